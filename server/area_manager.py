@@ -27,19 +27,18 @@ all necessary actions in order to simulate different rooms.
 
 from __future__ import annotations
 
-import asyncio
 import json
 import random
 import time
 import typing
 
-from typing import Any, Callable, Dict, List, Set, Tuple, Union
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Set, Tuple, Union
 
 from server import logger
 from server.asset_manager import AssetManager
 from server.constants import Constants, FadeOption
 from server.evidence import EvidenceList
-from server.exceptions import AreaError, MusicError, ServerError, TaskError
+from server.exceptions import AreaError, MusicError, ServerError
 from server.subscriber import Publisher
 from server.validate.areas import ValidateAreas
 
@@ -90,6 +89,10 @@ class AreaManager(AssetManager):
             self.publisher = Publisher(self)
 
             self._clients = set()
+            # Number of clients in the area using each participant character ID
+            self._char_occupancy: Dict[int, int] = dict()
+            self._restricted_chars: Set[str] = set()
+            self._restricted_char_ids: Set[int] = set()
             self.invite_list = {}
             self.music_looper = None
             self.music_looper_pargs = {}
@@ -131,7 +134,6 @@ class AreaManager(AssetManager):
             self.rp_getarea_allowed = parameters['rp_getarea_allowed']
             self.rp_getareas_allowed = parameters['rp_getareas_allowed']
             self.rollp_allowed = parameters['rollp_allowed']
-            self.reachable_areas = parameters['reachable_areas']
             self.change_reachability_allowed = parameters['change_reachability_allowed']
             self.default_change_reachability_allowed = parameters['change_reachability_allowed']
             self.gm_iclock_allowed = parameters['gm_iclock_allowed']
@@ -140,21 +142,94 @@ class AreaManager(AssetManager):
             self.global_allowed = parameters['global_allowed']
             self.lobby_area = parameters['lobby_area']
             self.private_area = parameters['private_area']
-            self.scream_range = parameters['scream_range']
             self.restricted_chars = parameters['restricted_chars']
             self.default_description = parameters['default_description']
             self.has_lights = parameters['has_lights']
             self.cbg_allowed = parameters['cbg_allowed']
             self.song_switch_allowed = parameters['song_switch_allowed']
             self.bullet = parameters['bullet']
-            self.visible_areas = parameters['visible_areas']
 
             # Store the current description separately from the default description
             self.description = self.default_description
 
-            self.default_reachable_areas = self.reachable_areas.copy()
+            self.default_reachable_areas = parameters['reachable_areas'].copy()
 
-            self.reachable_areas.add(self.name)  # Area can always reach itself
+            # Passages are stored by ID in the area manager, which can only resolve area names
+            # once all areas are loaded, so they are kept by name until then.
+            self._loaded_passages = {
+                'reachable_areas': parameters['reachable_areas'] | {self.name},  # Can reach itself
+                'visible_areas': parameters['visible_areas'].copy(),
+                'scream_range': parameters['scream_range'].copy(),
+            }
+
+        @property
+        def reachable_areas(self) -> FrozenSet[str]:
+            """
+            Declarator for a public reachable_areas attribute, the names of the areas there is a
+            passage to from this area. The returned set is read-only; assign a new set to change
+            the passages.
+            """
+
+            return frozenset(self.hub.area_manager.get_passage_names(self, 'reachable_areas'))
+
+        @reachable_areas.setter
+        def reachable_areas(self, new_reachable_areas: Iterable[str]):
+            """
+            Set the areas there is a passage to from this area.
+
+            Parameters
+            ----------
+            new_reachable_areas : Iterable[str]
+                Names of the areas.
+            """
+
+            self.hub.area_manager.set_passage_names(self, 'reachable_areas', new_reachable_areas)
+
+        @property
+        def visible_areas(self) -> FrozenSet[str]:
+            """
+            Declarator for a public visible_areas attribute, the names of the areas there is a
+            visible passage to from this area. The returned set is read-only; assign a new set to
+            change the passages.
+            """
+
+            return frozenset(self.hub.area_manager.get_passage_names(self, 'visible_areas'))
+
+        @visible_areas.setter
+        def visible_areas(self, new_visible_areas: Iterable[str]):
+            """
+            Set the areas there is a visible passage to from this area.
+
+            Parameters
+            ----------
+            new_visible_areas : Iterable[str]
+                Names of the areas.
+            """
+
+            self.hub.area_manager.set_passage_names(self, 'visible_areas', new_visible_areas)
+
+        @property
+        def scream_range(self) -> FrozenSet[str]:
+            """
+            Declarator for a public scream_range attribute, the names of the areas that can hear
+            screams from this area. The returned set is read-only; assign a new set to change the
+            scream range.
+            """
+
+            return frozenset(self.hub.area_manager.get_passage_names(self, 'scream_range'))
+
+        @scream_range.setter
+        def scream_range(self, new_scream_range: Iterable[str]):
+            """
+            Set the areas that can hear screams from this area.
+
+            Parameters
+            ----------
+            new_scream_range : Iterable[str]
+                Names of the areas.
+            """
+
+            self.hub.area_manager.set_passage_names(self, 'scream_range', new_scream_range)
 
         @property
         def clients(self) -> Set[ClientManager.Client]:
@@ -167,7 +242,8 @@ class AreaManager(AssetManager):
         @clients.setter
         def clients(self, new_clients: Set[ClientManager.Client]):
             """
-            Set the clients parameter to a copy of the given one.
+            Set the clients parameter to a copy of the given one, and recount the characters in
+            use in the area.
 
             Parameters
             ----------
@@ -176,6 +252,128 @@ class AreaManager(AssetManager):
             """
 
             self._clients = new_clients
+            self._char_occupancy = dict()
+            for client in new_clients:
+                self._add_char_occupant(client.char_id)
+
+        @property
+        def restricted_chars(self) -> Set[str]:
+            """
+            Declarator for a public restricted_chars attribute. This returns a copy of the names of
+            the characters restricted in the area.
+            """
+
+            return self._restricted_chars.copy()
+
+        @restricted_chars.setter
+        def restricted_chars(self, new_restricted_chars: Set[str]):
+            """
+            Set the characters restricted in the area to a copy of the given ones, and recompute
+            their character IDs.
+
+            Parameters
+            ----------
+            new_restricted_chars: Set[str]
+                Names of the new restricted characters.
+            """
+
+            self._restricted_chars = set(new_restricted_chars)
+            self.refresh_restricted_char_ids()
+
+        def restrict_character(self, char_name: str):
+            """
+            Restrict the usage of a character in the area. If it was already restricted, do
+            nothing.
+
+            Parameters
+            ----------
+            char_name: str
+                Name of the character.
+            """
+
+            self._restricted_chars.add(char_name)
+            self.refresh_restricted_char_ids()
+
+        def unrestrict_character(self, char_name: str):
+            """
+            Lift the restriction on the usage of a character in the area. If it was not restricted,
+            do nothing.
+
+            Parameters
+            ----------
+            char_name: str
+                Name of the character.
+            """
+
+            self._restricted_chars.discard(char_name)
+            self.refresh_restricted_char_ids()
+
+        def refresh_restricted_char_ids(self):
+            """
+            Recompute the character IDs of the characters restricted in the area from the current
+            character list of the hub. Restricted characters not in the character list are ignored.
+            """
+
+            self._restricted_char_ids = self.hub.character_manager.get_character_ids_by_names(
+                self._restricted_chars)
+
+        def get_restricted_char_ids(self) -> Set[int]:
+            """
+            Return the character IDs of the characters restricted in the area.
+
+            Returns
+            -------
+            Set[int]
+                Character IDs.
+            """
+
+            return self._restricted_char_ids.copy()
+
+        def _add_char_occupant(self, char_id: Union[int, None]):
+            if not self.hub.character_manager.is_char_id_participant(char_id):
+                return
+            self._char_occupancy[char_id] = self._char_occupancy.get(char_id, 0) + 1
+
+        def _remove_char_occupant(self, char_id: Union[int, None]):
+            if not self.hub.character_manager.is_char_id_participant(char_id):
+                return
+            if self._char_occupancy[char_id] == 1:
+                self._char_occupancy.pop(char_id)
+            else:
+                self._char_occupancy[char_id] -= 1
+
+        def update_char_occupancy(self, client: ClientManager.Client,
+                                  old_char_id: Union[int, None], new_char_id: Union[int, None]):
+            """
+            Update the characters in use in the area after a client of the area changed character.
+            If the client is not in the area, do nothing.
+
+            Parameters
+            ----------
+            client: ClientManager.Client
+                Client that changed character.
+            old_char_id: Union[int, None]
+                Previous character ID of the client.
+            new_char_id: Union[int, None]
+                New character ID of the client.
+            """
+
+            if client not in self._clients:
+                return
+            self._remove_char_occupant(old_char_id)
+            self._add_char_occupant(new_char_id)
+
+        def get_char_occupancy(self) -> Dict[int, int]:
+            """
+            Return the number of clients in the area using each participant character.
+
+            Returns
+            -------
+            Dict[int, int]
+                Number of clients by character ID. Characters no one in the area uses are omitted.
+            """
+
+            return self._char_occupancy.copy()
 
         def new_client(self, client: ClientManager.Client):
             """
@@ -187,7 +385,12 @@ class AreaManager(AssetManager):
                 Client to add.
             """
 
+            if client not in self.clients:
+                self._add_char_occupant(client.char_id)
             self.clients.add(client)
+            self.server.clock_manager.notify_area_entered(self, client)
+            self.server.music_loop_manager.resume_loop(self)
+            self.server.client_manager.schedule_phantom_peek(client)
 
         def remove_client(self, client: ClientManager.Client):
             """
@@ -210,9 +413,13 @@ class AreaManager(AssetManager):
                 if client.id != -1:  # Ignore pre-clients (before getting playercount)
                     info = 'Area {} does not contain client {}'.format(self, client)
                     raise KeyError(info)
+            else:
+                self._remove_char_occupant(client.char_id)
+            self.server.clock_manager.notify_area_left(self, client)
 
             if not self.clients:
                 self.unlock()
+                self.server.music_loop_manager.suspend_loop(self)
 
         def send_command(self, cmd: str, *args: List):
             """
@@ -465,16 +672,11 @@ class AreaManager(AssetManager):
                 Character IDs of all unavailable characters in the area.
             """
 
-            if more_unavail_chars is None:
-                more_unavail_chars = set()
-
-            unavailable = {x.char_id for x in self.clients if x.has_participant_character()}
-            unavailable |= more_unavail_chars
-            restricted = {self.hub.character_manager.get_character_id_by_name(name)
-                          for name in self.restricted_chars}
-
+            unavailable = set(self._char_occupancy)
+            if more_unavail_chars:
+                unavailable |= more_unavail_chars
             if not allow_restricted:
-                unavailable |= restricted
+                unavailable |= self._restricted_char_ids
 
             return unavailable
 
@@ -505,13 +707,13 @@ class AreaManager(AssetManager):
 
             unusable = self.get_chars_unusable(allow_restricted=allow_restricted,
                                                more_unavail_chars=more_unavail_chars)
-            available = {i for i in range(len(self.hub.character_manager.get_characters()))
-                         if i not in unusable}
+            available = [i for i in range(len(self.hub.character_manager.get_characters()))
+                         if i not in unusable]
 
             if not available:
                 raise AreaError('No available characters.')
 
-            return random.choice(tuple(available))
+            return random.choice(available)
 
         def is_char_available(self, char_id: Union[int, None], allow_restricted: bool = False,
                               more_unavail_chars: Set[int] = None) -> bool:
@@ -539,9 +741,13 @@ class AreaManager(AssetManager):
             if not self.hub.character_manager.is_char_id_participant(char_id):
                 return True
 
-            unusable = self.get_chars_unusable(allow_restricted=allow_restricted,
-                                               more_unavail_chars=more_unavail_chars)
-            return char_id not in unusable
+            if char_id in self._char_occupancy:
+                return False
+            if more_unavail_chars and char_id in more_unavail_chars:
+                return False
+            if not allow_restricted and char_id in self._restricted_char_ids:
+                return False
+            return True
 
         def add_to_dicelog(self, client: ClientManager.Client, msg: str):
             """
@@ -880,23 +1086,15 @@ class AreaManager(AssetManager):
             loop_pargs = pargs.copy()
             loop_pargs['force_same_restart'] = force_same_restart
 
-            def loop(zeroth_loop):
-                for player in self.clients:
-                    if zeroth_loop or self.legacy_jukebox or not player.packet_handler.HAS_CLIENTSIDE_MUSIC_LOOPING:
-                        player.send_music(**loop_pargs)
-
-                if self.music_looper:
-                    self.music_looper.cancel()
-                if length > 0:
-                    def f(): return loop(False)
-                    self.music_looper = asyncio.get_event_loop().call_later(length, f)
-
-                # Overwrite in case char_id changed (e.g., server looping)
-                loop_pargs['char_id'] = -1
-                loop_pargs['force_same_restart'] = 0
-                self.music_looper_pargs = loop_pargs
+            for player in self.clients:
+                player.send_music(**loop_pargs)
 
-            loop(True)
+            # Overwrite in case char_id changed (e.g., server looping)
+            loop_pargs['char_id'] = -1
+            loop_pargs['force_same_restart'] = 0
+            self.music_looper_pargs = loop_pargs
+            # Later loops are sent by the server only to clients that cannot loop by themselves
+            self.server.music_loop_manager.start_loop(self, length, loop_pargs)
 
             # Record the character name and the track they played.
             self.current_music_player = client.displayname
@@ -905,6 +1103,8 @@ class AreaManager(AssetManager):
 
             logger.log_server('[{}][{}]Changed music to {}.'
                               .format(self.id, client.get_char_name(), name), client)
+            logger.log_transcript('music', client, area=self, char=client.get_char_name(),
+                                  track=name)
 
             # Changing music reveals sneaked players, so do that if requested
             if not client.is_staff() and not client.is_visible and reveal_sneaked:
@@ -1021,16 +1221,10 @@ class AreaManager(AssetManager):
                 If no client has an active day cycle involving the current area.
             """
 
-            for client in self.hub.get_players():
-                try:
-                    task = self.server.task_manager.get_task(client, 'as_day_cycle')
-                except TaskError.TaskNotFoundError:
-                    pass
-                else:
-                    area_1, area_2 = task.parameters['area_1'], task.parameters['area_2']
-                    if area_1 <= self.id <= area_2:
-                        return client
-            raise AreaError.ClientNotFound
+            clocks = self.server.clock_manager.get_clocks_in_area(self)
+            if not clocks:
+                raise AreaError.ClientNotFound
+            return min((clock.owner for clock in clocks), key=lambda client: client.id)
 
         def get_clock_period(self) -> str:
             """
@@ -1049,9 +1243,8 @@ class AreaManager(AssetManager):
             except AreaError.ClientNotFound:
                 return ''
             else:
-                task = self.server.task_manager.get_task(client, 'as_day_cycle')
-                period = task.parameters['period']
-                return period
+                clock = self.server.clock_manager.get_clock(client)
+                return clock.period
 
         def get_look_output_for(self,
                                 client: ClientManager.Client) -> Tuple[bool, bool, str, bool, str]:
@@ -1187,6 +1380,8 @@ class AreaManager(AssetManager):
                 raise AreaError('This area is already part of a zone.')
 
             self._in_zone = new_zone_value
+            for client in self.clients:
+                self.server.client_manager.schedule_phantom_peek(client)
 
         def destroy(self):
             """
@@ -1198,6 +1393,7 @@ class AreaManager(AssetManager):
 
             """
 
+            self.server.music_loop_manager.stop_loop(self)
             self.publisher.publish('area_destroyed', dict())
 
         def __repr__(self):
@@ -1224,6 +1420,15 @@ class AreaManager(AssetManager):
 
         super().__init__(server, hub=hub)
         self._areas = []
+        self._name_to_area: Dict[str, AreaManager.Area] = dict()
+        self._id_to_area: Dict[int, AreaManager.Area] = dict()
+        # Passage graphs, indexed by area ID. For each kind of passage, entry i is a bitset whose
+        # bit j is set if there is a passage of that kind from area i to area j.
+        self._passages: Dict[str, List[int]] = {
+            'reachable_areas': list(),
+            'visible_areas': list(),
+            'scream_range': list(),
+        }
         self._source_file = None
         self._previous_source_file = None
         self.area_names = set()
@@ -1400,6 +1605,8 @@ class AreaManager(AssetManager):
         old_areas = self.get_areas()
         self._areas = temp_areas
         self.area_names = [area.name for area in self._areas]
+        self._rebuild_area_indexes()
+        self._load_passages()
 
         # Only once all areas have been created, actually set the corresponding values
         # Helps avoiding junk area lists if there was an error
@@ -1412,20 +1619,8 @@ class AreaManager(AssetManager):
                                 'load.')
 
         # And end all existing day cycles
-        clients_with_clocks: Set[ClientManager.Client] = set()
-        for area in old_areas:
-            try:
-                clock_creator = area.get_clock_creator()
-            except AreaError.ClientNotFound:
-                continue
-            else:
-                clients_with_clocks.add(clock_creator)
-
-        for client in clients_with_clocks:
-            try:
-                client.server.task_manager.delete_task(client, 'as_day_cycle')
-            except TaskError.TaskNotFoundError:
-                pass
+        for clock in self.server.clock_manager.get_clocks_in_hub(self.hub):
+            clock.end()
 
         # And remove all global IC and global IC prefixes
         for client in self.hub.get_players():
@@ -1538,10 +1733,10 @@ class AreaManager(AssetManager):
             If no area has the given name.
         """
 
-        for area in self._areas:
-            if area.name == name:
-                return area
-        raise AreaError('Area not found.')
+        try:
+            return self._name_to_area[name]
+        except KeyError:
+            raise AreaError('Area not found.')
 
     def get_area_by_id(self, area_id: int) -> AreaManager.Area:
         """
@@ -1563,10 +1758,306 @@ class AreaManager(AssetManager):
             If no area has the given ID.
         """
 
+        try:
+            return self._id_to_area[area_id]
+        except (KeyError, TypeError):
+            raise AreaError('Area not found.')
+
+    def get_areas_by_names(self, names: Iterable[str]) -> List[AreaManager.Area]:
+        """
+        Return the Area objects corresponding to the areas that have the given names, sorted in
+        increasing order by area ID. Duplicate names are only considered once.
+
+        Parameters
+        ----------
+        names: Iterable[str]
+            Area names to look for.
+
+        Returns
+        -------
+        List[AreaManager.Area]
+            Areas.
+
+        Raises
+        ------
+        AreaError
+            If no area has one of the given names.
+        """
+
+        return sorted({self.get_area_by_name(name) for name in names},
+                      key=lambda area: area.id)
+
+    def get_areas_by_ids(self, area_ids: Iterable[int]) -> List[AreaManager.Area]:
+        """
+        Return the Area objects corresponding to the areas that have the given IDs, sorted in
+        increasing order by area ID. Duplicate IDs are only considered once.
+
+        Parameters
+        ----------
+        area_ids: Iterable[int]
+            Area IDs to look for.
+
+        Returns
+        -------
+        List[AreaManager.Area]
+            Areas.
+
+        Raises
+        ------
+        AreaError
+            If no area has one of the given IDs.
+        """
+
+        return sorted({self.get_area_by_id(area_id) for area_id in area_ids},
+                      key=lambda area: area.id)
+
+    def _rebuild_area_indexes(self):
+        self._name_to_area = dict()
+        self._id_to_area = dict()
         for area in self._areas:
-            if area.id == area_id:
-                return area
-        raise AreaError('Area not found.')
+            # Area names are validated to be unique, but keep the first area just in case
+            self._name_to_area.setdefault(area.name, area)
+            self._id_to_area.setdefault(area.id, area)
+
+    def _load_passages(self):
+        for (kind, graph) in self._passages.items():
+            graph[:] = [self._get_bitset(area._loaded_passages[kind]) for area in self._areas]
+
+    def _get_bitset(self, names: Iterable[str]) -> int:
+        bitset = 0
+        for name in names:
+            bitset |= 1 << self.get_area_by_name(name).id
+        return bitset
+
+    def _get_areas_in_bitset(self, bitset: int) -> List[AreaManager.Area]:
+        areas = list()
+        while bitset:
+            lowest_bit = bitset & -bitset
+            areas.append(self._areas[lowest_bit.bit_length()-1])
+            bitset ^= lowest_bit
+        return areas
+
+    def _is_managed(self, area: AreaManager.Area) -> bool:
+        return self._id_to_area.get(area.id) is area
+
+    def _has_passage(self, kind: str, from_area: AreaManager.Area,
+                     to_area: AreaManager.Area) -> bool:
+        if not (self._is_managed(from_area) and self._is_managed(to_area)):
+            return False
+        return bool(self._passages[kind][from_area.id] >> to_area.id & 1)
+
+    def get_passage_names(self, area: AreaManager.Area, kind: str) -> Set[str]:
+        """
+        Return the names of the areas there is a passage of a particular kind to from the given
+        area.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area the passages start from.
+        kind : str
+            Kind of passage: 'reachable_areas', 'visible_areas' or 'scream_range'.
+
+        Returns
+        -------
+        Set[str]
+            Names of the areas.
+        """
+
+        if not self._is_managed(area):
+            # Area is still being loaded, or was unloaded
+            return set(area._loaded_passages[kind])
+        return {target.name
+                for target in self._get_areas_in_bitset(self._passages[kind][area.id])}
+
+    def set_passage_names(self, area: AreaManager.Area, kind: str, names: Iterable[str]):
+        """
+        Set the areas there is a passage of a particular kind to from the given area.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area the passages start from.
+        kind : str
+            Kind of passage: 'reachable_areas', 'visible_areas' or 'scream_range'.
+        names : Iterable[str]
+            Names of the areas.
+
+        Raises
+        ------
+        AreaError
+            If the area is not managed by this manager, or no area has one of the given names.
+        """
+
+        if not self._is_managed(area):
+            raise AreaError('Area not found.')
+        self._passages[kind][area.id] = self._get_bitset(names)
+
+    def is_reachable(self, from_area: AreaManager.Area, to_area: AreaManager.Area) -> bool:
+        """
+        Return True if there is a passage from one area to another, False otherwise.
+
+        Parameters
+        ----------
+        from_area : AreaManager.Area
+            Area the passage starts from.
+        to_area : AreaManager.Area
+            Area the passage leads to.
+
+        Returns
+        -------
+        bool
+            True if there is a passage, False otherwise (including if either area is not managed
+            by this manager).
+        """
+
+        return self._has_passage('reachable_areas', from_area, to_area)
+
+    def is_visible(self, from_area: AreaManager.Area, to_area: AreaManager.Area) -> bool:
+        """
+        Return True if there is a visible passage from one area to another, False otherwise.
+
+        Parameters
+        ----------
+        from_area : AreaManager.Area
+            Area the passage starts from.
+        to_area : AreaManager.Area
+            Area the passage leads to.
+
+        Returns
+        -------
+        bool
+            True if there is a visible passage, False otherwise (including if either area is not
+            managed by this manager).
+        """
+
+        return self._has_passage('visible_areas', from_area, to_area)
+
+    def is_in_scream_range(self, from_area: AreaManager.Area, to_area: AreaManager.Area) -> bool:
+        """
+        Return True if screams from one area can be heard in another, False otherwise.
+
+        Parameters
+        ----------
+        from_area : AreaManager.Area
+            Area the scream comes from.
+        to_area : AreaManager.Area
+            Area that would hear the scream.
+
+        Returns
+        -------
+        bool
+            True if the scream can be heard, False otherwise (including if either area is not
+            managed by this manager).
+        """
+
+        return self._has_passage('scream_range', from_area, to_area)
+
+    def get_reachable_areas(self, area: AreaManager.Area) -> List[AreaManager.Area]:
+        """
+        Return the areas there is a passage to from the given area, sorted by area ID.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area the passages start from.
+
+        Returns
+        -------
+        List[AreaManager.Area]
+            Areas.
+        """
+
+        if not self._is_managed(area):
+            return list()
+        return self._get_areas_in_bitset(self._passages['reachable_areas'][area.id])
+
+    def get_visible_areas(self, area: AreaManager.Area) -> List[AreaManager.Area]:
+        """
+        Return the areas there is a visible passage to from the given area, sorted by area ID.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area the passages start from.
+
+        Returns
+        -------
+        List[AreaManager.Area]
+            Areas.
+        """
+
+        if not self._is_managed(area):
+            return list()
+        return self._get_areas_in_bitset(self._passages['visible_areas'][area.id])
+
+    def get_scream_range(self, area: AreaManager.Area) -> List[AreaManager.Area]:
+        """
+        Return the areas that can hear screams from the given area, sorted by area ID.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area the screams come from.
+
+        Returns
+        -------
+        List[AreaManager.Area]
+            Areas.
+        """
+
+        if not self._is_managed(area):
+            return list()
+        return self._get_areas_in_bitset(self._passages['scream_range'][area.id])
+
+    def get_passage_path(self, from_area: AreaManager.Area,
+                         to_area: AreaManager.Area) -> List[AreaManager.Area]:
+        """
+        Return a shortest sequence of areas, starting with `from_area` and ending with `to_area`,
+        such that there is a passage from each area in the sequence to the next one.
+
+        Parameters
+        ----------
+        from_area : AreaManager.Area
+            Area to start from.
+        to_area : AreaManager.Area
+            Area to end at.
+
+        Returns
+        -------
+        List[AreaManager.Area]
+            Areas in the path.
+
+        Raises
+        ------
+        AreaError
+            If either area is not managed by this manager, or there is no such path.
+        """
+
+        if not (self._is_managed(from_area) and self._is_managed(to_area)):
+            raise AreaError('Area not found.')
+
+        reachable = self._passages['reachable_areas']
+        previous: Dict[int, int] = {from_area.id: from_area.id}
+        seen = 1 << from_area.id
+        frontier = [from_area.id]
+        while frontier and to_area.id not in previous:
+            next_frontier = list()
+            for area_id in frontier:
+                new_bits = reachable[area_id] & ~seen
+                seen |= new_bits
+                for area in self._get_areas_in_bitset(new_bits):
+                    previous[area.id] = area_id
+                    next_frontier.append(area.id)
+            frontier = next_frontier
+
+        if to_area.id not in previous:
+            raise AreaError('No path found.')
+
+        path = [to_area.id]
+        while path[-1] != from_area.id:
+            path.append(previous[path[-1]])
+        return [self._areas[area_id] for area_id in reversed(path)]
 
     def get_areas_in_range(self, area1: AreaManager.Area,
                            area2: AreaManager.Area) -> Set[AreaManager.Area]:
@@ -1601,7 +2092,7 @@ class AreaManager(AssetManager):
         prepared_list = list()
         prepared_list.append(Constants.get_first_area_list_item('HUB', from_area.hub, from_area))
         for area in self.get_areas():
-            if need_to_check or area.name in from_area.visible_areas:
+            if need_to_check or self.is_visible(from_area, area):
                 prepared_list.append(f'{area.id}-{area.name}')
 
         return prepared_list
@@ -1622,23 +2113,25 @@ class AreaManager(AssetManager):
                                 .format(areas[i].name))
 
             # And make sure that non-authorized users cannot create passages they cannot see
-            if ((not areas[1-i].name in areas[i].reachable_areas) and
-                    not (client.is_staff() or areas[1-i].name in areas[i].visible_areas)):
+            if (not self.is_reachable(areas[i], areas[1-i]) and
+                    not (client.is_staff() or self.is_visible(areas[i], areas[1-i]))):
                 raise AreaError('You must be authorized to create a new passage from {} to '
                                 '{}.'.format(areas[i].name, areas[1-i].name))
 
         # If we are at this point, we are committed to changing the passage locks
+        reachable, visible = self._passages['reachable_areas'], self._passages['visible_areas']
         for i in range(num_areas):
-            if areas[1-i].name in areas[i].reachable_areas:  # Case removing a passage
+            from_id, to_bit = areas[i].id, 1 << areas[1-i].id
+            if self.is_reachable(areas[i], areas[1-i]):  # Case removing a passage
                 now_reachable.append(False)
-                areas[i].reachable_areas -= {areas[1-i].name}
+                reachable[from_id] &= ~to_bit
                 if change_passage_visibility:
-                    areas[i].visible_areas -= {areas[1-i].name}
+                    visible[from_id] &= ~to_bit
             else:  # Case creating a passage
                 now_reachable.append(True)
-                areas[i].reachable_areas.add(areas[1-i].name)
+                reachable[from_id] |= to_bit
                 if change_passage_visibility:
-                    areas[i].visible_areas.add(areas[1-i].name)
+                    visible[from_id] |= to_bit
 
             for client in areas[i].clients:
                 client.send_music_list_view()
@@ -1658,3 +2151,11 @@ class AreaManager(AssetManager):
 
         # 1. At least one area.
         assert self._areas
+
+        # 2. Each area counts exactly the participant characters of its clients.
+        for area in self._areas:
+            occupancy = dict()
+            for client in area.clients:
+                if client.has_participant_character():
+                    occupancy[client.char_id] = occupancy.get(client.char_id, 0) + 1
+            assert occupancy == area.get_char_occupancy(), (area, occupancy)
@@ -18,74 +18,584 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+"""
+Module that contains the BanManager class, which keeps the bans of the server and checks
+connections against them.
+"""
+
 from __future__ import annotations
 
+import asyncio
+import heapq
 import ipaddress
+import itertools
 import json
+import time
 import typing
 
+from typing import Any, Dict, List, Tuple, Union
+
 from server import logger
 from server.constants import Constants
 from server.exceptions import ServerError
 
 if typing.TYPE_CHECKING:
+    from server.client_manager import ClientManager
     from server.tsuserver import TsuserverDR
 
+_IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+_IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
 
 class BanManager:
+    """
+    The bans of the server. A ban is on an IPID, an HDID or an IP range (in CIDR notation, such as
+    `203.0.113.0/24`), and may expire.
+
+    IPID and HDID bans are kept in dicts, and IP range bans in a binary prefix tree for each IP
+    version, so checking a connection takes the same time however many bans there are. Bans that
+    expire are also kept in a min-heap by expiry time, and a single scheduled callback lifts the
+    bans whose time came.
+    """
+
+    KINDS = ('ipid', 'hdid', 'cidr')
+
+    class Ban:
+        """
+        A ban on an IPID, an HDID or an IP range.
+        """
+
+        def __init__(self, kind: str, value: Union[int, str], created: float,
+                     expires: Union[float, None] = None, reason: Union[str, None] = None):
+            """
+            Create a ban.
+
+            Parameters
+            ----------
+            kind : str
+                Kind of ban: `'ipid'`, `'hdid'` or `'cidr'`.
+            value : Union[int, str]
+                Banned IPID, HDID or IP range.
+            created : float
+                When the ban was made, in seconds since the epoch.
+            expires : Union[float, None], optional
+                When the ban expires, in seconds since the epoch. Defaults to None (never).
+            reason : Union[str, None], optional
+                Reason of the ban. Defaults to None (no reason).
+            """
+
+            self.kind = kind
+            self.value = value
+            self.created = created
+            self.expires = expires
+            self.reason = reason
+
+        def is_expired(self, now: float) -> bool:
+            """
+            Return whether the ban expired by a given time.
+
+            Parameters
+            ----------
+            now : float
+                Time, in seconds since the epoch.
+
+            Returns
+            -------
+            bool
+                True if the ban expired, False otherwise.
+            """
+
+            return self.expires is not None and self.expires <= now
+
+        def __str__(self) -> str:
+            name = {'ipid': 'IPID', 'hdid': 'HDID', 'cidr': 'IP range'}[self.kind]
+            return f'{name} {self.value}'
+
+    class _PrefixTree:
+        """
+        A binary prefix tree (radix tree with a radix of 2) of IP range bans of one IP version.
+        Each node is a list of its child for bit 0, its child for bit 1, and the ban of the
+        range the path to the node stands for (if any).
+        """
+
+        def __init__(self, max_prefixlen: int):
+            self.max_prefixlen = max_prefixlen
+            self.root: List[Any] = [None, None, None]
+
+        def _bits(self, address: int, length: int):
+            for i in range(length):
+                yield (address >> (self.max_prefixlen - 1 - i)) & 1
+
+        def add(self, network: _IPNetwork, ban: BanManager.Ban):
+            node = self.root
+            for bit in self._bits(int(network.network_address), network.prefixlen):
+                if node[bit] is None:
+                    node[bit] = [None, None, None]
+                node = node[bit]
+            node[2] = ban
+
+        def remove(self, network: _IPNetwork):
+            node = self.root
+            for bit in self._bits(int(network.network_address), network.prefixlen):
+                node = node[bit]
+                if node is None:
+                    return
+            node[2] = None
+
+        def find(self, address: Union[ipaddress.IPv4Address, ipaddress.IPv6Address],
+                 now: float) -> Union[BanManager.Ban, None]:
+            # Return the ban of the widest range that contains the address
+            node = self.root
+            bits = self._bits(int(address), self.max_prefixlen)
+            while node is not None:
+                if node[2] is not None and not node[2].is_expired(now):
+                    return node[2]
+                bit = next(bits, None)
+                if bit is None:
+                    return None
+                node = node[bit]
+            return None
+
     def __init__(self, server: TsuserverDR):
-        self.bans = []
         self.server = server
 
+        self._ipid_bans: Dict[int, BanManager.Ban] = dict()
+        self._hdid_bans: Dict[str, BanManager.Ban] = dict()
+        self._cidr_bans: Dict[str, BanManager.Ban] = dict()
+        self._trees = {4: self._PrefixTree(32), 6: self._PrefixTree(128)}
+        self._expiries: List[Tuple[float, int, BanManager.Ban]] = list()
+        self._expiry_counter = itertools.count()
+        self._expiry_handle: Union[asyncio.TimerHandle, None] = None
+
+        # Bans are recorded in the database as they change, so only load them from there
+        if self.server.sqlite_storage:
+            for (kind, value, created, expires, reason) in self.server.sqlite_storage.load_bans():
+                self._insert(self.Ban(kind, value, created, expires=expires, reason=reason))
+            self._schedule_expiry()
+            return
+
+        self.server.persistence_manager.register('storage/banlist.json',
+                                                 self._snapshot_banlist, compact=True)
         self.load_banlist()
         self.write_banlist()  # TODO: Remove this after next major update
+        self._schedule_expiry()
+
+    @staticmethod
+    def parse_address(ip: str) -> Union[_IPAddress, None]:
+        """
+        Return the address of an IP, with IPv4 addresses mapped to IPv6 (as in dual stack
+        sockets) treated as IPv4 addresses.
+
+        Parameters
+        ----------
+        ip : str
+            IP.
+
+        Returns
+        -------
+        Union[_IPAddress, None]
+            Address, or None if `ip` is not a valid IP.
+        """
+
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        if address.version == 6 and address.ipv4_mapped:
+            return address.ipv4_mapped
+        return address
+
+    @staticmethod
+    def parse_banlist(contents: Any) -> List[Tuple[str, Union[int, str], float,
+                                                   Union[float, None], Union[str, None]]]:
+        """
+        Return the bans of the contents of a ban list file. Ban list files are either a list of
+        banned IPIDs (legacy format), or a dict with a version of 2 and a list of bans, each as a
+        list of its kind, value, creation time, expiry time and reason.
+
+        Parameters
+        ----------
+        contents : Any
+            Loaded contents of a ban list file.
+
+        Returns
+        -------
+        List[Tuple[str, Union[int, str], float, Union[float, None], Union[str, None]]]
+            Bans, each as its kind, value, creation time, expiry time and reason. Entries of the
+            legacy format that are not IPIDs are skipped.
+
+        Raises
+        ------
+        ServerError.FileSyntaxError
+            If the contents are in neither format.
+        """
+
+        if isinstance(contents, list):
+            now = time.time()
+            return [('ipid', int(ipid), now, None, None) for ipid in contents
+                    if str(ipid).isdigit()]
+
+        if not isinstance(contents, dict) or contents.get('version') != 2:
+            raise ServerError.FileSyntaxError('Unrecognized ban list format.')
+        bans = list()
+        for (kind, value, created, expires, reason) in contents['bans']:
+            if kind not in BanManager.KINDS:
+                raise ServerError.FileSyntaxError(f'Unrecognized kind of ban {kind}.')
+            bans.append((kind, value, created, expires, reason))
+        return bans
 
     def load_banlist(self):
         try:
             with Constants.fopen('storage/banlist.json', 'r', encoding='utf-8') as banlist_file:
-                self.bans = json.load(banlist_file)
+                bans = self.parse_banlist(json.load(banlist_file))
         except ServerError.FileNotFoundError:
             message = 'WARNING: File not found: storage/banlist.json. Creating a new one...'
             logger.log_pdebug(message)
             self.write_banlist()
+            return
         except Exception as ex:
             message = 'WARNING: Error loading storage/banlist.json. Will assume empty values.\n'
             message += '{}: {}'.format(type(ex).__name__, ex)
             logger.log_pdebug(message)
+            return
+
+        for (kind, value, created, expires, reason) in bans:
+            self._insert(self.Ban(kind, value, created, expires=expires, reason=reason))
 
     def write_banlist(self):
-        with open('storage/banlist.json', 'w', encoding='utf-8') as banlist_file:
-            json.dump(self.bans, banlist_file, indent=4)
+        self.server.persistence_manager.mark_dirty('storage/banlist.json')
+
+    def _snapshot_banlist(self) -> Dict[str, Any]:
+        return {
+            'version': 2,
+            'bans': [[ban.kind, ban.value, ban.created, ban.expires, ban.reason]
+                     for ban in self.get_bans()],
+        }
+
+    def _get_bans_of_kind(self, kind: str) -> Dict[Union[int, str], BanManager.Ban]:
+        return {'ipid': self._ipid_bans, 'hdid': self._hdid_bans, 'cidr': self._cidr_bans}[kind]
+
+    def _insert(self, ban: BanManager.Ban) -> bool:
+        # Add a ban to the indexes, unless it already expired
+        if ban.is_expired(time.time()):
+            return False
+
+        self._get_bans_of_kind(ban.kind)[ban.value] = ban
+        if ban.kind == 'cidr':
+            network = ipaddress.ip_network(ban.value)
+            self._trees[network.version].add(network, ban)
+        if ban.expires is not None:
+            heapq.heappush(self._expiries, (ban.expires, next(self._expiry_counter), ban))
+        return True
+
+    def _delete(self, ban: BanManager.Ban):
+        # Remove a ban from the indexes. Its entry in the expiry heap, if any, is left there, and
+        # skipped once it comes up.
+        del self._get_bans_of_kind(ban.kind)[ban.value]
+        if ban.kind == 'cidr':
+            network = ipaddress.ip_network(ban.value)
+            self._trees[network.version].remove(network)
+
+    def _record_add(self, ban: BanManager.Ban, client: Union[ClientManager.Client, None]):
+        if self.server.sqlite_storage:
+            self.server.sqlite_storage.add_ban(ban.kind, ban.value, ban.created,
+                                               expires=ban.expires, reason=ban.reason,
+                                               actor_ipid=client.ipid if client else None)
+        else:
+            self.write_banlist()
+
+    def _record_remove(self, ban: BanManager.Ban, client: Union[ClientManager.Client, None],
+                       action: str = 'unban'):
+        if self.server.sqlite_storage:
+            self.server.sqlite_storage.remove_ban(ban.kind, ban.value,
+                                                  actor_ipid=client.ipid if client else None,
+                                                  action=action)
+        else:
+            self.write_banlist()
+
+    def _schedule_expiry(self):
+        # Have a single callback run when the earliest ban expires
+        if self._expiry_handle is not None:
+            self._expiry_handle.cancel()
+            self._expiry_handle = None
+        if not self._expiries:
+            return
 
-    def add_ban(self, ip):
+        delay = max(0, self._expiries[0][0] - time.time())
+        self._expiry_handle = asyncio.get_event_loop().call_later(delay, self._on_expiry)
+
+    def _on_expiry(self):
+        self._expiry_handle = None
+        self.remove_expired_bans()
+        self._schedule_expiry()
+
+    def remove_expired_bans(self) -> List[BanManager.Ban]:
+        """
+        Lift all bans that expired.
+
+        Returns
+        -------
+        List[BanManager.Ban]
+            Lifted bans.
+        """
+
+        now = time.time()
+        expired = list()
+        while self._expiries and self._expiries[0][0] <= now:
+            _, _, ban = heapq.heappop(self._expiries)
+            # Skip bans that were lifted or replaced before they expired
+            if self._get_bans_of_kind(ban.kind).get(ban.value) is not ban:
+                continue
+            self._delete(ban)
+            self._record_remove(ban, None, action='expire')
+            logger.log_server(f'Ban on {ban} expired.')
+            expired.append(ban)
+        return expired
+
+    def _parse_target(self, ip: Union[int, str]) -> Tuple[str, Union[int, str]]:
+        # Return the kind and value of a ban on an IPID, IP or IP range
         try:
-            try:
-                int(ip)
-            except ValueError:
-                ipaddress.ip_address(ip)
-                ip = self.server.get_ipid(ip)
+            return 'ipid', int(ip)
         except ValueError:
-            raise ServerError('Argument must be an IP address or IPID.')
-        if ip not in self.bans:
-            self.bans.append(ip)
-        else:
+            pass
+        try:
+            if '/' in ip:
+                return 'cidr', str(ipaddress.ip_network(ip, strict=False))
+            ipaddress.ip_address(ip)
+            return 'ipid', self.server.get_ipid(ip)
+        except ValueError:
+            raise ServerError('Argument must be an IP address, IP range or IPID.')
+
+    def add_ban(self, ip: Union[int, str], client: ClientManager.Client = None,
+                length: Union[float, None] = None,
+                reason: Union[str, None] = None) -> BanManager.Ban:
+        """
+        Ban an IPID, the IPID of an IP, or an IP range.
+
+        Parameters
+        ----------
+        ip : Union[int, str]
+            IPID, IP or IP range (in CIDR notation) to ban.
+        client : ClientManager.Client, optional
+            Moderator who made the ban. Defaults to None (not known).
+        length : Union[float, None], optional
+            Number of seconds the ban lasts. Defaults to None (forever).
+        reason : Union[str, None], optional
+            Reason of the ban. Defaults to None (no reason).
+
+        Returns
+        -------
+        BanManager.Ban
+            New ban.
+
+        Raises
+        ------
+        ServerError
+            If `ip` is not an IPID, IP or IP range, if it is already banned, or if `length` is
+            not positive.
+        """
+
+        kind, value = self._parse_target(ip)
+        return self._add(kind, value, client, length, reason)
+
+    def add_hdid_ban(self, hdid: str, client: ClientManager.Client = None,
+                     length: Union[float, None] = None,
+                     reason: Union[str, None] = None) -> BanManager.Ban:
+        """
+        Ban an HDID.
+
+        Parameters
+        ----------
+        hdid : str
+            HDID to ban.
+        client : ClientManager.Client, optional
+            Moderator who made the ban. Defaults to None (not known).
+        length : Union[float, None], optional
+            Number of seconds the ban lasts. Defaults to None (forever).
+        reason : Union[str, None], optional
+            Reason of the ban. Defaults to None (no reason).
+
+        Returns
+        -------
+        BanManager.Ban
+            New ban.
+
+        Raises
+        ------
+        ServerError
+            If the HDID is already banned, or if `length` is not positive.
+        """
+
+        return self._add('hdid', hdid, client, length, reason)
+
+    def _add(self, kind: str, value: Union[int, str], client: Union[ClientManager.Client, None],
+             length: Union[float, None], reason: Union[str, None]) -> BanManager.Ban:
+        old_ban = self._get_bans_of_kind(kind).get(value)
+        if old_ban and not old_ban.is_expired(time.time()):
             raise ServerError('User is already banned.')
-        self.write_banlist()
 
-    def remove_ban(self, ip):
+        if length is not None and length <= 0:
+            raise ServerError('Ban length must be positive.')
+
+        now = time.time()
+        ban = self.Ban(kind, value, now, expires=None if length is None else now + length,
+                       reason=reason)
+        self._insert(ban)
+        self._record_add(ban, client)
+        if ban.expires is not None and self._expiries[0][2] is ban:
+            self._schedule_expiry()
+        return ban
+
+    def remove_ban(self, ip: Union[int, str],
+                   client: ClientManager.Client = None) -> BanManager.Ban:
+        """
+        Lift the ban on an IPID, the IPID of an IP, or an IP range.
+
+        Parameters
+        ----------
+        ip : Union[int, str]
+            IPID, IP or IP range (in CIDR notation) to unban.
+        client : ClientManager.Client, optional
+            Moderator who lifted the ban. Defaults to None (not known).
+
+        Returns
+        -------
+        BanManager.Ban
+            Lifted ban.
+
+        Raises
+        ------
+        ServerError
+            If `ip` is not an IPID, IP or IP range, or if it is not banned.
+        """
+
+        kind, value = self._parse_target(ip)
+        return self._remove(kind, value, client)
+
+    def remove_hdid_ban(self, hdid: str,
+                        client: ClientManager.Client = None) -> BanManager.Ban:
+        """
+        Lift the ban on an HDID.
+
+        Parameters
+        ----------
+        hdid : str
+            HDID to unban.
+        client : ClientManager.Client, optional
+            Moderator who lifted the ban. Defaults to None (not known).
+
+        Returns
+        -------
+        BanManager.Ban
+            Lifted ban.
+
+        Raises
+        ------
+        ServerError
+            If the HDID is not banned.
+        """
+
+        return self._remove('hdid', hdid, client)
+
+    def _remove(self, kind: str, value: Union[int, str],
+                client: Union[ClientManager.Client, None]) -> BanManager.Ban:
+        ban = self._get_bans_of_kind(kind).get(value)
+        if not ban or ban.is_expired(time.time()):
+            raise ServerError('User is already not banned.')
+
+        self._delete(ban)
+        self._record_remove(ban, client)
+        return ban
+
+    def is_banned(self, ipid: Union[int, str]) -> bool:
         try:
-            try:
-                int(ip)
-            except ValueError:
-                ipaddress.ip_address(ip)
-                ip = self.server.get_ipid(ip)
+            ban = self._ipid_bans.get(int(ipid))
         except ValueError:
-            raise ServerError('Argument must be an IP address or IPID.')
-        if ip in self.bans:
-            self.bans.remove(ip)
-        else:
-            raise ServerError('User is already not banned.')
-        self.write_banlist()
+            return False
+        return ban is not None and not ban.is_expired(time.time())
+
+    def is_hdid_banned(self, hdid: str) -> bool:
+        ban = self._hdid_bans.get(hdid)
+        return ban is not None and not ban.is_expired(time.time())
+
+    def find_connection_ban(self, ip: str,
+                            ipid: Union[int, None] = None) -> Union[BanManager.Ban, None]:
+        """
+        Return a ban that applies to a connection, before it becomes a client.
+
+        Parameters
+        ----------
+        ip : str
+            IP of the connection.
+        ipid : Union[int, None], optional
+            IPID of the IP, if it has one. Defaults to None (no IPID).
+
+        Returns
+        -------
+        Union[BanManager.Ban, None]
+            Ban on an IP range that contains the IP or on the IPID, or None if there is none.
+        """
+
+        now = time.time()
+        address = self.parse_address(ip)
+        if address is not None:
+            ban = self._trees[address.version].find(address, now)
+            if ban is not None:
+                return ban
+
+        if ipid is None:
+            return None
+        ban = self._ipid_bans.get(ipid)
+        if ban is not None and not ban.is_expired(now):
+            return ban
+        return None
+
+    def find_client_ban(self, hdid: str, ipids: List[int]) -> Union[BanManager.Ban, None]:
+        """
+        Return a ban that applies to a client that just sent its HDID.
+
+        Parameters
+        ----------
+        hdid : str
+            HDID of the client.
+        ipids : List[int]
+            IPIDs the HDID was seen with.
+
+        Returns
+        -------
+        Union[BanManager.Ban, None]
+            Ban on the HDID, on any of the IPIDs, or on any other HDID seen with any of the
+            IPIDs, or None if there is none.
+        """
+
+        now = time.time()
+        ban = self._hdid_bans.get(hdid)
+        if ban is not None and not ban.is_expired(now):
+            return ban
+        for ipid in ipids:
+            ban = self._ipid_bans.get(ipid)
+            if ban is not None and not ban.is_expired(now):
+                return ban
+        # Otherwise, a banned user could join again just by changing their HDID
+        for ipid in ipids:
+            for linked_hdid in self.server.get_ipid_hdids(ipid):
+                ban = self._hdid_bans.get(linked_hdid)
+                if ban is not None and not ban.is_expired(now):
+                    return ban
+        return None
+
+    def get_bans(self) -> List[BanManager.Ban]:
+        """
+        Return all bans that did not expire.
+
+        Returns
+        -------
+        List[BanManager.Ban]
+            Bans, in the order they were made.
+        """
 
-    def is_banned(self, ipid):
-        return ipid in self.bans
+        now = time.time()
+        bans = itertools.chain(self._ipid_bans.values(), self._hdid_bans.values(),
+                               self._cidr_bans.values())
+        return sorted((ban for ban in bans if not ban.is_expired(now)),
+                      key=lambda ban: ban.created)
@@ -22,7 +22,7 @@ from __future__ import annotations
 
 import typing
 
-from typing import Callable, List, Tuple, Union
+from typing import Callable, Dict, Iterable, List, Set, Tuple, Union
 
 from server.asset_manager import AssetManager
 from server.exceptions import CharacterError
@@ -57,6 +57,11 @@ class CharacterManager(AssetManager):
         self._source_file = None
         self._previous_source_file = None
 
+        # Character IDs by exact name and by lowercase name. If a name repeats, its first
+        # appearance is kept.
+        self._name_to_id: Dict[str, int] = dict()
+        self._lower_name_to_id: Dict[str, int] = dict()
+
     def get_type_name(self) -> str:
         """
         Return `'character list'`.
@@ -223,10 +228,16 @@ class CharacterManager(AssetManager):
         self._characters = new_list.copy()
         self._source_file = source_file
 
+        self._name_to_id = dict()
+        self._lower_name_to_id = dict()
+        for (i, name) in enumerate(self._characters):
+            self._name_to_id.setdefault(name, i)
+            self._lower_name_to_id.setdefault(name.lower(), i)
+
         return new_list.copy()
 
     def is_character(self, character: str) -> bool:
-        return character in self._characters
+        return character in self._name_to_id
 
     def is_char_id_participant(self, char_id: Union[int, None]) -> bool:
         # DO NOT UNCOMMENT.
@@ -250,10 +261,34 @@ class CharacterManager(AssetManager):
     def get_character_id_by_name(self, name: str) -> int:
         if name == self.server.config['spectator_name']:
             return -1
-        for i, ch in enumerate(self._characters):
-            if ch.lower() == name.lower():
-                return i
-        raise CharacterError.CharacterNotFoundError(f'Character {name} not found.')
+        try:
+            return self._lower_name_to_id[name.lower()]
+        except KeyError:
+            raise CharacterError.CharacterNotFoundError(f'Character {name} not found.')
+
+    def get_character_ids_by_names(self, names: Iterable[str]) -> Set[int]:
+        """
+        Return the IDs of the characters with the given names, ignoring case. Names that do not
+        belong to any character are ignored.
+
+        Parameters
+        ----------
+        names : Iterable[str]
+            Names of the characters.
+
+        Returns
+        -------
+        Set[int]
+            Character IDs.
+        """
+
+        char_ids = set()
+        for name in names:
+            try:
+                char_ids.add(self.get_character_id_by_name(name))
+            except CharacterError.CharacterNotFoundError:
+                continue
+        return char_ids
 
     def translate_character_id(self, client: ClientManager.Client,
                                old_char_name: str = None) -> Tuple[bool, Union[int, None]]:
@@ -263,14 +298,14 @@ class CharacterManager(AssetManager):
         if not client.has_participant_character():
             # Do nothing for spectators
             return (False, client.char_id)
-        if old_char_name not in self._characters:
+        if old_char_name not in self._name_to_id:
             # Character no longer exists, so switch to spectator
             client.send_ooc(f'After a change in the character list, your character is no '
                             f'longer available. Switching to '
                             f'{self.server.config["spectator_name"]}.')
             return (True, -1)
 
-        target_char_id = self._characters.index(old_char_name)
+        target_char_id = self._name_to_id[old_char_name]
         return (client.char_id != target_char_id, target_char_id)
 
     def _check_structure(self):
@@ -284,5 +319,10 @@ class CharacterManager(AssetManager):
 
         """
 
-        # At least one character
+        # 1. At least one character
         assert self._characters
+
+        # 2. Every character can be found by name
+        assert len(self._name_to_id) <= len(self._characters)
+        for name in self._characters:
+            assert self._characters[self._name_to_id[name]] == name, name
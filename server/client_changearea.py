@@ -99,7 +99,7 @@ class ClientChangeArea:
 
         # Check if trying to reach an unreachable area
         if not (client.is_staff() or client.is_transient or override_passages or
-                area.name in client.area.reachable_areas):
+                client.hub.area_manager.is_reachable(client.area, area)):
             raise ClientError('The passage to this area is locked.',
                               code='ChArUnreachable')
 
@@ -435,12 +435,10 @@ class ClientChangeArea:
                             f'already')
 
                 for player in status_visible:
-                    remembered_status = client.remembered_statuses.get(player.id, '')
-                    if player.status != remembered_status:
+                    if client.remember_status(player):
                         # Found someone whose status has changed
                         # Only for these situations do we want to ping
                         found_something = True
-                    client.remembered_statuses[player.id] = player.status
 
             elif changed_visibility and not client.is_deaf:
                 # Give nerfed notifications if the lights are out or the player is blind, but NOT
@@ -837,6 +835,8 @@ class ClientChangeArea:
         logger.log_server(f'[{client.get_char_name()}]Changed area from '
                           f'{old_area.name} ({old_area.id}) to '
                           f'{area.name} ({area.id}){in_new_hub}.', client)
+        logger.log_transcript('area', client, area=area, char=client.get_char_name(),
+                              from_hub=old_area.hub.get_id(), from_area=old_area.id)
         found_something, ding_something = client.notify_change_area(
             area, old_dname, ignore_bleeding=ignore_bleeding,
             ignore_autopass=ignore_autopass)
@@ -20,8 +20,12 @@
 
 from __future__ import annotations
 
+import bisect
 import datetime
+import heapq
+import itertools
 import json
+import math
 import random
 import string
 import time
@@ -30,8 +34,8 @@ from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type, TypeVa
 
 from server import client_changearea, clients, logger
 from server.constants import Constants, FadeOption, TargetType
-from server.exceptions import (AreaError, ClientError, HubError, PartyError,
-                               TaskError, TrialError)
+from server.exceptions import (AreaError, ClientError, ClockError, EffectError, HubError,
+                               PartyError, TaskError, TrialError)
 from server.hub_manager import _Hub
 from server.music_manager import PersonalMusicManager
 from server.subscriber import Publisher
@@ -46,6 +50,39 @@ if typing.TYPE_CHECKING:
     from server.zone_manager import ZoneManager
 
 
+class _PrefixIndex:
+    """
+    An index of clients by a string value that supports finding all clients whose value starts
+    with a given prefix, ignoring case, without looking at every client.
+    """
+
+    def __init__(self):
+        # Sorted list of (lowercased value, id(client)), with a parallel list of clients
+        self._keys: List[Tuple[str, int]] = list()
+        self._clients: List[ClientManager.Client] = list()
+
+    def add(self, client: ClientManager.Client, value: str):
+        key = (value.lower(), id(client))
+        position = bisect.bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._clients.insert(position, client)
+
+    def remove(self, client: ClientManager.Client, value: str):
+        key = (value.lower(), id(client))
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            self._keys.pop(position)
+            self._clients.pop(position)
+
+    def get_prefixed(self, prefix: str) -> List[ClientManager.Client]:
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._keys, (prefix, ))
+        end = start
+        while end < len(self._keys) and self._keys[end][0].startswith(prefix):
+            end += 1
+        return self._clients[start:end]
+
+
 class ClientManager:
     class Client:
         def __init__(
@@ -58,6 +95,7 @@ class ClientManager:
             protocol: AOProtocol = None
         ):
             self.server = server
+            self._log_prefix = None
             self.hub = hub
             self.transport = transport
             self.protocol = protocol
@@ -71,18 +109,18 @@ class ClientManager:
             self.publisher = Publisher(self)
 
             self.disconnected = False
-            self.hdid = ''
-            self.ipid = ipid
+            self._hdid = ''
+            self._ipid = ipid
             self.id = user_id
-            self.char_id = None
-            self.name = ''
+            self._char_id = None
+            self._name = ''
             self.char_folder = ''
             self.char_outfit = ''
-            self.char_showname = ''
+            self._char_showname = ''
             self.pos = 'wit'
             self.scale = 1000
             self.vertical = 0
-            self.showname = ''
+            self._showname = ''
             self.joined = time.time()
             self.last_active = Constants.get_time()
             self.viewing_hubs = False
@@ -148,10 +186,14 @@ class ClientManager:
             self.remembered_passages = dict()
             self.remembered_locked_passages = dict()
             self.remembered_statuses = dict()
+            self.status_remembered_by = set()
             self.can_bypass_iclock = False
             self.char_log = list()
             self.ignored_players = set()
-            self.paranoia = 2
+            self.ignored_by = set()
+            self._paranoia = 2
+            self._phantom_peek_threshold = None
+            self._phantom_peek_cycle = None
             self.notecard = ''
             self.is_mindreader = False
             self.autoglance = False
@@ -191,6 +233,23 @@ class ClientManager:
 
         def send_command_dict(self, command, dargs):
             _, to_send = self.prepare_command(command, dargs)
+            self.send_prepared_command(command, to_send, dargs)
+
+        def send_prepared_command(self, command: str, to_send: List, dargs: Dict[str, Any]):
+            """
+            Send a packet whose arguments were already prepared with `prepare_command` for a
+            client of the same protocol as this one.
+
+            Parameters
+            ----------
+            command : str
+                ID of the packet to send.
+            to_send : List
+                Packet argument values, as returned by `prepare_command`.
+            dargs : Dict[str, Any]
+                Original packet arguments.
+            """
+
             self.send_command(command, *to_send)
             self.publisher.publish(f'client_outbound_{command.lower()}',
                                    {'contents': dargs.copy()})
@@ -1507,33 +1566,21 @@ class ClientManager:
             """
 
             resulting_effects = dict()
+            effect_manager = self.server.effect_manager
 
             for effect in effects:
                 name = effect.name
-                async_name = effect.async_name
 
                 try:
-                    task = self.server.task_manager.get_task(self, async_name)
-                except TaskError.TaskNotFoundError:
-                    self.server.task_manager.new_task(self, async_name, {
-                        'length': length,
-                        'effect': effect,
-                        'new_value': True,
-                    })
+                    old_remaining = effect_manager.get_remaining(self, effect)
+                except EffectError.EffectNotFoundError:
+                    effect_manager.schedule_effect(self, effect, length)
                     resulting_effects[name] = (length, False)
                 else:
-                    old_start = task.creation_time
-                    old_length = task.parameters['length']
                     # Effect existed before, check if need to replace it with a shorter effect
-                    old_remaining, _ = Constants.time_remaining(
-                        old_start, old_length)
                     if length < old_remaining:
                         # Replace with shorter timed effect
-                        self.server.task_manager.new_task(self, async_name, {
-                            'length': length,
-                            'effect': effect,
-                            'new_value': True,
-                        })
+                        effect_manager.schedule_effect(self, effect, length)
                         resulting_effects[name] = (length, True)
                     else:
                         # Do not replace, current effect's time is shorter
@@ -1617,11 +1664,7 @@ class ClientManager:
                 if other_client == self:
                     continue
                 if other_client.is_staff():
-                    if self.id not in other_client.remembered_statuses:
-                        other_client.remembered_statuses[self.id] = ''
-
-                    if other_client.remembered_statuses[self.id] != self.status:
-                        other_client.remembered_statuses[self.id] = self.status
+                    if other_client.remember_status(self):
                         clients_to_notify.append(other_client)
                     continue
                 if not self.is_visible:
@@ -1631,15 +1674,60 @@ class ClientManager:
                 if other_client.is_blind or other_client.is_deaf:
                     continue
 
-                if self.id not in other_client.remembered_statuses:
-                    other_client.remembered_statuses[self.id] = ''
-
-                if other_client.remembered_statuses[self.id] != self.status:
-                    other_client.remembered_statuses[self.id] = self.status
+                if other_client.remember_status(self):
                     clients_to_notify.append(other_client)
 
             return clients_to_notify
 
+        def remember_status(self, target: ClientManager.Client) -> bool:
+            """
+            Have the client remember the current status of the target.
+
+            Parameters
+            ----------
+            target : ClientManager.Client
+                Client whose status will be remembered.
+
+            Returns
+            -------
+            bool
+                True if the remembered status of the target changed, False otherwise. A target
+                with no status whose status was never remembered counts as unchanged.
+            """
+
+            target.status_remembered_by.add(self)
+            if self.remembered_statuses.get(target.id, '') == target.status:
+                self.remembered_statuses[target.id] = target.status
+                return False
+            self.remembered_statuses[target.id] = target.status
+            return True
+
+        def ignore(self, target: ClientManager.Client):
+            """
+            Have the client ignore the target.
+
+            Parameters
+            ----------
+            target : ClientManager.Client
+                Client to ignore.
+            """
+
+            self.ignored_players.add(target)
+            target.ignored_by.add(self)
+
+        def unignore(self, target: ClientManager.Client):
+            """
+            Have the client no longer ignore the target.
+
+            Parameters
+            ----------
+            target : ClientManager.Client
+                Client to no longer ignore.
+            """
+
+            self.ignored_players.discard(target)
+            target.ignored_by.discard(self)
+
         def follow_user(self, target: ClientManager.Client):
             if target == self:
                 raise ClientError('You cannot follow yourself.')
@@ -1856,6 +1944,7 @@ class ClientManager:
                 else:
                     raise ValueError(f'Invalid area_id {area_id}')
 
+                area_manager = current_area.hub.area_manager
                 for area in areas:
                     # Get area details...
                     # If staff (or acting as mod) and there are clients in the area OR
@@ -1866,8 +1955,8 @@ class ClientManager:
                     norm_check = (len([c for c in area.clients if c.is_visible or c == self]) > 0
                                   and (self.is_transient
                                        or area == self.area
-                                       or (area.name in current_area.visible_areas
-                                           and area.name in current_area.reachable_areas)))
+                                       or (area_manager.is_visible(current_area, area)
+                                           and area_manager.is_reachable(current_area, area))))
                     # Check reachable and visibly reachable to prevent gaining information from
                     # areas that are visible from area list but are not reachable (e.g. normally
                     # locked passages).
@@ -1914,8 +2003,7 @@ class ClientManager:
             unusable_ids = {c.char_id for c in self.get_visible_clients(self.area)
                             if c.has_participant_character()}
             if not self.is_staff():
-                unusable_ids |= {self.hub.character_manager.get_character_id_by_name(name)
-                                 for name in self.area.restricted_chars}
+                unusable_ids |= self.area.get_restricted_char_ids()
 
             for x in unusable_ids:
                 char_list[x] = -1
@@ -2170,8 +2258,8 @@ class ClientManager:
 
             # If managing a day cycle clock, end it
             try:
-                self.server.task_manager.delete_task(self, 'as_day_cycle')
-            except TaskError.TaskNotFoundError:
+                self.server.clock_manager.end_clock(self)
+            except ClockError.ClockNotFoundError:
                 pass
 
             # If having global IC enabled, remove it
@@ -2329,6 +2417,263 @@ class ClientManager:
                      .format(Constants.time_elapsed(self.joined), self.last_active))
             return info
 
+        @property
+        def paranoia(self) -> float:
+            """
+            Declarator for a public paranoia attribute.
+            """
+
+            return self._paranoia
+
+        @paranoia.setter
+        def paranoia(self, new_paranoia: float):
+            """
+            Set the player paranoia level to the given one, and redraw when the player will next
+            roll a phantom peek successfully if their phantom peek chance changed.
+
+            Parameters
+            ----------
+            new_paranoia : float
+                New player paranoia level.
+            """
+
+            self._paranoia = new_paranoia
+            self.server.client_manager.schedule_phantom_peek(self)
+
+        def get_phantom_peek_threshold(self) -> float:
+            """
+            Return the probability the player rolls a phantom peek in a phantom peek cycle. This is
+            their player paranoia plus the paranoia of the zone they are in, as a fraction.
+
+            Returns
+            -------
+            float
+                Probability of a phantom peek per phantom peek cycle. It may be outside [0, 1].
+            """
+
+            zone = self.area.in_zone
+            if zone and zone.is_property('Paranoia'):
+                zone_paranoia, = zone.get_property('Paranoia')
+            else:
+                zone_paranoia = 0
+            return (self.paranoia+zone_paranoia)/100
+
+        @property
+        def hub(self) -> _Hub:
+            """
+            Declarator for a public hub attribute.
+            """
+
+            return self._hub
+
+        @hub.setter
+        def hub(self, new_hub: _Hub):
+            """
+            Set the hub of the client to the given one.
+
+            Parameters
+            ----------
+            new_hub : _Hub
+                New hub.
+            """
+
+            self._hub = new_hub
+            self._log_prefix = None
+
+        @property
+        def is_mod(self) -> bool:
+            """
+            Declarator for a public is_mod attribute.
+            """
+
+            return self._is_mod
+
+        @is_mod.setter
+        def is_mod(self, new_is_mod: bool):
+            """
+            Set whether the client is logged in as a moderator.
+
+            Parameters
+            ----------
+            new_is_mod : bool
+                New value.
+            """
+
+            self._is_mod = new_is_mod
+            self._log_prefix = None
+
+        def get_log_prefix(self) -> str:
+            """
+            Return the prefix of log lines about the client, which identifies its IPID, HDID, client
+            ID and hub, and whether it is a moderator. The prefix is cached until any of those
+            change.
+
+            Returns
+            -------
+            str
+                Log prefix.
+            """
+
+            if self._log_prefix is None:
+                ipid = self.get_ip()
+                if ipid is None:
+                    ipid = 'None'
+                else:
+                    ipid = '{:<15}'.format(ipid)
+
+                prefix = f'[{ipid}][{self.get_hdid()}][{self.id}][{self.hub.get_id()}]'
+                if self.is_mod:
+                    prefix += '[MOD]'
+                self._log_prefix = prefix
+            return self._log_prefix
+
+        @property
+        def hdid(self) -> str:
+            """
+            Declarator for a public hdid attribute.
+            """
+
+            return self._hdid
+
+        @hdid.setter
+        def hdid(self, new_hdid: str):
+            """
+            Set the hardware ID of the client to the given one, and update the client indexes of
+            the client manager accordingly.
+
+            Parameters
+            ----------
+            new_hdid : str
+                New hardware ID.
+            """
+
+            old_hdid, self._hdid = self._hdid, new_hdid
+            self._log_prefix = None
+            self.server.client_manager.update_client_index(self, TargetType.HDID, old_hdid,
+                                                           new_hdid)
+
+        @property
+        def ipid(self) -> int:
+            """
+            Declarator for a public ipid attribute.
+            """
+
+            return self._ipid
+
+        @ipid.setter
+        def ipid(self, new_ipid: int):
+            """
+            Set the IPID of the client to the given one, and update the client indexes of
+            the client manager accordingly.
+
+            Parameters
+            ----------
+            new_ipid : int
+                New IPID.
+            """
+
+            old_ipid, self._ipid = self._ipid, new_ipid
+            self._log_prefix = None
+            self.server.client_manager.update_client_index(self, TargetType.IPID, old_ipid,
+                                                           new_ipid)
+
+        @property
+        def char_id(self) -> Union[int, None]:
+            """
+            Declarator for a public char_id attribute.
+            """
+
+            return self._char_id
+
+        @char_id.setter
+        def char_id(self, new_char_id: Union[int, None]):
+            """
+            Set the character ID of the client to the given one, and update the client indexes of
+            the client manager accordingly.
+
+            Parameters
+            ----------
+            new_char_id : Union[int, None]
+                New character ID.
+            """
+
+            old_char_id, self._char_id = self._char_id, new_char_id
+            self.server.client_manager.update_client_index(self, TargetType.CHAR_NAME, old_char_id,
+                                                           new_char_id)
+            self.area.update_char_occupancy(self, old_char_id, new_char_id)
+
+        @property
+        def name(self) -> str:
+            """
+            Declarator for a public name attribute.
+            """
+
+            return self._name
+
+        @name.setter
+        def name(self, new_name: str):
+            """
+            Set the OOC name of the client to the given one, and update the client indexes of
+            the client manager accordingly.
+
+            Parameters
+            ----------
+            new_name : str
+                New OOC name.
+            """
+
+            old_name, self._name = self._name, new_name
+            self.server.client_manager.update_client_index(self, TargetType.OOC_NAME, old_name,
+                                                           new_name)
+
+        @property
+        def showname(self) -> str:
+            """
+            Declarator for a public showname attribute.
+            """
+
+            return self._showname
+
+        @showname.setter
+        def showname(self, new_showname: str):
+            """
+            Set the custom showname of the client to the given one, and update the client
+            indexes of the client manager accordingly.
+
+            Parameters
+            ----------
+            new_showname : str
+                New custom showname.
+            """
+
+            old_showname, self._showname = self._showname, new_showname
+            self.server.client_manager.update_client_index(self, TargetType.SHOWNAME, old_showname,
+                                                           new_showname)
+
+        @property
+        def char_showname(self) -> str:
+            """
+            Declarator for a public char_showname attribute.
+            """
+
+            return self._char_showname
+
+        @char_showname.setter
+        def char_showname(self, new_char_showname: str):
+            """
+            Set the character showname of the client to the given one, and update the client
+            indexes of the client manager accordingly.
+
+            Parameters
+            ----------
+            new_char_showname : str
+                New character showname.
+            """
+
+            old_char_showname, self._char_showname = self._char_showname, new_char_showname
+            self.server.client_manager.update_client_index(
+                self, TargetType.CHAR_SHOWNAME, old_char_showname, new_char_showname)
+
         @property
         def zone_watched(self) -> ZoneManager.Zone:
             """
@@ -2403,14 +2748,32 @@ class ClientManager:
 
         self.clients: Set[default_client_type] = set()
         self.server = server
-        self.cur_id = [False] * self.server.config['playerlimit']
+        # Min-heap of unused client IDs, so the lowest free ID is always handed out first
+        self._free_ids: List[int] = list(range(self.server.config['playerlimit']))
         self.default_client_type = default_client_type
 
+        # Client indexes for get_targets, kept up to date by the client attribute setters
+        self._id_to_client: List[Union[ClientManager.Client, None]] = \
+            [None] * self.server.config['playerlimit']
+        self._ipid_to_clients: Dict[int, Set[ClientManager.Client]] = dict()
+        self._hdid_to_clients: Dict[str, Set[ClientManager.Client]] = dict()
+        self._char_id_to_clients: Dict[Union[int, None], Set[ClientManager.Client]] = dict()
+        self._prefix_indexes: Dict[TargetType, _PrefixIndex] = {
+            TargetType.OOC_NAME: _PrefixIndex(),
+            TargetType.SHOWNAME: _PrefixIndex(),
+            TargetType.CHAR_SHOWNAME: _PrefixIndex(),
+        }
+
         # Phantom peek timer stuff
+        # Rather than rolling every client every cycle, each client draws the cycle in which
+        # their next successful roll happens, and only clients due in a cycle are looked at.
         base_time = 300
         _phantom_peek_timer_min = base_time - base_time/2
         _phantom_peek_timer_max = base_time + base_time/2
         _phantom_peek_fuzz_per_client = base_time/2
+        self.phantom_peek_cycle = 0
+        self._phantom_peek_schedule: List[Tuple[int, int, ClientManager.Client]] = list()
+        self._phantom_peek_counter = itertools.count()
         self.phantom_peek_timer = self.server.timer_manager.new_timer(
             auto_restart=True,
             max_value=random.randint(
@@ -2418,22 +2781,18 @@ class ClientManager:
         )
 
         def _phantom_peek():
-            for client in self.clients:
-                if client.char_id is None:
+            self.phantom_peek_cycle += 1
+            for client in self.pop_due_phantom_peeks():
+                if client.char_id is not None:
                     # Only makes sense for proper players
-                    continue
-                zone = client.area.in_zone
-                if zone and zone.is_property('Paranoia'):
-                    zone_paranoia, = zone.get_property('Paranoia')
-                else:
-                    zone_paranoia = 0
-                threshold = (client.paranoia+zone_paranoia)/100
-                if random.random() < threshold:
                     delay = random.randint(
                         0, int(_phantom_peek_fuzz_per_client)-1)
                     self.server.task_manager.new_task(client, 'as_phantom_peek', {
                         'length': delay,
                     })
+                # Each cycle is an independent roll, so the next success is drawn afresh
+                self.schedule_phantom_peek(client, force=True)
+
             self.phantom_peek_timer.set_max_value(
                 random.randint(int(_phantom_peek_timer_min),
                                int(_phantom_peek_timer_max))
@@ -2448,24 +2807,29 @@ class ClientManager:
         hub: _Hub = None,
         transport: _ProactorSocketTransport = None,
         protocol: AOProtocol = None,
-    ) -> Tuple[Client, bool]:
+    ) -> Tuple[Union[Client, None], bool]:
         if client_type is None:
             client_type = self.default_client_type
         if hub is None:
             hub = self.server.hub_manager.get_default_managee()
 
         ip = Constants.get_ip_of_transport(transport)
+
+        # Refuse banned IP ranges and IPIDs before setting up a client for them. New IPs are only
+        # assigned an IPID once they are let in, so connections from banned ranges do not grow
+        # the IPID store.
+        ban = self.server.ban_manager.find_connection_ban(ip, ipid=self.server.peek_ipid(ip))
+        if ban:
+            logger.log_server(f'Refused connection from banned IP {ip}. Matching ban: {ban}.')
+            return None, False
         ipid = self.server.get_ipid(ip)
 
-        cur_id = -1
-        for i in range(self.server.config['playerlimit']):
-            if not self.cur_id[i]:
-                cur_id = i
-                break
+        cur_id = self._free_ids[0] if self._free_ids else -1
 
         c = client_type(self.server, hub, transport,
                         cur_id, ipid, protocol=protocol)
         self.clients.add(c)
+        self._index_client(c)
 
         # Check if server is full, and if so, send number of players and disconnect
         if cur_id == -1:
@@ -2474,7 +2838,8 @@ class ClientManager:
                 'player_limit': self.server.config['playerlimit']
             })
             return c, False
-        self.cur_id[cur_id] = True
+        heapq.heappop(self._free_ids)
+        self._id_to_client[cur_id] = c
         self.server.task_manager.tasks[c] = dict()
         return c, True
 
@@ -2492,10 +2857,19 @@ class ClientManager:
 
         # Avoid having pre-clients do this (before they are granted a cID)
         if client.id >= 0:
-            self.cur_id[client.id] = False
+            if self._id_to_client[client.id] is client:
+                self._id_to_client[client.id] = None
+                heapq.heappush(self._free_ids, client.id)
             # Cancel client's pending tasks
             for task_name in self.server.task_manager.tasks[client].copy():
                 self.server.task_manager.delete_task(client, task_name)
+            # Cancel client's pending timed effects
+            self.server.effect_manager.cancel_client_effects(client)
+            # End client's day cycle clock, if any
+            try:
+                self.server.clock_manager.end_clock(client)
+            except ClockError.ClockNotFoundError:
+                pass
 
         # If the client was part of a party, remove them from the party
         if client.party:
@@ -2539,79 +2913,234 @@ class ClientManager:
 
         client.publisher.publish('client_destroyed', {})
 
-        # Moreover, free up the client ID from the set of ignored IDs for all players
-        for other in self.clients:
-            if client == other:
-                continue
-            if client.id in other.ignored_players:
-                other.ignored_players.remove(client.id)
+        # Moreover, remove the client from the set of ignored players of all players who were
+        # ignoring them, as well as the client from the players they were ignoring
+        for other in client.ignored_by.copy():
+            other.unignore(client)
+        for other in client.ignored_players.copy():
+            client.unignore(other)
 
         # Finally, for every other client, remove the remembered status
-        for other in self.clients:
-            if client == other:
-                continue
-            if client.id in other.remembered_statuses:
-                other.remembered_statuses.pop(client.id)
-
-        # Moreover, free up the client ID from the set of ignored IDs for all players
-        for other in self.clients:
-            if client == other:
-                continue
-            if client.id in other.ignored_players:
-                other.ignored_players.remove(client.id)
+        for other in client.status_remembered_by:
+            other.remembered_statuses.pop(client.id, None)
+        client.status_remembered_by = set()
+        for target_id in client.remembered_statuses:
+            target = self._id_to_client[target_id] if target_id >= 0 else None
+            if target:
+                target.status_remembered_by.discard(client)
+        client.remembered_statuses = dict()
 
         client.send_player_list_to_area()
         
         client.detatch_pair()
 
+        # Any scheduled phantom peek for the client is now stale
+        client._phantom_peek_cycle = None
+
+        self._unindex_client(client)
         self.clients.remove(client)
 
     def is_client(self, client: ClientManager.Client) -> bool:
         return client in self.clients
 
+    def schedule_phantom_peek(self, client: ClientManager.Client, force: bool = False):
+        """
+        Draw the phantom peek cycle in which the client will next roll a phantom peek
+        successfully, if their phantom peek threshold changed since it was last drawn (or always
+        if `force` is True).
+
+        As every cycle is an independent roll that succeeds with probability equal to the
+        threshold, the number of cycles until the next success is geometrically distributed.
+        Redrawing it at any cycle (e.g. because the threshold changed) does not change the
+        distribution of rolls, as the geometric distribution is memoryless.
+
+        Parameters
+        ----------
+        client : ClientManager.Client
+            Client to schedule.
+        force : bool, optional
+            If True, the next successful cycle is redrawn even if the threshold did not change.
+            Defaults to False.
+        """
+
+        threshold = client.get_phantom_peek_threshold()
+        if not force and threshold == client._phantom_peek_threshold:
+            return
+
+        client._phantom_peek_threshold = threshold
+        if threshold <= 0:
+            client._phantom_peek_cycle = None
+            return
+
+        if threshold >= 1:
+            cycles = 1
+        else:
+            # Inverse transform sampling, with 1-random() in (0, 1] so the logarithm is defined
+            cycles = 1 + int(math.log(1-random.random()) / math.log(1-threshold))
+
+        client._phantom_peek_cycle = self.phantom_peek_cycle + cycles
+        heapq.heappush(self._phantom_peek_schedule,
+                       (client._phantom_peek_cycle, next(self._phantom_peek_counter), client))
+
+        # Drop stale entries if they start to dominate the schedule
+        if len(self._phantom_peek_schedule) > 2*len(self.clients) + 64:
+            self._phantom_peek_schedule = [
+                entry for entry in self._phantom_peek_schedule
+                if entry[2]._phantom_peek_cycle == entry[0] and entry[2] in self.clients
+            ]
+            heapq.heapify(self._phantom_peek_schedule)
+
+    def pop_due_phantom_peeks(self) -> List[ClientManager.Client]:
+        """
+        Remove from the phantom peek schedule and return all clients whose phantom peek roll
+        succeeds in the current phantom peek cycle.
+
+        Returns
+        -------
+        List[ClientManager.Client]
+            Clients due for a phantom peek.
+        """
+
+        due_clients = list()
+        schedule = self._phantom_peek_schedule
+        while schedule and schedule[0][0] <= self.phantom_peek_cycle:
+            cycle, _, client = heapq.heappop(schedule)
+            if client._phantom_peek_cycle != cycle or client not in self.clients:
+                continue  # Stale entry
+            client._phantom_peek_cycle = None
+            if client.get_phantom_peek_threshold() != client._phantom_peek_threshold:
+                # Threshold changed without the schedule being told, so this draw is meaningless
+                self.schedule_phantom_peek(client)
+                continue
+            due_clients.append(client)
+        return due_clients
+
+    def _get_set_index(self, key: TargetType) -> Dict[Any, Set[ClientManager.Client]]:
+        return {
+            TargetType.IPID: self._ipid_to_clients,
+            TargetType.HDID: self._hdid_to_clients,
+            TargetType.CHAR_NAME: self._char_id_to_clients,
+        }.get(key)
+
+    def _get_indexed_values(self, client: ClientManager.Client) -> Dict[TargetType, Any]:
+        return {
+            TargetType.IPID: client.ipid,
+            TargetType.HDID: client.hdid,
+            TargetType.CHAR_NAME: client.char_id,
+            TargetType.OOC_NAME: client.name,
+            TargetType.SHOWNAME: client.showname,
+            TargetType.CHAR_SHOWNAME: client.char_showname,
+        }
+
+    def _add_to_index(self, client: ClientManager.Client, key: TargetType, value: Any):
+        if key in self._prefix_indexes:
+            self._prefix_indexes[key].add(client, value)
+        else:
+            self._get_set_index(key).setdefault(value, set()).add(client)
+
+    def _remove_from_index(self, client: ClientManager.Client, key: TargetType, value: Any):
+        if key in self._prefix_indexes:
+            self._prefix_indexes[key].remove(client, value)
+            return
+
+        set_index = self._get_set_index(key)
+        clients = set_index.get(value)
+        if clients is None:
+            return
+        clients.discard(client)
+        if not clients:
+            set_index.pop(value)
+
+    def _index_client(self, client: ClientManager.Client):
+        for (key, value) in self._get_indexed_values(client).items():
+            self._add_to_index(client, key, value)
+
+    def _unindex_client(self, client: ClientManager.Client):
+        for (key, value) in self._get_indexed_values(client).items():
+            self._remove_from_index(client, key, value)
+
+    def update_client_index(self, client: ClientManager.Client, key: TargetType, old_value: Any,
+                            new_value: Any):
+        """
+        Move a client in the index for a target type from its old value to its new value.
+        Clients not managed by this manager are ignored.
+
+        Parameters
+        ----------
+        client : ClientManager.Client
+            Client whose value changed.
+        key : TargetType
+            Target type whose value changed. One of IPID, HDID, CHAR_NAME (for character IDs),
+            OOC_NAME, SHOWNAME or CHAR_SHOWNAME.
+        old_value : Any
+            Previous value.
+        new_value : Any
+            New value.
+        """
+
+        if client not in self.clients:
+            return
+
+        self._remove_from_index(client, key, old_value)
+        self._add_to_index(client, key, new_value)
+
     def get_targets(self, client: ClientManager.Client, key: TargetType, value: Any,
                     local: bool = False) -> List[ClientManager.Client]:
         # possible keys: ip, OOC, id, cname, ipid, hdid, showname
-        areas = None
-        if local:
-            areas = [client.area]
-        else:
-            areas = client.hub.area_manager.get_areas()
         targets = []
         if key == TargetType.ALL:
             for nkey in range(8):
                 targets += self.get_targets(client, nkey, value, local)
-        for area in areas:
-            for target in area.clients:
-                if key == TargetType.IP:
-                    if target.get_ipreal().lower().startswith(value.lower()):
-                        targets.append(target)
-                elif key == TargetType.OOC_NAME:
-                    if target.name.lower().startswith(value.lower()):
-                        targets.append(target)
-                elif key == TargetType.CHAR_NAME:
-                    if target.get_char_name().lower().startswith(value.lower()):
-                        targets.append(target)
-                elif key == TargetType.CHAR_FOLDER:
-                    if target.char_folder.lower().startswith(value.lower()):
-                        targets.append(target)
-                elif key == TargetType.ID:
-                    if target.id == value:
-                        targets.append(target)
-                elif key == TargetType.IPID:
-                    if target.ipid == value:
-                        targets.append(target)
-                elif key == TargetType.HDID:
-                    if target.hdid == value:
-                        targets.append(target)
-                elif key == TargetType.SHOWNAME:
-                    if target.showname.lower().startswith(value.lower()):
-                        targets.append(target)
-                elif key == TargetType.CHAR_SHOWNAME:
-                    if target.char_showname.lower().startswith(value.lower()):
-                        targets.append(target)
+
+        if key == TargetType.ID:
+            if not isinstance(value, int) or not 0 <= value < len(self._id_to_client):
+                return targets
+            candidates = [self._id_to_client[value]] if self._id_to_client[value] else []
+        elif key in (TargetType.IPID, TargetType.HDID):
+            candidates = self._get_set_index(key).get(value, set())
+        elif key in self._prefix_indexes:
+            candidates = self._prefix_indexes[key].get_prefixed(value)
+        elif key == TargetType.CHAR_NAME:
+            # Clients with the same character ID in the same hub share a character name, so it
+            # is only checked once per character ID
+            candidates = list()
+            for same_char_clients in self._char_id_to_clients.values():
+                in_scope = [target for target in same_char_clients
+                            if self._is_in_scope(client, target, local)]
+                if (in_scope and
+                        in_scope[0].get_char_name().lower().startswith(value.lower())):
+                    candidates.extend(in_scope)
+        else:
+            # Not indexed
+            if local:
+                areas = [client.area]
+            else:
+                areas = client.hub.area_manager.get_areas()
+            for area in areas:
+                for target in area.clients:
+                    if key == TargetType.IP:
+                        if target.get_ipreal().lower().startswith(value.lower()):
+                            targets.append(target)
+                    elif key == TargetType.CHAR_FOLDER:
+                        if target.char_folder.lower().startswith(value.lower()):
+                            targets.append(target)
+            return targets
+
+        targets.extend(sorted((target for target in candidates
+                               if self._is_in_scope(client, target, local)),
+                              key=lambda target: (target.area.id, target.id)))
         return targets
 
+    @staticmethod
+    def _is_in_scope(client: ClientManager.Client, target: ClientManager.Client,
+                     local: bool) -> bool:
+        # Targets must be in an area of the hub of the client, or the client's area if local
+        if target not in target.area.clients:
+            return False
+        if local:
+            return target.area == client.area
+        return target.area.hub == client.hub
+
     def get_muted_clients(self) -> List[ClientManager.Client]:
         clients = []
         for client in self.clients:
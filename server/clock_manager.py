@@ -0,0 +1,888 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the ClockManager class, which itself contains the Clock subclass.
+
+A clock (or day cycle) announces the passing of in-game hours to the players in a range of areas
+of a hub. Rather than each clock running its own coroutine, all clocks of a server share a single
+scheduler that wakes up exactly at the next hour boundary of any clock.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import typing
+
+from typing import Dict, List, Set, Tuple, Union
+
+from server.exceptions import ClockError
+
+if typing.TYPE_CHECKING:
+    # Avoid circular referencing
+    from server.area_manager import AreaManager
+    from server.client_manager import ClientManager
+    from server.hub_manager import _Hub
+    from server.tsuserver import TsuserverDR
+
+
+class ClockManager:
+    """
+    A manager for clocks. Each client may own at most one clock.
+
+    The manager keeps, for every area covered by some clock, the clocks covering it, so that
+    the recipients of each clock are updated as players enter and leave areas rather than
+    recomputed on every hour.
+    """
+
+    class Clock:
+        """
+        A clock that ticks through the hours of an in-game day in a range of areas of a hub.
+        """
+
+        def __init__(
+            self,
+            server: TsuserverDR,
+            manager: ClockManager,
+            owner: ClientManager.Client,
+            area_1: int,
+            area_2: int,
+            hour_length: int,
+            hour_start: int,
+            hours_in_day: int,
+        ):
+            """
+            Create a new clock. The clock does not start ticking until `start` is called.
+
+            Parameters
+            ----------
+            server : TsuserverDR
+                Server the clock belongs to.
+            manager : ClockManager
+                Manager for this clock.
+            owner : ClientManager.Client
+                Client that initiated the clock.
+            area_1 : int
+                ID of the first area of the range of areas of the clock.
+            area_2 : int
+                ID of the last area of the range of areas of the clock.
+            hour_length : int
+                Main length of each in-game hour (in seconds).
+            hour_start : int
+                Starting hour.
+            hours_in_day : int
+                Number of hours in a day.
+            """
+
+            self.server = server
+            self.manager = manager
+            self.owner = owner
+            self.hub: _Hub = owner.hub
+            self.area_1 = area_1
+            self.area_2 = area_2
+
+            self.hour = hour_start
+            self.hours_in_day = hours_in_day
+            self.main_hour_length = hour_length
+            self.hour_length = hour_length
+            self.periods: List[Tuple[int, str, int]] = list()
+            self.current_period: Tuple[int, str, int] = (-1, '', hour_length)
+            self.period = ''
+            self.is_paused = False
+            self.is_unknown = False
+            self.recipients: Set[ClientManager.Client] = set()
+
+            self._period_table: List[Tuple[int, str, int]] = list()
+            self._minute_at_interruption = 0
+            self._time_started_at = 0
+            self._deadline: Union[float, None] = None
+            self._notify_others = True
+            self._force_period_refresh = False
+            self._ended = False
+
+        def get_targets(self, notify_others: bool = True) -> Set[ClientManager.Client]:
+            """
+            Return the clients that should receive updates from this clock.
+
+            Parameters
+            ----------
+            notify_others : bool, optional
+                If False, only the owner of the clock is returned. Defaults to True.
+
+            Returns
+            -------
+            Set[ClientManager.Client]
+                Targets.
+            """
+
+            if not notify_others:
+                return {self.owner}
+            return self.recipients | {self.owner}
+
+        def covers_area(self, area: AreaManager.Area) -> bool:
+            """
+            Return whether the given area is part of the range of areas of this clock.
+
+            Parameters
+            ----------
+            area : AreaManager.Area
+                Area to check.
+
+            Returns
+            -------
+            bool
+                True if the area is in the range of the clock, False otherwise.
+            """
+
+            return area.hub == self.hub and self.area_1 <= area.id <= self.area_2
+
+        def find_period_of_hour(self, hour: int) -> Tuple[int, str, int]:
+            """
+            Return the period that contains the given hour, using the precomputed period table.
+
+            Parameters
+            ----------
+            hour : int
+                Hour to look for.
+
+            Returns
+            -------
+            Tuple[int, str, int]
+                Start, name and hour length of the period. If there are no periods, it is
+                `(-1, '', main_hour_length)`.
+            """
+
+            if not self.periods:
+                return (-1, '', self.main_hour_length)
+            if 0 <= hour < len(self._period_table):
+                return self._period_table[hour]
+            # Hours before the first period start wrap around to the last period
+            return self.periods[-1]
+
+        def _rebuild_period_table(self):
+            self.periods.sort()
+            self._period_table = list()
+            if not self.periods:
+                return
+
+            current = self.periods[-1]
+            next_period = 0
+            for hour in range(self.hours_in_day):
+                while (next_period < len(self.periods)
+                       and self.periods[next_period][0] <= hour):
+                    current = self.periods[next_period]
+                    next_period += 1
+                self._period_table.append(current)
+
+        def _get_minute(self) -> float:
+            if self.is_paused or self.is_unknown or self._deadline is None:
+                return self._minute_at_interruption
+            elapsed = self.manager.get_time()-self._time_started_at
+            return self._minute_at_interruption + elapsed/self.hour_length*60
+
+        def _resume(self):
+            # Schedule the end of the current hour based on how much of it already passed
+            if self.is_paused or self.is_unknown:
+                return
+            self._time_started_at = self.manager.get_time()
+            remaining = (60-self._minute_at_interruption)/60 * self.hour_length
+            self.manager._schedule(self, self._time_started_at + remaining)
+
+        def _suspend(self):
+            self._minute_at_interruption = self._get_minute()
+            self.manager._schedule(self, None)
+
+        def start(self, send_first_hour: bool):
+            """
+            Start the clock, notifying the current hour.
+
+            Parameters
+            ----------
+            send_first_hour : bool
+                If True, non-staff players in the range of areas will be notified of the first hour
+                as well.
+            """
+
+            client = self.owner
+            targets = {c for c in self.recipients if c.is_staff() or send_first_hour}
+            targets.add(client)
+            for c in targets:
+                c.send_ooc('It is now {}:00.'.format('{0:02d}'.format(self.hour)))
+                c.send_clock(client_id=client.id, hour=self.hour)
+
+            self._resume()
+
+        def tick(self, boundary: float = None):
+            """
+            Advance the clock by one hour, sending all related notifications.
+
+            Parameters
+            ----------
+            boundary : float, optional
+                Time at which the hour actually ended. If given, the next hour is measured from it
+                so that hours do not drift. Defaults to None (and then the current time is used).
+            """
+
+            client = self.owner
+            self.hour = (self.hour + 1) % self.hours_in_day
+            targets = self.get_targets(notify_others=self._notify_others)
+
+            # Check if new period has started
+            if not self.periods:
+                if self.current_period[1] != '':
+                    self.period = ''
+                    for c in targets:
+                        c.send_time_of_day(name='')
+                        c.send_ooc('It is no longer some particular period of day.')
+                self.current_period = self.find_period_of_hour(self.hour)
+                self.hour_length = self.main_hour_length
+            else:
+                self.current_period = self.find_period_of_hour(self.hour)
+                new_period_start, new_period_name, new_period_length = self.current_period
+                self.hour_length = new_period_length
+                if new_period_start == self.hour or self._force_period_refresh:
+                    self.period = new_period_name
+                    for c in targets:
+                        c.send_time_of_day(name=new_period_name)
+                        c.send_ooc(f'It is now {new_period_name}.')
+            self._force_period_refresh = False
+
+            # Regardless of new period, send other packets
+            for c in targets:
+                c.send_ooc('It is now {}:00.'.format('{0:02d}'.format(self.hour)))
+                c.send_clock(client_id=client.id, hour=self.hour)
+
+            self._minute_at_interruption = 0
+            self._notify_others = True
+
+            if boundary is None:
+                boundary = self.manager.get_time()
+            self._time_started_at = boundary
+            self.manager._schedule(self, boundary + self.hour_length)
+
+        def end(self):
+            """
+            End the clock, resetting the clock and time of day of every target.
+            """
+
+            if self._ended:
+                return
+            self._ended = True
+
+            client = self.owner
+            for c in self.get_targets():
+                c.send_clock(client_id=client.id, hour=-1)
+                c.send_time_of_day(name='')  # Reset time of day
+            client.send_ooc('Your day cycle in areas {} through {} has been ended.'
+                            .format(self.area_1, self.area_2))
+            client.send_ooc_others('(X) The day cycle initiated by {} in areas {} through '
+                                   '{} has been ended.'
+                                   .format(client.name, self.area_1, self.area_2),
+                                   is_zstaff_flex=True, in_hub=self.hub)
+            self.manager._remove_clock(self)
+
+        def set_time(self, hour_length: int, hour: int):
+            """
+            Set the main hour length and current hour of the clock. If the time was unknown, it
+            becomes known again.
+
+            Parameters
+            ----------
+            hour_length : int
+                New main hour length (in seconds).
+            hour : int
+                New hour.
+            """
+
+            client = self.owner
+            area_1, area_2 = self.area_1, self.area_2
+            old_hour = self.hour
+            self.hour = hour
+            self.hour_length = hour_length
+            self.main_hour_length = hour_length
+
+            # Do not notify of clock set to normies if only hour length changed
+            self._notify_others = (old_hour != hour)
+            self._minute_at_interruption = 0
+            self._force_period_refresh = True
+            str_hour = '{0:02d}'.format(hour)
+            self.is_unknown = False
+            client.send_ooc('Your day cycle in areas {} through {} was updated. New hour '
+                            'length: {} seconds. New hour: {}:00.'
+                            .format(area_1, area_2, hour_length, str_hour))
+            client.send_ooc_others('(X) The day cycle initiated by {} in areas {} through '
+                                   '{} has been updated. New hour length: {} seconds. '
+                                   'New hour: {}:00.'
+                                   .format(client.name, area_1, area_2, hour_length,
+                                           str_hour),
+                                   is_zstaff_flex=True, in_hub=self.hub)
+            # Setting time does not unpause the timer, warn clock master
+            if self.is_paused:
+                client.send_ooc('(X) Warning: Your day cycle is still paused.')
+            # Moreover, hour is +1'd automatically if the clock is unpaused
+            # So preemptively -1
+            else:
+                self.hour -= 1  # Take one hour away, because an hour would be added anyway
+
+            # This does not modify the hour length of active periods, so if there are any
+            # periods, warn clock master
+            if self.periods:
+                client.send_ooc('(X) Warning: A period is currently active, so the day '
+                                'cycle is using its hour length. Modify its hour length '
+                                'using /clock_period.')
+
+            if not self.is_paused:
+                self.tick()
+
+        def set_hours_in_day(self, hours_in_day: int):
+            """
+            Set the number of hours in a day of the clock. If the current hour is past the new
+            number of hours, it is reset to 0; and any periods that start past the new number of
+            hours are removed.
+
+            Parameters
+            ----------
+            hours_in_day : int
+                New number of hours in a day.
+            """
+
+            client = self.owner
+            area_1, area_2 = self.area_1, self.area_2
+            old_hour = self.hour
+            reset_hour = False
+            self.hours_in_day = hours_in_day
+
+            client.send_ooc(f'Your day cycle in areas {area_1} through {area_2} was '
+                            f'updated. New number of hours in the day: {hours_in_day} '
+                            f'hours.')
+            client.send_ooc_others(f'(X) The day cycle initiated by {client.displayname} '
+                                   f'[{client.id}] in areas {area_1} through {area_2} has '
+                                   f'been updated. New number of hours in the day: '
+                                   f'{hours_in_day} hours.',
+                                   is_zstaff_flex=True, in_hub=self.hub)
+            # Check if current hours exceed new number of hours in the day
+            if self.hour >= hours_in_day:
+                self.hour = 0
+                self._minute_at_interruption = 0
+                reset_hour = True
+                client.send_ooc(f'(X) The current hour {old_hour} was beyond the new '
+                                f'number of hours in the day you set, so your current hour '
+                                f'was set to 0.')
+                client.send_ooc_others(f'(X) The day cycle initiated by '
+                                       f'{client.displayname} [{client.id}] in areas '
+                                       f'{area_1} through {area_2} has had its current '
+                                       f'hour be set to 0 because it was beyond the number '
+                                       f'of hours it was set to now have.',
+                                       is_zstaff_flex=True, in_hub=self.hub,
+                                       pred=lambda c: area_1 <= c.area.id <= area_2)
+
+                # Moreover, hour is +1'd automatically if the clock is unpaused
+                # So preemptively -1
+                if not self.is_paused:
+                    self.hour -= 1  # Take one hour away, because an hour would be added anyway
+
+            # Pop any periods that are beyond the new number of hours in the day
+            popped_periods = list()
+            for (period_start, period_name, period_length) in self.periods.copy():
+                if period_start >= hours_in_day:
+                    self.periods.remove((period_start, period_name, period_length))
+                    popped_periods.append((period_start, period_name))
+            self._rebuild_period_table()
+
+            if popped_periods:
+                client.send_ooc(f'(X) The following periods were removed from the list of '
+                                f'periods as they were beyond the new number of hours in '
+                                f'the day: {popped_periods}.')
+                client.send_ooc_others(f'(X) The day cycle initiated by '
+                                       f'{client.displayname} [{client.id}] in areas '
+                                       f'{area_1} through {area_2} has had the following '
+                                       f'periods be removed from the list of periods as '
+                                       f'they were beyond the number of hours it was set '
+                                       f'to now have: {popped_periods}.',
+                                       is_zstaff_flex=True, in_hub=self.hub,
+                                       pred=lambda c: area_1 <= c.area.id <= area_2)
+
+            self._force_period_refresh = True  # Super conservative but always correct.
+            # Setting time does not unpause the timer, warn clock master
+            if self.is_paused:
+                client.send_ooc('(X) Warning: Your day cycle is still paused.')
+            elif reset_hour and not self.is_unknown:
+                self.tick()
+
+        def set_unknown(self):
+            """
+            Set the time of the clock to be unknown. Time does not flow while it is unknown.
+            """
+
+            client = self.owner
+            area_1, area_2 = self.area_1, self.area_2
+            if not self.is_paused:
+                self._suspend()
+            self.hour = -1
+            self.is_unknown = True
+
+            client.send_ooc('You have set the time to be unknown.')
+            client.send_ooc_others(f'(X) The day cycle initiated by {client.displayname} '
+                                   f'[{client.id}] in areas {area_1} through {area_2} has '
+                                   f'been set to be at an unknown time.',
+                                   is_zstaff_flex=True, in_hub=self.hub,
+                                   pred=lambda c: area_1 <= c.area.id <= area_2)
+            client.send_ooc_others('You seem to have lost track of time.',
+                                   is_zstaff_flex=False, in_hub=self.hub,
+                                   pred=lambda c: area_1 <= c.area.id <= area_2)
+
+            self.period = 'unknown'
+            for c in self.get_targets():
+                c.send_clock(client_id=client.id, hour=-1)
+                c.send_time_of_day(name='unknown')
+
+        def set_period(self, start: int, name: str, length: int):
+            """
+            Add a period to the clock, overwriting any periods with the same start or name.
+            If `start` is negative, the period with name `name` is removed instead.
+
+            Parameters
+            ----------
+            start : int
+                Start hour of the period, or -1 to remove the period.
+            name : str
+                Name of the period.
+            length : int
+                Hour length of the period (in seconds).
+            """
+
+            client = self.owner
+
+            # Pop entries with same start or name if needed (duplicated entries)
+            found = False
+            for (entry_start, entry_name, entry_length) in self.periods.copy():
+                if entry_start == start or entry_name == name:
+                    self.periods.remove((entry_start, entry_name, entry_length))
+                    found = True
+
+            if not found and start < 0:
+                # Check if attempted to remove a non-existing period
+                client.send_ooc(f'Period `{name}` not found.')
+                return
+
+            if start >= 0:
+                self.periods.append((start, name, length))
+
+            # start=-1 is used to indicate *please erase this period name*. By the previous
+            # for loop, any matching period names are removed, and by the if statement
+            # -1 is not added.
+            self._rebuild_period_table()
+
+            # Also note this is only relevant if the time is not unknown. If it is,
+            # then no updates should be sent
+            changed_current_period = False
+            if not self.is_unknown:
+                new_period_start, new_period_name, new_period_length = (
+                    self.find_period_of_hour(self.hour))
+                changed_current_period = (self.current_period[1] != new_period_name)
+                self.current_period = new_period_start, new_period_name, new_period_length
+                if self.periods and new_period_start == self.hour:
+                    changed_current_period = True
+
+            if changed_current_period:
+                self.period = new_period_name
+                if new_period_name:
+                    for c in self.get_targets():
+                        c.send_time_of_day(name=new_period_name)
+                        c.send_ooc(f'It is now {new_period_name}.')
+                else:
+                    for c in self.get_targets():
+                        c.send_time_of_day(name='')
+                        c.send_ooc('It is no longer some particular period of day.')
+
+            # Send notifications appropriately
+            if start >= 0:
+                # Case added a period
+                formatted_time = '{}:00'.format('{0:02d}'.format(start))
+                client.send_ooc(f'(X) You have added period `{name}`. '
+                                f'Period hour length: {self.current_period[2]} seconds. '
+                                f'Period hour start: {formatted_time}.')
+                client.send_ooc_others(
+                    f'(X) {client.displayname} [{client.id}] has added period `{name}` '
+                    f'to their day cycle. '
+                    f'Period hour length: {self.current_period[2]} seconds. '
+                    f'Period hour start: {formatted_time} '
+                    f'({client.area.id}).',
+                    is_zstaff_flex=True, in_hub=self.hub,
+                )
+            else:
+                # Case removed a period
+                client.send_ooc(f'(X) You have removed period `{name}`.')
+                client.send_ooc_others(f'(X) {client.displayname} [{client.id}] has '
+                                       f'removed period `{name}` off their day cycle '
+                                       f'({client.area.id}).',
+                                       is_zstaff_flex=True, in_hub=self.hub)
+
+        def pause(self):
+            """
+            Pause the clock.
+            """
+
+            client = self.owner
+            self._suspend()
+            self.is_paused = True
+
+            igt_now = '{}:{}'.format('{0:02d}'.format(self.hour),
+                                     '{0:02d}'.format(int(self._minute_at_interruption)))
+            client.send_ooc('Your day cycle in areas {} through {} has been paused at {}.'
+                            .format(self.area_1, self.area_2, igt_now))
+            client.send_ooc_others('(X) The day cycle initiated by {} in areas {} through '
+                                   '{} has been paused at {}.'
+                                   .format(client.name, self.area_1, self.area_2, igt_now),
+                                   is_zstaff_flex=True, in_hub=self.hub)
+
+        def unpause(self):
+            """
+            Unpause the clock.
+            """
+
+            client = self.owner
+            area_1, area_2 = self.area_1, self.area_2
+            self.is_paused = False
+            self._notify_others = True
+
+            client.send_ooc('Your day cycle in areas {} through {} has been unpaused.'
+                            .format(area_1, area_2))
+            client.send_ooc_others('(X) The day cycle initiated by {} in areas {} through '
+                                   '{} has been unpaused.'
+                                   .format(client.name, area_1, area_2),
+                                   is_zstaff_flex=True, in_hub=self.hub)
+
+            igt_now = '{}:{}'.format('{0:02d}'.format(self.hour),
+                                     '{0:02d}'.format(int(self._minute_at_interruption)))
+            igt_rounded = '{}:00.'.format('{0:02d}'.format(self.hour))
+            client.send_ooc('It is now {}.'.format(igt_now))
+            client.send_ooc_others('It is now {}.'.format(igt_now),
+                                   is_zstaff_flex=True, in_hub=self.hub,
+                                   pred=lambda c: area_1 <= c.area.id <= area_2)
+            client.send_ooc_others('It is now some time past {}.'.format(igt_rounded),
+                                   is_zstaff_flex=False, in_hub=self.hub,
+                                   pred=lambda c: area_1 <= c.area.id <= area_2)
+            for c in self.get_targets():
+                c.send_clock(client_id=client.id, hour=self.hour)
+
+            self._resume()
+
+        def __repr__(self):
+            return (f'ClockManager.Clock(server, {self.owner.id}, {self.area_1}, {self.area_2}) || '
+                    f'hub={self.hub.get_id()}, hour={self.hour}, '
+                    f'hours_in_day={self.hours_in_day}, hour_length={self.hour_length}, '
+                    f'periods={self.periods}, is_paused={self.is_paused}, '
+                    f'is_unknown={self.is_unknown}')
+
+    def __init__(self, server: TsuserverDR):
+        """
+        Create a clock manager.
+
+        Parameters
+        ----------
+        server : TsuserverDR
+            Server of the clock manager.
+        """
+
+        self.server = server
+        self._owner_to_clock: Dict[ClientManager.Client, ClockManager.Clock] = dict()
+        self._area_to_clocks: Dict[AreaManager.Area, Set[ClockManager.Clock]] = dict()
+
+        # Shared scheduler for all clocks: a heap of (deadline, sequence number, clock) with lazy
+        # deletion (entries whose deadline no longer matches the clock's deadline are stale), and
+        # a single event loop handle set to fire at the earliest deadline.
+        self._heap: List[Tuple[float, int, ClockManager.Clock]] = list()
+        self._sequence = itertools.count()
+        self._wakeup_handle: Union[asyncio.TimerHandle, None] = None
+        self._wakeup_at: Union[float, None] = None
+
+    @staticmethod
+    def get_time() -> float:
+        """
+        Return the current time of the event loop that schedules the clocks.
+
+        Returns
+        -------
+        float
+            Current time.
+        """
+
+        return asyncio.get_event_loop().time()
+
+    def new_clock(
+        self,
+        owner: ClientManager.Client,
+        area_1: int,
+        area_2: int,
+        hour_length: int,
+        hour_start: int,
+        hours_in_day: int,
+        send_first_hour: bool = True,
+    ) -> ClockManager.Clock:
+        """
+        Create and start a new clock owned by a client. If the client already owned a clock, that
+        clock is ended first.
+
+        Parameters
+        ----------
+        owner : ClientManager.Client
+            Client that initiates the clock.
+        area_1 : int
+            ID of the first area of the range of areas of the clock.
+        area_2 : int
+            ID of the last area of the range of areas of the clock.
+        hour_length : int
+            Main length of each in-game hour (in seconds).
+        hour_start : int
+            Starting hour.
+        hours_in_day : int
+            Number of hours in a day.
+        send_first_hour : bool, optional
+            If True, non-staff players in the range of areas will be notified of the first hour
+            as well. Defaults to True.
+
+        Returns
+        -------
+        ClockManager.Clock
+            The created clock.
+        """
+
+        try:
+            self.get_clock(owner).end()
+        except ClockError.ClockNotFoundError:
+            pass
+
+        clock = self.Clock(self.server, self, owner, area_1, area_2, hour_length, hour_start,
+                           hours_in_day)
+        self._owner_to_clock[owner] = clock
+        for area in clock.hub.area_manager.get_areas():
+            if clock.covers_area(area):
+                if area not in self._area_to_clocks:
+                    self._area_to_clocks[area] = set()
+                self._area_to_clocks[area].add(clock)
+                clock.recipients.update(area.clients)
+
+        clock.start(send_first_hour)
+        return clock
+
+    def get_clock(self, owner: ClientManager.Client) -> ClockManager.Clock:
+        """
+        Return the clock owned by a client.
+
+        Parameters
+        ----------
+        owner : ClientManager.Client
+            Client to check.
+
+        Returns
+        -------
+        ClockManager.Clock
+            Clock owned by the client.
+
+        Raises
+        ------
+        ClockError.ClockNotFoundError
+            If the client owns no clock.
+        """
+
+        try:
+            return self._owner_to_clock[owner]
+        except KeyError:
+            raise ClockError.ClockNotFoundError
+
+    def is_clock_owner(self, owner: ClientManager.Client) -> bool:
+        """
+        Return whether a client owns a clock.
+
+        Parameters
+        ----------
+        owner : ClientManager.Client
+            Client to check.
+
+        Returns
+        -------
+        bool
+            True if the client owns a clock, False otherwise.
+        """
+
+        return owner in self._owner_to_clock
+
+    def end_clock(self, owner: ClientManager.Client):
+        """
+        End the clock owned by a client.
+
+        Parameters
+        ----------
+        owner : ClientManager.Client
+            Client whose clock will be ended.
+
+        Raises
+        ------
+        ClockError.ClockNotFoundError
+            If the client owns no clock.
+        """
+
+        self.get_clock(owner).end()
+
+    def get_clocks(self) -> Set[ClockManager.Clock]:
+        """
+        Return (a shallow copy of) the clocks this manager manages.
+
+        Returns
+        -------
+        Set[ClockManager.Clock]
+            Clocks.
+        """
+
+        return set(self._owner_to_clock.values())
+
+    def get_clocks_in_area(self, area: AreaManager.Area) -> Set[ClockManager.Clock]:
+        """
+        Return (a shallow copy of) the clocks whose range of areas includes the given area.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area to check.
+
+        Returns
+        -------
+        Set[ClockManager.Clock]
+            Clocks.
+        """
+
+        return self._area_to_clocks.get(area, set()).copy()
+
+    def get_clocks_in_hub(self, hub: _Hub) -> Set[ClockManager.Clock]:
+        """
+        Return the clocks that run in the given hub.
+
+        Parameters
+        ----------
+        hub : _Hub
+            Hub to check.
+
+        Returns
+        -------
+        Set[ClockManager.Clock]
+            Clocks.
+        """
+
+        return {clock for clock in self._owner_to_clock.values() if clock.hub == hub}
+
+    def notify_area_entered(self, area: AreaManager.Area, client: ClientManager.Client):
+        """
+        Subscribe a client that just entered an area to the clocks covering that area.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area entered.
+        client : ClientManager.Client
+            Client that entered the area.
+        """
+
+        for clock in self._area_to_clocks.get(area, ()):
+            clock.recipients.add(client)
+
+    def notify_area_left(self, area: AreaManager.Area, client: ClientManager.Client):
+        """
+        Unsubscribe a client that just left an area from the clocks covering that area.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area left.
+        client : ClientManager.Client
+            Client that left the area.
+        """
+
+        for clock in self._area_to_clocks.get(area, ()):
+            clock.recipients.discard(client)
+
+    def _remove_clock(self, clock: ClockManager.Clock):
+        if self._owner_to_clock.get(clock.owner) == clock:
+            self._owner_to_clock.pop(clock.owner)
+        for area in list(self._area_to_clocks.keys()):
+            clocks = self._area_to_clocks[area]
+            clocks.discard(clock)
+            if not clocks:
+                self._area_to_clocks.pop(area)
+        self._schedule(clock, None)
+
+    def _schedule(self, clock: ClockManager.Clock, deadline: Union[float, None]):
+        # Entries already in the heap for this clock become stale, as their deadlines no longer
+        # match the clock's deadline.
+        clock._deadline = deadline
+        if deadline is not None:
+            heapq.heappush(self._heap, (deadline, next(self._sequence), clock))
+        self._rearm()
+
+    def _discard_stale_entries(self):
+        while self._heap:
+            deadline, _, clock = self._heap[0]
+            if not clock._ended and clock._deadline == deadline:
+                break
+            heapq.heappop(self._heap)
+
+    def _rearm(self):
+        self._discard_stale_entries()
+        wakeup_at = self._heap[0][0] if self._heap else None
+        if wakeup_at == self._wakeup_at:
+            return
+
+        if self._wakeup_handle:
+            self._wakeup_handle.cancel()
+            self._wakeup_handle = None
+        self._wakeup_at = wakeup_at
+        if wakeup_at is not None:
+            loop = asyncio.get_event_loop()
+            self._wakeup_handle = loop.call_at(wakeup_at, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup_handle = None
+        self._wakeup_at = None
+
+        # Tick every clock whose hour ended, including clocks in other hubs or ranges that
+        # happen to share the same hour boundary.
+        now = self.get_time()
+        due: List[Tuple[float, ClockManager.Clock]] = list()
+        self._discard_stale_entries()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, clock = heapq.heappop(self._heap)
+            if not clock._ended and clock._deadline == deadline:
+                clock._deadline = None
+                due.append((deadline, clock))
+            self._discard_stale_entries()
+
+        for (deadline, clock) in due:
+            if clock._ended or clock.is_paused or clock.is_unknown:
+                continue
+            clock.tick(boundary=deadline)
+
+        self._rearm()
+
+    def __repr__(self):
+        return (f'ClockManager(server) || '
+                f'clocks={self.get_clocks()}, '
+                f'wakeup_at={self._wakeup_at}')
@@ -24,13 +24,15 @@ import collections
 import datetime
 import random
 import hashlib
+import ipaddress
 import string
 import time
 
 from server import logger
 from server.constants import Constants, FadeOption, TargetType
-from server.exceptions import ArgumentError, AreaError, ClientError, HubError, MusicError, ServerError, TaskError
-from server.exceptions import PartyError, ZoneError, TrialError, NonStopDebateError
+from server.exceptions import ArgumentError, AreaError, ClientError, HubError, MusicError
+from server.exceptions import PartyError, ZoneError, TrialError, NonStopDebateError, ClockError
+from server.exceptions import EffectError
 from server.client_manager import ClientManager
 
 from typing import Union
@@ -385,43 +387,63 @@ def ooc_cmd_autopass(client: ClientManager.Client, arg: str):
 
 def ooc_cmd_ban(client: ClientManager.Client, arg: str):
     """ (MOD ONLY)
-    Kicks given user by IPID or IP from the server and prevents them from rejoining. Requires
-    /unban to undo.
-    Returns an error if given identifier does not correspond to a user.
+    Kicks given user by IPID or IP, or all users in a given IP range, from the server and prevents
+    them from rejoining. If given a ban length (a number followed by m for minutes, h for hours or
+    d for days), the ban is lifted once that time passes. Otherwise, it requires /unban to undo.
+    Returns an error if given identifier is not an IPID, IP or IP range, or if it is already
+    banned.
 
     SYNTAX
-    /ban <client_ipid>
-    /ban <client_ip>
+    /ban <client_ipid> {ban_length}
+    /ban <client_ip> {ban_length}
+    /ban <ip_range> {ban_length}
 
     PARAMETERS
     <client_ipid>: IPID for the client (number in parentheses in /getarea)
     <client_ip>: user IP
+    <ip_range>: IP range in CIDR notation (IP followed by / and the number of fixed bits)
+
+    OPTIONAL PARAMETERS
+    {ban_length}: Length of the ban, such as 30m, 12h or 7d
 
     EXAMPLES
     >>> /ban 1234567890
     Bans the user with IPID 1234567890.
-    >>> /ban 127.0.0.1
-    Bans the user with IP 127.0.0.1.
+    >>> /ban 127.0.0.1 12h
+    Bans the user with IP 127.0.0.1 for 12 hours.
+    >>> /ban 203.0.113.0/24 7d
+    Bans all users with IPs from 203.0.113.0 to 203.0.113.255 for 7 days.
     """
 
     arg = arg.strip()
-    Constants.assert_command(client, arg, is_mod=True, parameters='>0')
+    Constants.assert_command(client, arg, is_mod=True, parameters='&1-2')
+    args = arg.split(' ')
+    length = Constants.parse_ban_length(args[1]) if len(args) == 2 else None
 
-    # Guesses that any number is an IPID
-    # and that any non-numerical entry is an IP address.
-    if arg.isdigit():
+    # Guesses that any number is an IPID, that any entry with a / is an IP range,
+    # and that any other entry is an IP address.
+    if args[0].isdigit():
         # IPID
-        idnt = int(arg)
+        idnt = int(args[0])
         targets = client.server.client_manager.get_targets(
             client, TargetType.IPID, idnt, False)
+    elif '/' in args[0]:
+        # IP range. Targets are looked up once the range is known to be valid
+        idnt = args[0]
+        targets = None
     else:
         # IP Address
-        idnt = arg
+        idnt = args[0]
         targets = client.server.client_manager.get_targets(
             client, TargetType.IP, idnt, False)
 
     # Try and add the user to the ban list based on the given identifier
-    client.server.ban_manager.add_ban(idnt)
+    ban = client.server.ban_manager.add_ban(idnt, client=client, length=length)
+    if targets is None:
+        idnt = ban.value
+        network = ipaddress.ip_network(idnt)
+        targets = [c for c in client.server.get_clients()
+                   if client.server.ban_manager.parse_address(c.get_ipreal()) in network]
 
     # Kick+ban all clients opened by the targeted user.
     if targets:
@@ -435,56 +457,58 @@ def ooc_cmd_ban(client: ClientManager.Client, arg: str):
                                    is_officer=True, in_hub=None)
             c.disconnect()
 
+    duration = ' for {}'.format(Constants.time_format(length)) if length else ''
     plural = 's were' if len(targets) != 1 else ' was'
-    client.send_ooc('You banned `{}`. As a result, {} client{} kicked as well.'
-                    .format(idnt, len(targets), plural))
-    client.send_ooc_others('{} banned `{}`. As a result, {} client{} kicked as well.'
-                           .format(client.name, idnt, len(targets), plural),
+    client.send_ooc('You banned `{}`{}. As a result, {} client{} kicked as well.'
+                    .format(idnt, duration, len(targets), plural))
+    client.send_ooc_others('{} banned `{}`{}. As a result, {} client{} kicked as well.'
+                           .format(client.name, idnt, duration, len(targets), plural),
                            is_officer=True, in_hub=None)
-    logger.log_server('Banned {}.'.format(idnt), client)
+    logger.log_server('Banned {}{}.'.format(idnt, duration), client)
 
 
 def ooc_cmd_banhdid(client: ClientManager.Client, arg: str):
     """ (MOD ONLY)
     Similar to /ban (kicks given user from the server if they are there and prevents them from
     rejoining), but the identifier must be an HDID. It does not require the user to be online.
-    Requires /unbanhdid to undo.
+    If given a ban length (a number followed by m for minutes, h for hours or d for days), the
+    ban is lifted once that time passes. Otherwise, it requires /unbanhdid to undo.
     Returns an error if given identifier does not correspond to a user, or if the target is already
     banned.
 
     SYNTAX
-    /banhdid <client_hdid>
+    /banhdid <client_hdid> {ban_length}
 
     PARAMETERS
     <client_hdid>: User HDID (available in server logs and through a mod /whois)
 
+    OPTIONAL PARAMETERS
+    {ban_length}: Length of the ban, such as 30m, 12h or 7d
+
     EXAMPLES
     >>> /banhdid abcd1234
     Bans the user with HDID abcd1234.
+    >>> /banhdid abcd1234 30m
+    Bans the user with HDID abcd1234 for 30 minutes.
     """
 
-    Constants.assert_command(client, arg, is_mod=True, parameters='=1')
-
-    if arg not in client.server.hdid_list:
-        raise ClientError('Unrecognized HDID {}.'.format(arg))
+    Constants.assert_command(client, arg, is_mod=True, parameters='&1-2')
+    args = arg.split(' ')
+    hdid = args[0]
+    length = Constants.parse_ban_length(args[1]) if len(args) == 2 else None
 
-    # This works by banning one of the IPIDs the user is associated with. The way ban handling
-    # works is that the server keeps track of all the IPIDs a user has logged in with their HDID
-    # and checks on joining if any of those IPIDs was banned in the past. If that is the case,
-    # then the server assumes that player is banned, even if they have changed IPIDs in the meantime
+    ipids = client.server.get_hdid_ipids(hdid)
+    if not ipids:
+        raise ClientError('Unrecognized HDID {}.'.format(hdid))
 
-    # Thus, banning one IPID is sufficient, so check if any associated IPID is already banned.
-    for ipid in client.server.hdid_list[arg]:
-        if client.server.ban_manager.is_banned(ipid):
-            raise ClientError(f'User is already banned (banned IPID: {ipid}).')
-
-    identifier = random.choice(client.server.hdid_list[arg])
-    # Try and add the user to the ban list based on the given identifier
-    client.server.ban_manager.add_ban(identifier)
+    # The HDID itself is banned, so the user stays banned even if they change IPIDs. Users who
+    # join with an IPID that was seen with a banned HDID are refused as well once they send
+    # their HDID, so they cannot get back in by just changing their HDID.
+    client.server.ban_manager.add_hdid_ban(hdid, client=client, length=length)
 
     # Try and kick the user from the server, as well as announce their ban.
     targets = client.server.client_manager.get_targets(
-        client, TargetType.HDID, arg, False)
+        client, TargetType.HDID, hdid, False)
 
     # Kick+ban all clients opened by the targeted user.
     if targets:
@@ -498,13 +522,14 @@ def ooc_cmd_banhdid(client: ClientManager.Client, arg: str):
                                    is_officer=True, in_hub=None)
             c.disconnect()
 
+    duration = ' for {}'.format(Constants.time_format(length)) if length else ''
     plural = 's were' if len(targets) != 1 else ' was'
-    client.send_ooc('You banned HDID `{}`. As a result, {} client{} kicked as well.'
-                    .format(arg, len(targets), plural))
-    client.send_ooc_others('{} [{}] banned HDID `{}`. As a result, {} client{} kicked as well.'
-                           .format(client.name, client.id, arg, len(targets), plural),
+    client.send_ooc('You banned HDID `{}`{}. As a result, {} client{} kicked as well.'
+                    .format(hdid, duration, len(targets), plural))
+    client.send_ooc_others('{} [{}] banned HDID `{}`{}. As a result, {} client{} kicked as well.'
+                           .format(client.name, client.id, hdid, duration, len(targets), plural),
                            is_officer=True, in_hub=None)
-    logger.log_server('HDID-banned {}.'.format(identifier), client)
+    logger.log_server('HDID-banned {}{}.'.format(hdid, duration), client)
 
 
 def ooc_cmd_bg(client: ClientManager.Client, arg: str):
@@ -1596,7 +1621,7 @@ def ooc_cmd_char_restrict(client: ClientManager.Client, arg: str):
 
     # If intended character not in area's restriction, add it
     if arg not in client.area.restricted_chars:
-        client.area.restricted_chars.add(arg)
+        client.area.restrict_character(arg)
         # For all clients using the now restricted character, switch them to some other character.
         for c in client.area.clients:
             if not c.is_staff() and c.get_char_name() == arg:
@@ -1615,7 +1640,7 @@ def ooc_cmd_char_restrict(client: ClientManager.Client, arg: str):
                                   .format(c.id, arg, c.get_char_name(), c.area.id),
                                   is_zstaff_flex=True)
     else:
-        client.area.restricted_chars.remove(arg)
+        client.area.unrestrict_character(arg)
 
 
 def ooc_cmd_chars_restricted(client: ClientManager.Client, arg: str):
@@ -1837,8 +1862,7 @@ def ooc_cmd_clock(client: ClientManager.Client, arg: str):
 
     # If already existing day cycle. Will overwrite preexisting one
     # But first, make sure normies do not get a new notification.
-    normie_notif = not client.server.task_manager.is_task(
-        client, 'as_day_cycle')
+    normie_notif = not client.server.clock_manager.is_clock_owner(client)
 
     client.send_ooc(f'You initiated a day cycle of length {hour_length} seconds per hour in areas '
                     f'{area_1} through {area_2}. The cycle ID is {client.id}.')
@@ -1850,14 +1874,8 @@ def ooc_cmd_clock(client: ClientManager.Client, arg: str):
         client.send_ooc_others(f'{client.displayname} initiated a day cycle.',
                                is_zstaff_flex=False, pred=lambda c: area_1 <= c.area.id <= area_2)
 
-    client.server.task_manager.new_task(client, 'as_day_cycle', {
-        'area_1': area_1,
-        'area_2': area_2,
-        'hour_length': hour_length,
-        'hour_start': hour_start,
-        'hours_in_day': hours_in_day,
-        'send_first_hour': normie_notif,
-    })
+    client.server.clock_manager.new_clock(client, area_1, area_2, hour_length, hour_start,
+                                          hours_in_day, send_first_hour=normie_notif)
 
 
 def ooc_cmd_clock_end(client: ClientManager.Client, arg: str):
@@ -1890,8 +1908,8 @@ def ooc_cmd_clock_end(client: ClientManager.Client, arg: str):
         raise ArgumentError('Client {} is not online.'.format(arg))
 
     try:
-        client.server.task_manager.delete_task(c, 'as_day_cycle')
-    except TaskError.TaskNotFoundError:
+        client.server.clock_manager.end_clock(c)
+    except ClockError.ClockNotFoundError:
         raise ClientError(
             'Client {} has not initiated any day cycles.'.format(arg))
 
@@ -1928,19 +1946,18 @@ def ooc_cmd_clock_pause(client: ClientManager.Client, arg: str):
         raise ArgumentError('Client {} is not online.'.format(arg))
 
     try:
-        task = client.server.task_manager.get_task(c, 'as_day_cycle')
-    except TaskError.TaskNotFoundError:
+        clock = client.server.clock_manager.get_clock(c)
+    except ClockError.ClockNotFoundError:
         raise ClientError(
             'Client {} has not initiated any day cycles.'.format(arg))
 
-    if task.parameters['is_unknown']:
+    if clock.is_unknown:
         raise ClientError(
             'You may not pause the day cycle while the time is unknown.')
-    if task.parameters['is_paused']:
+    if clock.is_paused:
         raise ClientError('Day cycle is already paused.')
 
-    task.parameters['refresh_reason'] = 'pause'
-    client.server.task_manager.force_asyncio_cancelled_error(task)
+    clock.pause()
 
 
 def ooc_cmd_clock_period(client: ClientManager.Client, arg: str):
@@ -1979,13 +1996,13 @@ def ooc_cmd_clock_period(client: ClientManager.Client, arg: str):
     Constants.assert_command(client, arg, is_staff=True, parameters='&2-3')
 
     try:
-        task = client.server.task_manager.get_task(client, 'as_day_cycle')
-    except TaskError.TaskNotFoundError:
+        clock = client.server.clock_manager.get_clock(client)
+    except ClockError.ClockNotFoundError:
         raise ClientError('You have not initiated any day cycles.')
 
     args = arg.split()
-    hour_length = task.parameters['main_hour_length']
-    hours_in_day = task.parameters['hours_in_day']
+    hour_length = clock.main_hour_length
+    hours_in_day = clock.hours_in_day
 
     name = args[0].lower()
     pre_hour_start = args[2] if len(args) == 3 else args[1]
@@ -2005,9 +2022,7 @@ def ooc_cmd_clock_period(client: ClientManager.Client, arg: str):
     except ValueError:
         raise ArgumentError(f'Invalid period hour length {pre_hour_length}.')
 
-    task.parameters['new_period_start'] = (hour_start, name, hour_length)
-    task.parameters['refresh_reason'] = 'period'
-    client.server.task_manager.force_asyncio_cancelled_error(task)
+    clock.set_period(hour_start, name, hour_length)
 
 
 def ooc_cmd_clock_period_end(client: ClientManager.Client, arg: str):
@@ -2033,13 +2048,11 @@ def ooc_cmd_clock_period_end(client: ClientManager.Client, arg: str):
     Constants.assert_command(client, arg, is_staff=True, parameters='=1')
 
     try:
-        task = client.server.task_manager.get_task(client, 'as_day_cycle')
-    except TaskError.TaskNotFoundError:
+        clock = client.server.clock_manager.get_clock(client)
+    except ClockError.ClockNotFoundError:
         raise ClientError('You have not initiated any day cycles.')
 
-    task.parameters['new_period_start'] = (-1, arg, 0)
-    task.parameters['refresh_reason'] = 'period'
-    client.server.task_manager.force_asyncio_cancelled_error(task)
+    clock.set_period(-1, arg, 0)
 
 
 def ooc_cmd_clock_set(client: ClientManager.Client, arg: str):
@@ -2069,8 +2082,8 @@ def ooc_cmd_clock_set(client: ClientManager.Client, arg: str):
     Constants.assert_command(client, arg, is_staff=True, parameters='=2')
 
     try:
-        task = client.server.task_manager.get_task(client, 'as_day_cycle')
-    except TaskError.TaskNotFoundError:
+        clock = client.server.clock_manager.get_clock(client)
+    except ClockError.ClockNotFoundError:
         raise ClientError('You have not initiated any day cycles.')
 
     pre_hour_length, pre_hour_start = arg.split(' ')
@@ -2083,15 +2096,13 @@ def ooc_cmd_clock_set(client: ClientManager.Client, arg: str):
 
     try:
         hour_start = int(pre_hour_start)
-        hours_in_day = task.parameters['hours_in_day']
+        hours_in_day = clock.hours_in_day
         if hour_start < 0 or hour_start >= hours_in_day:
             raise ValueError
     except ValueError:
         raise ArgumentError('Invalid hour start {}.'.format(pre_hour_start))
 
-    task.parameters['new_day_cycle_args'] = (hour_length, hour_start)
-    task.parameters['refresh_reason'] = 'set'
-    client.server.task_manager.force_asyncio_cancelled_error(task)
+    clock.set_time(hour_length, hour_start)
 
 
 def ooc_cmd_clock_set_hours(client: ClientManager.Client, arg: str):
@@ -2120,8 +2131,8 @@ def ooc_cmd_clock_set_hours(client: ClientManager.Client, arg: str):
     Constants.assert_command(client, arg, is_staff=True, parameters='=1')
 
     try:
-        task = client.server.task_manager.get_task(client, 'as_day_cycle')
-    except TaskError.TaskNotFoundError:
+        clock = client.server.clock_manager.get_clock(client)
+    except ClockError.ClockNotFoundError:
         raise ClientError('You have not initiated any day cycles.')
 
     try:
@@ -2131,9 +2142,7 @@ def ooc_cmd_clock_set_hours(client: ClientManager.Client, arg: str):
     except ValueError:
         raise ArgumentError(f'Invalid number of hours per day {hours_in_day}.')
 
-    task.parameters['hours_in_day'] = hours_in_day
-    task.parameters['refresh_reason'] = 'set_hours'
-    client.server.task_manager.force_asyncio_cancelled_error(task)
+    clock.set_hours_in_day(hours_in_day)
 
 
 def ooc_cmd_clock_unknown(client: ClientManager.Client, arg: str):
@@ -2157,15 +2166,14 @@ def ooc_cmd_clock_unknown(client: ClientManager.Client, arg: str):
     Constants.assert_command(client, arg, is_staff=True, parameters='=0')
 
     try:
-        task = client.server.task_manager.get_task(client, 'as_day_cycle')
-    except TaskError.TaskNotFoundError:
+        clock = client.server.clock_manager.get_clock(client)
+    except ClockError.ClockNotFoundError:
         raise ClientError('You have not initiated any day cycles.')
 
-    if task.parameters['is_unknown']:
+    if clock.is_unknown:
         raise ClientError('Your day cycle already has unknown time.')
 
-    task.parameters['refresh_reason'] = 'unknown'
-    client.server.task_manager.force_asyncio_cancelled_error(task)
+    clock.set_unknown()
 
 
 def ooc_cmd_clock_unpause(client: ClientManager.Client, arg: str):
@@ -2200,19 +2208,18 @@ def ooc_cmd_clock_unpause(client: ClientManager.Client, arg: str):
         raise ArgumentError('Client {} is not online.'.format(arg))
 
     try:
-        task = client.server.task_manager.get_task(c, 'as_day_cycle')
-    except TaskError.TaskNotFoundError:
+        clock = client.server.clock_manager.get_clock(c)
+    except ClockError.ClockNotFoundError:
         raise ClientError(
             'Client {} has not initiated any day cycles.'.format(arg))
 
-    if task.parameters['is_unknown']:
+    if clock.is_unknown:
         raise ClientError(
             'You may not unpause the day cycle while the time is unknown.')
-    if not task.parameters['is_paused']:
+    if not clock.is_paused:
         raise ClientError('Day cycle is already unpaused.')
 
-    task.parameters['refresh_reason'] = 'unpause'
-    client.server.task_manager.force_asyncio_cancelled_error(task)
+    clock.unpause()
 
 
 def ooc_cmd_coinflip(client: ClientManager.Client, arg: str):
@@ -2289,8 +2296,8 @@ def ooc_cmd_cure(client: ClientManager.Client, arg: str):
     for effect in sorted_effects:
         # Check if the client is subject to a countdown for that effect
         try:
-            client.server.task_manager.delete_task(target, effect.async_name)
-        except TaskError.TaskNotFoundError:
+            client.server.effect_manager.cancel_effect(target, effect)
+        except EffectError.EffectNotFoundError:
             pass  # Do nothing if not subject to one
 
         if target != client:
@@ -2665,25 +2672,55 @@ def ooc_cmd_doc(client: ClientManager.Client, arg: str):
 def ooc_cmd_dump(client: ClientManager.Client, arg: str):
     """ (STAFF ONLY)
     Prepares a server dump containing debugging information about the server and saves it in the
-    server log files.
+    server log files. The dump is written in the background, and compressed if it is large.
+    If given sections, only those sections are included. Otherwise, all sections but the
+    character and music lists of each hub are included.
 
     SYNTAX
-    /dump
+    /dump {section_1} {section_2} ...
 
     PARAMETERS
-    None
+    {section_n}: One of packets, clients, areas, backgrounds, characters, music, reports, or all to
+    include every section.
 
     EXAMPLES
     >>> /dump
     May return something like this:
+    | $H: Preparing server dump.
     | $H: Generated server dump file logs/[2020-12-23T200220]D.log.
+    >>> /dump clients music
+    May return something like this:
+    | $H: Preparing server dump.
+    | $H: Generated server dump file logs/[2020-12-23T200235]D.log.gz.
     """
 
-    Constants.assert_command(client, arg, is_mod=True, parameters='=0')
+    Constants.assert_command(client, arg, is_mod=True)
+
+    if not arg:
+        sections = logger.DEFAULT_DUMP_SECTIONS
+    elif arg == 'all':
+        sections = logger.DUMP_SECTIONS
+    else:
+        sections = arg.split()
+        for section in sections:
+            if section not in logger.DUMP_SECTIONS:
+                raise ArgumentError(f'Invalid dump section {section}. Expected one of '
+                                    f'{", ".join(logger.DUMP_SECTIONS)} or all.')
 
     dump_message = f'Client {client.id} requested a server dump.'
-    file = logger.log_error(dump_message, client.server, errortype='D')
-    client.send_ooc(f'Generated server dump file {file}.')
+    future = logger.log_error_async(dump_message, client.server, errortype='D',
+                                    sections=sections)
+    client.send_ooc('Preparing server dump.')
+
+    def _send_file(future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            client.send_ooc(f'Unable to generate server dump file: {future.exception()}')
+        else:
+            client.send_ooc(f'Generated server dump file {future.result()}.')
+
+    future.add_done_callback(_send_file)
 
 
 def ooc_cmd_exit(client: ClientManager.Client, arg: str):
@@ -3998,7 +4035,7 @@ def ooc_cmd_ignore(client: ClientManager.Client, arg: str):
         raise ClientError(
             f'You are already ignoring {target.displayname} [{target.id}].')
 
-    client.ignored_players.add(target)
+    client.ignore(target)
     client.send_ooc(
         f'You are now ignoring {target.displayname} [{target.id}].')
 
@@ -4218,7 +4255,8 @@ def ooc_cmd_knock(client: ClientManager.Client, arg: str):
     if target_area.lobby_area:
         raise ClientError('You cannot knock the door to a lobby area.')
 
-    if target_area.name not in client.area.default_reachable_areas | client.area.reachable_areas:
+    if not (target_area.name in client.area.default_reachable_areas or
+            client.hub.area_manager.is_reachable(client.area, target_area)):
         raise ClientError('You tried to knock on the door to {} but you realized the room is too '
                           'far away.'.format(target_area.name))
 
@@ -4244,6 +4282,8 @@ def ooc_cmd_lasterror(client: ClientManager.Client, arg: str):
     error which is what is usually sent to the offending client).
     Note that ClientErrors, ServerErrors, AreaErrors and ArgumentErrors are usually caught by the
     server itself, and would not normally cause issues.
+    If the event loop lag monitor is enabled in the server configuration, it also shows a summary
+    of the recent event loop lag, including the stacks of the code running during the worst stalls.
     Returns an error if no errors had been raised and not been caught since server bootup.
 
     SYNTAX
@@ -4284,6 +4324,10 @@ def ooc_cmd_lasterror(client: ClientManager.Client, arg: str):
     client.send_ooc(
         f'The last uncaught error message was the following:\n{pre_info}')
 
+    if client.server.loop_monitor:
+        client.send_ooc(f'Recent event loop lag:\n{client.server.loop_monitor.get_report()}')
+    client.send_ooc(f'Structural checks:\n{client.server.structure_checker.get_report()}')
+
 
 def ooc_cmd_lights(client: ClientManager.Client, arg: str):
     """ (VARYING PRIVILEGES)
@@ -4947,19 +4991,17 @@ def ooc_cmd_minimap(client: ClientManager.Client, arg: str):
         info += '\r\n<ALL>'
     else:
         # Get all reachable areas and sort them by area ID
-        sorted_areas = sorted(client.area.visible_areas,
-                              key=lambda name: client.hub.area_manager.get_area_by_name(name).id)
+        sorted_areas = client.hub.area_manager.get_areas_by_names(client.area.visible_areas)
 
         # No areas found or just the current area found means there are no reachable areas.
-        if len(sorted_areas) == 0 or sorted_areas == [client.area.name]:
+        if len(sorted_areas) == 0 or sorted_areas == [client.area]:
             info += '\r\n*No areas available.'
         # Otherwise, build the list of all reachable areas
         else:
-            for area_name in sorted_areas:
-                if area_name == client.area.name:
+            for area in sorted_areas:
+                if area == client.area:
                     continue
-                area = client.hub.area_manager.get_area_by_name(area_name)
-                info += f'\r\n{area.id}-{area_name}'
+                info += f'\r\n{area.id}-{area.name}'
 
     client.send_ooc(info)
 
@@ -6660,7 +6702,7 @@ def ooc_cmd_party_invite(client: ClientManager.Client, arg: str):
     c, _, _ = client.server.client_manager.get_target_public(client, arg)
     # Check if invitee is in the same area
     if c.area != party.area:
-        if c.area.name in client.area.scream_range and not c.is_deaf:
+        if client.hub.area_manager.is_in_scream_range(client.area, c.area) and not c.is_deaf:
             msg = ('You hear screeching of someone asking you to join their party but they seem '
                    'too far away to even care all that much.')
             c.send_ooc(msg)
@@ -7146,7 +7188,7 @@ def ooc_cmd_passage_restore(client: ClientManager.Client, arg: str):
 
     for i in range(areas[0].id, areas[1].id+1):
         area = client.hub.area_manager.get_area_by_id(i)
-        area.reachable_areas = set(list(area.default_reachable_areas)[:])
+        area.reachable_areas = area.default_reachable_areas
         area.change_reachability_allowed = area.default_change_reachability_allowed
 
     if areas[0] == areas[1]:
@@ -7191,7 +7233,7 @@ def ooc_cmd_peek(client: ClientManager.Client, arg: str):
     target_area = Constants.parse_area_names(client, [arg])[0]
     if target_area == client.area:
         raise ClientError('You cannot peek into your current area.')
-    if target_area.name not in client.area.visible_areas:
+    if not client.hub.area_manager.is_visible(client.area, target_area):
         raise ClientError('You do not see a passage to that area.')
     if target_area.lobby_area:
         raise ClientError('You cannot peek into lobby areas.')
@@ -7200,7 +7242,7 @@ def ooc_cmd_peek(client: ClientManager.Client, arg: str):
 
     area_lock_ok = not (target_area.is_locked and not client.is_staff()
                         and client.ipid not in target_area.invite_list)
-    reachable_ok = target_area.name in client.area.reachable_areas
+    reachable_ok = client.hub.area_manager.is_reachable(client.area, target_area)
     # Two cases:
     # 1. if passage exists and area not locked
     # 2. Either is not true
@@ -7671,15 +7713,7 @@ def ooc_cmd_randommusic(client: ClientManager.Client, arg: str):
                           f'{Constants.time_format(delay)}.')
 
     # Find all music tracks
-    music_names = list()
-    music_list = client.music_manager.get_music()
-
-    for item in music_list:
-        songs = item['songs']
-        for song in songs:
-            name = song['name']
-            music_names.append(name)
-
+    music_names = client.music_manager.get_track_names()
     if not music_names:
         raise ClientError('No music tracks found in the current music list.')
 
@@ -8010,8 +8044,7 @@ def ooc_cmd_rplay(client: ClientManager.Client, arg: str):
     except ArgumentError:
         raise ArgumentError('You must specify a song.')
 
-    areas = {client.hub.area_manager.get_area_by_name(reachable_area_name)
-             for reachable_area_name in client.area.visible_areas}
+    areas = set(client.hub.area_manager.get_areas_by_names(client.area.visible_areas))
 
     track_name = arg
     fade_option = FadeOption.NO_FADE
@@ -8080,6 +8113,7 @@ def ooc_cmd_scream(client: ClientManager.Client, arg: str):
         raise ClientError('The IC chat in this area is currently locked.')
 
     arg = arg[:256]  # Cap
+    scream_areas = set(client.hub.area_manager.get_scream_range(client.area))
 
     if not client.is_gagged:
         client.send_ooc(f'You screamed `{arg}`.')
@@ -8090,7 +8124,7 @@ def ooc_cmd_scream(client: ClientManager.Client, arg: str):
                                    pred=lambda c: (not c.muted_global and
                                                    (c.area == client.area or
                                                     ((client.is_staff() or not c.area.ic_lock) and
-                                                     c.area.name in client.area.scream_range))))
+                                                     c.area in scream_areas))))
             client.send_ooc_others(f'(X) {client.displayname} [{client.id}] screamed `{arg}` '
                                    f'({client.area.id}).', is_zstaff_flex=True,
                                    pred=lambda c: not c.muted_global)
@@ -8114,7 +8148,7 @@ def ooc_cmd_scream(client: ClientManager.Client, arg: str):
                                   pred=lambda c: (not c.muted_global and
                                                   (c.area == client.area or
                                                    ((client.is_staff() or not c.area.ic_lock) and
-                                                    c.area.name in client.area.scream_range))))
+                                                    c.area in scream_areas))))
             client.send_ic_others(msg=arg, to_deaf=True,
                                   showname='???',
                                   folder=client.char_folder, char_id=client.char_id,
@@ -8122,7 +8156,7 @@ def ooc_cmd_scream(client: ClientManager.Client, arg: str):
                                   pred=lambda c: (not c.muted_global and
                                                   (c.area == client.area or
                                                    ((client.is_staff() or not c.area.ic_lock) and
-                                                    c.area.name in client.area.scream_range))))
+                                                    c.area in scream_areas))))
         else:
             client.send_ic_others(msg=arg, to_deaf=False,
                                   showname='[S]' +
@@ -8170,9 +8204,8 @@ def ooc_cmd_scream_range(client: ClientManager.Client, arg: str):
         info += '\r\n*No areas.'
     # Otherwise, build the list of all areas.
     else:
-        areas = [client.hub.area_manager.get_area_by_name(area_name)
-                 for area_name in client.area.scream_range]
-        for area in sorted(areas, key=lambda area: area.id):
+        areas = client.hub.area_manager.get_areas_by_names(client.area.scream_range)
+        for area in areas:
             info += '\r\n*{}-{}'.format(area.id, area.name)
 
     client.send_ooc(info)
@@ -8217,8 +8250,8 @@ def ooc_cmd_scream_set(client: ClientManager.Client, arg: str):
             'You cannot add or remove the current area from the scream range.')
 
     # If intended area not in range, add it
-    if intended_area.name not in client.area.scream_range:
-        client.area.scream_range.add(intended_area.name)
+    if not client.hub.area_manager.is_in_scream_range(client.area, intended_area):
+        client.area.scream_range |= {intended_area.name}
         client.send_ooc('Added area {} to the scream range of area {}.'
                         .format(intended_area.name, client.area.name))
         client.send_ooc_others('(X) {} [{}] added area {} to the scream range of area {} ({}).'
@@ -8228,7 +8261,7 @@ def ooc_cmd_scream_set(client: ClientManager.Client, arg: str):
                           .format(client.area.id, client.get_char_name(), intended_area.name,
                                   client.area.name), client)
     else:  # Otherwise, add it
-        client.area.scream_range.remove(intended_area.name)
+        client.area.scream_range -= {intended_area.name}
         client.send_ooc('Removed area {} from the scream range of area {}.'
                         .format(intended_area.name, client.area.name))
         client.send_ooc_others('(X) {} [{}] removed area {} from the scream range of area {} ({}).'
@@ -10155,22 +10188,26 @@ def ooc_cmd_trial_unlead(client: ClientManager.Client, arg: str):
 
 def ooc_cmd_unban(client: ClientManager.Client, arg: str):
     """ (MOD ONLY)
-    Removes given user from the server banlist, allowing them to rejoin the server.
-    Returns an error if given identifier does not correspond to a banned user.
+    Removes given user or IP range from the server banlist, allowing them to rejoin the server.
+    Returns an error if given identifier does not correspond to a banned user or IP range.
 
     SYNTAX
     /unban <client_ipid>
     /unban <client_ip>
+    /unban <ip_range>
 
     PARAMETERS
     <client_ipid>: IPID for the client (number in parentheses in /getarea)
     <client_ip>: user IP
+    <ip_range>: IP range in CIDR notation (IP followed by / and the number of fixed bits)
 
     EXAMPLES
     >>> /unban 1234567890
     Unbans the user with IPID 1234567890.
     >>> /unban 127.0.0.1
     Unbans the user with IP 127.0.0.1.
+    >>> /unban 203.0.113.0/24
+    Unbans the IP range from 203.0.113.0 to 203.0.113.255.
     """
 
     arg = arg.strip()
@@ -10183,7 +10220,9 @@ def ooc_cmd_unban(client: ClientManager.Client, arg: str):
         # IP Address
         idnt = arg.strip()
 
-    client.server.ban_manager.remove_ban(idnt)
+    ban = client.server.ban_manager.remove_ban(idnt, client=client)
+    if ban.kind == 'cidr':
+        idnt = ban.value
 
     client.send_ooc('Unbanned `{}`.'.format(idnt))
     client.send_ooc_others('{} [{}] unbanned `{}`.'
@@ -10210,16 +10249,20 @@ def ooc_cmd_unbanhdid(client: ClientManager.Client, arg: str):
 
     Constants.assert_command(client, arg, is_mod=True, parameters='=1')
 
-    if arg not in client.server.hdid_list:
+    ipids = client.server.get_hdid_ipids(arg)
+    if not ipids:
         raise ClientError('Unrecognized HDID {}.'.format(arg))
 
-    # The server checks for any associated banned IPID for a user, so in order to unban by HDID
-    # all the associated IPIDs must be unbanned.
+    # The server checks for any associated banned IPID for a user as well as the HDID itself, so
+    # in order to unban by HDID both the HDID and all the associated IPIDs must be unbanned.
 
     found_banned = False
-    for ipid in client.server.hdid_list[arg]:
+    if client.server.ban_manager.is_hdid_banned(arg):
+        client.server.ban_manager.remove_hdid_ban(arg, client=client)
+        found_banned = True
+    for ipid in ipids:
         if client.server.ban_manager.is_banned(ipid):
-            client.server.ban_manager.remove_ban(ipid)
+            client.server.ban_manager.remove_ban(ipid, client=client)
             found_banned = True
 
     if not found_banned:
@@ -10490,7 +10533,7 @@ def ooc_cmd_unignore(client: ClientManager.Client, arg: str):
         raise ClientError(
             f'You are already not ignoring {target.displayname} [{target.id}].')
 
-    client.ignored_players.remove(target)
+    client.unignore(target)
     client.send_ooc(
         f'You are no longer ignoring {target.displayname} [{target.id}].')
 
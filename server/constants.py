@@ -117,10 +117,6 @@ class Effects(Enum):
     def function(self):
         return self.value[2]
 
-    @property
-    def async_name(self):
-        return 'as_effect_{}'.format(self.name.lower())
-
 
 class _UniqueKeySafeLoader(yaml.SafeLoader):
     # Adapted from ErichBSchulz at https://stackoverflow.com/a/63215043
@@ -985,6 +981,26 @@ class Constants():
                             'Could not parse area `{}`.'.format(areas[i]))
         return area_list
 
+    @staticmethod
+    def parse_ban_length(ban_length: str) -> float:
+        """
+        Convert a ban length such as `30m`, `12h` or `7d` (minutes, hours or days) into seconds.
+        """
+
+        units = {'m': 60, 'h': 3600, 'd': 86400}
+        unit = ban_length[-1:].lower()
+        if unit not in units:
+            raise ClientError('Expected ban length in minutes, hours or days, such as 30m, 12h '
+                              'or 7d.')
+        try:
+            amount = int(ban_length[:-1])
+        except ValueError:
+            raise ClientError('Expected ban length in minutes, hours or days, such as 30m, 12h '
+                              'or 7d.')
+        if amount <= 0:
+            raise ClientError('Expected positive ban length.')
+        return amount * units[unit]
+
     @staticmethod
     def parse_effects(client: ClientManager.Client, effects: List[str]) -> Set[str]:
         """
@@ -0,0 +1,369 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the EffectManager class, which schedules timed effects (such as the ones
+poisons cause) on clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import typing
+
+from typing import Dict, List, Tuple, Union
+
+from server.constants import Constants, Effects
+from server.exceptions import EffectError
+
+if typing.TYPE_CHECKING:
+    # Avoid circular referencing
+    from server.client_manager import ClientManager
+    from server.hub_manager import _Hub
+    from server.tsuserver import TsuserverDR
+    from server.zone_manager import ZoneManager
+
+
+class EffectManager:
+    """
+    A manager for timed effects. Every effect of every client shares a single event loop timer
+    set to the earliest pending effect. Effects that are due within `batch_window` seconds of one
+    another are applied together, and staff members are sent one notification per zone for all
+    of them.
+    """
+
+    class TimedEffect:
+        """
+        An effect that will be set on (or removed from) a client after some time.
+        """
+
+        def __init__(
+            self,
+            client: ClientManager.Client,
+            effect: Effects,
+            new_value: bool,
+            start: float,
+            length: float,
+        ):
+            """
+            Create a timed effect.
+
+            Parameters
+            ----------
+            client : ClientManager.Client
+                Client the effect will be applied to.
+            effect : Effects
+                Effect to apply.
+            new_value : bool
+                Value the effect will be set to.
+            start : float
+                Event loop time the effect was scheduled at.
+            length : float
+                Time until the effect is applied (in seconds).
+            """
+
+            self.client = client
+            self.effect = effect
+            self.new_value = new_value
+            self.start = start
+            self.length = length
+            self.deadline = start + length
+
+        def __repr__(self):
+            return (f'EffectManager.TimedEffect({self.client.id}, {self.effect.name}, '
+                    f'{self.new_value}, {self.start}, {self.length})')
+
+    def __init__(self, server: TsuserverDR, batch_window: float = 0.1):
+        """
+        Create an effect manager.
+
+        Parameters
+        ----------
+        server : TsuserverDR
+            Server of the effect manager.
+        batch_window : float, optional
+            Effects due at most this many seconds after the earliest due effect are applied
+            together with it. Defaults to 0.1.
+        """
+
+        self.server = server
+        self.batch_window = batch_window
+
+        self._client_to_effects: Dict[ClientManager.Client,
+                                      Dict[Effects, EffectManager.TimedEffect]] = dict()
+        # Heap of (deadline, sequence number, timed effect) with lazy deletion: entries whose
+        # timed effect is no longer the pending one for its client and effect are stale.
+        self._heap: List[Tuple[float, int, EffectManager.TimedEffect]] = list()
+        self._sequence = itertools.count()
+        self._wakeup_handle: Union[asyncio.TimerHandle, None] = None
+        self._wakeup_at: Union[float, None] = None
+
+    @staticmethod
+    def get_time() -> float:
+        """
+        Return the current time of the event loop that schedules the effects.
+
+        Returns
+        -------
+        float
+            Current time.
+        """
+
+        return asyncio.get_event_loop().time()
+
+    def schedule_effect(
+        self,
+        client: ClientManager.Client,
+        effect: Effects,
+        length: float,
+        new_value: bool = True,
+    ) -> EffectManager.TimedEffect:
+        """
+        Schedule an effect to be applied to a client after some time, replacing any pending
+        timed effect the client had for that same effect.
+
+        Parameters
+        ----------
+        client : ClientManager.Client
+            Client the effect will be applied to.
+        effect : Effects
+            Effect to apply.
+        length : float
+            Time until the effect is applied (in seconds).
+        new_value : bool, optional
+            Value the effect will be set to. Defaults to True.
+
+        Returns
+        -------
+        EffectManager.TimedEffect
+            The scheduled timed effect.
+        """
+
+        timed_effect = self.TimedEffect(client, effect, new_value, self.get_time(), length)
+        if client not in self._client_to_effects:
+            self._client_to_effects[client] = dict()
+        self._client_to_effects[client][effect] = timed_effect
+
+        heapq.heappush(self._heap, (timed_effect.deadline, next(self._sequence), timed_effect))
+        self._rearm()
+        return timed_effect
+
+    def get_effect(self, client: ClientManager.Client,
+                   effect: Effects) -> EffectManager.TimedEffect:
+        """
+        Return the pending timed effect of a client for a particular effect.
+
+        Parameters
+        ----------
+        client : ClientManager.Client
+            Client to check.
+        effect : Effects
+            Effect to check.
+
+        Returns
+        -------
+        EffectManager.TimedEffect
+            Pending timed effect.
+
+        Raises
+        ------
+        EffectError.EffectNotFoundError
+            If the client has no pending timed effect for that effect.
+        """
+
+        try:
+            return self._client_to_effects[client][effect]
+        except KeyError:
+            raise EffectError.EffectNotFoundError
+
+    def get_remaining(self, client: ClientManager.Client, effect: Effects) -> float:
+        """
+        Return the time left until the pending timed effect of a client for a particular effect
+        is applied.
+
+        Parameters
+        ----------
+        client : ClientManager.Client
+            Client to check.
+        effect : Effects
+            Effect to check.
+
+        Returns
+        -------
+        float
+            Time left (in seconds).
+
+        Raises
+        ------
+        EffectError.EffectNotFoundError
+            If the client has no pending timed effect for that effect.
+        """
+
+        return self.get_effect(client, effect).deadline - self.get_time()
+
+    def cancel_effect(self, client: ClientManager.Client, effect: Effects):
+        """
+        Cancel the pending timed effect of a client for a particular effect. No messages are sent.
+
+        Parameters
+        ----------
+        client : ClientManager.Client
+            Client whose effect will be cancelled.
+        effect : Effects
+            Effect to cancel.
+
+        Raises
+        ------
+        EffectError.EffectNotFoundError
+            If the client has no pending timed effect for that effect.
+        """
+
+        try:
+            client_effects = self._client_to_effects[client]
+            client_effects.pop(effect)
+        except KeyError:
+            raise EffectError.EffectNotFoundError
+
+        if not client_effects:
+            self._client_to_effects.pop(client)
+        # The heap entry is now stale and will be discarded when reached
+
+    def cancel_client_effects(self, client: ClientManager.Client):
+        """
+        Cancel all pending timed effects of a client. No messages are sent.
+
+        Parameters
+        ----------
+        client : ClientManager.Client
+            Client whose effects will be cancelled.
+        """
+
+        self._client_to_effects.pop(client, None)
+
+    def _is_pending(self, timed_effect: EffectManager.TimedEffect) -> bool:
+        client_effects = self._client_to_effects.get(timed_effect.client)
+        return (client_effects is not None
+                and client_effects.get(timed_effect.effect) is timed_effect)
+
+    def _discard_stale_entries(self):
+        while self._heap and not self._is_pending(self._heap[0][2]):
+            heapq.heappop(self._heap)
+
+    def _rearm(self):
+        self._discard_stale_entries()
+        wakeup_at = self._heap[0][0] + self.batch_window if self._heap else None
+        if wakeup_at == self._wakeup_at:
+            return
+
+        if self._wakeup_handle:
+            self._wakeup_handle.cancel()
+            self._wakeup_handle = None
+        self._wakeup_at = wakeup_at
+        if wakeup_at is not None:
+            loop = asyncio.get_event_loop()
+            self._wakeup_handle = loop.call_at(wakeup_at, self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup_handle = None
+        self._wakeup_at = None
+
+        now = self.get_time()
+        due: List[EffectManager.TimedEffect] = list()
+        self._discard_stale_entries()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, timed_effect = heapq.heappop(self._heap)
+            self.cancel_effect(timed_effect.client, timed_effect.effect)
+            due.append(timed_effect)
+            self._discard_stale_entries()
+
+        try:
+            self.apply_effects(due)
+        finally:
+            self._rearm()
+
+    def apply_effects(self, timed_effects: List[EffectManager.TimedEffect]):
+        """
+        Apply the given timed effects, notifying each affected client and sending one notification
+        per zone to staff members for all the effects applied to players in that zone.
+
+        Parameters
+        ----------
+        timed_effects : List[EffectManager.TimedEffect]
+            Timed effects to apply.
+        """
+
+        # Group the effects by the staff members that would be notified of them
+        groups: Dict[Tuple[_Hub, Union[ZoneManager.Zone, None]],
+                     List[EffectManager.TimedEffect]] = dict()
+
+        for timed_effect in sorted(timed_effects,
+                                   key=lambda te: (te.client.id, te.effect.name)):
+            client, effect = timed_effect.client, timed_effect.effect
+            if timed_effect.new_value:
+                client.send_ooc('The effect `{}` kicked in.'.format(effect.name))
+            else:
+                client.send_ooc('The effect `{}` stopped.'.format(effect.name))
+            effect.function(client, timed_effect.new_value)
+
+            zone = client.zone_watched if client.zone_watched else client.area.in_zone
+            key = (client.hub, zone)
+            if key not in groups:
+                groups[key] = list()
+            groups[key].append(timed_effect)
+
+        for group in groups.values():
+            if len(group) == 1:
+                timed_effect = group[0]
+                client = timed_effect.client
+                if timed_effect.new_value:
+                    message = ('(X) {} [{}] is now subject to the effect `{}`.'
+                               .format(client.displayname, client.id, timed_effect.effect.name))
+                else:
+                    message = ('(X) {} [{}] is no longer subject to the effect `{}`.'
+                               .format(client.displayname, client.id, timed_effect.effect.name))
+                client.send_ooc_others(message, is_zstaff_flex=True)
+                continue
+
+            # Aggregate all effects by client for a single notification
+            lines: Dict[ClientManager.Client, List[str]] = dict()
+            for timed_effect in group:
+                if timed_effect.client not in lines:
+                    lines[timed_effect.client] = list()
+                name = timed_effect.effect.name
+                lines[timed_effect.client].append(
+                    f'`{name}`' if timed_effect.new_value else f'no longer `{name}`')
+
+            message = '(X) The following players are now subject to the following effects:'
+            for (client, actions) in lines.items():
+                message += '\r\n*{} [{}]: {}'.format(client.displayname, client.id,
+                                                      Constants.cjoin(actions, sort=False))
+
+            # As with single effects, affected players are only told their own effects once
+            sender = group[0].client
+            cond = Constants.build_cond(sender, in_hub=True, is_zstaff_flex=True,
+                                        not_to={timed_effect.client for timed_effect in group})
+            self.server.make_all_clients_do('send_ooc', message, pred=cond)
+
+    def __repr__(self):
+        return (f'EffectManager(server) || '
+                f'pending={self._client_to_effects}, '
+                f'wakeup_at={self._wakeup_at}')
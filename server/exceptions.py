@@ -396,3 +396,15 @@ class HubError(GameWithAreasError):
 class TaskError(TsuserverException):
     class TaskNotFoundError(TsuserverException):
         pass
+
+
+@recreate_subexceptions
+class ClockError(TsuserverException):
+    class ClockNotFoundError(TsuserverException):
+        pass
+
+
+@recreate_subexceptions
+class EffectError(TsuserverException):
+    class EffectNotFoundError(TsuserverException):
+        pass
@@ -39,12 +39,13 @@ same game manager.
 from __future__ import annotations
 
 import typing
-from typing import Any, Callable, Dict, Set, Tuple, Type, Union
+from typing import Any, Callable, Dict, Set, Tuple, Type, Union, FrozenSet, Mapping
 
 from server.exceptions import GameError, PlayerGroupError, TimerError
 from server.playergroup_manager import _PlayerGroup, PlayerGroupManager
 from server.timer_manager import Timer, TimerManager
 from server.subscriber import Listener, Publisher
+from server.structure_checker import gated_structure_check
 
 if typing.TYPE_CHECKING:
     from server.client_manager import ClientManager
@@ -1194,6 +1195,8 @@ class _Game(_GameTrivialInherited):
         if self.is_unmanaged():
             raise GameError.GameIsUnmanagedError
 
+        self.manager._touch_managee(self)
+
         try:
             timer = self._timer_manager.new_timer(
                 timer_type=timer_type,
@@ -1266,6 +1269,8 @@ class _Game(_GameTrivialInherited):
         if self.is_unmanaged():
             raise GameError.GameIsUnmanagedError
 
+        self.manager._touch_managee(self)
+
         try:
             timer_id = self._timer_manager.delete_timer(timer)
         except TimerError.ManagerDoesNotManageTimerError:
@@ -1456,6 +1461,8 @@ class _Game(_GameTrivialInherited):
         if self.is_unmanaged():
             raise GameError.GameIsUnmanagedError
 
+        self.manager._touch_managee(self)
+
         if team_type is None:
             team_type = _Team
 
@@ -1533,6 +1540,8 @@ class _Game(_GameTrivialInherited):
         if self.is_unmanaged():
             raise GameError.GameIsUnmanagedError
 
+        self.manager._touch_managee(self)
+
         try:
             return self._team_manager.delete_managee(team)
         except PlayerGroupError.ManagerDoesNotManageGroupError:
@@ -1825,6 +1834,7 @@ class _Game(_GameTrivialInherited):
             return
         self.remove_player(player)
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -2357,15 +2367,17 @@ class _GameManagerTrivialInherited(PlayerGroupManager):
 
         return super().get_managees_of_user(user)
 
-    def get_player_to_managees_map(self) -> Dict[ClientManager.Client, Set[_Game]]:
+    def get_player_to_managees_map(
+        self
+    ) -> Mapping[ClientManager.Client, FrozenSet[_Game]]:
         """
-        Return a mapping of the players part of any game managed by this manager to the
-        game managed by this manager such players belong to.
+        Return a read-only view of the mapping of the players part of any game managed by this
+        manager to the game managed by this manager such players belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_Game]]
-            Mapping.
+        Mapping[ClientManager.Client, FrozenSet[_Game]]
+            Mapping. It reflects later changes to game memberships.
         """
 
         return super().get_player_to_managees_map()
@@ -2476,6 +2488,7 @@ class GameManager(_GameManagerTrivialInherited):
             game_number += 1
         raise GameError.ManagerTooManyGamesError
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -24,12 +24,14 @@ Module that contains the base game with areas class.
 
 from __future__ import annotations
 
+import types
 import typing
-from typing import Callable, Dict, Set, Any, Tuple, Type, Union
+from typing import Callable, Dict, Set, Any, Tuple, Type, Union, FrozenSet, Mapping
 
 from server.exceptions import GameWithAreasError, GameError
 from server.game_manager import _Game, GameManager
 from server.timer_manager import Timer
+from server.structure_checker import gated_structure_check
 
 if typing.TYPE_CHECKING:
     # Avoid circular referencing
@@ -1676,6 +1678,7 @@ class _GameWithAreas(_GameWithAreasTrivialInherited):
         """
 
         self._autoadd_on_client_enter = new_value
+        self.manager._touch_managee(self)
 
     def unchecked_add_player(self, user: ClientManager.Client):
         """
@@ -1801,6 +1804,7 @@ class _GameWithAreas(_GameWithAreasTrivialInherited):
 
         self._ever_had_areas = True
         self._areas.add(area)
+        self.manager._add_to_area_managees(area, self)
         self.listener.subscribe(area)
 
     def remove_area(self, area: AreaManager.Area):
@@ -1879,6 +1883,7 @@ class _GameWithAreas(_GameWithAreasTrivialInherited):
 
     def _cleanup_remove_area(self, area: AreaManager.Area):
         self._areas.discard(area)
+        self.manager._remove_from_area_managees(area, self)
         self.listener.unsubscribe(area)
 
     def requires_areas(self) -> bool:
@@ -2142,6 +2147,7 @@ class _GameWithAreas(_GameWithAreasTrivialInherited):
         # print('Received DESTRUCTION', area)
         self.remove_area(area)
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -2343,7 +2349,7 @@ class _GameWithAreasManagerTrivialInherited(GameManager):
             area_concurrent_limit=area_concurrent_limit,
             autoadd_on_client_enter=autoadd_on_client_enter,
             autoadd_on_creation_existing_users=autoadd_on_creation_existing_users,
-            require_area=require_areas,
+            require_areas=require_areas,
             **kwargs,
         )
         self._check_structure()
@@ -2575,15 +2581,17 @@ class _GameWithAreasManagerTrivialInherited(GameManager):
 
         return super().get_managees_of_user(user)
 
-    def get_player_to_managees_map(self) -> Dict[ClientManager.Client, Set[_GameWithAreas]]:
+    def get_player_to_managees_map(
+        self
+    ) -> Mapping[ClientManager.Client, FrozenSet[_GameWithAreas]]:
         """
-        Return a mapping of the players part of any game with areas managed by this manager to the
-        game with areas managed by this manager such players belong to.
+        Return a read-only view of the mapping of the players part of any game with areas managed
+        by this manager to the game with areas managed by this manager such players belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_GameWithAreas]]
-            Mapping.
+        Mapping[ClientManager.Client, FrozenSet[_GameWithAreas]]
+            Mapping. It reflects later changes to game with areas memberships.
         """
 
         return super().get_player_to_managees_map()
@@ -2672,7 +2680,11 @@ class GameWithAreasManager(_GameWithAreasManagerTrivialInherited):
     #     a. For every game with areas `game` in `games`:
     #           1. `game` has no area concurrent membership limit, or it is at least the length
     #               of `games`.
+    #     b. `games` are exactly the games with areas managed by this manager `area` is part of.
     # 2. The invariants of the parent class are maintained.
+    #
+    # If structural checks are incremental, invariant 1 is only asserted for the areas of touched
+    # games with areas and the areas in `self._touched_areas`.
 
     def __init__(
         self,
@@ -2704,6 +2716,8 @@ class GameWithAreasManager(_GameWithAreasManagerTrivialInherited):
             managee_limit=managee_limit,
             default_managee_type=default_managee_type
         )
+        self._area_to_managees: Dict[AreaManager.Area, FrozenSet[_GameWithAreas]] = dict()
+        self._touched_areas: Set[AreaManager.Area] = set()
 
     def unchecked_new_managee(
         self,
@@ -2829,6 +2843,10 @@ class GameWithAreasManager(_GameWithAreasManagerTrivialInherited):
         except GameError.ManagerTooManyGamesError:
             raise GameWithAreasError.ManagerTooManyGamesError
 
+        # Record areas the game with areas added to itself while it was being created
+        for area in game.get_areas():
+            self._add_to_area_managees(area, game)
+
         try:
             for area in areas:
                 game.unchecked_add_area(area)
@@ -2903,11 +2921,7 @@ class GameWithAreasManager(_GameWithAreasManagerTrivialInherited):
 
         """
 
-        areas_to_managees = self.get_areas_to_managees_map()
-        try:
-            return areas_to_managees[area].copy()
-        except KeyError:
-            return set()
+        return set(self._area_to_managees.get(area, frozenset()))
 
     def find_area_concurrent_limiting_managee(
         self,
@@ -2953,26 +2967,81 @@ class GameWithAreasManager(_GameWithAreasManagerTrivialInherited):
             return None
         return most_restrictive_game
 
-    def get_areas_to_managees_map(self) -> Dict[ClientManager.Client, Set[_GameWithAreas]]:
+    def get_areas_to_managees_map(
+        self
+    ) -> Mapping[AreaManager.Area, FrozenSet[_GameWithAreas]]:
         """
-        Return a mapping of the areas part of any game with areas managed by this manager to the
-        game with areas managed by this manager such players belong to.
+        Return a read-only view of the mapping of the areas part of any game with areas managed by
+        this manager to the game with areas managed by this manager such areas belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_GameWithAreas]]
-            Mapping.
+        Mapping[AreaManager.Area, FrozenSet[_GameWithAreas]]
+            Mapping. It reflects later changes to game with areas areas.
+        """
+
+        return types.MappingProxyType(self._area_to_managees)
+
+    def _add_to_area_managees(self, area: AreaManager.Area, managee: _GameWithAreas):
+        """
+        Record that an area was added to a game with areas managed by this manager. If the game
+        with areas is not managed by this manager, do nothing.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area that was added.
+        managee : _GameWithAreas
+            Game with areas the area was added to.
+
+        """
+
+        # Areas of games with areas that are still being created are recorded once the game with
+        # areas is managed.
+        if not self.manages_managee(managee):
+            return
+        self._area_to_managees[area] = self._area_to_managees.get(area, frozenset()) | {managee}
+        self._touch_managee(managee)
+        self._touch_area(area)
+
+    def _remove_from_area_managees(self, area: AreaManager.Area, managee: _GameWithAreas):
         """
+        Record that an area is no longer part of a game with areas managed by this manager.
+        If it was already not recorded as such, do nothing.
 
-        output = dict()
-        for group in self.get_managees():
-            for area in group.get_areas():
-                if area not in output:
-                    output[area] = set()
-                output[area].add(group)
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area that was removed.
+        managee : _GameWithAreas
+            Game with areas the area was removed from.
+
+        """
+
+        remaining = self._area_to_managees.get(area, frozenset()) - {managee}
+        if remaining:
+            self._area_to_managees[area] = remaining
+        else:
+            self._area_to_managees.pop(area, None)
+        self._touch_managee(managee)
+        self._touch_area(area)
+
+    def _touch_area(self, area: AreaManager.Area):
+        """
+        Record that the games with areas an area is part of changed, so that the next incremental
+        structural check of this manager asserts the invariants relating them.
 
-        return output
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area whose games with areas changed.
+
+        """
 
+        if self._is_checked_incrementally():
+            self._touched_areas.add(area)
+
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -2985,7 +3054,40 @@ class GameWithAreasManager(_GameWithAreasManagerTrivialInherited):
         """
 
         # 1.
-        area_to_games = self.get_areas_to_managees_map()
+        if self._is_checked_incrementally():
+            # 1b.
+            for game in self._get_checked_managees():
+                for area in game.get_areas():
+                    assert game in self._area_to_managees.get(area, frozenset()), (
+                        f'For game with areas manager {self}, expected that its area to game with '
+                        f'areas mapping listed area {area} of game with areas {game}, but found '
+                        f'it did not.'
+                    )
+
+            area_to_games = {area: self._area_to_managees.get(area, frozenset())
+                             for area in self._touched_areas}
+            for (area, games) in area_to_games.items():
+                for game in games:
+                    assert self.manages_managee(game) and game.has_area(area), (
+                        f'For game with areas manager {self}, expected that its area to game '
+                        f'with areas mapping only listed game with areas {game} for area {area} '
+                        f'if the area was part of it, but found it was not.'
+                    )
+        else:
+            area_to_games = dict()
+            for game in self.get_managees():
+                for area in game.get_areas():
+                    if area not in area_to_games:
+                        area_to_games[area] = set()
+                    area_to_games[area].add(game)
+
+            # 1b.
+            assert area_to_games == self._area_to_managees, (
+                f'For game with areas manager {self}, expected that its area to game with areas '
+                f'mapping {dict(self._area_to_managees)} matched the areas of its games with '
+                f'areas {area_to_games}, but found it did not.'
+            )
+
         for (area, games) in area_to_games.items():
             membership = len(games)
 
@@ -3002,6 +3104,8 @@ class GameWithAreasManager(_GameWithAreasManagerTrivialInherited):
                     f'areas. || {self}'
                 )
 
+        self._touched_areas.clear()
+
         # Last
         super()._check_structure()
 
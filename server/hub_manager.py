@@ -36,8 +36,9 @@ from server.exceptions import AreaError, HubError, GameWithAreasError, ServerErr
 from server.gamewithareas_manager import _GameWithAreas, GameWithAreasManager
 from server.music_manager import MusicManager
 
-from typing import Callable, Dict, List, Set, Any, Tuple, Type, Union
+from typing import Callable, Dict, List, Set, Any, Tuple, Type, Union, FrozenSet, Mapping
 
+from server.structure_checker import gated_structure_check
 from server.trial_manager import TrialManager
 from server.zone_manager import ZoneManager
 
@@ -1920,6 +1921,30 @@ class _Hub(_HubTrivialInherited):
 
         return "hub"
 
+    def unchecked_add_player(self, user: ClientManager.Client):
+        """
+        Make a user a player of the hub, and make the hub the hub of the user. By default this
+        player will not be a leader, unless the hub has no leaders and it requires a leader.
+
+        As a player must be in an area of the hub, removing them does not change their hub.
+
+        This method does not assert structural integrity.
+
+        Parameters
+        ----------
+        user : ClientManager.Client
+            User to add to the hub. They must be in an area part of the hub.
+
+        Raises
+        ------
+        Any error from the parent class's unchecked_add_player(user)
+            If the user could not be added to the hub.
+
+        """
+
+        super().unchecked_add_player(user)
+        user.hub = self
+
     def get_password(self) -> str:
         """
         Get the password of the hub.
@@ -1958,6 +1983,7 @@ class _Hub(_HubTrivialInherited):
         """
 
         self._password = new_password
+        self.manager._touch_managee(self)
 
     def is_password(self, guess: str) -> bool:
         """
@@ -2091,6 +2117,12 @@ class _Hub(_HubTrivialInherited):
 
         # Only now update internally. This is to allow `change_character` to work properly.
         self.character_manager.load_file(source_file)
+        # Areas store the IDs of their restricted characters, which may have changed. On the first
+        # load there are no areas yet.
+        if old_characters:
+            for area in self.area_manager.get_areas():
+                area.refresh_restricted_char_ids()
+
         for client in self.get_players():
             old_char_name = old_client_char_names[client]
             if client.packet_handler.ALLOWS_CHAR_LIST_RELOAD:
@@ -2353,6 +2385,7 @@ class _Hub(_HubTrivialInherited):
             new_char_name=new_char_name,
         )
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -2725,15 +2758,17 @@ class _HubManagerTrivialInherited(GameWithAreasManager):
 
         return super().get_managees_of_user(user)
 
-    def get_player_to_managees_map(self) -> Dict[ClientManager.Client, Set[_Hub]]:
+    def get_player_to_managees_map(
+        self
+    ) -> Mapping[ClientManager.Client, FrozenSet[_Hub]]:
         """
-        Return a mapping of the players part of any hub managed by this manager to the
-        hub managed by this manager such players belong to.
+        Return a read-only view of the mapping of the players part of any hub managed by this
+        manager to the hub managed by this manager such players belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_Hub]]
-            Mapping.
+        Mapping[ClientManager.Client, FrozenSet[_Hub]]
+            Mapping. It reflects later changes to hub memberships.
         """
 
         return super().get_player_to_managees_map()
@@ -2809,15 +2844,17 @@ class _HubManagerTrivialInherited(GameWithAreasManager):
 
         return super().find_area_concurrent_limiting_managee(area)
 
-    def get_areas_to_managees_map(self) -> Dict[ClientManager.Client, Set[_Hub]]:
+    def get_areas_to_managees_map(
+        self
+    ) -> Mapping[AreaManager.Area, FrozenSet[_Hub]]:
         """
-        Return a mapping of the areas part of any hub managed by this manager to the
-        hub managed by this manager such players belong to.
+        Return a read-only view of the mapping of the areas part of any hub managed by this
+        manager to the hub managed by this manager such areas belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_Hub]]
-            Mapping.
+        Mapping[AreaManager.Area, FrozenSet[_Hub]]
+            Mapping. It reflects later changes to hub areas.
         """
 
         return super().get_areas_to_managees_map()
@@ -2877,7 +2914,12 @@ class HubManager(_HubManagerTrivialInherited):
     # Invariants
     # ----------
     # 1. If `self.get_managees()` is empty, then `self._ever_had_hubs` is True.
-    # 2. The invariants of the parent class are maintained.
+    # 2. For every player `player` of a hub `hub` managed by this manager, `player.hub` is `hub`,
+    #    and `hub` is the only hub managed by this manager `player` is a player of.
+    # 3. The invariants of the parent class are maintained.
+    #
+    # If structural checks are incremental, invariant 2 is only asserted for the players of touched
+    # hubs and the touched users.
 
     def __init__(
         self,
@@ -3083,6 +3125,33 @@ class HubManager(_HubManagerTrivialInherited):
 
         """
 
+        hub = user.hub
+        if not self.manages_managee(hub) or not hub.is_player(user):
+            raise HubError.UserNotPlayerError
+        return hub
+
+    def _find_managee_of_user(self, user: ClientManager.Client) -> _Hub:
+        """
+        Get the hub the user is in by checking every hub the user is a player of, rather than
+        relying on the hub of the user. This is meant for structural checks.
+
+        Parameters
+        ----------
+        user : ClientManager.Client
+            User to check.
+
+        Raises
+        ------
+        HubError.UserNotPlayerError
+            If the user is not in a hub managed by this manager.
+
+        Returns
+        -------
+        HubManager.Hub
+            Hub of the user.
+
+        """
+
         games = self.get_managees_of_user(user)
         hubs = {game for game in games if isinstance(game, _Hub)}
         if not hubs:
@@ -3135,6 +3204,7 @@ class HubManager(_HubManagerTrivialInherited):
 
         return prepared_list
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -3158,4 +3228,21 @@ class HubManager(_HubManagerTrivialInherited):
             )
 
         # 2.
+        if self._is_checked_incrementally():
+            hubs = self._get_checked_managees()
+            for user in self._touched_users:
+                for hub in self.get_managees_of_user(user):
+                    assert user.hub == hub, (
+                        f'For hub manager {self}, expected that player {user} of hub {hub} had '
+                        f'that hub as their hub, found their hub was {user.hub}.'
+                    )
+
+        for hub in hubs:
+            for player in hub.get_players():
+                assert player.hub == hub == self._find_managee_of_user(player), (
+                    f'For hub manager {self}, expected that player {player} of hub {hub} had '
+                    f'that hub as their hub, found their hub was {player.hub}.'
+                )
+
+        # 3.
         super()._check_structure()
@@ -25,10 +25,11 @@ Module that contains the base hubbed game class.
 from __future__ import annotations
 
 import typing
-from typing import Callable, Dict, Set, Any, Tuple, Type, Union
+from typing import Callable, Dict, Set, Any, Tuple, Type, Union, FrozenSet, Mapping
 
 from server.exceptions import HubbedGameError, GameWithAreasError
 from server.gamewithareas_manager import _GameWithAreas, GameWithAreasManager
+from server.structure_checker import gated_structure_check
 
 if typing.TYPE_CHECKING:
     # Avoid circular referencing
@@ -2129,6 +2130,7 @@ class _HubbedGame(_HubbedGameTrivialInherited):
         except GameWithAreasError.AreaHitGameConcurrentLimitError:
             raise HubbedGameError.AreaHitGameConcurrentLimitError
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -2683,15 +2685,17 @@ class _HubbedGameManagerTrivialInherited(GameWithAreasManager):
 
         return super().get_managees_of_user(user)
 
-    def get_player_to_managees_map(self) -> Dict[ClientManager.Client, Set[_HubbedGame]]:
+    def get_player_to_managees_map(
+        self
+    ) -> Mapping[ClientManager.Client, FrozenSet[_HubbedGame]]:
         """
-        Return a mapping of the players part of any hubbed game managed by this manager to the
-        hubbed game managed by this manager such players belong to.
+        Return a read-only view of the mapping of the players part of any hubbed game managed by
+        this manager to the hubbed game managed by this manager such players belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_HubbedGame]]
-            Mapping.
+        Mapping[ClientManager.Client, FrozenSet[_HubbedGame]]
+            Mapping. It reflects later changes to hubbed game memberships.
         """
 
         return super().get_player_to_managees_map()
@@ -2807,15 +2811,17 @@ class _HubbedGameManagerTrivialInherited(GameWithAreasManager):
 
         return super().find_player_concurrent_limiting_managee(user)
 
-    def get_areas_to_managees_map(self) -> Dict[ClientManager.Client, Set[_HubbedGame]]:
+    def get_areas_to_managees_map(
+        self
+    ) -> Mapping[AreaManager.Area, FrozenSet[_HubbedGame]]:
         """
-        Return a mapping of the areas part of any hubbed game managed by this manager to the
-        hubbed game managed by this manager such players belong to.
+        Return a read-only view of the mapping of the areas part of any hubbed game managed by this
+        manager to the hubbed game managed by this manager such areas belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_HubbedGame]]
-            Mapping.
+        Mapping[AreaManager.Area, FrozenSet[_HubbedGame]]
+            Mapping. It reflects later changes to hubbed game areas.
         """
 
         return super().get_areas_to_managees_map()
@@ -2891,6 +2897,7 @@ class HubbedGameManager(_HubbedGameManagerTrivialInherited):
             game_number += 1
         raise HubbedGameError.ManagerTooManyGamesError
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
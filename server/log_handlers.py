@@ -0,0 +1,490 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the logging handlers the server logs through, which hand log records to a
+background thread so that logging never blocks the event loop on disk I/O.
+"""
+
+import concurrent.futures
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import sys
+import time
+
+from typing import Any, Callable, Dict, Union
+
+
+class ClientFormatter(logging.Formatter):
+    """
+    A formatter for records that may carry the log prefix of the client they are about in their
+    `client_prefix` attribute. Records without one are formatted with an empty prefix.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Record to format.
+
+        Returns
+        -------
+        str
+            Formatted record.
+        """
+
+        if not hasattr(record, 'client_prefix'):
+            record.client_prefix = ''
+        return super().format(record)
+
+
+class _BatchedFileHandler(logging.FileHandler):
+    """
+    A file handler that flushes its file once every `batch_size` records, or as soon as there
+    are no more records waiting in the queue it is fed from, rather than after every record.
+
+    The name of the file is a `time.strftime` pattern evaluated in UTC, so it changes as time
+    passes (for example, once a month for `logs/server-%Y-%m.log`). The file may also have a
+    maximum size. Whenever the name changes or the file would exceed its maximum size, the file is
+    archived as the next numbered segment of its name (for example, `logs/server-2022-10.3.log`),
+    which is then compressed with gzip in a background thread. Compressed segments may be deleted
+    after a while, or once there are too many.
+
+    If an indexer is given, each archived segment is also given a JSON sidecar index (for
+    example, `logs/server-2022-10.3.log.idx.json`) with what the indexer returns for it.
+    """
+
+    def __init__(
+        self,
+        filename_pattern: str,
+        record_queue: queue.Queue,
+        batch_size: int,
+        max_bytes: Union[int, None] = None,
+        max_archives: Union[int, None] = None,
+        max_archive_days: Union[float, None] = None,
+        indexer: Union[Callable[[str], Dict[str, Any]], None] = None,
+    ):
+        """
+        Create a batched file handler. Segments left uncompressed and files of past periods are
+        archived and compressed.
+
+        Parameters
+        ----------
+        filename_pattern : str
+            Pattern of the name of the file to write to.
+        record_queue : queue.Queue
+            Queue the records handled come from.
+        batch_size : int
+            Maximum number of records written between flushes.
+        max_bytes : Union[int, None], optional
+            Size in bytes past which the file is archived. Defaults to None (no limit).
+        max_archives : Union[int, None], optional
+            Maximum number of compressed segments kept, oldest first deleted. Defaults to None
+            (no limit).
+        max_archive_days : Union[float, None], optional
+            Number of days after which compressed segments are deleted. Defaults to None (kept
+            forever).
+        indexer : Union[Callable[[str], Dict[str, Any]], None], optional
+            Function that returns the sidecar index of an uncompressed segment. Defaults to None
+            (segments have no sidecar index).
+        """
+
+        self._filename_pattern = filename_pattern
+        self._next_filename_check = 0
+        super().__init__(self._get_filename(time.time()), encoding='utf-8')
+
+        self._record_queue = record_queue
+        self._batch_size = batch_size
+        self._unflushed = 0
+        self._max_bytes = max_bytes
+        self._max_archives = max_archives
+        self._max_archive_days = max_archive_days
+        self._indexer = indexer
+        self._size = os.path.getsize(self.baseFilename)
+
+        directory, name_pattern = os.path.split(os.path.abspath(filename_pattern))
+        stem_pattern, extension = os.path.splitext(name_pattern)
+        stem_regex = re.sub('%[a-zA-Z]', '[^.]+', re.escape(stem_pattern))
+        self._directory = directory
+        self._extension = extension
+        self._file_regex = re.compile(f'{stem_regex}{re.escape(extension)}')
+        self._segment_regex = re.compile(rf'(.+)\.(\d+){re.escape(extension)}(\.gz)?')
+        self._archiver = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        for name in os.listdir(self._directory):
+            path = os.path.join(self._directory, name)
+            if self._is_own_segment(name, compressed=False):
+                self._archiver.submit(self._compress, path)
+            elif self._file_regex.fullmatch(name) and path != self.baseFilename:
+                self._archive(path)
+
+    def _is_own_segment(self, name: str, compressed: bool) -> bool:
+        """
+        Return whether a file name is that of a segment of a file this handler writes to.
+
+        Parameters
+        ----------
+        name : str
+            File name.
+        compressed : bool
+            Whether to look for compressed or uncompressed segments.
+
+        Returns
+        -------
+        bool
+            True if the file is a segment as described, False otherwise.
+        """
+
+        match = self._segment_regex.fullmatch(name)
+        if not match or bool(match.group(3)) != compressed:
+            return False
+        return bool(self._file_regex.fullmatch(f'{match.group(1)}{self._extension}'))
+
+    def _get_filename(self, created: float) -> str:
+        """
+        Return the name of the file records created at a given time are written to.
+
+        Parameters
+        ----------
+        created : float
+            Time, in seconds since the epoch.
+
+        Returns
+        -------
+        str
+            Absolute path of the file.
+        """
+
+        return os.path.abspath(time.strftime(self._filename_pattern, time.gmtime(created)))
+
+    def _archive(self, path: str):
+        """
+        Rename a file to the next free numbered segment of its name, and compress it in the
+        background. Empty files are deleted instead.
+
+        Parameters
+        ----------
+        path : str
+            File to archive.
+        """
+
+        if not os.path.getsize(path):
+            os.remove(path)
+            return
+
+        directory, name = os.path.split(path)
+        stem, extension = os.path.splitext(name)
+        numbers = [0]
+        for other_name in os.listdir(directory):
+            match = self._segment_regex.fullmatch(other_name)
+            if match and match.group(1) == stem:
+                numbers.append(int(match.group(2)))
+
+        segment = os.path.join(directory, f'{stem}.{max(numbers)+1}{extension}')
+        os.rename(path, segment)
+        self._archiver.submit(self._compress, segment)
+
+    def _compress(self, path: str):
+        """
+        Index a segment if needed, compress it with gzip, delete the uncompressed segment and then
+        apply the retention policy. This is run by the archiver thread.
+
+        Parameters
+        ----------
+        path : str
+            Segment to compress.
+        """
+
+        try:
+            if self._indexer:
+                with open(f'{path}.idx.json.part', 'w', encoding='utf-8') as index_file:
+                    json.dump(self._indexer(path), index_file)
+                os.replace(f'{path}.idx.json.part', f'{path}.idx.json')
+
+            with open(path, 'rb') as source, gzip.open(f'{path}.gz.part', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.replace(f'{path}.gz.part', f'{path}.gz')
+            os.remove(path)
+            self._prune()
+        except OSError as ex:
+            print(f'Unable to compress log segment {path}: {ex}', file=sys.stderr)
+
+    def _prune(self):
+        """
+        Delete compressed segments older than the maximum number of days to keep them, and then
+        the oldest ones past the maximum number of compressed segments.
+        """
+
+        if self._max_archives is None and self._max_archive_days is None:
+            return
+
+        archives = list()
+        for name in os.listdir(self._directory):
+            if self._is_own_segment(name, compressed=True):
+                path = os.path.join(self._directory, name)
+                archives.append((os.path.getmtime(path), path))
+        archives.sort()
+
+        expired = list()
+        if self._max_archive_days is not None:
+            cutoff = time.time() - self._max_archive_days*86400
+            while archives and archives[0][0] < cutoff:
+                expired.append(archives.pop(0)[1])
+        if self._max_archives is not None:
+            while len(archives) > self._max_archives:
+                expired.append(archives.pop(0)[1])
+
+        for path in expired:
+            os.remove(path)
+            # Remove the sidecar index, if any
+            index_path = f'{path[:-len(".gz")]}.idx.json'
+            if os.path.exists(index_path):
+                os.remove(index_path)
+
+    def _rotate(self, filename: str):
+        """
+        Close the current file, archive it and start writing to a new file.
+
+        Parameters
+        ----------
+        filename : str
+            Absolute path of the new file.
+        """
+
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self._unflushed = 0
+
+        if os.path.exists(self.baseFilename):
+            self._archive(self.baseFilename)
+        self.baseFilename = filename
+        self.stream = self._open()
+        self._size = os.path.getsize(self.baseFilename)
+
+    def emit(self, record: logging.LogRecord):
+        """
+        Write a record to the file, rotating it first if needed, and flush the file if enough
+        records were written since the last flush or no other records are waiting to be written.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Record to write.
+        """
+
+        try:
+            # File names are checked at most once a minute.
+            if record.created >= self._next_filename_check:
+                self._next_filename_check = record.created - record.created % 60 + 60
+                filename = self._get_filename(record.created)
+                if filename != self.baseFilename:
+                    self._rotate(filename)
+
+            if self.stream is None:
+                self.stream = self._open()
+            line = self.format(record) + self.terminator
+            # Sizes are in bytes, which for non-ASCII text is more than the number of characters
+            line_size = len(line.encode(self.encoding))
+            if (self._max_bytes is not None and self._size
+                    and self._size + line_size > self._max_bytes):
+                self._rotate(self.baseFilename)
+
+            self.stream.write(line)
+            self._size += line_size
+            self._unflushed += 1
+            if self._unflushed >= self._batch_size or self._record_queue.empty():
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """
+        Flush the file.
+        """
+
+        super().flush()
+        self._unflushed = 0
+
+    def close(self):
+        """
+        Close the file, and wait for pending compressions to finish.
+        """
+
+        super().close()
+        self._archiver.shutdown(wait=True)
+
+
+class _BlockingStopQueueListener(logging.handlers.QueueListener):
+    """
+    A queue listener that waits for space in its queue to tell its thread to stop, so that it can
+    be stopped even if its queue is full.
+    """
+
+    def enqueue_sentinel(self):
+        """
+        Put the sentinel that tells the thread to stop in the queue, waiting for space if needed.
+        """
+
+        self.queue.put(self._sentinel)
+
+
+class QueuedFileHandler(logging.handlers.QueueHandler):
+    """
+    A logging handler that puts records in a bounded queue, from which a background thread writes
+    them to a file in batches. If the queue is full, records are dropped and counted rather than
+    waited on.
+
+    The file written to may be rotated by time and size, with its archived segments compressed
+    and eventually deleted (see `_BatchedFileHandler`).
+
+    Closing the handler writes all queued records and stops the background thread.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        formatter: logging.Formatter,
+        level: int = logging.NOTSET,
+        capacity: int = 10000,
+        batch_size: int = 100,
+        max_bytes: Union[int, None] = None,
+        max_archives: Union[int, None] = None,
+        max_archive_days: Union[float, None] = None,
+        indexer: Union[Callable[[str], Dict[str, Any]], None] = None,
+    ):
+        """
+        Create a queued file handler and start its background thread.
+
+        Parameters
+        ----------
+        filename : str
+            File to write to, as a `time.strftime` pattern evaluated in UTC.
+        formatter : logging.Formatter
+            Formatter of the records written.
+        level : int, optional
+            Level of the handler. Defaults to logging.NOTSET.
+        capacity : int, optional
+            Maximum number of records waiting to be written. Defaults to 10000.
+        batch_size : int, optional
+            Maximum number of records written between flushes. Defaults to 100.
+        max_bytes : Union[int, None], optional
+            Size in bytes past which the file is archived. Defaults to None (no limit).
+        max_archives : Union[int, None], optional
+            Maximum number of compressed segments kept. Defaults to None (no limit).
+        max_archive_days : Union[float, None], optional
+            Number of days after which compressed segments are deleted. Defaults to None (kept
+            forever).
+        indexer : Union[Callable[[str], Dict[str, Any]], None], optional
+            Function that returns the sidecar index of an archived segment. Defaults to None (no
+            sidecar indexes).
+        """
+
+        # The file handler is created first so that, on interpreter exit, logging.shutdown closes
+        # this handler (and thus writes the queued records) before closing the file handler.
+        record_queue = queue.Queue(maxsize=capacity)
+        file_handler = _BatchedFileHandler(filename, record_queue, batch_size,
+                                           max_bytes=max_bytes, max_archives=max_archives,
+                                           max_archive_days=max_archive_days, indexer=indexer)
+        file_handler.setLevel(level)
+        file_handler.setFormatter(formatter)
+
+        super().__init__(record_queue)
+        self.setLevel(level)
+
+        self.capacity = capacity
+        self.dropped = 0
+
+        self.file_handler = file_handler
+        self.listener = _BlockingStopQueueListener(record_queue, self.file_handler,
+                                                   respect_handler_level=True)
+        self.listener.start()
+        self._closed = False
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Return the record to put in the queue. Records are formatted by the background thread, so
+        they are put in the queue as is.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Record to log.
+
+        Returns
+        -------
+        logging.LogRecord
+            Record to put in the queue.
+        """
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """
+        Put a record in the queue, or drop it if the queue is full.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Record to put in the queue.
+        """
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def get_report(self) -> str:
+        """
+        Return a human readable summary of the state of the queue.
+
+        Returns
+        -------
+        str
+            Summary.
+        """
+
+        return (f'{self.file_handler.baseFilename}: {self.queue.qsize()}/{self.capacity} records '
+                f'queued, {self.dropped} records dropped')
+
+    def close(self):
+        """
+        Write all queued records, stop the background thread and close the file. If the handler
+        is already closed, do nothing.
+        """
+
+        if self._closed:
+            return
+        self._closed = True
+
+        self.listener.stop()
+        self.file_handler.close()
+        super().close()
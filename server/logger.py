@@ -20,33 +20,69 @@
 
 from __future__ import annotations
 
-import datetime
+import asyncio
+import functools
+import gzip
 import logging
+import os
+import shutil
 import sys
 import time
 import traceback
 import typing
 
-from typing import Union
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Union
 
 from server.constants import Constants
+from server.log_handlers import ClientFormatter, QueuedFileHandler
+from server.transcript import TRANSCRIPT_DIRECTORY, TranscriptFormatter, index_segment
 
 if typing.TYPE_CHECKING:
+    from server.area_manager import AreaManager
     from server.client_manager import ClientManager
+    from server.hub_manager import _Hub
     from server.tsuserver import TsuserverDR
 
+_debug_log = logging.getLogger('debug')
+_server_log = logging.getLogger('server')
+_transcript_log = logging.getLogger('transcript')
+
+# Sections of server dumps. The character and music lists of hubs can be long, so they are left
+# out unless requested.
+DUMP_SECTIONS = ('packets', 'clients', 'areas', 'backgrounds', 'characters', 'music', 'reports')
+DEFAULT_DUMP_SECTIONS = ('packets', 'clients', 'areas', 'backgrounds', 'reports')
+# Server dumps larger than this many bytes are compressed
+DUMP_COMPRESS_BYTES = 1024 * 1024
+
+# A piece of a server dump: either text, or a function that yields the text of a copied list
+_DumpChunk = Union[str, Callable[[], Iterator[str]]]
 
-def setup_logger(debug):
-    logging.Formatter.converter = time.gmtime
-    debug_formatter = logging.Formatter('[%(asctime)s UTC]%(message)s')
-    srv_formatter = logging.Formatter('[%(asctime)s UTC]%(message)s')
 
+def setup_logger(debug, rotation=None, transcript=False):
+    logging.Formatter.converter = time.gmtime
+    debug_formatter = ClientFormatter('[%(asctime)s UTC]%(client_prefix)s%(message)s')
+    srv_formatter = ClientFormatter('[%(asctime)s UTC]%(client_prefix)s%(message)s')
+
+    # Log files are rotated when they reach the configured size, and the server log also at the
+    # start of every month (UTC). Archived segments are compressed and may be deleted later.
+    if rotation is None:
+        rotation = dict()
+    max_bytes = rotation.get('max_size_mb')
+    if max_bytes is not None:
+        max_bytes = int(max_bytes*1024*1024)
+    rotation_options = {
+        'max_bytes': max_bytes,
+        'max_archives': rotation.get('max_archives'),
+        'max_archive_days': rotation.get('max_archive_days'),
+    }
+
+    # Server and debug log records are written by background threads, so that slow disks do not
+    # stall the event loop.
     debug_log = logging.getLogger('debug')
     debug_log.setLevel(logging.DEBUG)
 
-    debug_handler = logging.FileHandler('logs/debug.log', encoding='utf-8')
-    debug_handler.setLevel(logging.DEBUG)
-    debug_handler.setFormatter(debug_formatter)
+    debug_handler = QueuedFileHandler('logs/debug.log', debug_formatter, level=logging.DEBUG,
+                                      **rotation_options)
     debug_log.addHandler(debug_handler)
 
     if not debug:
@@ -55,11 +91,8 @@ def setup_logger(debug):
     server_log = logging.getLogger('server')
     server_log.setLevel(logging.INFO)
 
-    current_month = "{:02d}".format(datetime.date.today().month)
-    logfile_name = 'logs/server-{}-{}.log'.format(datetime.date.today().year, current_month)
-    server_handler = logging.FileHandler(logfile_name, encoding='utf-8')
-    server_handler.setLevel(logging.INFO)
-    server_handler.setFormatter(srv_formatter)
+    server_handler = QueuedFileHandler('logs/server-%Y-%m.log', srv_formatter, level=logging.INFO,
+                                       **rotation_options)
     server_log.addHandler(server_handler)
 
 #    rp_log = logging.getLogger('rp')
@@ -73,173 +106,307 @@ def setup_logger(debug):
     error_log = logging.getLogger('error')
     error_log.setLevel(logging.ERROR)
 
-    return (debug_log, debug_handler), (server_log, server_handler)
+    handlers = [(debug_log, debug_handler), (server_log, server_handler)]
+
+    # The structured transcript is only written if enabled
+    transcript_log = logging.getLogger('transcript')
+    transcript_log.setLevel(logging.INFO)
+    transcript_log.propagate = False
+    transcript_log.disabled = not transcript
 
+    if transcript:
+        os.makedirs(TRANSCRIPT_DIRECTORY, exist_ok=True)
+        transcript_handler = QueuedFileHandler(
+            f'{TRANSCRIPT_DIRECTORY}/transcript-%Y-%m-%d.jsonl', TranscriptFormatter(),
+            level=logging.INFO, indexer=index_segment, **rotation_options)
+        transcript_log.addHandler(transcript_handler)
+        handlers.append((transcript_log, transcript_handler))
 
-def log_debug(msg: str, client: Union[ClientManager.Client, None] = None):
-    msg = parse_client_info(client) + msg
-    logging.getLogger('debug').debug(msg)
+    return tuple(handlers)
+
+
+def log_debug(msg: str, client: Union[ClientManager.Client, None] = None, *args):
+    # Debug logging is disabled unless the server runs in debug mode, so bail out before doing
+    # any work. Any arguments are merged into the message only when the record is written.
+    if not _debug_log.isEnabledFor(logging.DEBUG):
+        return
+    _debug_log.debug(msg, *args, extra={'client_prefix': parse_client_info(client)})
 
 
 def _print_exception(etype, evalue, etraceback):
     return f'\n{"".join(traceback.format_exception(etype, evalue, etraceback))}'
 
 
-def _log_error(server: TsuserverDR) -> str:
-    msg = ''
+def _dump_error(description: str) -> str:
+    etype, evalue, etraceback = sys.exc_info()
+    return f'\nError generating {description}.{_print_exception(etype, evalue, etraceback)}'
 
-    # Add list of most recent packets
-    msg += f'\n\n\n= {server.logged_packet_limit} most recent packets dump ='
-    if not server.logged_packets:
-        msg += '\nNo logged packets.'
-    else:
-        for logged_packet in server.logged_packets:
-            str_logged_packet = ' '.join(logged_packet)
-            msg += f'\n{str_logged_packet}'
 
-    # Add list of clients to error log
-    try:
-        msg += '\n\n\n= Dump of clients ='
-        msg += f'\n*Number of clients: {len(server.get_clients())}'
-
-        msg += '\n*Current clients:'
-        clients = sorted(server.get_clients(), key=lambda c: c.id)
-
-        for c in clients:
-            try:
-                msg += f'\n\n{c.get_info(as_mod=True)}'
-            except Exception:
-                etype, evalue, etraceback = sys.exc_info()
-                msg += f'\n\nError generating dump of client {c.id}.'
-                msg += _print_exception(etype, evalue, etraceback)
-    except Exception:
-        etype, evalue, etraceback = sys.exc_info()
-        msg += '\nError generating dump of clients.'
-        msg += _print_exception(etype, evalue, etraceback)
+def _format_packets(logged_packets: List[List[str]]) -> Iterator[str]:
+    for logged_packet in logged_packets:
+        str_logged_packet = ' '.join(logged_packet)
+        yield f'\n{str_logged_packet}'
 
-    # Add list of hubs to error log
-    try:
-        msg += '\n\n\n= Dump of hubs ='
-        msg += f'\n*Number of hubs: {len(server.hub_manager.get_managees())}'
 
-        msg += '\n*Current hubs:'
-        hubs = sorted(server.hub_manager.get_managees(),
-                      key=lambda hub: hub.get_id())
+def _format_numbered(items: List[Any]) -> Iterator[str]:
+    for (i, item) in enumerate(items):
+        yield f'\n**{i}: {item}'
 
-        for hub in hubs:
-            msg += f'\n\n== Hub {hub.get_id()} =='
 
-            try:
-                msg += '\n\n=== Area list ==='
-                try:
-                    msg += (f'\n*Current area list file: '
-                            f'{hub.area_manager.get_source_file()}')
-                    msg += (f'\n*Previous area list file: '
-                            f'{hub.area_manager.get_previous_source_file()}')
-
-                    msg += '\n*Current area list:'
-                    for area in hub.area_manager.get_areas():
-                        msg += f'\n**{area}'
-                        for c in area.clients:
-                            msg += f'\n***{c}'
-                except Exception:
-                    etype, evalue, etraceback = sys.exc_info()
-                    msg += f'\nError generating dump of area list for hub {hub.get_id()}.'
-                    msg += _print_exception(etype, evalue, etraceback)
+def _format_music(music: List[Tuple[str, List[Any]]]) -> Iterator[str]:
+    for (i, (category, songs)) in enumerate(music):
+        yield f'\n**{i}: {category}'
+        for (j, song) in enumerate(songs):
+            yield f'\n***{j}: {song}'
 
-                msg += '\n\n=== Background list ==='
-                try:
-                    msg += (f'\n*Current background list file: '
-                            f'{hub.background_manager.get_source_file()}')
-                    msg += (f'\n*Previous background list file: '
-                            f'{hub.background_manager.get_previous_source_file()}')
-
-                    msg += '\n*Current background list:'
-                    for (i, background) in enumerate(hub.background_manager.get_backgrounds()):
-                        msg += f'\n**{i}: {background}'
-                except Exception:
-                    etype, evalue, etraceback = sys.exc_info()
-                    msg += f'\nError generating dump of background list for hub {hub.get_id()}.'
-                    msg += _print_exception(etype, evalue, etraceback)
 
-                msg += '\n\n=== Character list ==='
-                try:
-                    msg += (f'\n*Current character list file: '
-                            f'{hub.character_manager.get_source_file()}')
-                    msg += (f'\n*Previous character list file: '
-                            f'{hub.character_manager.get_previous_source_file()}')
-
-                    msg += '\n*Current character list:'
-                    for (i, character) in enumerate(hub.character_manager.get_characters()):
-                        msg += f'\n**{i}: {character}'
-                except Exception:
-                    etype, evalue, etraceback = sys.exc_info()
-                    msg += f'\nError generating dump of character list for hub {hub.get_id()}.'
-                    msg += _print_exception(etype, evalue, etraceback)
+def _snapshot_dump(server: TsuserverDR,
+                   sections: Iterable[str] = DEFAULT_DUMP_SECTIONS) -> List[_DumpChunk]:
+    # This runs in the event loop, so it only formats what is short or could change later on.
+    # Long lists are copied as they are, and formatted by _iter_dump.
+    chunks: List[_DumpChunk] = list()
 
-                msg += '\n\n=== DJ list ==='
-                try:
-                    msg += (f'\n*Current DJ list file: '
-                            f'{hub.music_manager.get_source_file()}')
-                    msg += (f'\n*Previous DJ list file: '
-                            f'{hub.music_manager.get_previous_source_file()}')
-
-                    msg += '\n*Current music:'
-                    for (i, category_songs) in enumerate(hub.music_manager.get_music()):
-                        category, songs = category_songs['category'], category_songs['songs']
-                        msg += f'\n**{i}: {category}'
-                        for (j, song) in enumerate(songs):
-                            msg += f'\n***{j}: {song}'
-                except Exception:
-                    etype, evalue, etraceback = sys.exc_info()
-                    msg += f'\nError generating dump of DJ list for hub {hub.get_id()}.'
-                    msg += _print_exception(etype, evalue, etraceback)
+    # Add list of most recent packets
+    if 'packets' in sections:
+        chunks.append(f'\n\n\n= {server.logged_packet_limit} most recent packets dump =')
+        if not server.logged_packets:
+            chunks.append('\nNo logged packets.')
+        else:
+            chunks.append(functools.partial(_format_packets, list(server.logged_packets)))
 
-            except Exception:
-                etype, evalue, etraceback = sys.exc_info()
-                msg += f'\nError generating dump of hub {hub.get_id()}.'
-                msg += _print_exception(etype, evalue, etraceback)
+    # Add list of clients to error log
+    if 'clients' in sections:
+        try:
+            chunks.append('\n\n\n= Dump of clients =')
+            chunks.append(f'\n*Number of clients: {len(server.get_clients())}')
 
-    except Exception:
-        etype, evalue, etraceback = sys.exc_info()
-        msg += '\nError generating dump of hubs.'
-        msg += _print_exception(etype, evalue, etraceback)
+            chunks.append('\n*Current clients:')
+            clients = sorted(server.get_clients(), key=lambda c: c.id)
 
-    return msg
+            for c in clients:
+                try:
+                    chunks.append(f'\n\n{c.get_info(as_mod=True)}')
+                except Exception:
+                    chunks.append(_dump_error(f'dump of client {c.id}'))
+        except Exception:
+            chunks.append(_dump_error('dump of clients'))
 
+    # Add list of hubs to error log
+    if any(section in sections for section in ('areas', 'backgrounds', 'characters', 'music')):
+        try:
+            chunks.append('\n\n\n= Dump of hubs =')
+            chunks.append(f'\n*Number of hubs: {len(server.hub_manager.get_managees())}')
 
-def log_error(msg: str, server: Union[TsuserverDR, None], errortype='P') -> str:
-    # errortype "C" if server raised an error as a result of a client packet.
-    # errortype "D" if player manually requested an error dump
-    # errortype "P" if server raised an error for any other reason
-    error_log = logging.getLogger('error')
+            chunks.append('\n*Current hubs:')
+            hubs = sorted(server.hub_manager.get_managees(),
+                          key=lambda hub: hub.get_id())
 
+            for hub in hubs:
+                chunks.append(f'\n\n== Hub {hub.get_id()} ==')
+                try:
+                    chunks.extend(_snapshot_hub(hub, sections))
+                except Exception:
+                    chunks.append(_dump_error(f'dump of hub {hub.get_id()}'))
+        except Exception:
+            chunks.append(_dump_error('dump of hubs'))
+
+    if 'reports' in sections:
+        # Add event loop lag summary to error log
+        try:
+            chunks.append('\n\n\n= Event loop lag =')
+            if not server.loop_monitor:
+                chunks.append('\nThe event loop lag monitor is disabled.')
+            else:
+                chunks.append(f'\n{server.loop_monitor.get_report()}')
+        except Exception:
+            chunks.append(_dump_error('event loop lag summary'))
+
+        # Add logging queue summary to error log
+        try:
+            chunks.append('\n\n\n= Logging queues =')
+            for (_, handler) in server.logger_handlers:
+                chunks.append(f'\n*{handler.get_report()}')
+        except Exception:
+            chunks.append(_dump_error('logging queue summary'))
+
+        # Add storage write summary to error log
+        try:
+            chunks.append('\n\n\n= Storage writes =')
+            chunks.append(f'\n{server.persistence_manager.get_report()}')
+        except Exception:
+            chunks.append(_dump_error('storage write summary'))
+
+        # Add structural check summary to error log
+        try:
+            chunks.append('\n\n\n= Structural checks =')
+            chunks.append(f'\n{server.structure_checker.get_report()}')
+        except Exception:
+            chunks.append(_dump_error('structural check summary'))
+
+    return chunks
+
+
+def _snapshot_hub(hub: _Hub, sections: Iterable[str]) -> List[_DumpChunk]:
+    chunks: List[_DumpChunk] = list()
+
+    if 'areas' in sections:
+        chunks.append('\n\n=== Area list ===')
+        try:
+            chunks.append(f'\n*Current area list file: '
+                          f'{hub.area_manager.get_source_file()}')
+            chunks.append(f'\n*Previous area list file: '
+                          f'{hub.area_manager.get_previous_source_file()}')
+
+            chunks.append('\n*Current area list:')
+            for area in hub.area_manager.get_areas():
+                chunks.append(f'\n**{area}')
+                for c in area.clients:
+                    chunks.append(f'\n***{c}')
+        except Exception:
+            chunks.append(_dump_error(f'dump of area list for hub {hub.get_id()}'))
+
+    if 'backgrounds' in sections:
+        chunks.append('\n\n=== Background list ===')
+        try:
+            chunks.append(f'\n*Current background list file: '
+                          f'{hub.background_manager.get_source_file()}')
+            chunks.append(f'\n*Previous background list file: '
+                          f'{hub.background_manager.get_previous_source_file()}')
+
+            chunks.append('\n*Current background list:')
+            chunks.append(functools.partial(_format_numbered,
+                                            list(hub.background_manager.get_backgrounds())))
+        except Exception:
+            chunks.append(_dump_error(f'dump of background list for hub {hub.get_id()}'))
+
+    if 'characters' in sections:
+        chunks.append('\n\n=== Character list ===')
+        try:
+            chunks.append(f'\n*Current character list file: '
+                          f'{hub.character_manager.get_source_file()}')
+            chunks.append(f'\n*Previous character list file: '
+                          f'{hub.character_manager.get_previous_source_file()}')
+
+            chunks.append('\n*Current character list:')
+            chunks.append(functools.partial(_format_numbered,
+                                            list(hub.character_manager.get_characters())))
+        except Exception:
+            chunks.append(_dump_error(f'dump of character list for hub {hub.get_id()}'))
+
+    if 'music' in sections:
+        chunks.append('\n\n=== DJ list ===')
+        try:
+            chunks.append(f'\n*Current DJ list file: '
+                          f'{hub.music_manager.get_source_file()}')
+            chunks.append(f'\n*Previous DJ list file: '
+                          f'{hub.music_manager.get_previous_source_file()}')
+
+            chunks.append('\n*Current music:')
+            music = [(category_songs['category'], list(category_songs['songs']))
+                     for category_songs in hub.music_manager.get_music()]
+            chunks.append(functools.partial(_format_music, music))
+        except Exception:
+            chunks.append(_dump_error(f'dump of DJ list for hub {hub.get_id()}'))
+
+    return chunks
+
+
+def _iter_dump(chunks: List[_DumpChunk]) -> Iterator[str]:
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        try:
+            yield from chunk()
+        except Exception:
+            yield _dump_error('part of the dump')
+
+
+def _prepare_dump(msg: str, server: Union[TsuserverDR, None], errortype: str,
+                  sections: Iterable[str]) -> Tuple[str, str, List[_DumpChunk]]:
     file = f'logs/{Constants.get_time_iso()}{errortype}.log'
     file = file.replace(':', '')
-    error_handler = logging.FileHandler(file, encoding='utf-8')
 
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(logging.Formatter('[%(asctime)s UTC]%(message)s'))
-    error_log.addHandler(error_handler)
+    formatter = logging.Formatter('[%(asctime)s UTC]%(message)s')
+    header = formatter.format(logging.LogRecord('error', logging.ERROR, '', 0, msg, None, None))
 
     if server:
-        msg += _log_error(server)
+        chunks = _snapshot_dump(server, sections=sections)
     else:
         # Case server was not initialized properly, so areas and clients are not set
-        msg += ('\nServer was not initialized, so packet, client and area dumps could not be '
-                'generated.')
+        chunks = ['\nServer was not initialized, so packet, client and area dumps could not be '
+                  'generated.']
+    return file, header, chunks
 
-    # Write and log
-    error_log.error(msg)
-    error_log.removeHandler(error_handler)
 
+def _write_dump(file: str, header: str, chunks: List[_DumpChunk]) -> str:
+    # Stream the dump to its file, and compress the file if it turned out large
+    with open(file, 'w', encoding='utf-8') as dump:
+        dump.write(header)
+        for text in _iter_dump(chunks):
+            dump.write(text)
+        dump.write('\n')
+
+    if os.path.getsize(file) <= DUMP_COMPRESS_BYTES:
+        return file
+
+    with open(file, 'rb') as source, gzip.open(f'{file}.gz', 'wb') as target:
+        shutil.copyfileobj(source, target)
+    os.remove(file)
+    return f'{file}.gz'
+
+
+def log_error(msg: str, server: Union[TsuserverDR, None], errortype='P',
+              sections: Iterable[str] = DEFAULT_DUMP_SECTIONS) -> str:
+    # errortype "C" if server raised an error as a result of a client packet.
+    # errortype "D" if player manually requested an error dump
+    # errortype "P" if server raised an error for any other reason
+    file = _write_dump(*_prepare_dump(msg, server, errortype, sections))
     log_pserver('Successfully created server dump file {}'.format(file))
     return file
 
 
-def log_server(msg: str, client: ClientManager.Client = None):
-    msg = f'{parse_client_info(client)}{msg}'
-    logging.getLogger('server').info(msg)
+def log_error_async(msg: str, server: TsuserverDR, errortype='D',
+                    sections: Iterable[str] = DEFAULT_DUMP_SECTIONS) -> asyncio.Future:
+    # Same as log_error, except only the snapshot of the server is taken in the event loop. The
+    # dump is formatted and written in a thread, and the returned future is set to its file.
+    file, header, chunks = _prepare_dump(msg, server, errortype, sections)
+    future = asyncio.get_event_loop().run_in_executor(None, _write_dump, file, header, chunks)
+
+    def _log_result(future: asyncio.Future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            log_pserver(f'Unable to create server dump file {file}: {future.exception()}')
+        else:
+            log_pserver('Successfully created server dump file {}'.format(future.result()))
+
+    future.add_done_callback(_log_result)
+    return future
+
+
+def log_server(msg: str, client: ClientManager.Client = None, *args):
+    if not _server_log.isEnabledFor(logging.INFO):
+        return
+    _server_log.info(msg, *args, extra={'client_prefix': parse_client_info(client)})
+
+
+def log_transcript(event: str, client: ClientManager.Client, area: AreaManager.Area = None,
+                   **payload):
+    # Record a structured transcript event. The client and area details are copied now, as the
+    # event is written by a background thread.
+    if not _transcript_log.isEnabledFor(logging.INFO):
+        return
+    if area is None:
+        area = client.area
+    _transcript_log.info(event, extra={'transcript': {
+        'event': event,
+        'hub': area.hub.get_id(),
+        'area': area.id,
+        'client': client.id,
+        'ipid': client.ipid,
+        'payload': payload,
+    }})
 
 
 def log_print(msg: str, client: ClientManager.Client = None):
@@ -261,14 +428,4 @@ def log_pserver(msg: str, client: ClientManager.Client = None):
 def parse_client_info(client: ClientManager.Client) -> str:
     if client is None:
         return ''
-    hdid = client.get_hdid()
-    ipid = client.get_ip()
-    if ipid is None:
-        ipid = 'None'
-    else:
-        ipid = '{:<15}'.format(ipid)
-
-    output = f'[{ipid}][{hdid}][{client.id}][{client.hub.get_id()}]'
-    if client.is_mod:
-        output += '[MOD]'
-    return output
+    return client.get_log_prefix()
@@ -0,0 +1,318 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the LoopMonitor class, which measures how late the event loop runs its
+callbacks and records what the loop was doing while it was stalled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+import typing
+
+from typing import Deque, Dict, List, Tuple, Union
+
+from server.constants import Constants
+
+if typing.TYPE_CHECKING:
+    # Avoid circular referencing
+    from server.tsuserver import TsuserverDR
+
+
+class LoopMonitor:
+    """
+    A watchdog for the event loop. A task sleeps for `interval` seconds at a time and measures
+    how much later than expected it wakes up (its lag). Meanwhile, a sampling thread checks
+    whether the task is overdue by more than `threshold` seconds, and if so, captures the stack
+    of the event loop thread, which is the stack of whatever handler is blocking the loop.
+
+    The lag of the last `history` wakeups is kept as a histogram, and the worst stalls among the
+    last `history` stalls are kept along with their stacks.
+    """
+
+    # Upper bounds (in milliseconds) of the buckets of the lag histogram
+    BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+    class Stall:
+        """
+        A wakeup of the monitor task that was later than the threshold.
+        """
+
+        def __init__(self, lag: float, when: str, stack: Union[str, None]):
+            """
+            Create a stall.
+
+            Parameters
+            ----------
+            lag : float
+                How late the monitor task woke up (in seconds).
+            when : str
+                Server time the stall was detected at.
+            stack : Union[str, None]
+                Formatted stack of the event loop thread while it was stalled, or None if the
+                sampling thread did not catch it.
+            """
+
+            self.lag = lag
+            self.when = when
+            self.stack = stack
+
+        def __repr__(self):
+            return f'LoopMonitor.Stall({self.lag:.3f}, {self.when})'
+
+    def __init__(
+        self,
+        server: TsuserverDR,
+        interval: float = 0.1,
+        threshold: float = 0.25,
+        history: int = 1000,
+        worst: int = 5,
+    ):
+        """
+        Create a loop monitor. It does not measure anything until started.
+
+        Parameters
+        ----------
+        server : TsuserverDR
+            Server of the loop monitor.
+        interval : float, optional
+            Time between measurements (in seconds). Defaults to 0.1.
+        threshold : float, optional
+            Lag above which a measurement counts as a stall and the event loop stack is captured
+            (in seconds). Defaults to 0.25.
+        history : int, optional
+            Number of most recent measurements and stalls to keep. Defaults to 1000.
+        worst : int, optional
+            Number of worst stalls to report. Defaults to 5.
+        """
+
+        self.server = server
+        self.interval = interval
+        self.threshold = threshold
+        self.worst = worst
+
+        self._lags: Deque[float] = collections.deque(maxlen=history)
+        self._bucket_counts: List[int] = [0] * len(self.BUCKETS)
+        self._stalls: Deque[LoopMonitor.Stall] = collections.deque(maxlen=history)
+        self._max_lag = 0.0
+
+        self._task: Union[asyncio.Task, None] = None
+        self._sampler: Union[threading.Thread, None] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Union[int, None] = None
+        # Monotonic time the monitor task is next expected to wake up at. Written by the
+        # monitor task and read by the sampling thread.
+        self._expected_at: Union[float, None] = None
+        # Stack captured by the sampling thread for the current stall, if any.
+        self._pending_stack: Union[Tuple[float, str], None] = None
+
+    def is_running(self) -> bool:
+        """
+        Return True if the monitor is currently measuring, False otherwise.
+
+        Returns
+        -------
+        bool
+            True if the monitor is running, False otherwise.
+        """
+
+        return self._task is not None
+
+    def start(self):
+        """
+        Start measuring the lag of the running event loop. Does nothing if already started.
+        """
+
+        if self._task:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._expected_at = None
+        self._pending_stack = None
+        self._task = asyncio.get_event_loop().create_task(self._watch())
+        self._sampler = threading.Thread(target=self._sample, name='LoopMonitorSampler',
+                                         daemon=True)
+        self._sampler.start()
+
+    async def stop(self):
+        """
+        Stop measuring. Recorded measurements are kept. Does nothing if not started.
+        """
+
+        if not self._task:
+            return
+
+        self._stopped.set()
+        task, self._task = self._task, None
+        task.cancel()
+        await Constants.await_cancellation(task)
+        self._sampler.join()
+        self._sampler = None
+        self._expected_at = None
+
+    async def _watch(self):
+        while True:
+            expected_at = time.monotonic() + self.interval
+            self._expected_at = expected_at
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._expected_at = None
+            self.record_lag(max(0.0, now - expected_at), expected_at=expected_at)
+
+    def _sample(self):
+        # Poll a few times per threshold so stalls barely over it are still caught mid-stall
+        period = max(0.001, min(self.interval, self.threshold) / 4)
+        while not self._stopped.wait(period):
+            expected_at = self._expected_at
+            if expected_at is None:
+                continue
+            pending = self._pending_stack
+            if pending is not None and pending[0] == expected_at:
+                continue
+            if time.monotonic() - expected_at <= self.threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = ''.join(traceback.format_stack(frame))
+            del frame
+            self._pending_stack = (expected_at, stack)
+
+    def record_lag(self, lag: float, expected_at: Union[float, None] = None):
+        """
+        Record a lag measurement, recording it as a stall with the stack captured for it (if
+        any) if it is over the threshold.
+
+        Parameters
+        ----------
+        lag : float
+            Lag (in seconds).
+        expected_at : Union[float, None], optional
+            Monotonic time the monitor task was expected to wake up at when the lag was measured.
+            Only a stack captured for that wake up is recorded with the stall. Defaults to None
+            (no stack).
+        """
+
+        if len(self._lags) == self._lags.maxlen:
+            self._bucket_counts[self._get_bucket(self._lags[0])] -= 1
+        self._lags.append(lag)
+        self._bucket_counts[self._get_bucket(lag)] += 1
+        self._max_lag = max(self._max_lag, lag)
+
+        pending, self._pending_stack = self._pending_stack, None
+        if lag <= self.threshold:
+            return
+
+        # A stack the sampling thread finished capturing after an earlier measurement was
+        # recorded belongs to that measurement, not this one
+        stack = pending[1] if pending and pending[0] == expected_at else None
+        self._stalls.append(self.Stall(lag, Constants.get_time(), stack))
+
+    def _get_bucket(self, lag: float) -> int:
+        lag_ms = lag * 1000
+        for (i, bound) in enumerate(self.BUCKETS):
+            if lag_ms <= bound:
+                return i
+        return len(self.BUCKETS) - 1
+
+    def get_histogram(self) -> Dict[float, int]:
+        """
+        Return the number of recent measurements in each bucket of the lag histogram.
+
+        Returns
+        -------
+        Dict[float, int]
+            Number of measurements, indexed by the upper bound of their bucket (in
+            milliseconds).
+        """
+
+        return dict(zip(self.BUCKETS, self._bucket_counts))
+
+    def get_worst_stalls(self) -> List[LoopMonitor.Stall]:
+        """
+        Return the worst recent stalls, from worst to least bad.
+
+        Returns
+        -------
+        List[LoopMonitor.Stall]
+            Stalls.
+        """
+
+        return sorted(self._stalls, key=lambda stall: -stall.lag)[:self.worst]
+
+    def get_report(self, with_stacks: bool = True) -> str:
+        """
+        Return a human-readable summary of the recent lag of the event loop.
+
+        Parameters
+        ----------
+        with_stacks : bool, optional
+            If True, include the stacks of the worst stalls. Defaults to True.
+
+        Returns
+        -------
+        str
+            Summary.
+        """
+
+        if not self._lags:
+            if not self.is_running():
+                return 'The event loop lag monitor is not running.'
+            return 'No event loop lag measurements yet.'
+
+        info = (f'*Measurements: {len(self._lags)} (every {self.interval*1000:g} ms, '
+                f'threshold {self.threshold*1000:g} ms)')
+        info += f'\n*Maximum lag since startup: {self._max_lag*1000:.1f} ms'
+        info += '\n*Lag histogram:'
+        lower = 0
+        for (bound, count) in self.get_histogram().items():
+            if count:
+                upper = f'{bound:g} ms' if bound != float('inf') else 'inf'
+                info += f'\n**{lower:g}-{upper}: {count}'
+            lower = bound
+
+        stalls = self.get_worst_stalls()
+        if not stalls:
+            info += '\n*No stalls over the threshold.'
+            return info
+
+        info += f'\n*Worst {len(stalls)} stall{"s" if len(stalls) != 1 else ""}:'
+        for stall in stalls:
+            info += f'\n**{stall.lag*1000:.1f} ms at {stall.when}'
+            if not with_stacks:
+                continue
+            if stall.stack:
+                info += f'\n{stall.stack.rstrip()}'
+            else:
+                info += '\n(Stack not captured)'
+        return info
+
+    def __repr__(self):
+        return (f'LoopMonitor(server, {self.interval}, {self.threshold}) || '
+                f'running={self.is_running()}, measurements={len(self._lags)}, '
+                f'stalls={len(self._stalls)}')
@@ -0,0 +1,276 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the MusicLoopManager class, which restarts tracks at the end of each loop for
+clients that cannot loop music by themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import typing
+
+from typing import Any, Dict, List, Set, Tuple, Union
+
+if typing.TYPE_CHECKING:
+    # Avoid circular referencing
+    from server.area_manager import AreaManager
+    from server.tsuserver import TsuserverDR
+
+
+class MusicLoopManager:
+    """
+    A manager for server-side music loops. Areas that play the same track with the same packet
+    arguments and whose loops start at about the same time share a single loop, so that a track
+    played in many areas at once (e.g. with /zone_play) is restarted by one event loop callback
+    and encoded once per client protocol.
+
+    Areas with no players are dropped from their loop, and rejoin a loop with the same phase
+    once a player enters them again.
+    """
+
+    class MusicLoop:
+        """
+        A track being looped in a set of areas.
+        """
+
+        def __init__(
+            self,
+            manager: MusicLoopManager,
+            key: Tuple[float, Tuple[Tuple[str, Any], ...]],
+            length: float,
+            pargs: Dict[str, Any],
+            next_loop_at: float,
+        ):
+            """
+            Create a new music loop. It does not start until it is armed by its manager.
+
+            Parameters
+            ----------
+            manager : MusicLoopManager
+                Manager of this music loop.
+            key : Tuple[float, Tuple[Tuple[str, Any], ...]]
+                Length and packet arguments of the loop in hashable form.
+            length : float
+                Length of the track (in seconds).
+            pargs : Dict[str, Any]
+                Arguments of the MC packet sent at each loop point.
+            next_loop_at : float
+                Event loop time of the next loop point.
+            """
+
+            self.manager = manager
+            self.key = key
+            self.length = length
+            self.pargs = pargs
+            self.next_loop_at = next_loop_at
+            self.areas: Set[AreaManager.Area] = set()
+            self.handle: Union[asyncio.TimerHandle, None] = None
+
+        def __repr__(self):
+            return (f'MusicLoopManager.MusicLoop({self.pargs.get("name")}, {self.length}) || '
+                    f'areas={self.areas}, next_loop_at={self.next_loop_at}')
+
+    def __init__(self, server: TsuserverDR, align_window: float = 0.5):
+        """
+        Create a music loop manager.
+
+        Parameters
+        ----------
+        server : TsuserverDR
+            Server of the music loop manager.
+        align_window : float, optional
+            Two areas playing the same track share a loop if their loop points are at most this
+            many seconds apart. Defaults to 0.5.
+        """
+
+        self.server = server
+        self.align_window = align_window
+        self._key_to_loops: Dict[Tuple[float, Tuple[Tuple[str, Any], ...]],
+                                 List[MusicLoopManager.MusicLoop]] = dict()
+        # Loops areas were dropped from because they emptied out, and the loop point they would
+        # have been at, so they can resume in phase
+        self._suspended: Dict[AreaManager.Area,
+                              Tuple[float, Dict[str, Any], float]] = dict()
+
+    @staticmethod
+    def get_time() -> float:
+        """
+        Return the current time of the event loop that schedules the music loops.
+
+        Returns
+        -------
+        float
+            Current time.
+        """
+
+        return asyncio.get_event_loop().time()
+
+    def start_loop(self, area: AreaManager.Area, length: float, pargs: Dict[str, Any]):
+        """
+        Start looping a track in an area that just started playing it, replacing any loop the
+        area was part of before. If `length` is not positive, the area just stops looping.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area that started playing the track.
+        length : float
+            Length of the track (in seconds).
+        pargs : Dict[str, Any]
+            Arguments of the MC packet to send at each loop point.
+        """
+
+        self.stop_loop(area)
+        if length <= 0:
+            return
+        self._join(area, length, pargs, self.get_time() + length)
+
+    def stop_loop(self, area: AreaManager.Area):
+        """
+        Stop looping whatever track an area is looping, if any.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area to stop looping.
+        """
+
+        self._suspended.pop(area, None)
+        self._leave(area)
+
+    def suspend_loop(self, area: AreaManager.Area):
+        """
+        Drop an area that no longer has players from its loop, remembering the loop so that it can
+        be resumed in phase with `resume_loop`.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area to suspend.
+        """
+
+        music_loop = area.music_looper
+        if not music_loop:
+            return
+        self._suspended[area] = (music_loop.length, music_loop.pargs, music_loop.next_loop_at)
+        self._leave(area)
+
+    def resume_loop(self, area: AreaManager.Area):
+        """
+        Have an area that was dropped from its loop rejoin a loop with the same phase, if it was
+        dropped from one.
+
+        Parameters
+        ----------
+        area : AreaManager.Area
+            Area to resume.
+        """
+
+        try:
+            length, pargs, old_loop_at = self._suspended.pop(area)
+        except KeyError:
+            return
+
+        now = self.get_time()
+        loops_passed = max(0, math.ceil((now-old_loop_at)/length))
+        self._join(area, length, pargs, old_loop_at + loops_passed*length)
+
+    def _join(self, area: AreaManager.Area, length: float, pargs: Dict[str, Any],
+              next_loop_at: float):
+        key = (length, tuple(sorted(pargs.items())))
+        loops = self._key_to_loops.setdefault(key, list())
+        for music_loop in loops:
+            if abs(music_loop.next_loop_at - next_loop_at) <= self.align_window:
+                break
+        else:
+            music_loop = self.MusicLoop(self, key, length, pargs.copy(), next_loop_at)
+            loops.append(music_loop)
+            self._arm(music_loop)
+
+        music_loop.areas.add(area)
+        area.music_looper = music_loop
+
+    def _leave(self, area: AreaManager.Area):
+        music_loop = area.music_looper
+        area.music_looper = None
+        if not music_loop:
+            return
+
+        music_loop.areas.discard(area)
+        if not music_loop.areas:
+            self._discard(music_loop)
+
+    def _discard(self, music_loop: MusicLoopManager.MusicLoop):
+        if music_loop.handle:
+            music_loop.handle.cancel()
+            music_loop.handle = None
+        loops = self._key_to_loops.get(music_loop.key, [])
+        if music_loop in loops:
+            loops.remove(music_loop)
+        if not loops:
+            self._key_to_loops.pop(music_loop.key, None)
+
+    def _arm(self, music_loop: MusicLoopManager.MusicLoop):
+        loop = asyncio.get_event_loop()
+        music_loop.handle = loop.call_at(music_loop.next_loop_at,
+                                         lambda: self._on_loop_point(music_loop))
+
+    def _on_loop_point(self, music_loop: MusicLoopManager.MusicLoop):
+        music_loop.handle = None
+
+        # Packets are prepared once per client protocol rather than once per client
+        prepared: Dict[Any, List] = dict()
+        for area in music_loop.areas.copy():
+            if not area.clients:
+                self.suspend_loop(area)
+                continue
+            for player in area.clients:
+                if not area.legacy_jukebox and player.packet_handler.HAS_CLIENTSIDE_MUSIC_LOOPING:
+                    continue
+                protocol = type(player.packet_handler)
+                if protocol not in prepared:
+                    _, to_send = player.prepare_command('MC', music_loop.pargs)
+                    prepared[protocol] = to_send
+                player.send_prepared_command('MC', prepared[protocol], music_loop.pargs)
+
+        if not music_loop.areas:
+            return  # Already discarded by the last area leaving
+
+        music_loop.next_loop_at += music_loop.length
+        self._arm(music_loop)
+
+    def get_loops(self) -> List[MusicLoopManager.MusicLoop]:
+        """
+        Return all music loops this manager manages.
+
+        Returns
+        -------
+        List[MusicLoopManager.MusicLoop]
+            Music loops.
+        """
+
+        return [music_loop for loops in self._key_to_loops.values() for music_loop in loops]
+
+    def __repr__(self):
+        return (f'MusicLoopManager(server) || '
+                f'loops={self.get_loops()}, suspended={len(self._suspended)}')
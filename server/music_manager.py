@@ -56,6 +56,12 @@ class MusicManager(AssetManager):
         self._source_file = None
         self._previous_source_file = None
 
+        # Derived views of self._music, rebuilt whenever a music list is loaded
+        self._name_to_data: Dict[str, Tuple[str, int, str]] = dict()
+        self._music_list: List[str] = list()
+        self._legacy_music_list: List[str] = list()
+        self._track_names: List[str] = list()
+
     def get_type_name(self) -> str:
         """
         Return `'music list'`.
@@ -230,36 +236,97 @@ class MusicManager(AssetManager):
 
         self._music = new_list.copy()
         self._source_file = source_file
+        self._rebuild_views()
 
         return new_list.copy()
 
-    def get_music_data(self, music: str) -> Tuple[str, int, str]:
-        for item in self.get_music():
-            if item['category'] == music:
-                return item['category'], -1, ''
+    def _rebuild_views(self):
+        """
+        Rebuild the name index and the prepared music lists from the current music list.
+
+        If a name is used more than once, either as a category or a track, only its first
+        appearance is indexed, which matches the order in which the list would be searched.
+        """
+
+        name_to_data = dict()
+        music_list = list()
+        legacy_music_list = list()
+        track_names = list()
+
+        for item in self._music:
+            category = item['category']
+            name_to_data.setdefault(category, (category, -1, ''))
+            music_list.append('category')
+            music_list.append(category)
+            legacy_music_list.append(category)
+
             for song in item['songs']:
-                if song['name'] == music:
-                    name = song['name']
-                    length = song['length'] if 'length' in song else -1
-                    source = song['source'] if 'source' in song else ''
-                    return name, length, source
-        raise MusicError.MusicNotFoundError
+                name = song['name']
+                length = song['length'] if 'length' in song else -1
+                source = song['source'] if 'source' in song else ''
+                name_to_data.setdefault(name, (name, length, source))
+                music_list.append(name)
+                legacy_music_list.append(name)
+                track_names.append(name)
+
+        self._name_to_data = name_to_data
+        self._music_list = music_list
+        self._legacy_music_list = legacy_music_list
+        self._track_names = track_names
+
+    def get_music_data(self, music: str) -> Tuple[str, int, str]:
+        """
+        Return the name, length and source of a music track or category.
+
+        Parameters
+        ----------
+        music : str
+            Name of the track or category.
+
+        Returns
+        -------
+        Tuple[str, int, str]
+            Name, length (-1 if not looping or a category) and source (empty if none) of the music.
+
+        Raises
+        ------
+        MusicError.MusicNotFoundError
+            If no track or category has that name.
+        """
 
-    def is_music(self, music: str) -> bool:
         try:
-            self.get_music_data(music)
-            return True
-        except MusicError.MusicNotFoundError:
-            return False
+            return self._name_to_data[music]
+        except KeyError:
+            raise MusicError.MusicNotFoundError
+
+    def is_music(self, music: str) -> bool:
+        return music in self._name_to_data
+
+    def get_track_names(self) -> List[str]:
+        """
+        Return the names of all tracks of the music manager, in list order and without
+        categories.
+
+        Returns
+        -------
+        List[str]
+            Names of the tracks. This list is shared and must not be modified.
+        """
+
+        return self._track_names
 
     def get_music_list(self) -> List[str]:
-        music_list = list()
-        for item in self._music:
-            music_list.append("category")
-            music_list.append(item['category'])
-            for song in item["songs"]:
-                music_list.append(song["name"])
-        return music_list
+        """
+        Return the list of music of the music manager in a format a DRO client can understand,
+        with every category preceded by the `'category'` marker.
+
+        Returns
+        -------
+        List[str]
+            List of music. This list is shared and must not be modified.
+        """
+
+        return self._music_list
 
     def get_legacy_music_list(self) -> List[str]:
         """
@@ -268,18 +335,10 @@ class MusicManager(AssetManager):
         Returns
         -------
         List[str]
-            List of music.
+            List of music. This list is shared and must not be modified.
         """
 
-        prepared_music_list = list()
-        for item in self._music:
-            category = item['category']
-            songs = item['songs']
-            prepared_music_list.append(category)
-            for song in songs:
-                name = song['name']
-                prepared_music_list.append(name)
-        return prepared_music_list
+        return self._legacy_music_list
 
     def _check_structure(self):
         """
@@ -292,9 +351,16 @@ class MusicManager(AssetManager):
 
         """
 
-        # At least one music track
+        # 1. At least one music track
         assert self._music
 
+        # 2. The name index and prepared lists were built from the current music list
+        assert len(self._legacy_music_list) == sum(len(item['songs']) + 1
+                                                   for item in self._music)
+        assert len(self._music_list) == len(self._legacy_music_list) + len(self._music)
+        for name in self._legacy_music_list:
+            assert name in self._name_to_data, name
+
 
 class PersonalMusicManager(MusicManager):
     def __init__(self, server: TsuserverDR, hub: Union[_Hub, None] = None):
@@ -59,25 +59,23 @@ def net_cmd_hi(client: ClientManager.Client, pargs: Dict[str, Any]):
 
     # Record new HDID and IPID if needed
     client.hdid = pargs['client_hdid']
-    if client.hdid not in client.server.hdid_list:
-        client.server.hdid_list[client.hdid] = []
     client.ipid = client.server.get_ipid(client.get_ipreal())
-    if client.ipid not in client.server.hdid_list[client.hdid]:
-        client.server.hdid_list[client.hdid].append(client.ipid)
-        client.server.dump_hdids()
-
-    # Check if the client is banned
-    for ipid in client.server.hdid_list[client.hdid]:
-        if client.server.ban_manager.is_banned(ipid):
-            logger.log_server(f'Disconnected previously banned player who just tried to join. '
-                              f'Banned IPID: {ipid}', client)
-            client.send_ooc_others(
-                f'Banned client with HDID {client.hdid} and IPID {client.ipid} '
-                f'attempted to join the server but was refused entrance.',
-                is_officer=True, in_hub=None)
-            client.send_command_dict('BD', dict())
-            client.disconnect()
-            return
+    client.server.add_hdid_ipid(client.hdid, client.ipid)
+
+    # Check if the client is banned, by HDID, by any IPID the HDID was seen with, or by any
+    # HDID seen with those IPIDs
+    ipids = client.server.get_hdid_ipids(client.hdid)
+    ban = client.server.ban_manager.find_client_ban(client.hdid, ipids)
+    if ban:
+        logger.log_server(f'Disconnected previously banned player who just tried to join. '
+                          f'Matching ban: {ban}', client)
+        client.send_ooc_others(
+            f'Banned client with HDID {client.hdid} and IPID {client.ipid} '
+            f'attempted to join the server but was refused entrance.',
+            is_officer=True, in_hub=None)
+        client.send_command_dict('BD', dict())
+        client.disconnect()
+        return
 
     logger.log_server(f'Connected. HDID: {client.hdid}.', client)
     client.send_command_dict('ID', {
@@ -230,8 +228,8 @@ def net_cmd_askchaa(client: ClientManager.Client, pargs: Dict[str, Any]):
     # Make sure there is enough room for the client
     char_cnt = len(client.hub.character_manager.get_characters())
     evi_cnt = 0
-    music_cnt = sum([len(item['songs']) + 1
-                     for item in client.music_manager.get_music()])  # +1 for category
+    # One entry per category and per track
+    music_cnt = len(client.music_manager.get_legacy_music_list())
     area_cnt = len(client.hub.area_manager.get_areas())
     client.send_command_dict('SI', {
         'char_count': char_cnt,
@@ -621,6 +619,8 @@ def net_cmd_ms(client: ClientManager.Client, pargs: Dict[str, Any]):
     client.area.set_next_msg_delay(len(msg))
     logger.log_server(
         f'[IC][{client.area.id}][{client.get_char_name()}]{msg}', client)
+    logger.log_transcript('ic', client, char=client.get_char_name(),
+                          showname=client.showname_else_char_showname, message=msg)
 
     # Sending IC messages reveals sneaked players
     if not client.is_staff() and not client.is_visible:
@@ -738,6 +738,8 @@ def net_cmd_ct(client: ClientManager.Client, pargs: Dict[str, Any]):
         client.last_ooc_message = pargs['message']
         logger.log_server(f'[OOC][{client.area.id}][{client.get_char_name()}]'
                           f'[{client.name}]{message}', client)
+        logger.log_transcript('ooc', client, char=client.get_char_name(), name=client.name,
+                              message=message)
     client.last_active = Constants.get_time()
 
 
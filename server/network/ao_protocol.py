@@ -73,6 +73,11 @@ class AOProtocol(asyncio.Protocol):
         """
 
         self.client, valid = self.server.new_client(transport, protocol=self)
+        if self.client is None:
+            # Banned connection
+            transport.close()
+            return
+
         self.ping_timeout = asyncio.get_event_loop().call_later(self.server.config['timeout'],
                                                                 self.client.disconnect)
         if not valid:
@@ -91,6 +96,8 @@ class AOProtocol(asyncio.Protocol):
 
         :param exc: reason
         """
+        if self.client is None:
+            return
         self.client.disconnected = True
         self.server.remove_client(self.client)
         self.ping_timeout.cancel()
@@ -128,7 +135,7 @@ class AOProtocol(asyncio.Protocol):
         raw_parameters = msg.split('#')
         msg = '#'.join(raw_parameters)
 
-        logger.log_debug(f'[INC][RAW]{msg}', self.client)
+        logger.log_debug('[INC][RAW]%s', self.client, msg)
         try:
             if self.server.print_packets:
                 print(f'> {self.client.id}: {msg}')
@@ -163,6 +170,8 @@ class AOProtocol(asyncio.Protocol):
 
         :param data: bytes of data
         """
+        if self.client is None:
+            return
         buf = data
         if buf is None:
             buf = b''
@@ -35,6 +35,7 @@ from server import logger
 from server.exceptions import NonStopDebateError, TrialMinigameError
 from server.exceptions import ClientError, TimerError
 from server.trialminigame import _TrialMinigame, TRIALMINIGAMES
+from server.structure_checker import gated_structure_check
 
 if typing.TYPE_CHECKING:
     # Avoid circular referencing
@@ -2543,6 +2544,7 @@ class _NonStopDebate(_NonStopDebateTrivialInherited):
             self._break_loop(player, contents)
         else:
             raise RuntimeError(f'Unrecognized mode {self._mode}')
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_client_change_character(
@@ -2617,6 +2619,7 @@ class _NonStopDebate(_NonStopDebateTrivialInherited):
                                    f'to {player.get_char_name()} in your NSD.',
                                    pred=lambda c: c in self.get_leaders())
 
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_client_destroyed(self, player: ClientManager.Client):
@@ -2665,6 +2668,7 @@ class _NonStopDebate(_NonStopDebateTrivialInherited):
                                    'as it lost all its players.',
                                    is_zstaff_flex=False, part_of=nonplayers)
 
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_area_client_left_final(
@@ -2738,6 +2742,7 @@ class _NonStopDebate(_NonStopDebateTrivialInherited):
                                    pred=lambda c: c in self.get_leaders(), in_hub=area.hub)
             self.dismiss_user(client)
 
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_area_client_entered_final(
@@ -2812,6 +2817,7 @@ class _NonStopDebate(_NonStopDebateTrivialInherited):
                                        pred=lambda c: c in self.get_leaders())
             self.introduce_user(client)
 
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_area_client_inbound_ms_check(
@@ -3010,6 +3016,7 @@ class _NonStopDebate(_NonStopDebateTrivialInherited):
 
         self._set_intermission_postbreak(player, blankpost=False)
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
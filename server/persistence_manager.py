@@ -0,0 +1,260 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the PersistenceManager class, which writes the JSON files in `storage/`
+behind the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import typing
+
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
+
+from server import logger
+
+if typing.TYPE_CHECKING:
+    # Avoid circular referencing
+    from server.tsuserver import TsuserverDR
+
+
+class PersistenceManager:
+    """
+    A write-behind cache for JSON stores. Each store is a file along with a function that returns
+    a snapshot of its contents. Changed stores are marked as dirty, and all dirty stores are
+    written together `delay` seconds after the first of them was marked. Snapshots are taken in
+    the event loop, but serialized and written by a background thread, one store at a time.
+
+    Stores are written to a temporary file which then replaces the store, so a crash mid-write
+    leaves either the old or the new contents of the store, never a mix.
+    """
+
+    def __init__(self, server: TsuserverDR, delay: float = 5):
+        """
+        Create a persistence manager.
+
+        Parameters
+        ----------
+        server : TsuserverDR
+            Server the persistence manager belongs to.
+        delay : float, optional
+            Number of seconds writes of dirty stores are held back for, so that later changes
+            to them are written at the same time. Defaults to 5.
+        """
+
+        self.server = server
+        self.delay = delay
+
+        self._stores: Dict[str, Callable[[], Any]] = dict()
+        self._compact: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._flush_handle: Union[asyncio.TimerHandle, None] = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='persistence')
+        self._closed = False
+
+        self.writes = 0
+        self.marks = 0
+
+    def register(self, path: str, snapshot: Callable[[], Any], compact: bool = False):
+        """
+        Register a store.
+
+        Parameters
+        ----------
+        path : str
+            File of the store.
+        snapshot : Callable[[], Any]
+            Function that returns the contents of the store, as of the time it is called. The
+            contents must not be changed by the server afterwards, so they can be serialized in
+            another thread.
+        compact : bool, optional
+            If True, the store is written with no whitespace. Otherwise, it is written indented,
+            so it is easier to read. Defaults to False.
+        """
+
+        self._stores[path] = snapshot
+        if compact:
+            self._compact.add(path)
+
+    def mark_dirty(self, path: str):
+        """
+        Mark a store as dirty, so it is written with the next batch of dirty stores. If the
+        persistence manager was shut down, write the store right away instead.
+
+        Parameters
+        ----------
+        path : str
+            File of the store.
+
+        Raises
+        ------
+        KeyError
+            If no store with that file was registered.
+        """
+
+        if path not in self._stores:
+            raise KeyError(f'No store registered for {path}.')
+
+        self.marks += 1
+        if self._closed:
+            self.write(path)
+            return
+
+        self._dirty.add(path)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_later(self.delay, self._on_delay)
+
+    def is_dirty(self, path: str) -> bool:
+        """
+        Return whether a store has changes that were not yet handed off to be written.
+
+        Parameters
+        ----------
+        path : str
+            File of the store.
+
+        Returns
+        -------
+        bool
+            True if the store is dirty, False otherwise.
+        """
+
+        return path in self._dirty
+
+    def write(self, path: str):
+        """
+        Write a store right away, in the current thread.
+
+        Parameters
+        ----------
+        path : str
+            File of the store.
+
+        Raises
+        ------
+        KeyError
+            If no store with that file was registered.
+        """
+
+        self._dirty.discard(path)
+        self._write_all([(path, self._stores[path]())])
+
+    def flush(self) -> asyncio.Future:
+        """
+        Take snapshots of all dirty stores and have the background thread write them.
+
+        Returns
+        -------
+        asyncio.Future
+            Future that is done once the stores were written, as well as all stores that were
+            handed off to be written before.
+        """
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        snapshots = [(path, self._stores[path]()) for path in sorted(self._dirty)]
+        self._dirty.clear()
+
+        future = asyncio.get_event_loop().run_in_executor(self._executor, self._write_all,
+                                                          snapshots)
+
+        def _check_written(future: asyncio.Future):
+            if future.cancelled() or future.exception() is None:
+                return
+            # Try again with the next batch of dirty stores
+            paths = ', '.join(path for (path, _) in snapshots)
+            ex = future.exception()
+            logger.log_pdebug(f'WARNING: Unable to write {paths}. Will try again.\n'
+                              f'{type(ex).__name__}: {ex}')
+            for (path, _) in snapshots:
+                self.mark_dirty(path)
+
+        future.add_done_callback(_check_written)
+        return future
+
+    async def shutdown(self):
+        """
+        Write all dirty stores, wait for all writes to finish and stop the background thread.
+        Stores that fail to be written are tried once more in the current thread, and are logged
+        and dropped if they fail again. Stores marked as dirty afterwards are written right away.
+        """
+
+        if self._closed:
+            return
+        try:
+            await self.flush()
+        except Exception:
+            # The stores that failed to be written were marked as dirty again, so they are tried
+            # once more below
+            pass
+        self._closed = True
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._executor.shutdown(wait=True)
+
+        for path in sorted(self._dirty):
+            try:
+                self.write(path)
+            except Exception as ex:
+                logger.log_pdebug(f'WARNING: Unable to write {path} on shutdown.\n'
+                                  f'{type(ex).__name__}: {ex}')
+
+    def get_report(self) -> str:
+        """
+        Return a human readable summary of the stores and how often they were written.
+
+        Returns
+        -------
+        str
+            Summary.
+        """
+
+        info = f'*Stores: {", ".join(sorted(self._stores))}'
+        info += f'\n*Write delay: {self.delay} seconds'
+        info += f'\n*Changes: {self.marks}, written in {self.writes} files'
+        if self._dirty:
+            info += f'\n*Dirty: {", ".join(sorted(self._dirty))}'
+        return info
+
+    def _on_delay(self):
+        self._flush_handle = None
+        self.flush()
+
+    def _write_all(self, snapshots: List[Tuple[str, Any]]):
+        for (path, contents) in snapshots:
+            temp_path = f'{path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                if path in self._compact:
+                    json.dump(contents, file, separators=(',', ':'))
+                else:
+                    json.dump(contents, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, path)
+            self.writes += 1
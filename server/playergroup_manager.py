@@ -26,11 +26,13 @@ Module that contains the PlayerGroupManager class and the _PlayerGroup subclass.
 from __future__ import annotations
 
 import random
+import types
 import typing
 
-from typing import Callable, Dict, Tuple, Type, Union, Set
+from typing import Callable, Dict, FrozenSet, List, Mapping, Tuple, Type, Union, Set
 
 from server.exceptions import PlayerGroupError
+from server.structure_checker import gated_structure_check
 
 if typing.TYPE_CHECKING:
     from server.client_manager import ClientManager
@@ -255,6 +257,7 @@ class _PlayerGroup:
         """
 
         self._name = name
+        self.manager._touch_managee(self)
 
     def get_player_limit(self) -> Union[int, None]:
         """
@@ -408,6 +411,7 @@ class _PlayerGroup:
 
         self._ever_had_players = True
         self._players.add(user)
+        self.manager._add_to_user_managees(user, self)
 
         if self._require_invitations:
             self._invitations.remove(user)
@@ -469,6 +473,7 @@ class _PlayerGroup:
             raise PlayerGroupError.UserNotPlayerError
 
         self._players.remove(user)
+        self.manager._remove_from_user_managees(user, self)
         self._leaders.discard(user)
 
         # Check updated leadership requirement
@@ -602,6 +607,7 @@ class _PlayerGroup:
             raise PlayerGroupError.UserAlreadyPlayerError
 
         self._invitations.add(user)
+        self.manager._touch_managee(self)
 
     def remove_invitation(self, user: ClientManager.Client) -> bool:
         """
@@ -658,6 +664,7 @@ class _PlayerGroup:
             raise PlayerGroupError.UserNotInvitedError
 
         self._invitations.remove(user)
+        self.manager._touch_managee(self)
 
     def requires_invitations(self) -> bool:
         """
@@ -809,6 +816,7 @@ class _PlayerGroup:
             raise PlayerGroupError.UserAlreadyLeaderError
 
         self._leaders.add(user)
+        self.manager._touch_managee(self)
 
     def remove_leader(self, user: ClientManager.Client):
         """
@@ -865,6 +873,7 @@ class _PlayerGroup:
             raise PlayerGroupError.UserNotLeaderError
 
         self._leaders.remove(user)
+        self.manager._touch_managee(self)
         # Check leadership requirement
         self._choose_leader_if_needed()
 
@@ -946,6 +955,7 @@ class _PlayerGroup:
         if self._unmanaged:
             return
         self._unmanaged = True
+        self.manager._touch_managee(self)
 
         if self.manager.manages_managee(self):
             # If manager still recognizes, remove
@@ -978,6 +988,7 @@ class _PlayerGroup:
         new_leader = random.choice(list(self.get_players()))
         self.unchecked_add_leader(new_leader)
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -1028,8 +1039,7 @@ class _PlayerGroup:
         # 4.
         for player in self._players:
             assert (
-                player in self.manager.get_users_in_some_managee()
-                and self in self.manager.get_managees_of_user(player)
+                self in self.manager.get_managees_of_user(player)
             ), (
                 f'For player group {self._playergroup_id}, expected that its player {player} is '
                 f'properly recognized in the player to player group mapping of the manager of '
@@ -1138,10 +1148,17 @@ class PlayerGroupManager:
     # _default_managee_type : _PlayerGroup
     #     The type of player group this player group manager will create by default when ordered
     #     to create a new one.
-    # _user_to_managees : dict of ClientManager.Client to set of _PlayerGroup
-    #     Mapping of users to the player groups managed by this manager they belong to.
+    # _user_to_managees : dict of ClientManager.Client to frozenset of _PlayerGroup
+    #     Mapping of users to the player groups managed by this manager they belong to. It is
+    #     updated as players are added to and removed from player groups.
     # _id_to_managee : dict of str to _PlayerGroup
     #     Mapping of player group IDs to player groups that this manager manages.
+    # _touched_managees : set of _PlayerGroup
+    #     If structural checks are incremental, player groups mutated since the last structural
+    #     check of this manager. Empty otherwise.
+    # _touched_users : set of ClientManager.Client
+    #     If structural checks are incremental, users whose player group memberships changed since
+    #     the last structural check of this manager. Empty otherwise.
 
     # Invariants
     # ----------
@@ -1158,7 +1175,12 @@ class PlayerGroupManager:
     #     a. For every player group `playergroup` in `playergroups`:
     #           1. `playergroup` has no player concurrent membership limit, or it is at least the
     #               length of `playergroups`.
+    #     b. `playergroups` are exactly the player groups managed by this manager `player` is a
+    #        player of.
     # 5. Each player group it manages also satisfies its structural invariants.
+    #
+    # If structural checks are incremental, these invariants are only asserted for the player
+    # groups in `self._touched_managees` and the users in `self._touched_users`.
 
     def __init__(
         self,
@@ -1191,6 +1213,9 @@ class PlayerGroupManager:
         self._default_group_type = default_managee_type
         self._group_limit = managee_limit
         self._id_to_group: Dict[str, _PlayerGroup] = dict()
+        self._user_to_managees: Dict[ClientManager.Client, FrozenSet[_PlayerGroup]] = dict()
+        self._touched_managees: Set[_PlayerGroup] = set()
+        self._touched_users: Set[ClientManager.Client] = set()
 
     def get_managee_type(self) -> Type[_PlayerGroup]:
         """
@@ -1372,6 +1397,7 @@ class PlayerGroupManager:
         )
 
         self._id_to_group[group_id] = playergroup
+        self._touch_managee(playergroup)
 
         try:
             if creator:
@@ -1441,6 +1467,8 @@ class PlayerGroupManager:
         self._id_to_group.pop(playergroup_id)
 
         former_players = managee.get_players()
+        for player in former_players:
+            self._remove_from_user_managees(player, managee)
 
         managee.unchecked_destroy()
 
@@ -1462,7 +1490,7 @@ class PlayerGroupManager:
 
         """
 
-        return managee in self._id_to_group.values()
+        return self._id_to_group.get(managee.get_id()) is managee
 
     def get_managees(self) -> Set[_PlayerGroup]:
         """
@@ -1614,32 +1642,22 @@ class PlayerGroupManager:
 
         """
 
-        users_to_managees = self.get_player_to_managees_map()
+        return set(self._user_to_managees.get(user, frozenset()))
 
-        try:
-            return users_to_managees[user].copy()
-        except KeyError:
-            return set()
-
-    def get_player_to_managees_map(self) -> Dict[ClientManager.Client, Set[_PlayerGroup]]:
+    def get_player_to_managees_map(
+        self
+    ) -> Mapping[ClientManager.Client, FrozenSet[_PlayerGroup]]:
         """
-        Return a mapping of the players part of any player group managed by this manager to the
-        player groups managed by this manager such players belong to.
+        Return a read-only view of the mapping of the players part of any player group managed by
+        this manager to the player groups managed by this manager such players belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_PlayerGroup]]
-            Mapping.
+        Mapping[ClientManager.Client, FrozenSet[_PlayerGroup]]
+            Mapping. It reflects later changes to player group memberships.
         """
 
-        output = dict()
-        for group in self._id_to_group.values():
-            for player in group.get_players():
-                if player not in output:
-                    output[player] = set()
-                output[player].add(group)
-
-        return output
+        return types.MappingProxyType(self._user_to_managees)
 
     def get_users_in_some_managee(self) -> Set[ClientManager.Client]:
         """
@@ -1653,7 +1671,107 @@ class PlayerGroupManager:
 
         """
 
-        return set(self.get_player_to_managees_map().keys())
+        return set(self._user_to_managees.keys())
+
+    def _add_to_user_managees(self, user: ClientManager.Client, managee: _PlayerGroup):
+        """
+        Record that a user became a player of a player group managed by this manager.
+
+        Parameters
+        ----------
+        user : ClientManager.Client
+            User that became a player.
+        managee : _PlayerGroup
+            Player group the user joined.
+
+        """
+
+        self._user_to_managees[user] = self._user_to_managees.get(user, frozenset()) | {managee}
+        self._touch_managee(managee)
+        self._touch_user(user)
+
+    def _remove_from_user_managees(self, user: ClientManager.Client, managee: _PlayerGroup):
+        """
+        Record that a user is no longer a player of a player group managed by this manager.
+
+        Parameters
+        ----------
+        user : ClientManager.Client
+            User that is no longer a player.
+        managee : _PlayerGroup
+            Player group the user left.
+
+        """
+
+        remaining = self._user_to_managees.get(user, frozenset()) - {managee}
+        if remaining:
+            self._user_to_managees[user] = remaining
+        else:
+            self._user_to_managees.pop(user, None)
+        self._touch_managee(managee)
+        self._touch_user(user)
+
+    def _is_checked_incrementally(self) -> bool:
+        """
+        Return whether the structural checks of this manager are scoped to the player groups and
+        users touched since its last structural check.
+
+        Returns
+        -------
+        bool
+            True if the structure checker of the server is in incremental mode, False otherwise.
+
+        """
+
+        checker = getattr(self.server, 'structure_checker', None)
+        return checker is not None and checker.is_incremental()
+
+    def _touch_managee(self, managee: _PlayerGroup):
+        """
+        Record that a player group was mutated, so that the next incremental structural check of
+        this manager asserts its invariants.
+
+        Parameters
+        ----------
+        managee : _PlayerGroup
+            Player group that was mutated.
+
+        """
+
+        if self._is_checked_incrementally():
+            self._touched_managees.add(managee)
+
+    def _touch_user(self, user: ClientManager.Client):
+        """
+        Record that the player group memberships of a user changed, so that the next incremental
+        structural check of this manager asserts the invariants relating them.
+
+        Parameters
+        ----------
+        user : ClientManager.Client
+            User whose memberships changed.
+
+        """
+
+        if self._is_checked_incrementally():
+            self._touched_users.add(user)
+
+    def _get_checked_managees(self) -> List[_PlayerGroup]:
+        """
+        Return the managed player groups whose invariants the current structural check of this
+        manager asserts: all of them, or only those touched since the last structural check if
+        checks are incremental.
+
+        Returns
+        -------
+        List[_PlayerGroup]
+            Player groups to check.
+
+        """
+
+        if not self._is_checked_incrementally():
+            return list(self._id_to_group.values())
+        return [managee for managee in self._touched_managees if not managee.is_unmanaged()]
 
     def is_managee_creatable(self) -> bool:
         """
@@ -1755,6 +1873,7 @@ class PlayerGroupManager:
             return None
         return most_restrictive_group
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -1774,10 +1893,13 @@ class PlayerGroupManager:
                 f'{len(self._id_to_group)} player groups. || {self}'
             )
 
+        incremental = self._is_checked_incrementally()
+        playergroups = self._get_checked_managees()
+
         # 2.
-        for (playergroup_id, playergroup) in self._id_to_group.items():
+        for playergroup in playergroups:
             # 2a.
-            assert playergroup.get_id() == playergroup_id, (
+            assert self._id_to_group.get(playergroup.get_id()) is playergroup, (
                 f'For player group manager {self._id}, expected that player group {playergroup} '
                 f'that appears in the ID to player group mapping has the same ID as in the '
                 f'mapping, but found it did not. || {self}'
@@ -1789,25 +1911,69 @@ class PlayerGroupManager:
                 f'{playergroup} recognized that it was not unmanaged, but found it did.'
             )
 
-        # 3.
-        for playergroup1 in self._id_to_group.values():
-            for playergroup2 in self._id_to_group.values():
-                if playergroup1 == playergroup2:
-                    continue
+        if incremental:
+            for playergroup in self._touched_managees:
+                if playergroup.is_unmanaged():
+                    assert not self.manages_managee(playergroup), (
+                        f'For player group manager {self._id}, expected that unmanaged player '
+                        f'group {playergroup} was not managed by it, but found it was. || {self}'
+                    )
 
-                # 3a.
-                assert playergroup1.get_id() != playergroup2.get_id(), (
-                    f'For player group manager {self._id}, expected that its two managed player '
-                    f'groups {playergroup1}, {playergroup2} had unique player group IDs, but '
-                    f'found they did not. || {self}'
-                )
+        # 3.
+        # This follows from 2a. if all player groups are checked.
+        if not incremental:
+            for playergroup1 in self._id_to_group.values():
+                for playergroup2 in self._id_to_group.values():
+                    if playergroup1 == playergroup2:
+                        continue
+
+                    # 3a.
+                    assert playergroup1.get_id() != playergroup2.get_id(), (
+                        f'For player group manager {self._id}, expected that its two managed '
+                        f'player groups {playergroup1}, {playergroup2} had unique player group '
+                        f'IDs, but found they did not. || {self}'
+                    )
 
         # 4.
-        user_to_groups = self.get_player_to_managees_map()
-        for (user, playergroups) in user_to_groups.items():
-            membership = len(playergroups)
-
+        if incremental:
+            # 4b.
             for group in playergroups:
+                for player in group.get_players():
+                    assert group in self._user_to_managees.get(player, frozenset()), (
+                        f'For player group manager {self._id}, expected that its player to player '
+                        f'group mapping listed player {player} of player group {group}, but '
+                        f'found it did not. || {self}'
+                    )
+
+            user_to_groups = {user: self._user_to_managees.get(user, frozenset())
+                              for user in self._touched_users}
+            for (user, groups) in user_to_groups.items():
+                for group in groups:
+                    assert self.manages_managee(group) and group.is_player(user), (
+                        f'For player group manager {self._id}, expected that its player to player '
+                        f'group mapping only listed player group {group} for user {user} if '
+                        f'they were a player of it, but found they were not. || {self}'
+                    )
+        else:
+            user_to_groups = dict()
+            for group in self._id_to_group.values():
+                for player in group.get_players():
+                    if player not in user_to_groups:
+                        user_to_groups[player] = set()
+                    user_to_groups[player].add(group)
+
+            # 4b.
+            assert user_to_groups == self._user_to_managees, (
+                f'For player group manager {self._id}, expected that its player to player group '
+                f'mapping {dict(self._user_to_managees)} matched the players of its player groups '
+                f'{user_to_groups}, but found it did not. || {self}'
+            )
+
+        # 4a.
+        for (user, playergroups_of_user) in user_to_groups.items():
+            membership = len(playergroups_of_user)
+
+            for group in playergroups_of_user:
                 limit = group.get_player_concurrent_limit()
 
                 if limit is None:
@@ -1821,9 +1987,12 @@ class PlayerGroupManager:
                 )
 
         # Last.
-        for playergroup in self._id_to_group.values():
+        for playergroup in playergroups:
             playergroup._check_structure()
 
+        self._touched_managees.clear()
+        self._touched_users.clear()
+
     def __repr__(self):
         """
         Return a representation of this player group manager.
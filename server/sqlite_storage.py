@@ -0,0 +1,454 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the SQLiteStorage class, an SQLite database that holds the IPIDs, HDIDs and
+bans of the server, as well as an audit trail of moderation actions, as an alternative to the
+JSON files in `storage/`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import random
+import sqlite3
+import time
+import typing
+
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
+
+from server import logger
+from server.ban_manager import BanManager
+
+if typing.TYPE_CHECKING:
+    # Avoid circular referencing
+    from server.tsuserver import TsuserverDR
+
+
+class SQLiteStorage:
+    """
+    An SQLite database of IPIDs, HDIDs, bans and moderation actions.
+
+    Only rows that are needed are read, through indexed lookups, so the database is not loaded as
+    a whole on startup. Reads run in the event loop on their own connection. Writes are handed off
+    to a background thread that owns the writing connection, in the order they were made. As the
+    database is in WAL mode, reads never wait for writes. Everything written during this run is
+    also cached, so reads see writes that the background thread did not commit yet.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS ipids (
+            ip TEXT PRIMARY KEY,
+            ipid INTEGER NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS hdid_ipids (
+            hdid TEXT NOT NULL,
+            ipid INTEGER NOT NULL,
+            PRIMARY KEY (hdid, ipid)
+        );
+        CREATE INDEX IF NOT EXISTS hdid_ipids_by_ipid ON hdid_ipids (ipid);
+        CREATE TABLE IF NOT EXISTS bans (
+            id INTEGER PRIMARY KEY,
+            ipid INTEGER,
+            hdid TEXT,
+            cidr TEXT,
+            created REAL NOT NULL,
+            expires REAL,
+            reason TEXT
+        );
+        CREATE INDEX IF NOT EXISTS bans_by_ipid ON bans (ipid);
+        CREATE INDEX IF NOT EXISTS bans_by_hdid ON bans (hdid);
+        CREATE TABLE IF NOT EXISTS audit (
+            id INTEGER PRIMARY KEY,
+            time REAL NOT NULL,
+            action TEXT NOT NULL,
+            actor_ipid INTEGER,
+            target TEXT,
+            details TEXT
+        );
+        CREATE INDEX IF NOT EXISTS audit_by_target ON audit (target);
+    '''
+
+    def __init__(self, server: TsuserverDR, path: str):
+        """
+        Open (and create if needed) an SQLite database.
+
+        Parameters
+        ----------
+        server : TsuserverDR
+            Server the database belongs to.
+        path : str
+            File of the database.
+        """
+
+        self.server = server
+        self.path = path
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='sqlite')
+        self._writer: Union[sqlite3.Connection, None] = None
+        self._executor.submit(self._open_writer).result()
+        self._reader = sqlite3.connect(path)
+
+        self._ip_to_ipid: Dict[str, int] = dict()
+        self._new_ipids: Set[int] = set()
+        self._hdid_to_ipids: Dict[str, List[int]] = dict()
+        self._ipid_to_hdids: Dict[int, Set[str]] = dict()
+
+    def _open_writer(self):
+        self._writer = sqlite3.connect(self.path)
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        self._writer.execute('PRAGMA synchronous=NORMAL')
+        self._writer.executescript(self.SCHEMA)
+        self._writer.commit()
+
+    def _write(self, function: Callable[[sqlite3.Connection], Any]) -> concurrent.futures.Future:
+        # Run a write in the background thread, within a transaction
+        def _transaction():
+            with self._writer:
+                function(self._writer)
+
+        def _check_written(future: concurrent.futures.Future):
+            if future.exception() is not None:
+                ex = future.exception()
+                logger.log_pdebug(f'WARNING: Unable to write to {self.path}.\n'
+                                  f'{type(ex).__name__}: {ex}')
+
+        future = self._executor.submit(_transaction)
+        future.add_done_callback(_check_written)
+        return future
+
+    def get_ipid(self, ip: str) -> int:
+        """
+        Return the IPID of an IP, assigning it a new random IPID if it does not have one.
+
+        Parameters
+        ----------
+        ip : str
+            IP.
+
+        Returns
+        -------
+        int
+            IPID.
+        """
+
+        ipid = self.peek_ipid(ip)
+        if ipid is not None:
+            return ipid
+
+        while True:
+            ipid = random.randint(0, 10**10-1)
+            if ipid in self._new_ipids:
+                continue
+            if self._reader.execute('SELECT 1 FROM ipids WHERE ipid = ?', (ipid, )).fetchone():
+                continue
+            break
+
+        self._ip_to_ipid[ip] = ipid
+        self._new_ipids.add(ipid)
+        self._write(lambda db: db.execute('INSERT INTO ipids (ip, ipid) VALUES (?, ?)',
+                                          (ip, ipid)))
+        return ipid
+
+    def peek_ipid(self, ip: str) -> Union[int, None]:
+        """
+        Return the IPID of an IP, without assigning it one if it does not have one.
+
+        Parameters
+        ----------
+        ip : str
+            IP.
+
+        Returns
+        -------
+        Union[int, None]
+            IPID, or None if the IP has no IPID.
+        """
+
+        if ip in self._ip_to_ipid:
+            return self._ip_to_ipid[ip]
+
+        row = self._reader.execute('SELECT ipid FROM ipids WHERE ip = ?', (ip, )).fetchone()
+        if row is None:
+            return None
+        self._ip_to_ipid[ip] = row[0]
+        return row[0]
+
+    def get_hdid_ipids(self, hdid: str) -> List[int]:
+        """
+        Return the IPIDs an HDID was seen with.
+
+        Parameters
+        ----------
+        hdid : str
+            HDID.
+
+        Returns
+        -------
+        List[int]
+            IPIDs, in the order they were first seen with the HDID.
+        """
+
+        if hdid not in self._hdid_to_ipids:
+            rows = self._reader.execute('SELECT ipid FROM hdid_ipids WHERE hdid = ? '
+                                        'ORDER BY rowid', (hdid, )).fetchall()
+            self._hdid_to_ipids[hdid] = [ipid for (ipid, ) in rows]
+        return self._hdid_to_ipids[hdid].copy()
+
+    def get_ipid_hdids(self, ipid: int) -> Set[str]:
+        """
+        Return the HDIDs an IPID was seen with.
+
+        Parameters
+        ----------
+        ipid : int
+            IPID.
+
+        Returns
+        -------
+        Set[str]
+            HDIDs.
+        """
+
+        if ipid not in self._ipid_to_hdids:
+            rows = self._reader.execute('SELECT hdid FROM hdid_ipids WHERE ipid = ?',
+                                        (ipid, )).fetchall()
+            self._ipid_to_hdids[ipid] = {hdid for (hdid, ) in rows}
+        return self._ipid_to_hdids[ipid].copy()
+
+    def add_hdid_ipid(self, hdid: str, ipid: int):
+        """
+        Record that an HDID was seen with an IPID.
+
+        Parameters
+        ----------
+        hdid : str
+            HDID.
+        ipid : int
+            IPID.
+        """
+
+        if ipid in self.get_hdid_ipids(hdid):
+            return
+        self._hdid_to_ipids[hdid].append(ipid)
+        self.get_ipid_hdids(ipid)
+        self._ipid_to_hdids[ipid].add(hdid)
+        self._write(lambda db: db.execute('INSERT OR IGNORE INTO hdid_ipids (hdid, ipid) '
+                                          'VALUES (?, ?)', (hdid, ipid)))
+
+    def load_bans(self) -> List[Tuple[str, Union[int, str], float, Union[float, None],
+                                      Union[str, None]]]:
+        """
+        Return the bans.
+
+        Returns
+        -------
+        List[Tuple[str, Union[int, str], float, Union[float, None], Union[str, None]]]
+            Bans, in the order they were made, each as the kind of ban (`'ipid'`, `'hdid'` or
+            `'cidr'`), the banned value, when it was made, when it expires (or None if never)
+            and its reason (or None if none), with times in seconds since the epoch.
+        """
+
+        rows = self._reader.execute('SELECT ipid, hdid, cidr, created, expires, reason FROM bans '
+                                    'ORDER BY id').fetchall()
+        bans = list()
+        for (ipid, hdid, cidr, created, expires, reason) in rows:
+            for (kind, value) in (('ipid', ipid), ('hdid', hdid), ('cidr', cidr)):
+                if value is not None:
+                    bans.append((kind, value, created, expires, reason))
+                    break
+        return bans
+
+    def add_ban(self, kind: str, value: Union[int, str], created: float,
+                expires: Union[float, None] = None, reason: Union[str, None] = None,
+                actor_ipid: Union[int, None] = None):
+        """
+        Record a ban, and record it in the audit trail.
+
+        Parameters
+        ----------
+        kind : str
+            Kind of ban: `'ipid'`, `'hdid'` or `'cidr'`.
+        value : Union[int, str]
+            Banned IPID, HDID or IP range.
+        created : float
+            When the ban was made, in seconds since the epoch.
+        expires : Union[float, None], optional
+            When the ban expires, in seconds since the epoch. Defaults to None (never).
+        reason : Union[str, None], optional
+            Reason of the ban. Defaults to None (no reason).
+        actor_ipid : Union[int, None], optional
+            IPID of the moderator who made the ban. Defaults to None (not known).
+
+        Raises
+        ------
+        ValueError
+            If `kind` is not a kind of ban.
+        """
+
+        if kind not in BanManager.KINDS:
+            raise ValueError(f'Invalid kind of ban {kind}.')
+
+        def _add_ban(db: sqlite3.Connection):
+            db.execute(f'INSERT INTO bans ({kind}, created, expires, reason) VALUES (?, ?, ?, ?)',
+                       (value, created, expires, reason))
+            db.execute('INSERT INTO audit (time, action, actor_ipid, target, details) '
+                       'VALUES (?, ?, ?, ?, ?)', (created, 'ban', actor_ipid, str(value), reason))
+
+        self._write(_add_ban)
+
+    def remove_ban(self, kind: str, value: Union[int, str], actor_ipid: Union[int, None] = None,
+                   action: str = 'unban'):
+        """
+        Remove a ban, and record it in the audit trail.
+
+        Parameters
+        ----------
+        kind : str
+            Kind of ban: `'ipid'`, `'hdid'` or `'cidr'`.
+        value : Union[int, str]
+            Unbanned IPID, HDID or IP range.
+        actor_ipid : Union[int, None], optional
+            IPID of the moderator who removed the ban. Defaults to None (not known).
+        action : str, optional
+            Action to record in the audit trail. Defaults to `'unban'`.
+
+        Raises
+        ------
+        ValueError
+            If `kind` is not a kind of ban.
+        """
+
+        if kind not in BanManager.KINDS:
+            raise ValueError(f'Invalid kind of ban {kind}.')
+        now = time.time()
+
+        def _remove_ban(db: sqlite3.Connection):
+            db.execute(f'DELETE FROM bans WHERE {kind} = ?', (value, ))
+            db.execute('INSERT INTO audit (time, action, actor_ipid, target) '
+                       'VALUES (?, ?, ?, ?)', (now, action, actor_ipid, str(value)))
+
+        self._write(_remove_ban)
+
+    def get_audit(self, target: Union[str, None] = None,
+                  limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Return the most recent moderation actions, as committed to the database.
+
+        Parameters
+        ----------
+        target : Union[str, None], optional
+            If given, only return actions on this target (such as an IPID). Defaults to None.
+        limit : int, optional
+            Maximum number of actions to return. Defaults to 50.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            Actions, from most to least recent, with their time, action, actor_ipid, target and
+            details.
+        """
+
+        query = 'SELECT time, action, actor_ipid, target, details FROM audit'
+        parameters = list()
+        if target is not None:
+            query += ' WHERE target = ?'
+            parameters.append(target)
+        query += ' ORDER BY id DESC LIMIT ?'
+        parameters.append(limit)
+
+        fields = ('time', 'action', 'actor_ipid', 'target', 'details')
+        return [dict(zip(fields, row)) for row in self._reader.execute(query, parameters)]
+
+    def migrate_json(self, ipid_file: str, hdid_file: str, ban_file: str) -> bool:
+        """
+        Import the IPIDs, HDIDs and bans of the JSON storage files into the database, unless they
+        were imported before. Missing files are skipped. The JSON files are left as they are.
+
+        Parameters
+        ----------
+        ipid_file : str
+            JSON file of IPIDs by IP.
+        hdid_file : str
+            JSON file of IPID lists by HDID.
+        ban_file : str
+            JSON file of bans, in either the current or the legacy format.
+
+        Returns
+        -------
+        bool
+            True if the files were imported now, False if they had been imported before.
+        """
+
+        row = self._reader.execute("SELECT value FROM meta WHERE key = 'json_migrated'")
+        if row.fetchone() is not None:
+            return False
+
+        def _load(file: str, default: Any) -> Any:
+            if not os.path.exists(file):
+                return default
+            with open(file, 'r', encoding='utf-8') as json_file:
+                return json.load(json_file)
+
+        ipid_list = _load(ipid_file, dict())
+        hdid_list = _load(hdid_file, dict())
+        bans = BanManager.parse_banlist(_load(ban_file, list()))
+        now = time.time()
+
+        def _migrate(db: sqlite3.Connection):
+            db.executemany('INSERT OR IGNORE INTO ipids (ip, ipid) VALUES (?, ?)',
+                           ipid_list.items())
+            # Entries that are not IPIDs (say, from manual edits) are skipped
+            db.executemany('INSERT OR IGNORE INTO hdid_ipids (hdid, ipid) VALUES (?, ?)',
+                           ((hdid, int(ipid)) for (hdid, ipids) in hdid_list.items()
+                            for ipid in ipids if str(ipid).isdigit()))
+            db.executemany('INSERT INTO bans (ipid, hdid, cidr, created, expires, reason) '
+                           'VALUES (?, ?, ?, ?, ?, ?)',
+                           ((value if kind == 'ipid' else None,
+                             value if kind == 'hdid' else None,
+                             value if kind == 'cidr' else None,
+                             created, expires, reason)
+                            for (kind, value, created, expires, reason) in bans))
+            db.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(now), ))
+
+        self._write(_migrate).result()
+        logger.log_pdebug(f'Imported {len(ipid_list)} IPIDs, {len(hdid_list)} HDIDs and '
+                          f'{len(bans)} bans from the JSON storage files into {self.path}.')
+        return True
+
+    async def shutdown(self):
+        """
+        Wait for all writes to finish, and close the database.
+        """
+
+        def _close():
+            self._writer.close()
+
+        await asyncio.wrap_future(self._executor.submit(_close))
+        self._executor.shutdown(wait=True)
+        self._reader.close()
@@ -0,0 +1,266 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the StructureChecker class, which decides how often the structural
+invariants of player groups, games, hubs, trials, zones and timers are asserted, and measures how
+long asserting them takes.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+import typing
+
+from typing import Any, Callable, Dict, TypeVar
+
+if typing.TYPE_CHECKING:
+    # Avoid circular referencing
+    from server.tsuserver import TsuserverDR
+
+T = TypeVar('T', bound=Callable[..., Any])
+
+
+def gated_structure_check(check_structure: T) -> T:
+    """
+    Decorate a `_check_structure` method so that it only runs when the structure checker of the
+    server of its object decides so. Structural checks that run as part of another structural
+    check (such as parent class checks or checks of managed objects) always run.
+
+    Parameters
+    ----------
+    check_structure : T
+        `_check_structure` method to decorate.
+
+    Returns
+    -------
+    T
+        Decorated method.
+    """
+
+    @functools.wraps(check_structure)
+    def wrapper(self, *args, **kwargs):
+        server = getattr(self, 'server', None)
+        checker = getattr(server, 'structure_checker', None)
+        if checker is None:
+            return check_structure(self, *args, **kwargs)
+        return checker.run(check_structure, self, *args, **kwargs)
+
+    return wrapper
+
+
+class StructureChecker:
+    """
+    A gate for structural checks. In `'full'` mode every structural check runs, in `'off'` mode
+    none do, and in `'sampled'` mode a structural check runs if `every` structural checks were
+    requested since the last one that ran, or if `interval` seconds passed since then.
+
+    In `'incremental'` mode every structural check runs, but managers that support it only assert
+    the invariants of the objects that were touched since their last check, as well as the
+    invariants relating those objects to others. `run_full` still asserts all invariants.
+
+    The time spent asserting invariants is recorded overall and by type of checked object.
+    """
+
+    MODES = ('off', 'sampled', 'incremental', 'full')
+
+    def __init__(self, server: TsuserverDR, mode: str = 'full', every: int = 100,
+                 interval: float = 60):
+        """
+        Create a structure checker.
+
+        Parameters
+        ----------
+        server : TsuserverDR
+            Server the structure checker belongs to.
+        mode : str, optional
+            One of `'off'`, `'sampled'`, `'incremental'` or `'full'`. Defaults to `'full'`.
+        every : int, optional
+            In sampled mode, number of requested structural checks per structural check that
+            runs. Defaults to 100.
+        interval : float, optional
+            In sampled mode, maximum number of seconds between structural checks that run, as long
+            as some are requested. Defaults to 60.
+
+        Raises
+        ------
+        ValueError
+            If `mode` is not a valid mode.
+        """
+
+        if mode not in self.MODES:
+            raise ValueError(f'Invalid structure check mode {mode}.')
+
+        self.server = server
+        self.mode = mode
+        self.every = every
+        self.interval = interval
+
+        self._depth = 0
+        self._requested_since_check = 0
+        self._last_check = time.perf_counter()
+
+        self.requested = 0
+        self.performed = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self._time_by_type: Dict[str, float] = dict()
+
+    def should_check(self) -> bool:
+        """
+        Record that a structural check was requested and return whether it should run.
+
+        Returns
+        -------
+        bool
+            True if the structural check should run, False otherwise.
+        """
+
+        self.requested += 1
+        if self.mode in ('full', 'incremental'):
+            return True
+        if self.mode == 'off':
+            return False
+
+        self._requested_since_check += 1
+        if self._requested_since_check >= self.every:
+            return True
+        return time.perf_counter() - self._last_check >= self.interval
+
+    def is_incremental(self) -> bool:
+        """
+        Return whether managers should record the objects touched by their mutations, and scope
+        their structural checks to the objects touched since their last structural check.
+
+        Returns
+        -------
+        bool
+            True if the structure checker is in incremental mode, False otherwise.
+        """
+
+        return self.mode == 'incremental'
+
+    def run_full(self, instance: Any):
+        """
+        Run a structural check of an object that asserts all its invariants, regardless of the
+        mode of the structure checker.
+
+        Parameters
+        ----------
+        instance : Any
+            Object to check.
+
+        Raises
+        ------
+        AssertionError
+            If any of the invariants of the object are not maintained.
+        """
+
+        old_mode = self.mode
+        self.mode = 'full'
+        try:
+            instance._check_structure()
+        finally:
+            self.mode = old_mode
+
+    def run(self, check_structure: Callable[..., Any], instance: Any, *args, **kwargs) -> Any:
+        """
+        Run a structural check of an object if it is part of another structural check or if the
+        structure checker decides so, and record how long it took.
+
+        Parameters
+        ----------
+        check_structure : Callable[..., Any]
+            Undecorated `_check_structure` method.
+        instance : Any
+            Object to check.
+        *args, **kwargs
+            Arguments of the structural check.
+
+        Returns
+        -------
+        Any
+            Output of the structural check, or None if it did not run.
+
+        Raises
+        ------
+        AssertionError
+            If any of the invariants of the object are not maintained.
+        """
+
+        if self._depth:
+            return check_structure(instance, *args, **kwargs)
+        if not self.should_check():
+            return None
+
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return check_structure(instance, *args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            self._depth -= 1
+            self._requested_since_check = 0
+            self._last_check = end
+
+            elapsed = end - start
+            self.performed += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+            type_name = type(instance).__name__
+            self._time_by_type[type_name] = self._time_by_type.get(type_name, 0) + elapsed
+
+    def get_time_by_type(self) -> Dict[str, float]:
+        """
+        Return the total time (in seconds) spent running structural checks, by the name of the
+        type of the checked object.
+
+        Returns
+        -------
+        Dict[str, float]
+            Time by type name.
+        """
+
+        return self._time_by_type.copy()
+
+    def get_report(self) -> str:
+        """
+        Return a human readable summary of the structural checks requested and performed.
+
+        Returns
+        -------
+        str
+            Summary.
+        """
+
+        if self.mode == 'sampled':
+            mode = f'sampled (every {self.every} checks or {self.interval} seconds)'
+        else:
+            mode = self.mode
+
+        info = f'*Mode: {mode}'
+        info += f'\n*Checks performed: {self.performed} of {self.requested} requested'
+        info += (f'\n*Time spent: {self.total_time*1000:.1f} ms '
+                 f'(longest check: {self.max_time*1000:.1f} ms)')
+        by_type = sorted(self._time_by_type.items(), key=lambda item: item[1], reverse=True)
+        for (type_name, elapsed) in by_type:
+            info += f'\n**{type_name}: {elapsed*1000:.1f} ms'
+        return info
@@ -28,9 +28,9 @@ import asyncio
 import time
 import typing
 
-from typing import Any, Callable, Coroutine, Dict, Hashable, Tuple
+from typing import Any, Callable, Coroutine, Dict, Hashable
 
-from server.constants import Constants, Effects
+from server.constants import Constants
 from server.exceptions import TaskError, ServerError
 
 if typing.TYPE_CHECKING:
@@ -316,430 +316,6 @@ class TaskManager:
                     for c in p.get_members():
                         c.send_ooc('{} was AFK kicked from your party.'.format(original_name))
 
-    async def as_day_cycle(self, task: Task):
-        client: ClientManager.Client = task.owner
-        area_1: int = task.parameters['area_1']
-        area_2: int = task.parameters['area_2']
-        hour_length: int = task.parameters['hour_length']
-        hour_start: int = task.parameters['hour_start']
-        hours_in_day: int = task.parameters['hours_in_day']
-        send_first_hour: bool = task.parameters['send_first_hour']
-
-        hour = hour_start
-        hub = client.hub  # For later, in case client changes hub
-        minute_at_interruption = 0
-        main_hour_length = hour_length
-        time_started_at = time.time()
-        time_refreshed_at = time.time()  # Doesnt need init, but PyLint complains otherwise
-        periods = list()
-        force_period_refresh = False
-        current_period = (-1, '', main_hour_length)
-        notify_others = False
-
-        # Initialize task attributes
-        task.parameters['is_paused'] = False
-        task.parameters['is_unknown'] = False
-        task.parameters['refresh_reason'] = ''
-        task.parameters['period'] = ''
-        task.parameters['hours_in_day'] = hours_in_day
-        task.parameters['main_hour_length'] = main_hour_length
-
-        # Manually notify for the very first hour (if needed)
-        targets = [c for c in client.hub.get_players() if c == client or
-                   ((c.is_staff() or send_first_hour)
-                    and area_1 <= c.area.id <= area_2)]
-        for c in targets:
-            c.send_ooc('It is now {}:00.'.format('{0:02d}'.format(hour)))
-            c.send_clock(client_id=client.id, hour=hour)
-
-        def find_period_of_hour(hour) -> Tuple[int, str, int]:
-            if not periods:
-                return (-1, '', main_hour_length)
-            if hour < periods[0][0]:
-                return periods[-1]
-            output = None
-            for period_tuple in periods:
-                period_start, _, _ = period_tuple
-                if hour >= period_start:
-                    output = period_tuple
-            return output
-
-        while True:
-            try:
-                refresh_reason = task.parameters['refresh_reason']
-                task.parameters['refresh_reason'] = ''
-
-                # If timer is in unknown phase, there is no time progression
-                # Check again in one second.
-                if task.parameters['is_unknown']:
-                    # Manually restart other flags because they are no longer relevant
-                    notify_others = True
-                    await asyncio.sleep(1)
-                    continue
-
-                # If timer is paused, check again in one second.
-                if task.parameters['is_paused']:
-                    # Manually restart other flags because they are no longer relevant
-                    notify_others = True
-                    await asyncio.sleep(1)
-                    continue
-
-                # Otherwise, timer is not paused, so either an hour just finished or the timer
-                # was refreshed for some reason (unpausing, new period, etc.)
-                # If the clock was just set again, do not wait, execute actions immediately
-                if refresh_reason in ['set', 'set_hours_reset']:
-                    pass
-
-                # If the clock just had a new period added, its number of hours changed, or was just
-                # unpaused, restart the current hour
-                elif refresh_reason in ['period', 'unpause', 'set_hours_proceed']:
-                    notify_others = True
-                    await asyncio.sleep((60-minute_at_interruption)/60 * hour_length)
-                # Otherwise, just wait full hour
-                else:
-                    notify_others = True
-                    await asyncio.sleep(hour_length)
-
-                # After handling any interrupts, an hour just finished without any
-                # interruptions
-                # In all cases now, update hour
-                # We can do that as code only runs here if the timer is not paused
-                hour = (hour + 1) % hours_in_day
-                targets = [c for c in client.hub.get_players()
-                           if c == client
-                           or (notify_others and area_1 <= c.area.id <= area_2)]
-
-                # Check if new period has started
-                if not periods:
-                    if current_period[1] != '':
-                        for c in targets:
-                            task.parameters['period'] = ''
-                            c.send_time_of_day(name='')
-                            c.send_ooc('It is no longer some particular period of day.')
-                    current_period = find_period_of_hour(hour)
-                    hour_length = main_hour_length
-                else:
-                    current_period = find_period_of_hour(hour)
-                    new_period_start, new_period_name, new_period_length = current_period
-                    hour_length = new_period_length
-                    if new_period_start == hour or force_period_refresh:
-                        for c in targets:
-                            task.parameters['period'] = new_period_name
-                            c.send_time_of_day(name=new_period_name)
-                            c.send_ooc(f'It is now {new_period_name}.')
-                force_period_refresh = False
-
-                # Regardless of new period, send other packets
-                for c in targets:
-                    c.send_ooc('It is now {}:00.'.format('{0:02d}'.format(hour)))
-                    c.send_clock(client_id=client.id, hour=hour)
-
-                time_started_at = time.time()
-                minute_at_interruption = 0
-                notify_others = True
-
-            except (asyncio.CancelledError, KeyError):
-                # Code can run here for a few reasons
-                # 1. The timer was ended
-                # 2. The clock current hour and hourt length was manually set
-                # 3. The clock's number of hours was manually set
-                # 4. The clock was set to be at an unknown time
-                # 5. A new period was added
-                # 6. The clock was just unpaused
-                # 7. The clock was just paused
-                time_refreshed_at = time.time()
-
-                if 'refresh_reason' not in task.parameters:
-                    task.parameters['refresh_reason'] = ''
-
-                refresh_reason = task.parameters['refresh_reason']
-
-                if not refresh_reason:
-                    # refresh_reason may be undefined or the empty string.
-                    # Both cases imply cancelation
-                    for c in targets:
-                        c.send_clock(client_id=client.id, hour=-1)
-                        c.send_time_of_day(name='')  # Reset time of day
-                    client.send_ooc('Your day cycle in areas {} through {} has been ended.'
-                                    .format(area_1, area_2))
-                    client.send_ooc_others('(X) The day cycle initiated by {} in areas {} through '
-                                           '{} has been ended.'
-                                           .format(client.name, area_1, area_2),
-                                           is_zstaff_flex=True, in_hub=hub)
-                    targets = [c for c in client.hub.get_players()
-                               if c == client or area_1 <= c.area.id <= area_2]
-                    break
-
-                if refresh_reason == 'set':
-                    old_hour = hour
-                    hour_length, hour = task.parameters['new_day_cycle_args']
-                    main_hour_length = hour_length
-                    task.parameters['main_hour_length'] = main_hour_length
-
-                    # Do not notify of clock set to normies if only hour length changed
-                    notify_others = (old_hour != hour)
-                    minute_at_interruption = 0
-                    force_period_refresh = True
-                    str_hour = '{0:02d}'.format(hour)
-                    task.parameters['is_unknown'] = False
-                    client.send_ooc('Your day cycle in areas {} through {} was updated. New hour '
-                                    'length: {} seconds. New hour: {}:00.'
-                                    .format(area_1, area_2, hour_length, str_hour))
-                    client.send_ooc_others('(X) The day cycle initiated by {} in areas {} through '
-                                           '{} has been updated. New hour length: {} seconds. '
-                                           'New hour: {}:00.'
-                                           .format(client.name, area_1, area_2, hour_length,
-                                                   str_hour),
-                                           is_zstaff_flex=True, in_hub=hub)
-                    # Setting time does not unpause the timer, warn clock master
-                    if task.parameters['is_paused']:
-                        client.send_ooc('(X) Warning: Your day cycle is still paused.')
-
-                    # Moreover, hour is +1'd automatically if the clock is unpaused
-                    # So preemptively -1
-                    if not task.parameters['is_paused']:
-                        hour -= 1  # Take one hour away, because an hour would be added anyway
-
-                    # This does not modify the hour length of active periods, so if there are any
-                    # periods, warn clock master
-                    if periods:
-                        client.send_ooc('(X) Warning: A period is currently active, so the day '
-                                        'cycle is using its hour length. Modify its hour length '
-                                        'using /clock_period.')
-
-                elif refresh_reason == 'set_hours':
-                    old_hour = hour
-                    task.parameters['refresh_reason'] = 'set_hours_proceed'
-                    # Only update minute and time started at if timer is not paused
-                    if not task.parameters['is_paused']:
-                        minute_at_interruption += (time_refreshed_at-time_started_at)/hour_length*60
-                        time_started_at = time.time()
-
-                    hours_in_day = task.parameters['hours_in_day']
-                    client.send_ooc(f'Your day cycle in areas {area_1} through {area_2} was '
-                                    f'updated. New number of hours in the day: {hours_in_day} '
-                                    f'hours.')
-                    client.send_ooc_others(f'(X) The day cycle initiated by {client.displayname} '
-                                           f'[{client.id}] in areas {area_1} through {area_2} has '
-                                           f'been updated. New number of hours in the day: '
-                                           f'{hours_in_day} hours.',
-                                           is_zstaff_flex=True, in_hub=hub)
-                    # Check if current hours exceed new number of hours in the day
-                    if hour >= hours_in_day:
-                        hour = 0
-                        minute_at_interruption = 0
-                        task.parameters['refresh_reason'] = 'set_hours_reset'
-                        client.send_ooc(f'(X) The current hour {old_hour} was beyond the new '
-                                        f'number of hours in the day you set, so your current hour '
-                                        f'was set to 0.')
-                        client.send_ooc_others(f'(X) The day cycle initiated by '
-                                               f'{client.displayname} [{client.id}] in areas '
-                                               f'{area_1} through {area_2} has had its current '
-                                               f'hour be set to 0 because it was beyond the number '
-                                               f'of hours it was set to now have.',
-                                               is_zstaff_flex=True, in_hub=hub,
-                                               pred=lambda c: area_1 <= c.area.id <= area_2)
-
-                        # Moreover, hour is +1'd automatically if the clock is unpaused
-                        # So preemptively -1
-                        if not task.parameters['is_paused']:
-                            hour -= 1  # Take one hour away, because an hour would be added anyway
-
-                    # Pop any periods that are beyond the new number of hours in the day
-                    popped_periods = list()
-                    for (period_start, period_name) in periods.copy():
-                        if period_start >= hours_in_day:
-                            periods.remove((period_start, period_name))
-                            popped_periods.append((period_start, period_name))
-                    if popped_periods:
-                        client.send_ooc(f'(X) The following periods were removed from the list of '
-                                        f'periods as they were beyond the new number of hours in '
-                                        f'the day: {popped_periods}.')
-                        client.send_ooc_others(f'(X) The day cycle initiated by '
-                                               f'{client.displayname} [{client.id}] in areas '
-                                               f'{area_1} through {area_2} has had the following '
-                                               f'periods be removed from the list of periods as '
-                                               f'they were beyond the number of hours it was set '
-                                               f'to now have: {popped_periods}.',
-                                               is_zstaff_flex=True, in_hub=hub,
-                                               pred=lambda c: area_1 <= c.area.id <= area_2)
-
-                    force_period_refresh = True  # Super conservative but always correct.
-                    # Setting time does not unpause the timer, warn clock master
-                    if task.parameters['is_paused']:
-                        client.send_ooc('(X) Warning: Your day cycle is still paused.')
-
-                elif refresh_reason == 'unknown':
-                    hour = -1
-                    task.parameters['is_unknown'] = True
-
-                    client.send_ooc('You have set the time to be unknown.')
-                    client.send_ooc_others(f'(X) The day cycle initiated by {client.displayname} '
-                                           f'[{client.id}] in areas {area_1} through {area_2} has '
-                                           f'been set to be at an unknown time.',
-                                           is_zstaff_flex=True, in_hub=hub,
-                                           pred=lambda c: area_1 <= c.area.id <= area_2)
-                    client.send_ooc_others('You seem to have lost track of time.',
-                                           is_zstaff_flex=False, in_hub=hub,
-                                           pred=lambda c: area_1 <= c.area.id <= area_2)
-
-                    task.parameters['period'] = 'unknown'
-                    targets = [c for c in client.hub.get_players()
-                               if c == client or (area_1 <= c.area.id <= area_2)]
-                    for c in targets:
-                        c.send_clock(client_id=client.id, hour=-1)
-                        c.send_time_of_day(name='unknown')
-
-                elif refresh_reason == 'period':
-                    # Only update minute and time started at if timer is not paused
-                    if not task.parameters['is_paused']:
-                        minute_at_interruption += (time_refreshed_at-time_started_at)/hour_length*60
-                        time_started_at = time.time()
-                    start, name, length = task.parameters['new_period_start']
-
-                    # Pop entries with same start or name if needed (duplicated entries)
-                    found = False
-                    for (entry_start, entry_name, entry_length) in periods.copy():
-                        if entry_start == start or entry_name == name:
-                            periods.remove((entry_start, entry_name, entry_length))
-                            found = True
-
-                    if not found and start < 0:
-                        # Check if attempted to remove a non-existing period
-                        client.send_ooc(f'Period `{name}` not found.')
-                    else:
-                        if start >= 0:
-                            periods.append((start, name, length))
-
-                        # start=-1 is used to indicate *please erase this period name*. By the previous
-                        # for loop, any matching period names are removed, and by the if statement
-                        # -1 is not added.
-
-                        periods.sort()
-                        # Decide which period the current hour belongs to
-                        # Note it could be possible the current hour is smaller than than the first
-                        # period start. By wrapping around 24 hours logic, that means the current
-                        # period is the one given by the latest period.
-
-                        # Also note this is only relevant if the time is not unknown. If it is,
-                        # then no updates should be sent
-                        changed_current_period = False
-                        if not task.parameters['is_unknown']:
-                            new_period_start, new_period_name, new_period_length = find_period_of_hour(hour)
-                            changed_current_period = (current_period[1] != new_period_name)
-                            current_period = new_period_start, new_period_name, new_period_length
-                            if periods and new_period_start == hour:
-                                changed_current_period = True
-
-                        if changed_current_period:
-                            targets = [c for c in client.hub.get_players()
-                                       if c == client or area_1 <= c.area.id <= area_2]
-                            task.parameters['period'] = new_period_name
-                            if new_period_name:
-                                for c in targets:
-                                    c.send_time_of_day(name=new_period_name)
-                                    c.send_ooc(f'It is now {new_period_name}.')
-                            else:
-                                for c in targets:
-                                    c.send_time_of_day(name='')
-                                    c.send_ooc('It is no longer some particular period of day.')
-
-                        # Send notifications appropriately
-                        if start >= 0:
-                            # Case added a period
-                            formatted_time = '{}:00'.format('{0:02d}'.format(start))
-                            client.send_ooc(f'(X) You have added period `{name}`. '
-                                            f'Period hour length: {current_period[2]} seconds. '
-                                            f'Period hour start: {formatted_time}.')
-                            client.send_ooc_others(
-                                f'(X) {client.displayname} [{client.id}] has added period `{name}` '
-                                f'to their day cycle. '
-                                f'Period hour length: {current_period[2]} seconds. '
-                                f'Period hour start: {formatted_time} '
-                                f'({client.area.id}).',
-                                is_zstaff_flex=True, in_hub=hub,
-                            )
-                        else:
-                            # Case removed a period
-                            client.send_ooc(f'(X) You have removed period `{name}`.')
-                            client.send_ooc_others(f'(X) {client.displayname} [{client.id}] has '
-                                                   f'removed period `{name}` off their day cycle '
-                                                   f'({client.area.id}).',
-                                                   is_zstaff_flex=True, in_hub=hub)
-                elif refresh_reason == 'unpause':
-                    task.parameters['is_paused'] = False
-
-                    client.send_ooc('Your day cycle in areas {} through {} has been unpaused.'
-                                    .format(area_1, area_2))
-                    client.send_ooc_others('(X) The day cycle initiated by {} in areas {} through '
-                                           '{} has been unpaused.'
-                                           .format(client.name, area_1, area_2),
-                                           is_zstaff_flex=True, in_hub=hub)
-
-                    time_started_at = time.time()
-                    igt_now = '{}:{}'.format('{0:02d}'.format(hour),
-                                             '{0:02d}'.format(int(minute_at_interruption)))
-                    igt_rounded = '{}:00.'.format('{0:02d}'.format(hour))
-                    client.send_ooc('It is now {}.'.format(igt_now))
-                    client.send_ooc_others('It is now {}.'.format(igt_now),
-                                           is_zstaff_flex=True, in_hub=hub,
-                                           pred=lambda c: area_1 <= c.area.id <= area_2)
-                    client.send_ooc_others('It is now some time past {}.'.format(igt_rounded),
-                                           is_zstaff_flex=False, in_hub=hub,
-                                           pred=lambda c: area_1 <= c.area.id <= area_2)
-                    targets = [c for c in client.hub.get_players()
-                               if c == client or area_1 <= c.area.id <= area_2]
-                    for c in targets:
-                        c.send_clock(client_id=client.id, hour=hour)
-
-                elif refresh_reason == 'pause':
-                    task.parameters['is_paused'] = True
-
-                    minute_at_interruption += (time_refreshed_at - time_started_at)/hour_length*60
-                    igt_now = '{}:{}'.format('{0:02d}'.format(hour),
-                                             '{0:02d}'.format(int(minute_at_interruption)))
-                    client.send_ooc('Your day cycle in areas {} through {} has been paused at {}.'
-                                    .format(area_1, area_2, igt_now))
-                    client.send_ooc_others('(X) The day cycle initiated by {} in areas {} through '
-                                           '{} has been paused at {}.'
-                                           .format(client.name, area_1, area_2, igt_now),
-                                           is_zstaff_flex=True, in_hub=hub)
-                else:
-                    raise ValueError(f'Unknown refresh reason {refresh_reason} for day cycle.')
-
-    async def _as_effect(self, task: Task):
-        client: ClientManager.Client = task.owner
-        length: int = task.parameters['length']    # Length in seconds, already converted
-        effect: Effects = task.parameters['effect']
-        new_value: bool = task.parameters['new_value']
-
-        try:
-            await asyncio.sleep(length)
-        except asyncio.CancelledError:
-            pass  # Cancellation messages via send_oocs must be sent manually
-        else:
-            if new_value:
-                client.send_ooc('The effect `{}` kicked in.'.format(effect.name))
-                client.send_ooc_others('(X) {} [{}] is now subject to the effect `{}`.'
-                                       .format(client.displayname, client.id, effect.name),
-                                       is_zstaff_flex=True)
-                effect.function(client, True)
-            else:
-                client.send_ooc('The effect `{}` stopped.')
-                client.send_ooc_others('(X) {} [{}] is no longer subject to the effect `{}`.'
-                                       .format(client.displayname, client.id, effect.name),
-                                       is_zstaff_flex=True)
-                effect.function(client, False)
-
-    async def as_effect_blindness(self, task: Task):
-        await self._as_effect(task)
-
-    async def as_effect_deafness(self, task: Task):
-        await self._as_effect(task)
-
-    async def as_effect_gagged(self, task: Task):
-        await self._as_effect(task)
-
     async def as_handicap(self, task: Task):
         client: ClientManager.Client = task.owner
         length: int = task.parameters['length']
@@ -27,6 +27,7 @@ import time
 
 from server.constants import Constants
 from server.exceptions import TimerError
+from server.structure_checker import gated_structure_check
 
 
 class Timer:
@@ -735,6 +736,7 @@ class Timer:
                 self._on_refresh(new_time, elapsed)
             current_time = new_time
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants in the class description are satisfied.
@@ -1128,6 +1130,7 @@ class TimerManager():
             timer_number += 1
         raise TimerError.ManagerTooManyTimersError
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
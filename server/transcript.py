@@ -0,0 +1,345 @@
+# TsuserverDR, server software for Danganronpa Online based on tsuserver3,
+# which is server software for Attorney Online.
+#
+# Copyright (C) 2016 argoneus <argoneuscze@gmail.com> (original tsuserver3)
+#           (C) 2018-22 Chrezm/Iuvee <thechrezm@gmail.com> (further additions)
+#           (C) 2022 Tricky Leifa (further additions)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Module that contains the structured transcript of the server, a stream of JSON lines, one per IC
+message, OOC message, music change or area change, as well as the tools to index and search it.
+
+Each line has the following fields:
+* time: Time of the event, in seconds since the epoch.
+* event: Type of event: `'ic'`, `'ooc'`, `'music'` or `'area'`.
+* hub: ID of the hub the event happened in.
+* area: ID of the area the event happened in.
+* client: ID of the client that caused the event.
+* ipid: IPID of the client that caused the event.
+* payload: Details of the event.
+
+Transcript segments are written to `logs/transcripts`. Archived segments come with a sidecar index
+that lists the time range, IPIDs and areas of their events, which searches use to skip segments
+that cannot have any matching events.
+
+Searches can be run from the command line. For example, to search for the IC messages of IPID 5 in
+area 3 of hub h0 since 18:00 UTC of October 22, 2022, run:
+
+python -m server.transcript --ipid 5 --hub h0 --area 3 --event ic --since 2022-10-22T18:00
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+
+from typing import Any, Dict, Iterator, List, Union
+
+TRANSCRIPT_DIRECTORY = 'logs/transcripts'
+EVENT_TYPES = ('ic', 'ooc', 'music', 'area')
+
+_SEGMENT_REGEX = re.compile(r'.+\.jsonl(\.gz)?')
+
+
+class TranscriptFormatter(logging.Formatter):
+    """
+    A formatter that formats the transcript event in the `transcript` attribute of a record as a
+    JSON line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            Record to format.
+
+        Returns
+        -------
+        str
+            JSON line of the transcript event of the record.
+        """
+
+        event = {'time': round(record.created, 3)}
+        event.update(record.transcript)
+        return json.dumps(event, ensure_ascii=False)
+
+
+def index_segment(path: str) -> Dict[str, Any]:
+    """
+    Return the sidecar index of an uncompressed transcript segment.
+
+    Parameters
+    ----------
+    path : str
+        Transcript segment.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Index, with the minimum and maximum time of its events, the number of events, the IPIDs
+        seen and the areas (as [hub ID, area ID] pairs) seen.
+    """
+
+    min_time, max_time = None, None
+    ipids, areas = set(), set()
+    events = 0
+
+    for event in _read_segment(path):
+        events += 1
+        if min_time is None or event['time'] < min_time:
+            min_time = event['time']
+        if max_time is None or event['time'] > max_time:
+            max_time = event['time']
+        ipids.add(event['ipid'])
+        areas.add((event['hub'], event['area']))
+
+    return {
+        'min_time': min_time,
+        'max_time': max_time,
+        'events': events,
+        'ipids': sorted(ipids, key=str),
+        'areas': sorted(areas, key=str),
+    }
+
+
+def _read_segment(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the events of a transcript segment, compressed or not. Lines that are not valid JSON
+    (such as a line cut short by a crash) are skipped.
+
+    Parameters
+    ----------
+    path : str
+        Transcript segment.
+
+    Yields
+    ------
+    Dict[str, Any]
+        Event.
+    """
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def _segment_sort_key(name: str) -> List[Union[str, int]]:
+    """
+    Return a key that sorts transcript segment names chronologically: by date, then numbered
+    segments of a file in order, and then the file itself.
+
+    Parameters
+    ----------
+    name : str
+        Segment name.
+
+    Returns
+    -------
+    List[Union[str, int]]
+        Sort key.
+    """
+
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def _index_may_match(
+    index: Dict[str, Any],
+    since: Union[float, None],
+    until: Union[float, None],
+    ipid: Union[int, None],
+    hub: Union[str, None],
+    area: Union[int, None],
+) -> bool:
+    """
+    Return whether a transcript segment with a given sidecar index may have events that match a
+    search.
+
+    Returns
+    -------
+    bool
+        False if the index rules out any matching events, True otherwise.
+    """
+
+    if not index['events']:
+        return False
+    if since is not None and index['max_time'] < since:
+        return False
+    if until is not None and index['min_time'] > until:
+        return False
+    if ipid is not None and ipid not in index['ipids']:
+        return False
+    if hub is not None or area is not None:
+        return any((hub is None or hub == area_hub) and (area is None or area == area_id)
+                   for (area_hub, area_id) in index['areas'])
+    return True
+
+
+def search(
+    directory: str = TRANSCRIPT_DIRECTORY,
+    since: Union[float, None] = None,
+    until: Union[float, None] = None,
+    ipid: Union[int, None] = None,
+    client: Union[int, None] = None,
+    hub: Union[str, None] = None,
+    area: Union[int, None] = None,
+    events: Union[List[str], None] = None,
+    text: Union[str, None] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the transcript events that match all given criteria, in the order they were written.
+    Segments whose sidecar index rules out any matches are not read.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Directory of the transcript segments. Defaults to TRANSCRIPT_DIRECTORY.
+    since : Union[float, None], optional
+        Earliest time of the events, in seconds since the epoch. Defaults to None.
+    until : Union[float, None], optional
+        Latest time of the events, in seconds since the epoch. Defaults to None.
+    ipid : Union[int, None], optional
+        IPID of the client of the events. Defaults to None.
+    client : Union[int, None], optional
+        ID of the client of the events. Defaults to None.
+    hub : Union[str, None], optional
+        ID of the hub of the events. Defaults to None.
+    area : Union[int, None], optional
+        ID of the area of the events. Defaults to None.
+    events : Union[List[str], None], optional
+        Types of the events. Defaults to None.
+    text : Union[str, None], optional
+        Text that appears (ignoring case) in the payload of the events. Defaults to None.
+
+    Yields
+    ------
+    Dict[str, Any]
+        Matching event.
+    """
+
+    if text is not None:
+        text = text.lower()
+
+    for name in sorted(os.listdir(directory), key=_segment_sort_key):
+        if not _SEGMENT_REGEX.fullmatch(name):
+            continue
+        path = os.path.join(directory, name)
+
+        index_path = f'{path[:-len(".gz")] if path.endswith(".gz") else path}.idx.json'
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as index_file:
+                index = json.load(index_file)
+            if not _index_may_match(index, since, until, ipid, hub, area):
+                continue
+
+        for event in _read_segment(path):
+            if since is not None and event['time'] < since:
+                continue
+            if until is not None and event['time'] > until:
+                continue
+            if ipid is not None and event['ipid'] != ipid:
+                continue
+            if client is not None and event['client'] != client:
+                continue
+            if hub is not None and event['hub'] != hub:
+                continue
+            if area is not None and event['area'] != area:
+                continue
+            if events is not None and event['event'] not in events:
+                continue
+            if text is not None and text not in json.dumps(event['payload'],
+                                                           ensure_ascii=False).lower():
+                continue
+            yield event
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    """
+    Return a human readable line for a transcript event.
+
+    Parameters
+    ----------
+    event : Dict[str, Any]
+        Event.
+
+    Returns
+    -------
+    str
+        Line.
+    """
+
+    when = datetime.datetime.fromtimestamp(event['time'], tz=datetime.timezone.utc)
+    payload = ' '.join(f'{key}={value!r}' for (key, value) in event['payload'].items())
+    return (f'[{when.strftime("%Y-%m-%dT%H:%M:%S")} UTC][{event["ipid"]}][{event["client"]}]'
+            f'[{event["hub"]}][{event["area"]}][{event["event"].upper()}] {payload}')
+
+
+def _parse_time(value: str) -> float:
+    """
+    Return the seconds since the epoch of an ISO 8601 date and time, taken as UTC if it has no
+    timezone.
+    """
+
+    when = datetime.datetime.fromisoformat(value)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return when.timestamp()
+
+
+def main(argv: Union[List[str], None] = None):
+    """
+    Search the transcript from the command line, and print the matching events.
+
+    Parameters
+    ----------
+    argv : Union[List[str], None], optional
+        Command line arguments. Defaults to None (use sys.argv).
+    """
+
+    parser = argparse.ArgumentParser(description='Search the transcript of the server.')
+    parser.add_argument('--directory', default=TRANSCRIPT_DIRECTORY,
+                        help='directory of the transcript segments')
+    parser.add_argument('--since', type=_parse_time, help='earliest time (ISO 8601, UTC)')
+    parser.add_argument('--until', type=_parse_time, help='latest time (ISO 8601, UTC)')
+    parser.add_argument('--ipid', type=int, help='IPID of the client')
+    parser.add_argument('--client', type=int, help='ID of the client')
+    parser.add_argument('--hub', help='ID of the hub (e.g. h0)')
+    parser.add_argument('--area', type=int, help='ID of the area')
+    parser.add_argument('--event', action='append', choices=EVENT_TYPES,
+                        help='type of event (may be repeated)')
+    parser.add_argument('--text', help='text in the event, ignoring case')
+    args = parser.parse_args(argv)
+
+    for event in search(directory=args.directory, since=args.since, until=args.until,
+                        ipid=args.ipid, client=args.client, hub=args.hub, area=args.area,
+                        events=args.event, text=args.text):
+        print(format_event(event))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -31,8 +31,9 @@ from server.exceptions import               NonStopDebateError, TrialError, Hubb
 from server.hubbedgame_manager import _HubbedGame, HubbedGameManager
 from server.trialminigame import _TrialMinigame, TRIALMINIGAMES
 from server.nonstopdebate import _NonStopDebate
+from server.structure_checker import gated_structure_check
 
-from typing import Callable, Dict, Set, Any, Tuple, Type, Union
+from typing import Callable, Dict, Set, Any, Tuple, Type, Union, FrozenSet, Mapping
 
 if typing.TYPE_CHECKING:
     from server.area_manager import AreaManager
@@ -1890,6 +1891,7 @@ class _Trial(_TrialTrivialInherited):
         """
 
         self._autoadd_minigame_on_player_added = new_value
+        self.manager._touch_managee(self)
 
     def unchecked_add_player(self, user: ClientManager.Client):
         """
@@ -2183,6 +2185,7 @@ class _Trial(_TrialTrivialInherited):
             raise TrialError.InfluenceIsInvalidError
 
         self._player_to_influence[user.id] = (new_influence, min_influence, max_influence)
+        self.manager._touch_managee(self)
         user.send_health(side=2, health=int(new_influence))
 
         # If the new influence is 0, warn all trial leaders
@@ -2374,6 +2377,7 @@ class _Trial(_TrialTrivialInherited):
             raise TrialError.FocusIsInvalidError
 
         self._player_to_focus[user.id] = (new_focus, min_focus, max_focus)
+        self.manager._touch_managee(self)
         user.send_health(side=1, health=int(new_focus))
 
     def change_focus_by(self, user: ClientManager.Client, change_by: float):
@@ -2894,6 +2898,7 @@ class _Trial(_TrialTrivialInherited):
                                    pred=lambda c: c in self.get_leaders(), in_hub=area.hub)
             self.dismiss_user(client)
 
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_area_client_entered_final(
@@ -2992,6 +2997,7 @@ class _Trial(_TrialTrivialInherited):
                                        f'/trial_add {client.id}',
                                        pred=lambda c: c in self.get_leaders())
                 self.introduce_user(client)
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_client_change_character(
@@ -3058,6 +3064,7 @@ class _Trial(_TrialTrivialInherited):
             player.send_ooc_others(f'(X) Player {player.id} changed character from {old_char_name} '
                                    f'to {player.get_char_name()} in your trial.',
                                    pred=lambda c: c in self.get_leaders())
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_client_destroyed(self, player: ClientManager.Client):
@@ -3098,6 +3105,7 @@ class _Trial(_TrialTrivialInherited):
                                    'as it lost all its players.',
                                    is_zstaff_flex=False, part_of=nonplayers)
 
+        self.manager._touch_managee(self)
         self.manager._check_structure()
 
     def _on_client_inbound_rt(self, player: ClientManager.Client, contents: Dict[str, Any]):
@@ -3159,6 +3167,7 @@ class _Trial(_TrialTrivialInherited):
 
         self.destroy()
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -3667,15 +3676,17 @@ class _TrialManagerTrivialInherited(HubbedGameManager):
 
         return super().get_managees_of_user(user)
 
-    def get_player_to_managees_map(self) -> Dict[ClientManager.Client, Set[_Trial]]:
+    def get_player_to_managees_map(
+        self
+    ) -> Mapping[ClientManager.Client, FrozenSet[_Trial]]:
         """
-        Return a mapping of the players part of any trial managed by this manager to the
-        trial managed by this manager such players belong to.
+        Return a read-only view of the mapping of the players part of any trial managed by this
+        manager to the trial managed by this manager such players belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_Trial]]
-            Mapping.
+        Mapping[ClientManager.Client, FrozenSet[_Trial]]
+            Mapping. It reflects later changes to trial memberships.
         """
 
         return super().get_player_to_managees_map()
@@ -3751,15 +3762,17 @@ class _TrialManagerTrivialInherited(HubbedGameManager):
 
         return super().find_area_concurrent_limiting_managee(area)
 
-    def get_areas_to_managees_map(self) -> Dict[ClientManager.Client, Set[_Trial]]:
+    def get_areas_to_managees_map(
+        self
+    ) -> Mapping[AreaManager.Area, FrozenSet[_Trial]]:
         """
-        Return a mapping of the areas part of any trial managed by this manager to the
-        trial managed by this manager such players belong to.
+        Return a read-only view of the mapping of the areas part of any trial managed by this
+        manager to the trial managed by this manager such areas belong to.
 
         Returns
         -------
-        Dict[ClientManager.Client, Set[_Trial]]
-            Mapping.
+        Mapping[AreaManager.Area, FrozenSet[_Trial]]
+            Mapping. It reflects later changes to trial areas.
         """
 
         return super().get_areas_to_managees_map()
@@ -4035,6 +4048,7 @@ class TrialManager(_TrialManagerTrivialInherited):
             game_number += 1
         raise TrialError.ManagerTooManyGamesError
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert that all invariants specified in the class description are maintained.
@@ -22,7 +22,7 @@
 # This class will suffer major reworkings for 4.3
 
 from __future__ import annotations
-from typing import Any,             Callable, Dict, List, Tuple, Type
+from typing import Any,             Callable, Dict, List, Set, Tuple, Type, Union
 
 import asyncio
 import errno
@@ -40,12 +40,19 @@ import urllib.error
 from server import logger
 from server.ban_manager import BanManager
 from server.constants import Constants
+from server.effect_manager import EffectManager
 from server.client_manager import ClientManager
+from server.clock_manager import ClockManager
 from server.exceptions import ServerError
 from server.hub_manager import HubManager
+from server.loop_monitor import LoopMonitor
 from server.network.ao_protocol import AOProtocol
+from server.music_loop_manager import MusicLoopManager
 from server.network.ms3_protocol import MasterServerClient
 from server.party_manager import PartyManager
+from server.persistence_manager import PersistenceManager
+from server.sqlite_storage import SQLiteStorage
+from server.structure_checker import StructureChecker
 from server.task_manager import TaskManager
 from server.timer_manager import TimerManager
 
@@ -90,8 +97,29 @@ class TsuserverDR:
 
         self.load_config()
 
+        self.structure_checker = StructureChecker(
+            self,
+            mode=self.config['structure_checks']['mode'],
+            every=self.config['structure_checks'].get('every', 100),
+            interval=self.config['structure_checks'].get('interval', 60))
+        self.persistence_manager = PersistenceManager(
+            self, delay=self.config['storage_write_delay'])
+        self.sqlite_storage = None
+        if self.config['storage_backend'] == 'sqlite':
+            self.sqlite_storage = SQLiteStorage(self, 'storage/tsuserverdr.db')
+            self.sqlite_storage.migrate_json('storage/ip_ids.json', 'storage/hd_ids.json',
+                                             'storage/banlist.json')
         self.ban_manager = BanManager(self)
         self.timer_manager = TimerManager(self)
+        self.clock_manager = ClockManager(self)
+        self.effect_manager = EffectManager(self)
+        self.music_loop_manager = MusicLoopManager(self)
+        self.loop_monitor = None
+        if self.config['loop_lag_monitor']:
+            self.loop_monitor = LoopMonitor(
+                self,
+                interval=self.config['loop_lag_monitor']['interval_ms']/1000,
+                threshold=self.config['loop_lag_monitor']['threshold_ms']/1000)
         self.party_manager = PartyManager(self)
 
         self.client_manager = client_manager_type(self)
@@ -111,7 +139,9 @@ class TsuserverDR:
         self.showname_freeze = False
         self.commands = importlib.import_module('server.commands')
         self.commands_alt = importlib.import_module('server.commands_alt')
-        self.logger_handlers = logger.setup_logger(debug=self.config['debug'])
+        self.logger_handlers = logger.setup_logger(debug=self.config['debug'],
+                                                   rotation=self.config['log_rotation'],
+                                                   transcript=self.config['transcript'])
 
         logger.log_print('Server configurations loaded successfully!')
 
@@ -122,6 +152,9 @@ class TsuserverDR:
         self.error_queue = asyncio.Queue()
 
         self.task_manager = TaskManager(self)
+        if self.loop_monitor:
+            self.loop_monitor.start()
+
         if self.config['local']:
             bound_ip = '127.0.0.1'
             logger.log_print('Starting a local server...')
@@ -217,6 +250,14 @@ class TsuserverDR:
             self._server.close()
             await self._server.wait_closed()
 
+        if self.loop_monitor:
+            await self.loop_monitor.stop()
+
+        # Write any pending changes to storage files
+        await self.persistence_manager.shutdown()
+        if self.sqlite_storage:
+            await self.sqlite_storage.shutdown()
+
     def get_version_string(self):
         mes = '{}.{}.{}'.format(self.release, self.major_version, self.minor_version)
         if self.segment_version:
@@ -256,12 +297,14 @@ class TsuserverDR:
         self,
         transport: _ProactorSocketTransport,
         protocol: AOProtocol = None,
-    ) -> Tuple[ClientManager.Client, bool]:
+    ) -> Tuple[Union[ClientManager.Client, None], bool]:
         c, valid = self.client_manager.new_client(
             hub=self.hub_manager.get_default_managee(),
             transport=transport,
             protocol=protocol,
         )
+        if c is None:
+            return c, valid
         c.server = self
         c.area = self.hub_manager.get_default_managee().area_manager.default_area()
         c.area.new_client(c)
@@ -335,7 +378,14 @@ class TsuserverDR:
 
             'music_change_floodguard': {'times_per_interval': 1,
                                         'interval_length': 0,
-                                        'mute_length': 0}
+                                        'mute_length': 0},
+
+            'loop_lag_monitor': None,
+            'log_rotation': None,
+            'transcript': False,
+            'storage_write_delay': 5,
+            'storage_backend': 'json',
+            'structure_checks': {'mode': 'full'},
         }
 
         for (tag, value) in defaults_for_tags.items():
@@ -418,16 +468,27 @@ class TsuserverDR:
     def load_ids(self):
         self.ipid_list = dict()
         self.hdid_list = dict()
+        self._ipids = set()
+        self._ipid_hdids = dict()
+
+        # The database is read as needed, so there is nothing to load
+        if self.sqlite_storage:
+            return
+
+        self.persistence_manager.register('storage/ip_ids.json',
+                                          lambda: self.ipid_list.copy())
+        self.persistence_manager.register('storage/hd_ids.json',
+                                          lambda: {hdid: ipids.copy()
+                                                   for (hdid, ipids) in self.hdid_list.items()})
 
         # load ipids
         try:
             with Constants.fopen('storage/ip_ids.json', 'r', encoding='utf-8') as whole_list:
                 self.ipid_list = json.load(whole_list)
         except ServerError.FileNotFoundError:
-            with Constants.fopen('storage/ip_ids.json', 'w', encoding='utf-8') as whole_list:
-                json.dump(dict(), whole_list, indent=4)
             message = 'WARNING: File not found: storage/ip_ids.json. Creating a new one...'
             logger.log_pdebug(message)
+            self.dump_ipids()
         except Exception as ex:
             message = 'WARNING: Error loading storage/ip_ids.json. Will assume empty values.\n'
             message += '{}: {}'.format(type(ex).__name__, ex)
@@ -444,16 +505,16 @@ class TsuserverDR:
         # TODO: Remove this else and the code within after next major update
         else:
             self.dump_ipids()
+        self._ipids = set(self.ipid_list.values())
 
         # load hdids
         try:
             with Constants.fopen('storage/hd_ids.json', 'r', encoding='utf-8') as whole_list:
                 self.hdid_list = json.loads(whole_list.read())
         except ServerError.FileNotFoundError:
-            with Constants.fopen('storage/hd_ids.json', 'w', encoding='utf-8') as whole_list:
-                json.dump(dict(), whole_list, indent=4)
             message = 'WARNING: File not found: storage/hd_ids.json. Creating a new one...'
             logger.log_pdebug(message)
+            self.dump_hdids()
         except Exception as ex:
             message = 'WARNING: Error loading storage/hd_ids.json. Will assume empty values.\n'
             message += '{}: {}'.format(type(ex).__name__, ex)
@@ -470,6 +531,9 @@ class TsuserverDR:
         # TODO: Remove this else and the code within after next major update
         else:
             self.dump_hdids()
+        for (hdid, ipids) in self.hdid_list.items():
+            for ipid in ipids:
+                self._ipid_hdids.setdefault(ipid, set()).add(hdid)
 
     def load_gimp(self):
         try:
@@ -506,23 +570,52 @@ class TsuserverDR:
         return gimp_list.copy()
 
     def dump_ipids(self):
-        with Constants.fopen('storage/ip_ids.json', 'w', encoding='utf-8') as whole_list:
-            json.dump(self.ipid_list, whole_list, indent=4)
+        self.persistence_manager.mark_dirty('storage/ip_ids.json')
 
     def dump_hdids(self):
-        with Constants.fopen('storage/hd_ids.json', 'w', encoding='utf-8') as whole_list:
-            json.dump(self.hdid_list, whole_list, indent=4)
+        self.persistence_manager.mark_dirty('storage/hd_ids.json')
 
     def get_ipid(self, ip: str) -> int:
+        if self.sqlite_storage:
+            return self.sqlite_storage.get_ipid(ip)
+
         if ip not in self.ipid_list:
             while True:
                 ipid = random.randint(0, 10**10-1)
-                if ipid not in self.ipid_list.values():
+                if ipid not in self._ipids:
                     break
             self.ipid_list[ip] = ipid
+            self._ipids.add(ipid)
             self.dump_ipids()
         return self.ipid_list[ip]
 
+    def peek_ipid(self, ip: str) -> Union[int, None]:
+        # Unlike get_ipid, this does not assign an IPID to new IPs
+        if self.sqlite_storage:
+            return self.sqlite_storage.peek_ipid(ip)
+        return self.ipid_list.get(ip)
+
+    def get_hdid_ipids(self, hdid: str) -> List[int]:
+        if self.sqlite_storage:
+            return self.sqlite_storage.get_hdid_ipids(hdid)
+        return self.hdid_list.get(hdid, []).copy()
+
+    def get_ipid_hdids(self, ipid: int) -> Set[str]:
+        if self.sqlite_storage:
+            return self.sqlite_storage.get_ipid_hdids(ipid)
+        return self._ipid_hdids.get(ipid, set()).copy()
+
+    def add_hdid_ipid(self, hdid: str, ipid: int):
+        if self.sqlite_storage:
+            self.sqlite_storage.add_hdid_ipid(hdid, ipid)
+            return
+
+        ipids = self.hdid_list.setdefault(hdid, [])
+        if ipid not in ipids:
+            ipids.append(ipid)
+            self._ipid_hdids.setdefault(ipid, set()).add(hdid)
+            self.dump_hdids()
+
     def make_all_clients_do(self, function: str, *args: List[str],
                             pred: Callable[[ClientManager.Client], bool] = lambda x: True,
                             **kwargs):
@@ -577,7 +670,7 @@ class TsuserverDR:
         self.last_error = [info, etype, evalue, etraceback]
 
         # Log error to file
-        logger.log_error(info, server=self, errortype='C')
+        logger.log_error_async(info, self, errortype='C')
 
     def broadcast_global(self, client: ClientManager.Client, msg: str, as_mod: bool = False,
                          mtype: str = "<dollar>G",
@@ -25,6 +25,7 @@ if r'../..' not in sys.path:
     sys.path.append(r'../..')
 
 from server.exceptions import ServerError
+from server.structure_checker import StructureChecker
 from server.validate_assets import Validate
 
 
@@ -201,6 +202,79 @@ class ValidateConfig(Validate):
                        f'{contents["music_change_floodguard"][field_name]}')
                 raise ServerError.FileSyntaxError(msg)
 
+        # The event loop lag monitor is disabled unless configured
+        if contents.get('loop_lag_monitor') is not None:
+            if not isinstance(contents['loop_lag_monitor'], dict):
+                msg = (f'Expected field "loop_lag_monitor" to be of type dict, found it was a '
+                       f'{type(contents["loop_lag_monitor"]).__name__}.')
+                raise ServerError.FileSyntaxError(msg)
+            for field_name in ['interval_ms', 'threshold_ms']:
+                value = contents['loop_lag_monitor'].get(field_name)
+                if not isinstance(value, (float, int)) or isinstance(value, bool) or value <= 0:
+                    msg = (f'Expected subfield "{field_name}" of loop_lag_monitor to be a '
+                           f'positive number, found it was not: {value}')
+                    raise ServerError.FileSyntaxError(msg)
+
+        # Structural checks run after every mutation unless configured otherwise
+        if contents.get('structure_checks') is not None:
+            if not isinstance(contents['structure_checks'], dict):
+                msg = (f'Expected field "structure_checks" to be of type dict, found it was a '
+                       f'{type(contents["structure_checks"]).__name__}.')
+                raise ServerError.FileSyntaxError(msg)
+            mode = contents['structure_checks'].get('mode')
+            if mode not in StructureChecker.MODES:
+                msg = (f'Expected subfield "mode" of structure_checks to be one of '
+                       f'{", ".join(StructureChecker.MODES)}, found it was not: {mode}')
+                raise ServerError.FileSyntaxError(msg)
+            for field_name in ['every', 'interval']:
+                if field_name not in contents['structure_checks']:
+                    continue
+                value = contents['structure_checks'][field_name]
+                if not isinstance(value, (float, int)) or isinstance(value, bool) or value <= 0:
+                    msg = (f'Expected subfield "{field_name}" of structure_checks to be a '
+                           f'positive number, found it was not: {value}')
+                    raise ServerError.FileSyntaxError(msg)
+
+        # The structured transcript is only written if enabled
+        if 'transcript' in contents and not isinstance(contents['transcript'], bool):
+            msg = (f'Expected field "transcript" to be a boolean, found it was not: '
+                   f'{contents["transcript"]}')
+            raise ServerError.FileSyntaxError(msg)
+
+        # Storage files are written at most once every few seconds
+        if 'storage_write_delay' in contents:
+            value = contents['storage_write_delay']
+            if not isinstance(value, (float, int)) or isinstance(value, bool) or value < 0:
+                msg = (f'Expected field "storage_write_delay" to be a non-negative number, found '
+                       f'it was not: {value}')
+                raise ServerError.FileSyntaxError(msg)
+
+        # IPIDs, HDIDs and bans are kept in JSON files unless configured
+        if contents.get('storage_backend', 'json') not in ('json', 'sqlite'):
+            msg = (f'Expected field "storage_backend" to be json or sqlite, found it was not: '
+                   f'{contents["storage_backend"]}')
+            raise ServerError.FileSyntaxError(msg)
+
+        # Log files are only rotated monthly and archives are kept forever unless configured
+        if contents.get('log_rotation') is not None:
+            if not isinstance(contents['log_rotation'], dict):
+                msg = (f'Expected field "log_rotation" to be of type dict, found it was a '
+                       f'{type(contents["log_rotation"]).__name__}.')
+                raise ServerError.FileSyntaxError(msg)
+            for field_name in ['max_size_mb', 'max_archives', 'max_archive_days']:
+                if contents['log_rotation'].get(field_name) is None:
+                    continue
+                value = contents['log_rotation'][field_name]
+                if not isinstance(value, (float, int)) or isinstance(value, bool) or value <= 0:
+                    msg = (f'Expected subfield "{field_name}" of log_rotation to be a '
+                           f'positive number, found it was not: {value}')
+                    raise ServerError.FileSyntaxError(msg)
+            max_archives = contents['log_rotation'].get('max_archives')
+            if max_archives is not None and not isinstance(max_archives, int):
+                msg = (f'Expected subfield "max_archives" of log_rotation to be an integer, found '
+                       f'it was not: {max_archives}')
+                raise ServerError.FileSyntaxError(msg)
+
         return contents
 
 
@@ -32,6 +32,7 @@ from typing import Any, Dict, Set
 
 from server.constants import Constants
 from server.exceptions import ClientError, ZoneError
+from server.structure_checker import gated_structure_check
 from server.subscriber import Listener
 
 if typing.TYPE_CHECKING:
@@ -536,6 +537,7 @@ class ZoneManager:
             """
 
             self._properties[property_name] = property_value
+            self._update_phantom_peeks()
 
         def get_property(self, property_name: str) -> Any:
             """
@@ -600,10 +602,18 @@ class ZoneManager:
             """
 
             try:
-                return self._properties.pop(property_name)
+                property_value = self._properties.pop(property_name)
             except KeyError:
                 raise ZoneError.PropertyNotFoundError(property_name)
 
+            self._update_phantom_peeks()
+            return property_value
+
+        def _update_phantom_peeks(self):
+            # Properties may change the phantom peek chance of players in the zone
+            for client in self.get_players():
+                self.server.client_manager.schedule_phantom_peek(client)
+
         def get_info(self) -> str:
             """
             Obtain the zone details (ID, areas, watchers) as a human readable string.
@@ -762,6 +772,7 @@ class ZoneManager:
 
             self._check_structure()
 
+        @gated_structure_check
         def _check_structure(self):
             self.manager._check_structure()
 
@@ -1011,6 +1022,7 @@ class ZoneManager:
 
         raise ValueError('Server reached its zone limit.')
 
+    @gated_structure_check
     def _check_structure(self):
         """
         Assert the following invariants:
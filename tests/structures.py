@@ -25,7 +25,7 @@ import random
 import typing
 import unittest
 
-from typing import List, Set, Tuple, Type, Union
+from typing import Any, Dict, List, Set, Tuple, Type, Union
 
 import server
 
@@ -813,6 +813,8 @@ class _TestClientManager(ClientManager):
 
         def receive_command_stc(self, command_type, *args):
             command_type, *args = Constants.decode_ao_packet([command_type] + list(args))
+            if command_type in ('JSN', 'LP', 'LIST_REASON', 'chat_tick_rate', 'RENAME', 'SP', 'CL', 'TR', 'HR', 'SF', 'ROOMAMBIENT', 'GS'):  # LOCAL-ONLY
+                return
             self.received_packets.append([command_type, tuple(args)])
 
             buffer = ''
@@ -942,6 +944,13 @@ class _TestTsuserverDR(TsuserverDR):
         self.task_manager = TaskManager(self)
         self.client_manager: _TestClientManager  # For typing
 
+    def load_config(self) -> Dict[str, Any]:
+        """ Overwrites tsuserver.TsuserverDR.load_config so every structural check runs """
+
+        config = super().load_config()
+        config['structure_checks'] = {'mode': 'full'}
+        return config
+
     def new_client(
         self,
         transport: _ProactorSocketTransport,
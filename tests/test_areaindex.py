@@ -0,0 +1,50 @@
+from server.exceptions import AreaError
+
+from .structures import _TestSituation3
+
+
+class TestAreaIndex_01_Lookups(_TestSituation3):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.manager = cls.server.hub_manager.get_default_managee().area_manager
+
+    def test_01_byname(self):
+        """
+        Situation: Areas are looked up by name, one at a time and in bulk.
+        """
+
+        for area in self.manager.get_areas():
+            self.assertEqual(self.manager.get_area_by_name(area.name), area)
+            self.assertEqual(self.manager.get_area_by_id(area.id), area)
+
+        self.assertEqual(self.manager.get_areas_by_names([self.a2_name, self.a0_name,
+                                                          self.a2_name]),
+                         [self.area0, self.area2])
+        self.assertEqual(self.manager.get_areas_by_names([]), [])
+        self.assertRaises(AreaError, self.manager.get_area_by_name, 'Not An Area')
+        self.assertRaises(AreaError, self.manager.get_areas_by_names,
+                          [self.a0_name, 'Not An Area'])
+
+    def test_02_byid(self):
+        """
+        Situation: Areas are looked up by ID, one at a time and in bulk.
+        """
+
+        self.assertEqual(self.manager.get_areas_by_ids([3, 1]), [self.area1, self.area3])
+        self.assertRaises(AreaError, self.manager.get_area_by_id, -1)
+        self.assertRaises(AreaError, self.manager.get_area_by_id, len(self.manager.get_areas()))
+        self.assertRaises(AreaError, self.manager.get_area_by_id, '1')
+
+    def test_03_minimap(self):
+        """
+        Situation: C0 moves to area 1 and checks the minimap, which lists the visible areas other
+        than area 1 sorted by ID.
+        """
+
+        self.c0.move_area(1)
+        self.c0.ooc('/minimap')
+        self.c0.assert_ooc('== Minimap for {} ==\r\n{}-{}\r\n{}-{}'
+                           .format(self.a1_name, 2, self.a2_name, 6,
+                                   self.manager.get_area_by_id(6).name),
+                           over=True)
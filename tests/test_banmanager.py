@@ -0,0 +1,205 @@
+import asyncio
+import json
+import time
+
+from server.ban_manager import BanManager
+from server.exceptions import ServerError
+from server.network.ao_protocol import AOProtocol
+
+from .structures import _Unittest
+
+
+class _FakeTransport:
+    def __init__(self, ip):
+        self.ip = ip
+        self.closed = False
+
+    def get_extra_info(self, name):
+        return (self.ip, 1234)
+
+    def close(self):
+        self.closed = True
+
+
+class _TestBanManager(_Unittest):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.get_event_loop()
+        self.manager = self.server.ban_manager
+
+    def tearDown(self):
+        for ban in self.manager.get_bans():
+            self.manager._delete(ban)
+        self.manager.write_banlist()
+        for ip in ['192.0.2.1', '203.0.113.5', '2001:db8::1']:
+            self.server.ipid_list.pop(ip, None)
+        self.server.hdid_list.pop('hdid1', None)
+        self.server._ipid_hdids.pop(1, None)
+        super().tearDown()
+
+
+class TestBanManager_01_Lookups(_TestBanManager):
+    def test_01_ipid(self):
+        """
+        Situation: An IPID is banned, by IPID and then by the IP it belongs to. It is banned
+        whether given as a number or as a string, until it is unbanned.
+        """
+
+        ipid = self.server.get_ipid('192.0.2.1')
+        self.manager.add_ban(str(ipid))
+        self.assertTrue(self.manager.is_banned(ipid))
+        self.assertTrue(self.manager.is_banned(str(ipid)))
+        self.assertFalse(self.manager.is_banned(ipid+1))
+        self.assertRaises(ServerError, self.manager.add_ban, '192.0.2.1')
+
+        self.manager.remove_ban('192.0.2.1')
+        self.assertFalse(self.manager.is_banned(ipid))
+        self.assertRaises(ServerError, self.manager.remove_ban, ipid)
+        self.assertRaises(ServerError, self.manager.add_ban, 'not an IP')
+
+    def test_02_hdid(self):
+        """
+        Situation: HDID hdid1, which was seen with IPID 1, is banned. Clients with that HDID, with
+        an IPID that is banned, or with IPID 1 but another HDID, are found to be banned.
+        """
+
+        self.server.add_hdid_ipid('hdid1', 1)
+        self.manager.add_hdid_ban('hdid1')
+        self.assertTrue(self.manager.is_hdid_banned('hdid1'))
+        self.assertEqual(self.manager.find_client_ban('hdid1', [1]).kind, 'hdid')
+        self.assertEqual(self.manager.find_client_ban('hdid2', [1]).value, 'hdid1')
+        self.assertIsNone(self.manager.find_client_ban('hdid2', [2]))
+
+        self.manager.add_ban(2)
+        self.assertEqual(self.manager.find_client_ban('hdid2', [2]).value, 2)
+        self.manager.remove_hdid_ban('hdid1')
+        self.assertIsNone(self.manager.find_client_ban('hdid2', [1]))
+        self.assertFalse(self.manager.is_hdid_banned('hdid1'))
+
+    def test_03_ranges(self):
+        """
+        Situation: An IPv4 and an IPv6 range are banned. Connections from IPs in either range are
+        found to be banned, including IPv4 addresses mapped to IPv6, and other IPs are not.
+        """
+
+        ban = self.manager.add_ban('203.0.113.77/24')
+        self.assertEqual(ban.value, '203.0.113.0/24')
+        self.manager.add_ban('2001:db8::/32')
+
+        self.assertIs(self.manager.find_connection_ban('203.0.113.5', 0), ban)
+        self.assertIs(self.manager.find_connection_ban('::ffff:203.0.113.5', 0), ban)
+        self.assertIsNone(self.manager.find_connection_ban('203.0.114.5', 0))
+        self.assertEqual(self.manager.find_connection_ban('2001:db8::1', 0).value,
+                         '2001:db8::/32')
+        self.assertIsNone(self.manager.find_connection_ban('2001:db9::1', 0))
+
+        self.manager.remove_ban('203.0.113.0/24')
+        self.assertIsNone(self.manager.find_connection_ban('203.0.113.5', 0))
+
+
+class TestBanManager_02_Expiry(_TestBanManager):
+    def test_01_expire(self):
+        """
+        Situation: An IPID is banned for a short time. Once that time passes, it is no longer
+        banned, and the ban is lifted without anyone unbanning it. Bans for no time are refused.
+        """
+
+        self.assertRaises(ServerError, self.manager.add_ban, 1, length=0)
+        self.assertRaises(ServerError, self.manager.add_hdid_ban, 'hdid1', length=-5)
+        self.assertEqual(self.manager.get_bans(), [])
+
+        self.manager.add_ban(1, length=0.05)
+        self.manager.add_ban(2)
+        self.assertTrue(self.manager.is_banned(1))
+
+        self.loop.run_until_complete(asyncio.sleep(0.1))
+        self.assertFalse(self.manager.is_banned(1))
+        self.assertEqual([ban.value for ban in self.manager.get_bans()], [2])
+        self.assertNotIn(1, self.manager._ipid_bans)
+
+    def test_02_rebanned(self):
+        """
+        Situation: An IP range whose ban expired is banned again for good. The expiry of the
+        old ban does not lift the new one.
+        """
+
+        self.manager.add_ban('192.0.2.0/24', length=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.manager.find_connection_ban('192.0.2.1', 0))
+        self.manager.add_ban('192.0.2.0/24')
+
+        self.assertEqual(self.manager.remove_expired_bans(), [])
+        self.assertIsNotNone(self.manager.find_connection_ban('192.0.2.1', 0))
+
+
+class TestBanManager_03_Banlist(_TestBanManager):
+    def test_01_round_trip(self):
+        """
+        Situation: The ban list is written in the compact format, and reads back the same bans.
+        The legacy format of a list of IPIDs can also be read.
+        """
+
+        self.manager.add_ban(1, reason='Spam')
+        self.manager.add_hdid_ban('hdid1', length=60)
+        self.manager.add_ban('192.0.2.0/24')
+
+        contents = json.loads(json.dumps(self.manager._snapshot_banlist()))
+        self.assertEqual(contents['version'], 2)
+        bans = BanManager.parse_banlist(contents)
+        self.assertEqual([(kind, value, reason) for (kind, value, _, _, reason) in bans],
+                         [('ipid', 1, 'Spam'), ('hdid', 'hdid1', None),
+                          ('cidr', '192.0.2.0/24', None)])
+        self.assertIsNotNone(bans[1][3])
+
+        legacy = BanManager.parse_banlist(['11', 22, '192.0.2.1'])
+        self.assertEqual([(kind, value, expires) for (kind, value, _, expires, _) in legacy],
+                         [('ipid', 11, None), ('ipid', 22, None)])
+        self.assertRaises(ServerError.FileSyntaxError, BanManager.parse_banlist, {'bans': []})
+
+
+class TestBanManager_04_Connections(_TestBanManager):
+    def test_01_refused(self):
+        """
+        Situation: An IP range is banned. A connection from an IP in that range is closed before
+        a client is made for it.
+        """
+
+        self.manager.add_ban('203.0.113.0/24')
+        clients = len(self.server.client_manager.clients)
+
+        protocol = AOProtocol(self.server)
+        transport = _FakeTransport('203.0.113.5')
+        protocol.connection_made(transport)
+        self.assertIsNone(protocol.client)
+        self.assertTrue(transport.closed)
+        self.assertEqual(len(self.server.client_manager.clients), clients)
+        # The refused IP is not assigned an IPID
+        self.assertNotIn('203.0.113.5', self.server.ipid_list)
+
+        protocol.data_received(b'HI#hdid#%')
+        protocol.connection_lost(None)
+
+
+class TestBanManager_05_Commands(_TestBanManager):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        super().setUpClients(3)
+
+    def test_01_overlapping_range(self):
+        """
+        Situation: 127.0.0.0/8 is banned without kicking anyone. C0, a moderator, then bans
+        127.0.0.0/24, which also covers the IP of every client, C2 having joined through a dual
+        stack socket. Every client is kicked, even though the wider ban already matched them.
+        """
+
+        self.c2.get_ipreal = lambda: '::ffff:127.0.0.1'
+        self.c0.make_mod()
+        self.manager.add_ban('127.0.0.0/8')
+        self.c0.ooc('/ban 127.0.0.0/24 1h')
+
+        for c in [self.c0, self.c1, self.c2]:
+            self.assertTrue(c.disconnected)
+        self.assertEqual(self.manager.find_connection_ban('127.0.0.1').value, '127.0.0.0/8')
+        self.assertIn('127.0.0.0/24', self.manager._cidr_bans)
+        self.assertIsNotNone(self.manager._cidr_bans['127.0.0.0/24'].expires)
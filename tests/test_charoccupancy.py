@@ -0,0 +1,95 @@
+from server.exceptions import AreaError
+
+from .structures import _TestSituation5Mc1Gc2
+
+
+class _TestCharOccupancy(_TestSituation5Mc1Gc2):
+    def brute_force_occupancy(self, area):
+        """
+        Return the number of clients using each participant character in an area by checking
+        every client of the area.
+        """
+
+        occupancy = dict()
+        for client in area.clients:
+            if client.has_participant_character():
+                occupancy[client.char_id] = occupancy.get(client.char_id, 0) + 1
+        return occupancy
+
+    def assert_occupancy(self):
+        for area in self.server.hub_manager.get_default_managee().area_manager.get_areas():
+            self.assertEqual(area.get_char_occupancy(), self.brute_force_occupancy(area), area)
+
+    def discard_all(self):
+        for c in [self.c0, self.c1, self.c2, self.c3, self.c4]:
+            c.discard_all()
+
+
+class TestCharOccupancy_01_Occupancy(_TestCharOccupancy):
+    def test_01_changes(self):
+        """
+        Situation: Clients change characters, move between areas and disconnect. The characters
+        in use in each area always match its clients.
+        """
+
+        self.assert_occupancy()
+        self.assertFalse(self.area0.is_char_available(self.c0.char_id))
+        self.assertTrue(self.area0.is_char_available(-1))
+
+        self.c0.move_area(4)
+        self.assert_occupancy()
+        self.assertTrue(self.area0.is_char_available(self.c0.char_id))
+        self.assertFalse(self.area4.is_char_available(self.c0.char_id))
+
+        self.c4.change_character(self.c0.char_id)
+        self.c1.move_area(4)
+        self.c1.change_character(-1)
+        self.assert_occupancy()
+
+        self.c2.disconnect()
+        self.assert_occupancy()
+        self.discard_all()
+
+
+class TestCharOccupancy_02_RandomCharacter(_TestCharOccupancy):
+    def test_01_randomchar(self):
+        """
+        Situation: With every character in use or restricted, no random character is available.
+        Once a character is freed, it is the only one that can be chosen.
+        """
+
+        self.assertRaises(AreaError, self.area0.get_rand_avail_char_id)
+        char_id = self.c3.char_id
+        self.c3.change_character(-1)
+        self.assertEqual(self.area0.get_rand_avail_char_id(), char_id)
+        self.assertRaises(AreaError, self.area0.get_rand_avail_char_id,
+                          more_unavail_chars={char_id})
+        self.discard_all()
+
+
+class TestCharOccupancy_03_Restricted(_TestCharOccupancy):
+    def test_01_restrict(self):
+        """
+        Situation: C1 restricts and unrestricts their own character in area 0. The restricted
+        character IDs of the area follow.
+        """
+
+        char_name, char_id = self.c1.get_char_name(), self.c1.char_id
+        self.c1.ooc('/char_restrict {}'.format(char_name))
+        self.discard_all()
+        self.assertEqual(self.area0.restricted_chars, {char_name})
+        self.assertEqual(self.area0.get_restricted_char_ids(), {char_id})
+        self.assertFalse(self.area0.is_char_available(char_id, allow_restricted=True))
+
+        self.c1.move_area(4)
+        self.discard_all()
+        self.assertTrue(self.area0.is_char_available(char_id, allow_restricted=True))
+        self.assertFalse(self.area0.is_char_available(char_id))
+        self.assertIn(char_id, self.area0.get_chars_unusable())
+        self.assertNotIn(char_id, self.area0.get_chars_unusable(allow_restricted=True))
+
+        self.c1.move_area(0)
+        self.c1.ooc('/char_restrict {}'.format(char_name))
+        self.discard_all()
+        self.assertEqual(self.area0.get_restricted_char_ids(), set())
+        self.assert_occupancy()
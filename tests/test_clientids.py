@@ -0,0 +1,57 @@
+import random
+
+from .structures import _Unittest
+
+
+class TestClientIDs_01_Allocation(_Unittest):
+    def setUp(self):
+        super().setUp()
+        self.random_state = random.getstate()
+        random.seed(20230426)
+        self.connected = dict()
+
+    def tearDown(self):
+        for client in self.connected.values():
+            client.disconnect()
+        random.setstate(self.random_state)
+        super().tearDown()
+
+    def connect(self):
+        client = self.server.make_test_client(attempts_to_fully_join=False)
+        if client.disconnected:
+            return client
+        self.connected[client.id] = client
+        return client
+
+    def disconnect(self, client_id):
+        self.connected.pop(client_id).disconnect()
+
+    def test_01_lowestfree(self):
+        """
+        Situation: Thousands of simulated clients connect and disconnect in random order, with
+        reconnect storms that fill the server. Every client that connects gets the lowest client
+        ID not in use, and clients connecting to a full server are turned away with no ID.
+        """
+
+        limit = self.server.config['playerlimit']
+        rejected = 0
+
+        for step in range(2000):
+            if step % 1000 == 500:
+                # Reconnect storm
+                for _ in range(limit - len(self.connected) + 2):
+                    expected = min(set(range(limit)) - set(self.connected), default=-1)
+                    client = self.connect()
+                    self.assertEqual(client.id, expected)
+                    if expected == -1:
+                        self.assertTrue(client.disconnected)
+                        rejected += 1
+            elif self.connected and random.random() < 0.5:
+                self.disconnect(random.choice(list(self.connected)))
+            else:
+                expected = min(set(range(limit)) - set(self.connected), default=-1)
+                client = self.connect()
+                self.assertEqual(client.id, expected)
+
+        self.assertTrue(rejected >= 4)
+        self.assertEqual(len(self.server.client_manager.clients), len(self.connected))
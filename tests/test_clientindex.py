@@ -0,0 +1,117 @@
+from server.constants import TargetType
+
+from .structures import _TestSituation5
+
+
+class _TestClientIndex(_TestSituation5):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.manager = cls.server.client_manager
+
+    def brute_force_targets(self, client, key, value, local=False):
+        """
+        Return the clients get_targets would return by checking every client of every area.
+        """
+
+        attributes = {
+            TargetType.OOC_NAME: lambda target: target.name,
+            TargetType.CHAR_NAME: lambda target: target.get_char_name(),
+            TargetType.SHOWNAME: lambda target: target.showname,
+            TargetType.CHAR_SHOWNAME: lambda target: target.char_showname,
+        }
+
+        areas = [client.area] if local else client.hub.area_manager.get_areas()
+        targets = set()
+        for area in areas:
+            for target in area.clients:
+                if key == TargetType.ID and target.id == value:
+                    targets.add(target)
+                elif key == TargetType.IPID and target.ipid == value:
+                    targets.add(target)
+                elif key == TargetType.HDID and target.hdid == value:
+                    targets.add(target)
+                elif (key in attributes
+                      and attributes[key](target).lower().startswith(value.lower())):
+                    targets.add(target)
+        return targets
+
+    def assert_same_targets(self, key, value, local=False):
+        for client in [self.c0, self.c1]:
+            actual = self.manager.get_targets(client, key, value, local)
+            self.assertEqual(len(actual), len(set(actual)), (key, value))
+            self.assertEqual(set(actual), self.brute_force_targets(client, key, value, local),
+                             (key, value, local))
+
+
+class TestClientIndex_01_Lookups(_TestClientIndex):
+    def test_01_ids(self):
+        """
+        Situation: Clients are looked up by ID, including IDs of no one.
+        """
+
+        for value in [0, 1, 4, 5, 99, -1]:
+            self.assert_same_targets(TargetType.ID, value)
+        self.assertEqual(self.manager.get_targets(self.c0, TargetType.ID, 3), [self.c3])
+
+    def test_02_names(self):
+        """
+        Situation: C0, C1 and C2 change their OOC names and shownames to names sharing prefixes,
+        then change them again. Lookups by prefix match what checking every client would return.
+        """
+
+        self.c0.name = 'Alpha'
+        self.c1.name = 'alphabet'
+        self.c2.name = 'Beta'
+        self.c0.showname = 'Aleph'
+        self.c3.showname = 'ALEPHNULL'
+        for prefix in ['', 'a', 'AL', 'alpha', 'alphab', 'alephn', 'b', 'z']:
+            for key in [TargetType.OOC_NAME, TargetType.SHOWNAME]:
+                self.assert_same_targets(key, prefix)
+                self.assert_same_targets(key, prefix, local=True)
+
+        self.c1.name = 'Gamma'
+        self.c3.showname = ''
+        self.assertEqual(self.manager.get_targets(self.c0, TargetType.OOC_NAME, 'alph'),
+                         [self.c0])
+        self.assertEqual(self.manager.get_targets(self.c0, TargetType.SHOWNAME, 'aleph'),
+                         [self.c0])
+
+    def test_03_characters(self):
+        """
+        Situation: Clients are looked up by character name. C3 then switches to spectator and C4
+        takes C3's former character.
+        """
+
+        for prefix in ['', 'a', self.c2.get_char_name()[:3]]:
+            self.assert_same_targets(TargetType.CHAR_NAME, prefix)
+
+        char_id, char_name = self.c3.char_id, self.c3.get_char_name()
+        self.c3.change_character(-1)
+        self.c3.discard_all()
+        self.assert_same_targets(TargetType.CHAR_NAME, char_name)
+        self.assertEqual(self.manager.get_targets(self.c0, TargetType.CHAR_NAME, char_name), [])
+
+        self.c4.change_character(char_id)
+        self.c4.discard_all()
+        self.assertEqual(self.manager.get_targets(self.c0, TargetType.CHAR_NAME, char_name),
+                         [self.c4])
+
+    def test_04_disconnect(self):
+        """
+        Situation: C4 has a unique HDID and disconnects. They are no longer returned by any
+        lookup, and multiclients are found through the indexes.
+        """
+
+        self.c4.hdid = 'UNIQUEHDID'
+        self.assertEqual(self.manager.get_targets(self.c0, TargetType.HDID, 'UNIQUEHDID'),
+                         [self.c4])
+        self.assert_same_targets(TargetType.IPID, self.c0.ipid)
+        self.assertEqual(self.c0.get_multiclients(),
+                         sorted(self.brute_force_targets(self.c0, TargetType.IPID,
+                                                         self.c0.ipid)))
+
+        c4_id = self.c4.id
+        self.c4.disconnect()
+        self.assertEqual(self.manager.get_targets(self.c0, TargetType.HDID, 'UNIQUEHDID'), [])
+        self.assertEqual(self.manager.get_targets(self.c0, TargetType.ID, c4_id), [])
@@ -0,0 +1,174 @@
+import asyncio
+
+from server.exceptions import AreaError
+
+from .structures import _TestSituation4
+
+
+class _TestClockManager(_TestSituation4):
+    def setUp(self):
+        super().setUp()
+        self.manager = self.server.clock_manager
+        # Clocks read the time from their manager, so tests can move it forward at will
+        self.now = asyncio.get_event_loop().time()
+        self.manager.get_time = lambda: self.now
+
+    def tearDown(self):
+        for clock in self.manager.get_clocks():
+            clock.end()
+        del self.manager.get_time
+        for c in [self.c0, self.c1, self.c2, self.c3]:
+            c.discard_all()
+        super().tearDown()
+
+    def advance(self, length):
+        # Move the time forward and run the scheduler as if its timer just fired
+        self.now += length
+        self.manager._on_wakeup()
+
+
+class TestClockManager_01_Ticks(_TestClockManager):
+    def test_01_boundaries(self):
+        """
+        Situation: C0 starts a clock with 10 second hours. Each hour is measured from the end of
+        the previous one, even if the scheduler wakes up late.
+        """
+
+        start = self.now
+        clock = self.manager.new_clock(self.c0, 0, 1, 10, 5, 24)
+        self.assertEqual(clock._deadline, start+10)
+
+        self.advance(5)
+        self.assertEqual(clock.hour, 5)
+
+        self.advance(5.5)
+        self.assertEqual(clock.hour, 6)
+        self.assertEqual(clock._deadline, start+20)
+
+        self.advance(9.5)
+        self.assertEqual(clock.hour, 7)
+        self.assertEqual(clock._deadline, start+30)
+
+    def test_02_pause(self):
+        """
+        Situation: C0 pauses their clock halfway through an hour and unpauses it much later. The
+        clock does not tick while paused, and resumes with the half hour that was left.
+        """
+
+        clock = self.manager.new_clock(self.c0, 0, 1, 10, 5, 24)
+        self.now += 5
+        clock.pause()
+        self.assertEqual(clock._minute_at_interruption, 30)
+        self.assertIsNone(clock._deadline)
+
+        self.advance(100)
+        self.assertEqual(clock.hour, 5)
+
+        clock.unpause()
+        self.assertEqual(clock._deadline, self.now+5)
+        self.advance(5)
+        self.assertEqual(clock.hour, 6)
+        self.assertEqual(clock._minute_at_interruption, 0)
+
+    def test_03_hours_in_day(self):
+        """
+        Situation: C0 has a clock at hour 22 with two periods, and sets the day to have 12 hours.
+        The period past the new number of hours is dropped, and the hour is reset to 0.
+        """
+
+        clock = self.manager.new_clock(self.c0, 0, 1, 10, 22, 24)
+        clock.set_period(5, 'day', 10)
+        clock.set_period(20, 'night', 20)
+
+        clock.set_hours_in_day(12)
+        self.assertEqual(clock.periods, [(5, 'day', 10)])
+        self.assertEqual(len(clock._period_table), 12)
+        self.assertEqual(clock.hour, 0)
+        self.assertEqual(clock.find_period_of_hour(0), (5, 'day', 10))
+
+    def test_04_unknown(self):
+        """
+        Situation: C0 sets the time of their clock to be unknown. The clock stops ticking, and its
+        targets are sent an unknown hour and period.
+        """
+
+        clock = self.manager.new_clock(self.c0, 0, 1, 10, 5, 24)
+        self.c0.discard_all()
+        clock.set_unknown()
+        self.assertEqual(clock.hour, -1)
+        self.assertTrue(clock.is_unknown)
+        self.assertEqual(clock.period, 'unknown')
+        self.assertIsNone(clock._deadline)
+        self.c0.assert_packet('TOD', ('unknown', ), somewhere=True)
+
+        self.advance(50)
+        self.assertEqual(clock.hour, -1)
+
+        clock.set_time(10, 8)
+        self.assertFalse(clock.is_unknown)
+        self.assertEqual(clock.hour, 8)
+        self.assertEqual(clock._deadline, self.now+10)
+
+
+class TestClockManager_02_Scheduler(_TestClockManager):
+    def test_01_shared_timer(self):
+        """
+        Situation: C0 and C1 start clocks with 10 and 15 second hours. A single timer is set for
+        the earliest hour boundary of either clock, and each clock ticks on its own boundaries.
+        """
+
+        start = self.now
+        clock0 = self.manager.new_clock(self.c0, 0, 1, 10, 0, 24)
+        clock1 = self.manager.new_clock(self.c1, 2, 3, 15, 0, 24)
+        self.assertEqual(self.manager._wakeup_at, start+10)
+        self.assertIsNotNone(self.manager._wakeup_handle)
+
+        expected = [(10, 1, 0, start+15), (15, 1, 1, start+20), (20, 2, 1, start+30),
+                    (30, 3, 2, start+40)]
+        for (elapsed, hour0, hour1, wakeup_at) in expected:
+            self.advance(start+elapsed-self.now)
+            self.assertEqual((clock0.hour, clock1.hour), (hour0, hour1), elapsed)
+            self.assertEqual(self.manager._wakeup_at, wakeup_at, elapsed)
+
+        clock0.end()
+        self.assertEqual(self.manager._wakeup_at, start+45)
+        clock1.end()
+        self.assertIsNone(self.manager._wakeup_at)
+        self.assertIsNone(self.manager._wakeup_handle)
+
+
+class TestClockManager_03_Areas(_TestClockManager):
+    def test_01_recipients(self):
+        """
+        Situation: C0 starts a clock in areas 0 through 1. C2 moves out of its range, where it no
+        longer receives the clock, and then back into its range.
+        """
+
+        clock = self.manager.new_clock(self.c0, 0, 1, 10, 0, 24)
+        self.assertEqual(clock.recipients, {self.c0, self.c1, self.c2, self.c3})
+
+        self.c2.move_area(4)
+        self.assertNotIn(self.c2, clock.recipients)
+        self.c2.discard_all()
+        self.advance(10)
+        self.c2.assert_no_packets()
+
+        self.c2.move_area(1)
+        self.assertIn(self.c2, clock.recipients)
+        self.c2.move_area(0)
+
+    def test_02_creator(self):
+        """
+        Situation: C2 and then C1 start clocks involving area 0. The clock creator of area 0 is
+        C1, as it has the lowest ID, until its clock ends.
+        """
+
+        self.assertRaises(AreaError.ClientNotFound, self.area0.get_clock_creator)
+        self.manager.new_clock(self.c2, 0, 1, 10, 0, 24)
+        self.manager.new_clock(self.c1, 0, 4, 10, 0, 24)
+        self.assertEqual(self.area0.get_clock_creator(), self.c1)
+        self.assertEqual(self.area4.get_clock_creator(), self.c1)
+
+        self.manager.end_clock(self.c1)
+        self.assertEqual(self.area0.get_clock_creator(), self.c2)
+        self.assertRaises(AreaError.ClientNotFound, self.area4.get_clock_creator)
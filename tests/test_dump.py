@@ -0,0 +1,110 @@
+import asyncio
+import gzip
+import os
+
+from server import logger
+
+from .structures import _TestSituation4, _TestSituation4Mc12
+
+
+class TestDump_01_Sections(_TestSituation4):
+    def dump(self, sections=logger.DEFAULT_DUMP_SECTIONS):
+        return ''.join(logger._iter_dump(logger._snapshot_dump(self.server, sections=sections)))
+
+    def test_01_default(self):
+        """
+        Situation: A dump with the default sections includes the clients and area lists, but not
+        the character and music lists.
+        """
+
+        dump = self.dump()
+        self.assertIn('= Dump of clients =', dump)
+        self.assertIn('=== Area list ===', dump)
+        self.assertIn('= Structural checks =', dump)
+        self.assertNotIn('=== Character list ===', dump)
+        self.assertNotIn('=== DJ list ===', dump)
+
+    def test_02_selected(self):
+        """
+        Situation: A dump with only the music section includes the music list of each hub, as it
+        was when the dump was requested.
+        """
+
+        music_manager = self.c0.hub.music_manager
+        category = music_manager.get_music()[0]
+        chunks = logger._snapshot_dump(self.server, sections=['music'])
+        category['songs'].append({'name': 'Not Yet A Song'})
+        try:
+            dump = ''.join(logger._iter_dump(chunks))
+        finally:
+            category['songs'].pop()
+
+        self.assertIn('=== DJ list ===', dump)
+        self.assertIn(f'**0: {category["category"]}', dump)
+        self.assertIn(f'***0: {category["songs"][0]}', dump)
+        self.assertNotIn('Not Yet A Song', dump)
+        self.assertNotIn('= Dump of clients =', dump)
+
+
+class TestDump_02_Write(_TestSituation4Mc12):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.get_event_loop()
+        self.files = list()
+        self.compress_bytes = logger.DUMP_COMPRESS_BYTES
+
+    def tearDown(self):
+        logger.DUMP_COMPRESS_BYTES = self.compress_bytes
+        for file in self.files:
+            os.remove(file)
+        super().tearDown()
+
+    def wait(self, future):
+        self.loop.run_until_complete(future)
+        self.files.append(future.result())
+        return future.result()
+
+    def test_01_plain(self):
+        """
+        Situation: A small dump is written in a thread to an uncompressed file.
+        """
+
+        file = self.wait(logger.log_error_async('Test dump.', self.server))
+        self.assertTrue(file.endswith('D.log'))
+        with open(file, 'r', encoding='utf-8') as dump:
+            contents = dump.read()
+        self.assertIn('Test dump.', contents)
+        self.assertIn('= Dump of clients =', contents)
+
+    def test_02_compressed(self):
+        """
+        Situation: A dump larger than the compression threshold is compressed.
+        """
+
+        logger.DUMP_COMPRESS_BYTES = 0
+        file = self.wait(logger.log_error_async('Test dump.', self.server, sections=['music']))
+        self.assertTrue(file.endswith('D.log.gz'))
+        self.assertFalse(os.path.exists(file[:-len('.gz')]))
+        with gzip.open(file, 'rt', encoding='utf-8') as dump:
+            self.assertIn('=== DJ list ===', dump.read())
+
+    def test_03_command(self):
+        """
+        Situation: C1 (mod) requests a dump of the clients and areas, typing two spaces between
+        them, and is sent its file once written. An invalid section is rejected.
+        """
+
+        self.c1.ooc('/dump clients  areas')
+        self.c1.assert_ooc('Preparing server dump.', over=True)
+        for _ in range(100):
+            self.loop.run_until_complete(asyncio.sleep(0.01))
+            if self.c1.received_ooc:
+                break
+        message = self.c1.received_ooc[0][1]
+        self.assertTrue(message.startswith('Generated server dump file logs/'))
+        self.files.append(message[len('Generated server dump file '):-len('.')])
+        self.c1.discard_all()
+
+        self.c1.ooc('/dump clients songs')
+        self.c1.assert_ooc('Invalid dump section songs. Expected one of packets, clients, areas, '
+                           'backgrounds, characters, music, reports or all.', over=True)
@@ -0,0 +1,46 @@
+from server.exceptions import GameWithAreasError
+from server.gamewithareas_manager import GameWithAreasManager
+
+from .structures import _TestSituation4
+
+
+class TestGameAreasMap_01_Areas(_TestSituation4):
+    def setUp(self):
+        super().setUp()
+        self.manager = GameWithAreasManager(self.server)
+
+    def test_01_hubareas(self):
+        """
+        Situation: Every area of the default hub is recorded as part of it, including those added
+        while the hub was being created.
+        """
+
+        hub = self.server.hub_manager.get_default_managee()
+        for area in hub.area_manager.get_areas():
+            self.assertEqual(self.server.hub_manager.get_managees_in_area(area), {hub})
+
+    def test_02_addremove(self):
+        """
+        Situation: Games with areas are created, gain and lose areas and are destroyed. The
+        mapping of areas to games with areas always matches the areas of each game with areas.
+        """
+
+        game1 = self.manager.new_managee(areas={self.area0, self.area1},
+                                         area_concurrent_limit=2)
+        game2 = self.manager.new_managee(areas={self.area1}, area_concurrent_limit=2)
+        self.assertEqual(self.manager.get_managees_in_area(self.area1), {game1, game2})
+        self.assertEqual(self.manager.get_managees_in_area(self.area2), set())
+        self.assertRaises(GameWithAreasError.AreaHitGameConcurrentLimitError,
+                          self.manager.new_managee, areas={self.area1})
+
+        mapping = self.manager.get_areas_to_managees_map()
+        game1.remove_area(self.area1)
+        self.assertEqual(mapping[self.area1], {game2})
+        self.assertEqual(self.manager.get_managees_in_area(self.area0), {game1})
+
+        game2.remove_area(self.area1)  # Destroys game2 as it has no areas left
+        self.assertFalse(self.manager.manages_managee(game2))
+        self.assertNotIn(self.area1, mapping)
+
+        game1.destroy()
+        self.assertEqual(dict(mapping), dict())
@@ -0,0 +1,25 @@
+from server.exceptions import HubError
+
+from .structures import _TestSituation4
+
+
+class TestHubPlayers_01_HubOfUser(_TestSituation4):
+    def test_01_addremove(self):
+        """
+        Situation: C0 is removed as a player of the default hub and then added back. The hub of C0
+        is found directly while they are a player, and not found while they are not.
+        """
+
+        manager = self.server.hub_manager
+        hub = manager.get_default_managee()
+        for c in [self.c0, self.c1, self.c2, self.c3]:
+            self.assertIs(manager.get_managee_of_user(c), hub)
+            self.assertIs(manager._find_managee_of_user(c), hub)
+
+        hub.remove_player(self.c0)
+        self.assertIs(self.c0.hub, hub)
+        self.assertRaises(HubError.UserNotPlayerError, manager.get_managee_of_user, self.c0)
+
+        hub.add_player(self.c0)
+        self.assertIs(self.c0.hub, hub)
+        self.assertIs(manager.get_managee_of_user(self.c0), hub)
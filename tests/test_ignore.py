@@ -0,0 +1,64 @@
+from .structures import _TestSituation5
+
+
+class TestIgnore_01_Disconnect(_TestSituation5):
+    def test_01_ignoredisconnects(self):
+        """
+        Situation: C0 and C1 ignore C4, and C4 ignores C2. C4 then disconnects. No one is ignoring
+        or ignored by C4 anymore.
+        """
+
+        self.c0.ooc('/ignore {}'.format(self.c4.id))
+        self.c0.assert_ooc('You are now ignoring {} [{}].'
+                           .format(self.c4.displayname, self.c4.id), over=True)
+        self.c1.ooc('/ignore {}'.format(self.c4.id))
+        self.c1.assert_ooc('You are now ignoring {} [{}].'
+                           .format(self.c4.displayname, self.c4.id), over=True)
+        self.c4.ooc('/ignore {}'.format(self.c2.id))
+        self.c4.assert_ooc('You are now ignoring {} [{}].'
+                           .format(self.c2.displayname, self.c2.id), over=True)
+        self.assertEqual(self.c4.ignored_by, {self.c0, self.c1})
+        self.assertEqual(self.c2.ignored_by, {self.c4})
+
+        c4 = self.c4
+        self.server.disconnect_test_client(c4.id)
+        self.assertEqual(self.c0.ignored_players, set())
+        self.assertEqual(self.c1.ignored_players, set())
+        self.assertEqual(self.c2.ignored_by, set())
+        self.assertEqual(c4.ignored_by, set())
+
+    def test_02_unignore(self):
+        """
+        Situation: C0 ignores and then unignores C1. C1 is no longer ignored by C0.
+        """
+
+        self.c0.ooc('/ignore {}'.format(self.c1.id))
+        self.c0.assert_ooc('You are now ignoring {} [{}].'
+                           .format(self.c1.displayname, self.c1.id), over=True)
+        self.assertEqual(self.c1.ignored_by, {self.c0})
+
+        self.c0.ooc('/unignore {}'.format(self.c1.id))
+        self.c0.assert_ooc('You are no longer ignoring {} [{}].'
+                           .format(self.c1.displayname, self.c1.id), over=True)
+        self.assertEqual(self.c0.ignored_players, set())
+        self.assertEqual(self.c1.ignored_by, set())
+
+
+class TestIgnore_02_RememberedStatuses(_TestSituation5):
+    def test_01_statusdisconnects(self):
+        """
+        Situation: C3 sets a status that everyone else in the area remembers. C3 then disconnects.
+        No one remembers the status of C3's former client ID anymore.
+        """
+
+        c3_id = self.c3.id
+        self.c3.status = 'Looks tired.'
+        notified = self.c3.refresh_remembered_status()
+        self.assertEqual(set(notified), {self.c0, self.c1, self.c2, self.c4})
+        self.assertEqual(self.c3.status_remembered_by, {self.c0, self.c1, self.c2, self.c4})
+        self.assertEqual(self.c0.remembered_statuses[c3_id], 'Looks tired.')
+        self.assertEqual(self.c3.refresh_remembered_status(), [])
+
+        self.server.disconnect_test_client(c3_id)
+        for c in [self.c0, self.c1, self.c2, self.c4]:
+            self.assertNotIn(c3_id, c.remembered_statuses)
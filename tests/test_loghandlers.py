@@ -0,0 +1,222 @@
+import calendar
+import gzip
+import logging
+import os
+import tempfile
+import time
+
+from server import logger
+from server.log_handlers import ClientFormatter, QueuedFileHandler
+
+from .structures import _TestSituation4, _Unittest
+
+
+class TestLogHandlers_01_Queued(_Unittest):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'test.log')
+        self.log = logging.getLogger('test_loghandlers')
+        self.log.setLevel(logging.INFO)
+        self.log.propagate = False
+        self.handler = None
+
+    def make_handler(self, capacity):
+        self.handler = QueuedFileHandler(self.filename, logging.Formatter('%(message)s'),
+                                         capacity=capacity, batch_size=2)
+        self.log.addHandler(self.handler)
+
+    def tearDown(self):
+        if self.handler:
+            self.log.removeHandler(self.handler)
+            self.handler.close()
+        self.directory.cleanup()
+        super().tearDown()
+
+    def read_lines(self):
+        with open(self.filename, 'r', encoding='utf-8') as file:
+            return file.read().splitlines()
+
+    def test_01_write(self):
+        """
+        Situation: Records logged through the queued handler are all in the file once the handler
+        is closed.
+        """
+
+        self.make_handler(100)
+        for i in range(10):
+            self.log.info(f'Line {i}')
+        self.handler.close()
+
+        self.assertEqual(self.read_lines(), [f'Line {i}' for i in range(10)])
+        self.assertEqual(self.handler.dropped, 0)
+
+    def test_02_overflow(self):
+        """
+        Situation: While the background thread is not writing, more records are logged than fit
+        in the queue. The records that do not fit are dropped and counted, without blocking.
+        """
+
+        self.make_handler(3)
+        self.handler.listener.stop()
+        for i in range(5):
+            self.log.info(f'Line {i}')
+        self.assertEqual(self.handler.dropped, 2)
+        self.assertIn('3/3 records queued, 2 records dropped', self.handler.get_report())
+
+        self.handler.listener.start()
+        self.handler.close()
+        self.assertEqual(self.read_lines(), ['Line 0', 'Line 1', 'Line 2'])
+
+    def test_03_server(self):
+        """
+        Situation: The server and debug loggers log through queued handlers, which are listed in
+        error dumps.
+        """
+
+        for (_logger, handler) in self.server.logger_handlers:
+            self.assertIsInstance(handler, QueuedFileHandler)
+            self.assertIn(handler, _logger.handlers)
+
+        dump = ''.join(logger._iter_dump(logger._snapshot_dump(self.server)))
+        self.assertIn('= Logging queues =', dump)
+
+
+class TestLogHandlers_02_ClientPrefix(_TestSituation4):
+    def tearDown(self):
+        self.c1.is_mod = False
+        super().tearDown()
+
+    def test_01_cache(self):
+        """
+        Situation: The log prefix of C1 is cached, and recomputed once C1 logs in as moderator.
+        """
+
+        prefix = self.c1.get_log_prefix()
+        self.assertEqual(prefix, f'[{self.c1.ipid:<15}][{self.c1.hdid}][{self.c1.id}]'
+                                 f'[{self.c1.hub.get_id()}]')
+        self.assertIs(self.c1.get_log_prefix(), prefix)
+
+        self.c1.is_mod = True
+        self.assertEqual(self.c1.get_log_prefix(), f'{prefix}[MOD]')
+        self.assertEqual(logger.parse_client_info(self.c1), f'{prefix}[MOD]')
+
+    def test_02_format(self):
+        """
+        Situation: Records logged about C1 are formatted with its log prefix, and records about no
+        client are formatted with no prefix.
+        """
+
+        formatter = ClientFormatter('%(client_prefix)s%(message)s')
+        record = logging.LogRecord('server', logging.INFO, __file__, 0, 'Hi %s', ('there', ),
+                                   None)
+        self.assertEqual(formatter.format(record), 'Hi there')
+
+        record.client_prefix = self.c1.get_log_prefix()
+        self.assertEqual(formatter.format(record), f'{self.c1.get_log_prefix()}Hi there')
+
+
+class TestLogHandlers_03_Rotation(_Unittest):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.handler = None
+
+    def tearDown(self):
+        if self.handler:
+            self.handler.close()
+        self.directory.cleanup()
+        super().tearDown()
+
+    def make_handler(self, **kwargs):
+        self.handler = QueuedFileHandler(os.path.join(self.directory.name, 'test-%Y-%m.log'),
+                                         logging.Formatter('%(message)s'), **kwargs)
+
+    def log(self, msg, created=None):
+        record = logging.LogRecord('test_loghandlers', logging.INFO, __file__, 0, msg, None, None)
+        if created is not None:
+            record.created = created
+        self.handler.handle(record)
+
+    def read(self, name):
+        path = os.path.join(self.directory.name, name)
+        if name.endswith('.gz'):
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                return file.read().splitlines()
+        with open(path, 'r', encoding='utf-8') as file:
+            return file.read().splitlines()
+
+    def test_01_size(self):
+        """
+        Situation: A log file with a maximum size of 20 bytes is written 7 lines of 7 bytes. It is
+        rotated every 2 lines, and the archived segments are compressed in order.
+        """
+
+        self.make_handler(max_bytes=20)
+        for i in range(7):
+            self.log(f'Line {i}')
+        self.handler.close()
+
+        month = time.strftime('test-%Y-%m', time.gmtime())
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         [f'{month}.1.log.gz', f'{month}.2.log.gz', f'{month}.3.log.gz',
+                          f'{month}.log'])
+        self.assertEqual(self.read(f'{month}.1.log.gz'), ['Line 0', 'Line 1'])
+        self.assertEqual(self.read(f'{month}.3.log.gz'), ['Line 4', 'Line 5'])
+        self.assertEqual(self.read(f'{month}.log'), ['Line 6'])
+
+    def test_02_month(self):
+        """
+        Situation: A record from the next month is logged after one from the current month. The
+        log switches to the file of the next month, and the file of the current month is archived.
+        A new handler then archives the file of the next month, as it is not the current one.
+        """
+
+        self.make_handler()
+        now = time.gmtime()
+        next_month = calendar.timegm((now.tm_year + now.tm_mon // 12, now.tm_mon % 12 + 1, 1,
+                                      0, 0, 0))
+        self.log('This month')
+        self.log('Next month', created=next_month)
+        self.handler.close()
+
+        month = time.strftime('test-%Y-%m', now)
+        later_month = time.strftime('test-%Y-%m', time.gmtime(next_month))
+        self.assertEqual(self.read(f'{month}.1.log.gz'), ['This month'])
+        self.assertEqual(self.read(f'{later_month}.log'), ['Next month'])
+
+        self.make_handler()
+        self.handler.close()
+        self.assertEqual(self.read(f'{later_month}.1.log.gz'), ['Next month'])
+
+    def test_03_retention(self):
+        """
+        Situation: With at most 2 archives kept, only the 2 most recent archived segments remain
+        after 5 rotations.
+        """
+
+        self.make_handler(max_bytes=10, max_archives=2)
+        for i in range(6):
+            self.log(f'Line {i}')
+            # Make modification times distinct
+            time.sleep(0.01)
+        self.handler.close()
+
+        month = time.strftime('test-%Y-%m', time.gmtime())
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         [f'{month}.4.log.gz', f'{month}.5.log.gz', f'{month}.log'])
+
+    def test_04_size_in_bytes(self):
+        """
+        Situation: A log file with a maximum size of 20 bytes is written 3 lines of 6 characters,
+        but 8 bytes. It is rotated after 2 lines, as its size is counted in bytes.
+        """
+
+        self.make_handler(max_bytes=20)
+        for i in range(3):
+            self.log(f'Ünï {i}')
+        self.handler.close()
+
+        month = time.strftime('test-%Y-%m', time.gmtime())
+        self.assertEqual(self.read(f'{month}.1.log.gz'), ['Ünï 0', 'Ünï 1'])
+        self.assertEqual(self.read(f'{month}.log'), ['Ünï 2'])
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from server.loop_monitor import LoopMonitor
+
+from .structures import _TestSituation3
+
+
+class TestLoopMonitor_01_Stalls(_TestSituation3):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.get_event_loop()
+        self.monitor = LoopMonitor(self.server, interval=0.02, threshold=0.1)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.monitor.stop())
+        super().tearDown()
+
+    def block_loop(self, length):
+        time.sleep(length)
+
+    def test_01_nostalls(self):
+        """
+        Situation: The monitor runs on an idle event loop. Measurements are recorded, but no
+        stalls.
+        """
+
+        self.assertEqual(self.monitor.get_report(), 'The event loop lag monitor is not running.')
+
+        self.monitor.start()
+        self.loop.run_until_complete(asyncio.sleep(0.2))
+        self.assertTrue(sum(self.monitor.get_histogram().values()) > 0)
+        self.assertEqual(self.monitor.get_worst_stalls(), [])
+        self.assertIn('No stalls over the threshold.', self.monitor.get_report())
+
+    def test_02_stall(self):
+        """
+        Situation: A callback blocks the event loop for 0.4 seconds while the monitor runs. A stall
+        of about that length is recorded, with the stack of the blocking callback.
+        """
+
+        self.monitor.start()
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        self.loop.call_soon(self.block_loop, 0.4)
+        self.loop.run_until_complete(asyncio.sleep(0.1))
+
+        stalls = self.monitor.get_worst_stalls()
+        self.assertEqual(len(stalls), 1)
+        self.assertTrue(stalls[0].lag > 0.25)
+        self.assertIsNotNone(stalls[0].stack)
+        self.assertIn('block_loop', stalls[0].stack)
+        self.assertIn('block_loop', self.monitor.get_report())
+        self.assertNotIn('block_loop', self.monitor.get_report(with_stacks=False))
+
+    def test_03_histogram(self):
+        """
+        Situation: Lags are recorded directly past the history size. Only the most recent ones are
+        kept, and the worst of the most recent stalls are sorted from worst to least bad.
+        """
+
+        monitor = LoopMonitor(self.server, interval=0.02, threshold=0.1, history=3, worst=2)
+        for lag in [2, 0.3, 0.2, 0.004, 0.5]:
+            monitor.record_lag(lag)
+
+        histogram = monitor.get_histogram()
+        self.assertEqual(sum(histogram.values()), 3)
+        self.assertEqual(histogram[5], 1)
+        self.assertEqual(histogram[250], 1)
+        self.assertEqual(histogram[500], 1)
+        self.assertEqual([stall.lag for stall in monitor.get_worst_stalls()], [0.5, 0.3])
+
+    def test_04_late_stack(self):
+        """
+        Situation: A stack is captured for a wake up whose lag was already recorded. It is not
+        recorded with the next stall, but a stack captured for that stall is.
+        """
+
+        monitor = LoopMonitor(self.server, interval=0.02, threshold=0.1)
+        monitor._pending_stack = (1.0, 'old stack')
+        monitor.record_lag(0.5, expected_at=2.0)
+        self.assertIsNone(monitor.get_worst_stalls()[0].stack)
+
+        monitor._pending_stack = (3.0, 'new stack')
+        monitor.record_lag(0.3, expected_at=3.0)
+        self.assertEqual(monitor.get_worst_stalls()[1].stack, 'new stack')
+        self.assertIsNone(monitor._pending_stack)
@@ -0,0 +1,77 @@
+from server.exceptions import MusicError
+from server.music_manager import MusicManager
+
+from .structures import _Unittest
+
+
+class TestMusicIndex_01_Lookups(_Unittest):
+    def setUp(self):
+        super().setUp()
+        self.manager = MusicManager(self.server)
+
+    @staticmethod
+    def linear_music_data(music_list, music):
+        """
+        Return the music data for a name by walking every category and track in order.
+        """
+
+        for item in music_list:
+            if item['category'] == music:
+                return item['category'], -1, ''
+            for song in item['songs']:
+                if song['name'] == music:
+                    return (song['name'], song['length'] if 'length' in song else -1,
+                            song['source'] if 'source' in song else '')
+        raise MusicError.MusicNotFoundError
+
+    def test_01_matcheslinear(self):
+        """
+        Situation: A music list with repeated names is loaded. Every lookup matches what walking
+        the music list in order would return, and prepared lists are rebuilt on reload.
+        """
+
+        self.manager.load_raw([
+            {'category': 'Alpha', 'songs': [
+                {'name': 'a.opus', 'length': 10},
+                {'name': 'b.opus', 'source': 'Someone'},
+                {'name': 'a.opus', 'length': 20},
+            ]},
+            {'category': 'Beta', 'songs': [
+                {'name': 'Alpha', 'length': 30},
+                {'name': 'c.opus'},
+            ]},
+        ])
+
+        music_list = self.manager.get_music()
+        for name in ['Alpha', 'Beta', 'a.opus', 'b.opus', 'c.opus']:
+            self.assertEqual(self.manager.get_music_data(name),
+                             self.linear_music_data(music_list, name))
+            self.assertTrue(self.manager.is_music(name))
+        self.assertRaises(MusicError.MusicNotFoundError, self.manager.get_music_data, 'd.opus')
+        self.assertFalse(self.manager.is_music('d.opus'))
+
+        self.assertEqual(self.manager.get_music_list(),
+                         ['category', 'Alpha', 'a.opus', 'b.opus', 'a.opus',
+                          'category', 'Beta', 'Alpha', 'c.opus'])
+        self.assertEqual(self.manager.get_legacy_music_list(),
+                         ['Alpha', 'a.opus', 'b.opus', 'a.opus', 'Beta', 'Alpha', 'c.opus'])
+        self.assertEqual(self.manager.get_track_names(),
+                         ['a.opus', 'b.opus', 'a.opus', 'Alpha', 'c.opus'])
+
+        self.manager.load_raw([{'category': 'Gamma', 'songs': [{'name': 'd.opus'}]}])
+        self.assertFalse(self.manager.is_music('a.opus'))
+        self.assertEqual(self.manager.get_music_data('d.opus'), ('d.opus', -1, ''))
+        self.assertEqual(self.manager.get_legacy_music_list(), ['Gamma', 'd.opus'])
+
+    def test_02_transfer(self):
+        """
+        Situation: A music manager takes the contents of the server's default hub music manager.
+        Its lookups and prepared lists match the original manager's.
+        """
+
+        other = self.server.hub_manager.get_default_managee().music_manager
+        self.manager.transfer_contents_from_manager(other)
+        self.assertEqual(self.manager.get_music_list(), other.get_music_list())
+        self.assertEqual(self.manager.get_track_names(), other.get_track_names())
+        for name in other.get_legacy_music_list():
+            self.assertEqual(self.manager.get_music_data(name), other.get_music_data(name))
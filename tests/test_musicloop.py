@@ -0,0 +1,137 @@
+import asyncio
+
+from server import clients
+from server.music_loop_manager import MusicLoopManager
+
+from .structures import _TestSituation4
+
+
+class _TestMusicLoop(_TestSituation4):
+    def setUp(self):
+        super().setUp()
+        self.manager = MusicLoopManager(self.server, align_window=0.5)
+        self.now = asyncio.get_event_loop().time()
+        self.start = self.now
+        self.manager.get_time = lambda: self.now
+        self.pargs = {'name': 'Track.mp3', 'char_id': -1, 'showname': '',
+                      'force_same_restart': 0, 'fade_option': 0, 'loop': -1, 'channel': 0,
+                      'effects': 0}
+
+        self.published = {c: 0 for c in [self.c0, self.c1, self.c2, self.c3]}
+        self.packet_handlers = {c: c.packet_handler for c in self.published}
+
+        def record(c, publish):
+            def _publish(event, *args, **kwargs):
+                if event == 'client_outbound_mc':
+                    self.published[c] += 1
+                return publish(event, *args, **kwargs)
+            return _publish
+
+        for c in self.published:
+            c.publisher.publish = record(c, c.publisher.publish)
+
+    def tearDown(self):
+        for area in self.server.hub_manager.get_default_managee().area_manager.get_areas():
+            if area.music_looper in self.manager.get_loops():
+                self.manager.stop_loop(area)
+        for c in self.published:
+            del c.publisher.publish
+            c.packet_handler = self.packet_handlers[c]
+            c.discard_all()
+        self.area0.legacy_jukebox = False
+        super().tearDown()
+
+    def loop_point(self, music_loop):
+        # Run the loop point as if its timer just fired
+        music_loop.handle.cancel()
+        self.now = music_loop.next_loop_at
+        self.manager._on_loop_point(music_loop)
+
+
+class TestMusicLoop_01_Sharing(_TestMusicLoop):
+    def test_01_align(self):
+        """
+        Situation: Areas 0 and 1 start the same track 0.3 seconds apart, so they share a loop.
+        Area 2 starts it a second later, and area 3 starts another track, so each gets its own
+        loop.
+        """
+
+        self.manager.start_loop(self.area0, 10, self.pargs)
+        self.now += 0.3
+        self.manager.start_loop(self.area1, 10, self.pargs)
+        self.assertIs(self.area0.music_looper, self.area1.music_looper)
+        self.assertEqual(self.area0.music_looper.areas, {self.area0, self.area1})
+
+        self.now += 1
+        self.manager.start_loop(self.area2, 10, self.pargs)
+        self.manager.start_loop(self.area3, 10, dict(self.pargs, name='Other.mp3'))
+        self.assertIsNot(self.area2.music_looper, self.area0.music_looper)
+        self.assertIsNot(self.area3.music_looper, self.area2.music_looper)
+        self.assertEqual(len(self.manager.get_loops()), 3)
+
+    def test_02_legacy(self):
+        """
+        Situation: C1 uses a client that cannot loop music by itself. At the loop point, only C1
+        is sent the track again. Once the area has the legacy jukebox on, everyone is. Each client
+        sent the track publishes it once.
+        """
+
+        self.c1.packet_handler = clients.ClientDRO1d2d3()
+        self.manager.start_loop(self.area0, 10, self.pargs)
+        music_loop = self.area0.music_looper
+        self.loop_point(music_loop)
+
+        self.c1.assert_packet('MC', None, over=True)
+        for c in [self.c0, self.c2, self.c3]:
+            c.assert_no_packets()
+        self.assertEqual(self.published, {self.c0: 0, self.c1: 1, self.c2: 0, self.c3: 0})
+
+        self.area0.legacy_jukebox = True
+        self.loop_point(music_loop)
+        for c in [self.c0, self.c1, self.c2, self.c3]:
+            c.assert_packet('MC', None, over=True)
+        self.assertEqual(self.published, {self.c0: 1, self.c1: 2, self.c2: 1, self.c3: 1})
+
+
+class TestMusicLoop_02_Suspension(_TestMusicLoop):
+    def test_01_resume_in_phase(self):
+        """
+        Situation: Area 5, which has no players, plays a track with 10 second loops. At its first
+        loop point it is dropped from its loop. When it is resumed 35 seconds after it started,
+        its next loop point is 40 seconds after it started.
+        """
+
+        self.manager.start_loop(self.area5, 10, self.pargs)
+        music_loop = self.area5.music_looper
+        self.loop_point(music_loop)
+
+        self.assertIsNone(self.area5.music_looper)
+        self.assertIsNone(music_loop.handle)
+        self.assertEqual(self.manager.get_loops(), [])
+
+        self.now = self.start + 35
+        self.manager.resume_loop(self.area5)
+        self.assertEqual(self.area5.music_looper.next_loop_at, self.start + 40)
+
+    def test_02_cancel(self):
+        """
+        Situation: Areas 0 and 1 share a loop. Its timer is cancelled once both areas stop
+        looping. Area 0 then plays a track and changes to another one, which cancels the timer of
+        the first track.
+        """
+
+        self.manager.start_loop(self.area0, 10, self.pargs)
+        self.manager.start_loop(self.area1, 10, self.pargs)
+        handle = self.area0.music_looper.handle
+
+        self.manager.stop_loop(self.area0)
+        self.assertFalse(handle.cancelled())
+        self.manager.stop_loop(self.area1)
+        self.assertTrue(handle.cancelled())
+        self.assertEqual(self.manager.get_loops(), [])
+
+        self.manager.start_loop(self.area0, 10, self.pargs)
+        handle = self.area0.music_looper.handle
+        self.manager.start_loop(self.area0, 20, dict(self.pargs, name='Other.mp3'))
+        self.assertTrue(handle.cancelled())
+        self.assertEqual(len(self.manager.get_loops()), 1)
@@ -0,0 +1,104 @@
+from server.exceptions import AreaError
+
+from .structures import _TestSituation4Mc12
+
+
+class _TestPassages(_TestSituation4Mc12):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.manager = cls.server.hub_manager.get_default_managee().area_manager
+
+    def tearDown(self):
+        # Restore the passages of the loaded area list
+        for area in self.manager.get_areas():
+            passages = area._loaded_passages
+            area.reachable_areas = passages['reachable_areas']
+            area.visible_areas = passages['visible_areas']
+            area.scream_range = passages['scream_range']
+        super().tearDown()
+
+    def discard_all(self):
+        for c in [self.c0, self.c1, self.c2, self.c3]:
+            c.discard_all()
+
+
+class TestPassages_01_Graph(_TestPassages):
+    def test_01_matchesnames(self):
+        """
+        Situation: For every pair of areas, the ID-based passage queries agree with the area
+        name sets the areas were loaded with.
+        """
+
+        for area in self.manager.get_areas():
+            passages = area._loaded_passages
+            self.assertEqual(area.reachable_areas, passages['reachable_areas'])
+            self.assertEqual(area.visible_areas, passages['visible_areas'])
+            self.assertEqual(area.scream_range, passages['scream_range'])
+
+            for other in self.manager.get_areas():
+                self.assertEqual(self.manager.is_reachable(area, other),
+                                 other.name in passages['reachable_areas'])
+                self.assertEqual(self.manager.is_visible(area, other),
+                                 other.name in passages['visible_areas'])
+                self.assertEqual(self.manager.is_in_scream_range(area, other),
+                                 other.name in passages['scream_range'])
+
+            self.assertEqual([a.name for a in self.manager.get_reachable_areas(area)],
+                             [a.name for a in self.manager.get_areas()
+                              if a.name in passages['reachable_areas']])
+
+    def test_02_setters(self):
+        """
+        Situation: The scream range of area 0 is set by name, then extended with an augmented
+        assignment. The returned set is read-only, so changing it in place fails.
+        """
+
+        self.area0.scream_range = [self.area1.name]
+        self.assertEqual(self.area0.scream_range, {self.area1.name})
+        self.area0.scream_range |= {self.area3.name}
+        self.assertEqual(self.manager.get_scream_range(self.area0), [self.area1, self.area3])
+
+        with self.assertRaises(AttributeError):
+            self.area0.scream_range.add(self.area4.name)
+        self.assertFalse(self.manager.is_in_scream_range(self.area0, self.area4))
+        self.assertRaises(AreaError, setattr, self.area0, 'scream_range', ['Not An Area'])
+
+    def test_03_passagelock(self):
+        """
+        Situation: C1 toggles the passage from area 0 to area 1 twice, once changing visibility.
+        """
+
+        reachable = self.manager.is_reachable(self.area0, self.area1)
+        now_reachable = self.manager.change_passage_lock(self.c1, [self.area0, self.area1],
+                                                         change_passage_visibility=True)
+        self.assertEqual(now_reachable, [not reachable])
+        self.assertEqual(self.manager.is_reachable(self.area0, self.area1), not reachable)
+        self.assertEqual(self.manager.is_visible(self.area0, self.area1), not reachable)
+        self.assertEqual(self.area1.name in self.area0.reachable_areas, not reachable)
+
+        self.manager.change_passage_lock(self.c1, [self.area0, self.area1], bilock=True)
+        self.assertEqual(self.manager.is_reachable(self.area0, self.area1), reachable)
+        self.discard_all()
+
+    def test_04_path(self):
+        """
+        Situation: Shortest passage paths are found between areas, and none are found once all
+        passages out of an area are removed.
+        """
+
+        self.assertEqual(self.manager.get_passage_path(self.area0, self.area0), [self.area0])
+
+        for area in self.manager.get_areas():
+            area.reachable_areas = {area.name}
+        self.area0.reachable_areas = {self.area1.name}
+        self.area1.reachable_areas = {self.area0.name, self.area2.name}
+        self.area2.reachable_areas = {self.area5.name}
+        self.area0.reachable_areas |= {self.area4.name}
+        self.area4.reachable_areas = {self.area5.name}
+
+        self.assertEqual(self.manager.get_passage_path(self.area0, self.area5),
+                         [self.area0, self.area4, self.area5])
+        self.assertEqual(self.manager.get_passage_path(self.area1, self.area5),
+                         [self.area1, self.area2, self.area5])
+        self.assertRaises(AreaError, self.manager.get_passage_path, self.area5, self.area0)
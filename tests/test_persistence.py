@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from server.persistence_manager import PersistenceManager
+
+from .structures import _Unittest
+
+
+class TestPersistence_01_Manager(_Unittest):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.get_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'store.json')
+        self.contents = {'a': 1}
+        self.manager = PersistenceManager(self.server, delay=60)
+        self.manager.register(self.path, lambda: self.contents.copy())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.manager.shutdown())
+        self.directory.cleanup()
+        super().tearDown()
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def test_01_coalesce(self):
+        """
+        Situation: A store is changed three times within the write delay. It is written once,
+        with its contents as of when it is flushed.
+        """
+
+        for i in range(3):
+            self.contents[str(i)] = i
+            self.manager.mark_dirty(self.path)
+        self.assertTrue(self.manager.is_dirty(self.path))
+        self.assertFalse(os.path.exists(self.path))
+
+        self.loop.run_until_complete(self.manager.flush())
+        self.assertFalse(self.manager.is_dirty(self.path))
+        self.assertEqual(self.read(), {'a': 1, '0': 0, '1': 1, '2': 2})
+        self.assertEqual(self.manager.writes, 1)
+        self.assertEqual(os.listdir(self.directory.name), ['store.json'])
+
+    def test_02_delay(self):
+        """
+        Situation: With a short write delay, a changed store is written once the delay is over.
+        """
+
+        self.manager.delay = 0.01
+        self.manager.mark_dirty(self.path)
+        self.loop.run_until_complete(asyncio.sleep(0.1))
+        self.assertEqual(self.read(), {'a': 1})
+
+    def test_03_shutdown(self):
+        """
+        Situation: Pending changes are written on shutdown, and later changes are written right
+        away. Unregistered stores cannot be marked as dirty.
+        """
+
+        self.manager.mark_dirty(self.path)
+        self.loop.run_until_complete(self.manager.shutdown())
+        self.assertEqual(self.read(), {'a': 1})
+
+        self.contents['b'] = 2
+        self.manager.mark_dirty(self.path)
+        self.assertEqual(self.read(), {'a': 1, 'b': 2})
+        self.assertRaises(KeyError, self.manager.mark_dirty, 'not_a_store.json')
+
+    def test_04_failure(self):
+        """
+        Situation: A store whose directory does not exist fails to be written, so it stays dirty.
+        Once the directory is created, the store is written on shutdown.
+        """
+
+        path = os.path.join(self.directory.name, 'later', 'store.json')
+        self.manager.register(path, lambda: [1, 2])
+        self.manager.mark_dirty(path)
+
+        future = self.manager.flush()
+        self.assertRaises(FileNotFoundError, self.loop.run_until_complete, future)
+        self.assertTrue(self.manager.is_dirty(path))
+
+        os.mkdir(os.path.dirname(path))
+        self.loop.run_until_complete(self.manager.shutdown())
+        with open(path, 'r', encoding='utf-8') as file:
+            self.assertEqual(json.load(file), [1, 2])
+
+    def test_05_failed_shutdown(self):
+        """
+        Situation: A store whose directory does not exist is dirty on shutdown. The failed write
+        does not stop the shutdown, and later changes are still written right away.
+        """
+
+        path = os.path.join(self.directory.name, 'missing', 'store.json')
+        self.manager.register(path, lambda: [1, 2])
+        self.manager.mark_dirty(path)
+        self.manager.mark_dirty(self.path)
+
+        self.loop.run_until_complete(self.manager.shutdown())
+        self.assertTrue(self.manager._closed)
+        self.assertFalse(self.manager.is_dirty(path))
+        self.assertIsNone(self.manager._flush_handle)
+        self.assertEqual(self.read(), {'a': 1})
+
+        self.contents['b'] = 2
+        self.manager.mark_dirty(self.path)
+        self.assertEqual(self.read(), {'a': 1, 'b': 2})
+
+
+class TestPersistence_02_Server(_Unittest):
+    def tearDown(self):
+        self.server.ipid_list.pop('192.0.2.1', None)
+        if self.server.ban_manager.is_banned(1234567890):
+            self.server.ban_manager.remove_ban(1234567890)
+        super().tearDown()
+
+    def test_01_stores(self):
+        """
+        Situation: A new IP and a new ban mark the IPID and ban stores as dirty instead of
+        rewriting them right away.
+        """
+
+        manager = self.server.persistence_manager
+        self.server.get_ipid('192.0.2.1')
+        self.assertTrue(manager.is_dirty('storage/ip_ids.json'))
+        self.assertIn('192.0.2.1', manager._stores['storage/ip_ids.json']())
+
+        self.server.ban_manager.add_ban('1234567890')
+        self.assertTrue(manager.is_dirty('storage/banlist.json'))
+        self.assertIn(1234567890, [value for (_, value, *_)
+                                    in manager._stores['storage/banlist.json']()['bans']])
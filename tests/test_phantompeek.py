@@ -0,0 +1,102 @@
+import random
+
+from .structures import _TestSituation4Mc12
+
+
+class _TestPhantomPeek(_TestSituation4Mc12):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.manager = cls.server.client_manager
+
+    def setUp(self):
+        super().setUp()
+        self.random_state = random.getstate()
+        random.seed(20230425)
+
+    def tearDown(self):
+        random.setstate(self.random_state)
+        super().tearDown()
+
+    def run_cycles(self, cycles):
+        """
+        Run the phantom peek schedule for the given number of cycles without starting any
+        phantom peek tasks, and return for each client the cycles in which they were due.
+        """
+
+        due_cycles = {client: list() for client in self.manager.clients}
+        for _ in range(cycles):
+            self.manager.phantom_peek_cycle += 1
+            for client in self.manager.pop_due_phantom_peeks():
+                due_cycles[client].append(self.manager.phantom_peek_cycle)
+                self.manager.schedule_phantom_peek(client, force=True)
+        return due_cycles
+
+
+class TestPhantomPeek_01_Schedule(_TestPhantomPeek):
+    def test_01_distribution(self):
+        """
+        Situation: C0 has player paranoia 25 and everyone else 0. Over many cycles, C0 is due
+        about a quarter of the cycles, with gaps between due cycles following a geometric
+        distribution, as if C0 had been rolled independently every cycle. No one else is ever due.
+        """
+
+        self.c0.paranoia = 25
+        for c in [self.c1, self.c2, self.c3]:
+            c.paranoia = 0
+
+        cycles = 40000
+        due_cycles = self.run_cycles(cycles)
+        for c in [self.c1, self.c2, self.c3]:
+            self.assertEqual(due_cycles[c], [])
+
+        c0_cycles = due_cycles[self.c0]
+        # Expected 10000 successes, standard deviation about 87
+        self.assertAlmostEqual(len(c0_cycles)/cycles, 0.25, delta=0.01)
+
+        gaps = [b-a for (a, b) in zip(c0_cycles, c0_cycles[1:])]
+        for gap in range(1, 5):
+            expected = 0.75**(gap-1) * 0.25
+            actual = gaps.count(gap)/len(gaps)
+            self.assertAlmostEqual(actual, expected, delta=0.02, msg=gap)
+        self.assertAlmostEqual(sum(gaps)/len(gaps), 4, delta=0.15)
+
+    def test_02_paranoiachanges(self):
+        """
+        Situation: C0's player paranoia is set to 0 and then to 100. While at 0, C0 is never due.
+        At 100, C0 is due every cycle.
+        """
+
+        self.c0.paranoia = 0
+        self.assertIsNone(self.c0._phantom_peek_cycle)
+        self.assertEqual(self.run_cycles(50)[self.c0], [])
+
+        self.c0.paranoia = 100
+        start = self.manager.phantom_peek_cycle
+        self.assertEqual(self.run_cycles(50)[self.c0], list(range(start+1, start+51)))
+
+    def test_03_zoneparanoia(self):
+        """
+        Situation: C0 has player paranoia 0, and C1 makes a zone in C0's area with zone paranoia
+        100. C0 is now due every cycle. After the zone is ended, C0 is never due again.
+        """
+
+        self.c0.paranoia = 0
+        self.c1.ooc('/zone {}'.format(self.c0.area.id))
+        self.c1.ooc('/zone_paranoia 100')
+        self.c0.discard_all()
+        self.c1.discard_all()
+        self.c2.discard_all()
+        self.c3.discard_all()
+
+        self.assertEqual(self.c0.get_phantom_peek_threshold(), 1)
+        self.assertEqual(len(self.run_cycles(20)[self.c0]), 20)
+
+        self.c1.ooc('/zone_end')
+        self.c0.discard_all()
+        self.c1.discard_all()
+        self.c2.discard_all()
+        self.c3.discard_all()
+
+        self.assertEqual(self.c0.get_phantom_peek_threshold(), 0)
+        self.assertEqual(self.run_cycles(20)[self.c0], [])
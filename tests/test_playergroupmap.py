@@ -0,0 +1,49 @@
+from server.exceptions import PlayerGroupError
+from server.playergroup_manager import PlayerGroupManager
+
+from .structures import _TestSituation4
+
+
+class TestPlayerGroupMap_01_Memberships(_TestSituation4):
+    def setUp(self):
+        super().setUp()
+        self.manager = PlayerGroupManager(self.server)
+
+    def test_01_addremove(self):
+        """
+        Situation: Player groups are created, gain and lose players and are deleted. The mapping of
+        users to player groups always matches the players of each group.
+        """
+
+        group1 = self.manager.new_managee(creator=self.c0, player_concurrent_limit=2)
+        group2 = self.manager.new_managee(creator=self.c1, player_concurrent_limit=2,
+                                          require_players=False)
+        group2.add_player(self.c0)
+        self.assertEqual(self.manager.get_managees_of_user(self.c0), {group1, group2})
+        self.assertEqual(self.manager.get_managees_of_user(self.c2), set())
+        self.assertEqual(self.manager.get_users_in_some_managee(), {self.c0, self.c1})
+
+        mapping = self.manager.get_player_to_managees_map()
+        with self.assertRaises(TypeError):
+            mapping[self.c2] = frozenset()
+        group2.remove_player(self.c1)
+        self.assertNotIn(self.c1, mapping)
+
+        group1.remove_player(self.c0)  # Deletes group1 as it has no players left
+        self.assertFalse(self.manager.manages_managee(group1))
+        self.assertEqual(self.manager.get_managees_of_user(self.c0), {group2})
+
+        self.manager.delete_managee(group2)
+        self.assertEqual(dict(mapping), dict())
+
+    def test_02_failedadd(self):
+        """
+        Situation: A user who already hit their concurrent limit fails to join another player
+        group. The mapping is unchanged.
+        """
+
+        group1 = self.manager.new_managee(creator=self.c0)
+        self.assertRaises(PlayerGroupError.UserHitGroupConcurrentLimitError,
+                          self.manager.new_managee, creator=self.c0)
+        self.assertEqual(self.manager.get_managees_of_user(self.c0), {group1})
+        self.assertEqual(self.manager.get_managees(), {group1})
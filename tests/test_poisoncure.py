@@ -1,3 +1,5 @@
+import asyncio
+
 from .structures import _TestSituation5Mc1Gc2
 
 """
@@ -5,6 +7,7 @@ This class is unable to test the timing for poison (it could, but it would make
 a lot longer). It will just test that the poison is applied and the output messages, not that
 poison effect is applied.
 It is able however to test that cure is applied, as the test does not have a time aspect.
+The expiry tests use one-second poisons to check effects kicking in.
 """
 
 class _TestPoisonCure(_TestSituation5Mc1Gc2):
@@ -373,3 +376,84 @@ class TestPoisonCure_02_Cure(_TestPoisonCure):
         self.assertFalse(self.c1.is_blind)
         self.assertFalse(self.c1.is_deaf)
         self.assertTrue(self.c1.is_gagged)
+
+class TestPoisonCure_03_Expiry(_TestPoisonCure):
+    def test_01_batchedexpiry(self):
+        """
+        Situation: C1 poisons C0 and C3 with blindness that acts in 1 second, and C0 with gagged
+        that acts in 1 second too. After that second, C0 and C3 are notified of their effects
+        kicking in, and C1 and C2 get a single notification for all of them.
+        """
+
+        self.c1.ooc('/poison 0 bg 1')
+        self.c1.ooc('/poison 3 b 1')
+        for c in [self.c0, self.c1, self.c2, self.c3, self.c4]:
+            c.discard_all()
+
+        asyncio.get_event_loop().run_until_complete(asyncio.sleep(1.5))
+
+        self.c0.assert_ooc('The effect `Blindness` kicked in.')
+        self.c0.assert_ooc('The effect `Gagged` kicked in.', somewhere=True, ooc_over=True)
+        self.c3.assert_ooc('The effect `Blindness` kicked in.', ooc_over=True)
+        message = ('(X) The following players are now subject to the following effects:'
+                   '\r\n*{} [{}]: `Blindness` and `Gagged`'
+                   '\r\n*{} [{}]: `Blindness`'
+                   .format(self.c0_dname, 0, self.c3_dname, 3))
+        self.c1.assert_ooc(message, over=True)
+        self.c2.assert_ooc(message, over=True)
+        self.c4.assert_no_packets()
+        self.c0.discard_all()
+        self.c3.discard_all()
+
+        self.assertTrue(self.c0.is_blind)
+        self.assertTrue(self.c0.is_gagged)
+        self.assertTrue(self.c3.is_blind)
+
+    def test_02_curecancels(self):
+        """
+        Situation: C1 poisons C0 with deafness that acts in 1 second, and then cures them before it
+        acts. Nothing happens after that second.
+        """
+
+        self.c1.ooc('/poison 0 d 1')
+        self.c1.ooc('/cure 0 d')
+        for c in [self.c0, self.c1, self.c2, self.c3, self.c4]:
+            c.discard_all()
+
+        asyncio.get_event_loop().run_until_complete(asyncio.sleep(1.5))
+
+        self.c0.assert_no_packets()
+        self.c1.assert_no_packets()
+        self.c2.assert_no_packets()
+        self.assertFalse(self.c0.is_deaf)
+
+    def test_03_affectedstaff(self):
+        """
+        Situation: C1 poisons C0 and C2 (a GM) with blindness that acts in 1 second. After that
+        second, C2 is only notified of its own effect kicking in, while C1 gets a single
+        notification for both.
+        """
+
+        self.c1.ooc('/poison 0 b 1')
+        self.c1.ooc('/poison 2 b 1')
+        for c in [self.c0, self.c1, self.c2, self.c3, self.c4]:
+            c.discard_all()
+
+        asyncio.get_event_loop().run_until_complete(asyncio.sleep(1.5))
+
+        self.c0.assert_ooc('The effect `Blindness` kicked in.', ooc_over=True)
+        self.c2.assert_ooc('The effect `Blindness` kicked in.', ooc_over=True)
+        message = ('(X) The following players are now subject to the following effects:'
+                   '\r\n*{} [{}]: `Blindness`'
+                   '\r\n*{} [{}]: `Blindness`'
+                   .format(self.c0_dname, 0, self.c2_dname, 2))
+        self.c1.assert_ooc(message, over=True)
+        self.c3.assert_no_packets()
+        self.c4.assert_no_packets()
+
+        self.c1.ooc('/cure 0 b')
+        self.c1.ooc('/cure 2 b')
+        for c in [self.c0, self.c1, self.c2, self.c3, self.c4]:
+            c.discard_all()
+        self.assertFalse(self.c0.is_blind)
+        self.assertFalse(self.c2.is_blind)
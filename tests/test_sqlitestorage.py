@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import tempfile
+
+from server.sqlite_storage import SQLiteStorage
+
+from .structures import _TestSituation4Mc12, _Unittest
+
+
+class _TestSQLiteStorage(_Unittest):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.get_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.db')
+        self.storages = list()
+
+    def tearDown(self):
+        for storage in self.storages:
+            self.close(storage)
+        self.directory.cleanup()
+        super().tearDown()
+
+    def open(self):
+        storage = SQLiteStorage(self.server, self.path)
+        self.storages.append(storage)
+        return storage
+
+    def close(self, storage):
+        if storage in self.storages:
+            self.storages.remove(storage)
+            self.loop.run_until_complete(storage.shutdown())
+
+    def write_json(self, name, contents):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(contents, file)
+        return path
+
+
+class TestSQLiteStorage_01_Migration(_TestSQLiteStorage):
+    def test_01_migrate(self):
+        """
+        Situation: The JSON storage files are imported into a new database once. Entries that are
+        not IPIDs are skipped.
+        """
+
+        files = [self.write_json('ip_ids.json', {'192.0.2.1': 11, '192.0.2.2': 22}),
+                 self.write_json('hd_ids.json', {'hdid1': [11, 22], 'hdid2': ['22', 'oops']}),
+                 self.write_json('banlist.json', [22, '192.0.2.3'])]
+
+        storage = self.open()
+        self.assertTrue(storage.migrate_json(*files))
+        self.assertFalse(storage.migrate_json(*files))
+
+        self.assertEqual(storage.get_ipid('192.0.2.2'), 22)
+        self.assertEqual(storage.get_hdid_ipids('hdid1'), [11, 22])
+        self.assertEqual(storage.get_hdid_ipids('hdid2'), [22])
+        self.assertEqual(storage.get_hdid_ipids('hdid3'), [])
+        self.assertEqual(storage.get_ipid_hdids(22), {'hdid1', 'hdid2'})
+        self.assertEqual([ban[:2] for ban in storage.load_bans()], [('ipid', 22)])
+
+    def test_02_missing(self):
+        """
+        Situation: Missing JSON storage files are skipped, and still count as imported.
+        """
+
+        storage = self.open()
+        missing = os.path.join(self.directory.name, 'missing.json')
+        self.assertTrue(storage.migrate_json(missing, missing, missing))
+        self.assertFalse(storage.migrate_json(missing, missing, missing))
+        self.assertEqual(storage.load_bans(), [])
+
+
+class TestSQLiteStorage_02_Writes(_TestSQLiteStorage):
+    def test_01_ids(self):
+        """
+        Situation: A new IP is assigned an IPID and linked to an HDID. Both are readable right
+        away, and still there once the database is reopened.
+        """
+
+        storage = self.open()
+        ipid = storage.get_ipid('192.0.2.1')
+        self.assertEqual(storage.get_ipid('192.0.2.1'), ipid)
+        self.assertNotEqual(storage.get_ipid('192.0.2.2'), ipid)
+        storage.add_hdid_ipid('hdid1', ipid)
+        storage.add_hdid_ipid('hdid1', ipid)
+        self.assertEqual(storage.get_hdid_ipids('hdid1'), [ipid])
+        self.assertEqual(storage.get_ipid_hdids(ipid), {'hdid1'})
+        self.close(storage)
+
+        storage = self.open()
+        self.assertEqual(storage.get_ipid('192.0.2.1'), ipid)
+        self.assertEqual(storage.get_hdid_ipids('hdid1'), [ipid])
+        self.assertEqual(storage.get_ipid_hdids(ipid), {'hdid1'})
+
+    def test_02_bans(self):
+        """
+        Situation: Two IPIDs, an HDID and an IP range are banned, and one IPID is unbanned. The
+        bans and the audit trail are there once the database is reopened.
+        """
+
+        storage = self.open()
+        storage.add_ban('ipid', 11, 100, actor_ipid=1, reason='Spam')
+        storage.add_ban('ipid', 22, 101, actor_ipid=1)
+        storage.add_ban('hdid', 'hdid1', 102, expires=200)
+        storage.add_ban('cidr', '192.0.2.0/24', 103)
+        storage.remove_ban('ipid', 11, actor_ipid=2)
+        self.assertRaises(ValueError, storage.add_ban, 'ip', '192.0.2.1', 104)
+        self.close(storage)
+
+        storage = self.open()
+        self.assertEqual(storage.load_bans(),
+                         [('ipid', 22, 101, None, None), ('hdid', 'hdid1', 102, 200, None),
+                          ('cidr', '192.0.2.0/24', 103, None, None)])
+        audit = storage.get_audit()
+        self.assertEqual([(entry['action'], entry['actor_ipid'], entry['target'])
+                          for entry in audit[:3]],
+                         [('unban', 2, '11'), ('ban', None, '192.0.2.0/24'),
+                          ('ban', None, 'hdid1')])
+        self.assertEqual(audit[-1]['details'], 'Spam')
+        self.assertEqual(len(storage.get_audit(target='11')), 2)
+        self.assertEqual(len(storage.get_audit(limit=1)), 1)
+
+
+class TestSQLiteStorage_03_Server(_TestSituation4Mc12):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.get_event_loop()
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = SQLiteStorage(self.server, os.path.join(self.directory.name, 'test.db'))
+        self.server.sqlite_storage = self.storage
+
+    def tearDown(self):
+        self.server.sqlite_storage = None
+        for ban in self.server.ban_manager.get_bans():
+            self.server.ban_manager._delete(ban)
+        self.loop.run_until_complete(self.storage.shutdown())
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_01_ban(self):
+        """
+        Situation: With the SQLite backend, the server gets IPIDs and HDIDs from the database,
+        and C1 bans an IPID, which is recorded in the audit trail along with the IPID of C1.
+        """
+
+        ipid = self.server.get_ipid('192.0.2.1')
+        self.server.add_hdid_ipid('hdid1', ipid)
+        self.assertEqual(self.server.get_hdid_ipids('hdid1'), [ipid])
+        self.assertNotIn('192.0.2.1', self.server.ipid_list)
+
+        self.server.ban_manager.add_ban(ipid, client=self.c1)
+        self.assertTrue(self.server.ban_manager.is_banned(ipid))
+        self.storage._executor.submit(lambda: None).result()
+        self.assertEqual([ban[:2] for ban in self.storage.load_bans()], [('ipid', ipid)])
+        self.assertEqual(self.storage.get_audit()[0]['actor_ipid'], self.c1.ipid)
@@ -0,0 +1,116 @@
+from server.playergroup_manager import PlayerGroupManager
+from server.structure_checker import StructureChecker
+
+from .structures import _TestSituation4
+
+
+class TestStructureChecker_01_Modes(_TestSituation4):
+    def setUp(self):
+        super().setUp()
+        self.original_checker = self.server.structure_checker
+        self.manager = PlayerGroupManager(self.server)
+
+    def tearDown(self):
+        self.server.structure_checker = self.original_checker
+        super().tearDown()
+
+    def corrupt(self):
+        """
+        Break an invariant of the player group manager by recording a player group that does not
+        exist.
+        """
+
+        self.manager._user_to_managees[self.c0] = frozenset({None})
+
+    def test_01_full(self):
+        """
+        Situation: In full mode, every structural check runs, so a broken invariant is caught on
+        the next check. Checks of the managed player groups run and are timed as part of the
+        manager's check.
+        """
+
+        self.assertEqual(self.server.structure_checker.mode, 'full')
+        self.server.structure_checker = StructureChecker(self.server, mode='full')
+        checker = self.server.structure_checker
+
+        self.manager.new_managee(creator=self.c0)
+        self.assertEqual(checker.requested, 1)
+        self.assertEqual(checker.performed, 1)
+        self.assertEqual(set(checker.get_time_by_type()), {'PlayerGroupManager'})
+
+        self.corrupt()
+        self.assertRaises(AssertionError, self.manager._check_structure)
+
+    def test_02_off(self):
+        """
+        Situation: In off mode, no structural check runs, so a broken invariant goes unnoticed.
+        """
+
+        self.server.structure_checker = StructureChecker(self.server, mode='off')
+        checker = self.server.structure_checker
+
+        self.manager.new_managee(creator=self.c0)
+        self.corrupt()
+        self.manager._check_structure()
+        self.assertEqual(checker.performed, 0)
+        self.assertEqual(checker.requested, 2)
+        self.assertEqual(checker.total_time, 0)
+
+    def test_03_sampled(self):
+        """
+        Situation: In sampled mode with every = 3, only every third structural check runs.
+        """
+
+        self.server.structure_checker = StructureChecker(self.server, mode='sampled', every=3,
+                                                         interval=3600)
+        checker = self.server.structure_checker
+
+        self.corrupt()
+        self.manager._check_structure()
+        self.manager._check_structure()
+        self.assertEqual(checker.performed, 0)
+        self.assertRaises(AssertionError, self.manager._check_structure)
+        self.assertEqual(checker.performed, 1)
+        self.assertTrue(checker.total_time > 0)
+
+        self.manager._check_structure()
+        self.assertEqual(checker.requested, 4)
+        self.assertEqual(checker.performed, 1)
+
+    def test_04_interval(self):
+        """
+        Situation: In sampled mode with interval = 0, every structural check runs.
+        """
+
+        self.server.structure_checker = StructureChecker(self.server, mode='sampled',
+                                                         every=1000, interval=0)
+        checker = self.server.structure_checker
+
+        self.manager._check_structure()
+        self.manager._check_structure()
+        self.assertEqual(checker.performed, 2)
+        self.assertIn('Checks performed: 2 of 2 requested', checker.get_report())
+
+    def test_05_incremental(self):
+        """
+        Situation: In incremental mode, structural checks only assert the invariants of the player
+        groups touched since the last check, so a broken invariant of an untouched player group is
+        only caught once that player group is touched or a full check is run.
+        """
+
+        self.server.structure_checker = StructureChecker(self.server, mode='incremental')
+        checker = self.server.structure_checker
+
+        group1 = self.manager.new_managee(creator=self.c0)
+        group2 = self.manager.new_managee(creator=self.c1)
+        self.assertEqual(self.manager._touched_managees, set())
+        self.assertEqual(self.manager._touched_users, set())
+
+        # Leader that is not a player
+        group2._leaders.add(self.c2)
+        group1.set_name('Group 1')
+        self.assertEqual(checker.performed, 3)
+
+        self.assertRaises(AssertionError, checker.run_full, self.manager)
+        self.assertEqual(checker.mode, 'incremental')
+        self.assertRaises(AssertionError, group2.set_name, 'Group 2')
@@ -0,0 +1,144 @@
+import contextlib
+import gzip
+import io
+import json
+import logging
+import os
+import tempfile
+
+from server import transcript
+from server.log_handlers import QueuedFileHandler
+
+from .structures import _TestSituation4, _Unittest
+
+
+class TestTranscript_01_Server(_TestSituation4):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.log = logging.getLogger('transcript')
+        self.handler = QueuedFileHandler(os.path.join(self.directory.name, 'transcript.jsonl'),
+                                         transcript.TranscriptFormatter())
+        self.log.addHandler(self.handler)
+
+    def tearDown(self):
+        self.log.disabled = True
+        self.log.removeHandler(self.handler)
+        self.handler.close()
+        self.directory.cleanup()
+        for c in [self.c0, self.c1, self.c2, self.c3]:
+            c.discard_all()
+        super().tearDown()
+
+    def read_events(self):
+        self.handler.close()
+        return list(transcript.search(directory=self.directory.name))
+
+    def test_01_disabled(self):
+        """
+        Situation: The transcript is disabled by default, so C1 talking in OOC writes no events.
+        """
+
+        self.c1.ooc('Hello')
+        self.assertEqual(self.read_events(), [])
+
+    def test_02_events(self):
+        """
+        Situation: With the transcript enabled, C1 talks in OOC and moves to area 4. Both events
+        are written with the hub, area, client and IPID of C1.
+        """
+
+        self.log.disabled = False
+        hub = self.c1.hub.get_id()
+        self.c1.ooc('Hello')
+        self.c1.move_area(4)
+
+        events = self.read_events()
+        self.assertEqual([event['event'] for event in events], ['ooc', 'area'])
+        for event in events:
+            self.assertEqual((event['hub'], event['client'], event['ipid']),
+                             (hub, self.c1.id, self.c1.ipid))
+        self.assertEqual(events[0]['area'], 0)
+        self.assertEqual(events[0]['payload']['message'], 'Hello')
+        self.assertEqual(events[1]['area'], 4)
+        self.assertEqual(events[1]['payload']['from_area'], 0)
+
+
+class TestTranscript_02_Search(_Unittest):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def write_segments(self):
+        handler = QueuedFileHandler(os.path.join(self.directory.name, 'transcript.jsonl'),
+                                    transcript.TranscriptFormatter(), max_bytes=1,
+                                    indexer=transcript.index_segment)
+        for (i, (ipid, area)) in enumerate([(1, 0), (2, 0), (1, 3)]):
+            record = logging.LogRecord('transcript', logging.INFO, __file__, 0, 'ic', None, None)
+            record.created = 1000 + i
+            record.transcript = {'event': 'ic', 'hub': 'h0', 'area': area, 'client': ipid,
+                                 'ipid': ipid, 'payload': {'message': f'Message {i}'}}
+            handler.handle(record)
+        handler.close()
+
+    def test_01_index(self):
+        """
+        Situation: Three events are written to a transcript that rotates after every event. Each
+        archived segment is compressed and has an index of its events.
+        """
+
+        self.write_segments()
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ['transcript.1.jsonl.gz', 'transcript.1.jsonl.idx.json',
+                          'transcript.2.jsonl.gz', 'transcript.2.jsonl.idx.json',
+                          'transcript.jsonl'])
+
+        path = os.path.join(self.directory.name, 'transcript.2.jsonl')
+        with open(f'{path}.idx.json', 'r', encoding='utf-8') as file:
+            index = json.load(file)
+        self.assertEqual(index, {'min_time': 1001, 'max_time': 1001, 'events': 1, 'ipids': [2],
+                                 'areas': [['h0', 0]]})
+        with gzip.open(f'{path}.gz', 'rt', encoding='utf-8') as file:
+            self.assertEqual(json.loads(file.read())['payload'], {'message': 'Message 1'})
+
+    def test_02_search(self):
+        """
+        Situation: The transcript is searched by IPID, area, time and text. Segments whose index
+        rules out any matches are not read.
+        """
+
+        self.write_segments()
+        directory = self.directory.name
+
+        def messages(**kwargs):
+            return [event['payload']['message']
+                    for event in transcript.search(directory=directory, **kwargs)]
+
+        self.assertEqual(messages(), ['Message 0', 'Message 1', 'Message 2'])
+        self.assertEqual(messages(ipid=1), ['Message 0', 'Message 2'])
+        self.assertEqual(messages(hub='h0', area=3), ['Message 2'])
+        self.assertEqual(messages(since=1001, until=1001), ['Message 1'])
+        self.assertEqual(messages(text='message 1'), ['Message 1'])
+        self.assertEqual(messages(events=['ooc']), [])
+
+        # A segment ruled out by its index is not read, even if it is unreadable
+        with open(os.path.join(directory, 'transcript.2.jsonl.gz'), 'wb') as file:
+            file.write(b'Not gzip')
+        self.assertEqual(messages(ipid=1), ['Message 0', 'Message 2'])
+
+    def test_03_main(self):
+        """
+        Situation: The transcript is searched from the command line.
+        """
+
+        self.write_segments()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            transcript.main(['--directory', self.directory.name, '--ipid', '2'])
+
+        self.assertEqual(output.getvalue(),
+                         "[1970-01-01T00:16:41 UTC][2][2][h0][0][IC] message='Message 1'\n")